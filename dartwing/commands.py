@@ -0,0 +1,159 @@
+"""
+Bench commands for Dartwing.
+
+    bench --site all dartwing-worker --queue default
+    bench --site all dartwing-async-worker --concurrency 200
+    bench --site all dartwing-process-worker --processes 4
+    bench --site mysite dartwing-preload-handlers
+    bench --site all dartwing-rebuild-job-rollups
+"""
+
+import gc
+
+import click
+import frappe
+from frappe.commands import pass_context
+
+
+def _get_sites(context) -> list:
+    if context.sites:
+        return list(context.sites)
+
+    from frappe.utils import get_sites
+
+    return get_sites()
+
+
+def _preload_sites(sites: list, quiet: bool = False) -> int:
+    """Preload Job Type handlers of each site, returning the number of failures."""
+    from dartwing.dartwing_core.background_jobs.preload import format_report, preload_handlers
+
+    failures = 0
+    for site in sites:
+        frappe.init(site=site)
+        try:
+            frappe.connect()
+            report = preload_handlers()
+        except Exception as e:
+            # A site without the app installed (or not migrated yet) must not
+            # keep the worker from serving the others
+            click.echo(f"{site}: preload skipped ({e})", err=True)
+            continue
+        finally:
+            frappe.destroy()
+
+        failures += sum(1 for row in report if row["error"])
+        if not quiet:
+            click.echo(format_report(site, report))
+    return failures
+
+
+@click.command("dartwing-worker")
+@click.option("--queue", type=str, help="Queue(s) to consume, comma separated")
+@click.option("--num-workers", type=int, help="Start a pool of workers instead of one")
+@click.option("--quiet", is_flag=True, default=False, help="Hide log output")
+@click.option("--burst", is_flag=True, default=False, help="Exit once the queues are empty")
+@pass_context
+def start_preloaded_worker(context, queue=None, num_workers=None, quiet=False, burst=False):
+    """Start an RQ worker with all enabled Job Type handlers already imported.
+
+    Handlers are imported in the worker's parent process, so the per-job work
+    horses (and pool workers) fork with them loaded and share their memory
+    copy-on-write. Before each fork the parent picks up Job Type changes of
+    the job's site.
+    """
+    from rq.worker import Worker
+    from frappe.utils.background_jobs import start_worker, start_worker_pool
+    from dartwing.dartwing_core.background_jobs.preload import install_fork_hook
+
+    sites = _get_sites(context)
+    _preload_sites(sites, quiet=quiet)
+    install_fork_hook(Worker, sites)
+
+    # Keep refcount updates from dirtying the preloaded objects' pages in
+    # every forked child
+    gc.collect()
+    gc.freeze()
+
+    if num_workers:
+        start_worker_pool(queue=queue, num_workers=num_workers, quiet=quiet, burst=burst)
+    else:
+        start_worker(queue=queue, quiet=quiet, burst=burst)
+
+
+@click.command("dartwing-async-worker")
+@click.option(
+    "--concurrency",
+    type=int,
+    default=None,
+    help="Async jobs run at once (default: ASYNC_WORKER_DEFAULT_CONCURRENCY)",
+)
+@click.option("--quiet", is_flag=True, default=False, help="Hide the preload report")
+@pass_context
+def start_async_worker(context, concurrency=None, quiet=False):
+    """Run jobs with async def handlers, many at once on one event loop.
+
+    While this worker runs, RQ workers hand such jobs to it instead of
+    running them one at a time (see background_jobs/async_runner.py).
+    """
+    from dartwing.dartwing_core.background_jobs.async_runner import AsyncJobWorker
+    from dartwing.dartwing_core.background_jobs.config import ASYNC_WORKER_DEFAULT_CONCURRENCY
+
+    sites = _get_sites(context)
+    _preload_sites(sites, quiet=quiet)
+    AsyncJobWorker(sites, concurrency or ASYNC_WORKER_DEFAULT_CONCURRENCY).run()
+
+
+@click.command("dartwing-process-worker")
+@click.option(
+    "--processes",
+    type=int,
+    default=None,
+    help="Process mode jobs run at once (default: PROCESS_WORKER_DEFAULT_CONCURRENCY)",
+)
+@click.option("--quiet", is_flag=True, default=False, help="Hide the preload report")
+@pass_context
+def start_process_worker(context, processes=None, quiet=False):
+    """Run jobs of Process mode Job Types on handler processes kept between jobs.
+
+    While this worker runs, RQ workers hand such jobs to it instead of
+    spawning a handler process per job (see background_jobs/process_pool.py).
+    """
+    from dartwing.dartwing_core.background_jobs.config import PROCESS_WORKER_DEFAULT_CONCURRENCY
+    from dartwing.dartwing_core.background_jobs.process_pool import ProcessJobWorker
+
+    sites = _get_sites(context)
+    _preload_sites(sites, quiet=quiet)
+    ProcessJobWorker(sites, processes or PROCESS_WORKER_DEFAULT_CONCURRENCY).run()
+
+
+@click.command("dartwing-preload-handlers")
+@pass_context
+def preload_job_handlers(context):
+    """Import all enabled Job Type handlers and report the time each one took."""
+    if _preload_sites(_get_sites(context)):
+        raise SystemExit(1)
+
+
+@click.command("dartwing-rebuild-job-rollups")
+@pass_context
+def rebuild_job_rollups(context):
+    """Recompute the job status rollups behind the job metrics from the Background Job table."""
+    from dartwing.dartwing_core.background_jobs.status_rollup import rebuild
+
+    for site in _get_sites(context):
+        frappe.init(site=site)
+        try:
+            frappe.connect()
+            click.echo(f"{site}: {rebuild()} rollup rows written")
+        finally:
+            frappe.destroy()
+
+
+commands = [
+    start_preloaded_worker,
+    start_async_worker,
+    start_process_worker,
+    preload_job_handlers,
+    rebuild_job_rollups,
+]
@@ -19,13 +19,16 @@ def submit_job(job_type: str, organization: str, parameters: dict = None, priori
         organization: Organization name
         parameters: Job-specific input parameters (optional)
         priority: Low/Normal/High/Critical (default: Normal)
-        depends_on: Parent job ID to wait for (optional)
+        depends_on: Parent job ID, or a list (JSON or comma-separated) of parent
+            job IDs, to wait for (optional)
 
     Returns:
-        dict: {job_id, status, message}
+        dict: {job_id, status, message, rate_limit}
+            rate_limit is {limit, remaining, window_seconds, reset_at, retry_after}
+            when the Job Type is rate limited, otherwise None
 
     Raises:
-        ValidationError: Invalid input parameters
+        ValidationError: Invalid input parameters or rate limit exceeded
         PermissionError: User lacks permission
         DuplicateError: Duplicate job submission detected
     """
@@ -43,23 +46,177 @@ def submit_job(job_type: str, organization: str, parameters: dict = None, priori
         "job_id": job.name,
         "status": job.status,
         "message": "Job submitted successfully",
+        "rate_limit": job.flags.rate_limit.as_dict() if job.flags.rate_limit else None,
     }
 
 
 @frappe.whitelist()
-def get_job_status(job_id: str):
+def submit_jobs_batch(job_type: str, organization: str, parameters_list: list, priority: str = None):
+    """
+    Submit many jobs of one Job Type for a single organization.
+
+    Args:
+        job_type: Job Type identifier (e.g., "pdf_generation")
+        organization: Organization name
+        parameters_list: List of job-specific input parameter dicts, one per job
+        priority: Low/Normal/High/Critical (default: Job Type default)
+
+    Returns:
+        dict: {batch_id, job_ids, duplicates, rate_limit, message}
+
+    Raises:
+        ValidationError: Invalid input parameters or rate limit exceeded
+        PermissionError: User lacks permission
+    """
+    from dartwing.dartwing_core.background_jobs.engine import submit_jobs_batch as engine_submit_jobs_batch
+
+    if isinstance(parameters_list, str):
+        parameters_list = frappe.parse_json(parameters_list)
+
+    result = engine_submit_jobs_batch(
+        job_type=job_type,
+        organization=organization,
+        parameters_list=parameters_list,
+        priority=priority,
+    )
+    result["message"] = _("{0} jobs submitted").format(len(result["job_ids"]))
+
+    return result
+
+
+@frappe.whitelist()
+def get_batch_status(batch_id: str):
+    """
+    Retrieve aggregated status and progress of a job batch.
+
+    Args:
+        batch_id: Batch ID returned by submit_jobs_batch
+
+    Returns:
+        dict: {batch_id, organization, total, job_count_by_status, progress, is_finished}
+    """
+    from dartwing.dartwing_core.background_jobs.engine import get_batch_status as engine_get_batch_status
+
+    return engine_get_batch_status(batch_id)
+
+
+@frappe.whitelist()
+def get_job_status(job_id: str, if_version: int = None):
     """
     Retrieve current status and progress of a job.
 
+    Responses carry the status version as their ETag. Pollers should send
+    back the version of the last response, either as if_version or as an
+    If-None-Match header; while the job is unchanged the response is an empty
+    304 Not Modified, served without database access.
+
     Args:
         job_id: Background Job ID
+        if_version: Version of the status the client already has (optional)
 
     Returns:
-        dict: Job status details including progress, timestamps, and output
+        Response: 200 with {"message": job status details including
+            progress, timestamps, output and version}, or 304 if unchanged
     """
+    from werkzeug.wrappers import Response
     from dartwing.dartwing_core.background_jobs import get_job_status as engine_get_job_status
 
-    return engine_get_job_status(job_id)
+    if not if_version and getattr(frappe, "request", None):
+        if_version = (frappe.request.headers.get("If-None-Match") or "").strip('" ') or None
+
+    result = engine_get_job_status(job_id, if_version=if_version)
+    headers = {"ETag": f'"{result["version"]}"'}
+    if result.get("not_modified"):
+        return Response(status=304, headers=headers)
+
+    # Returned as a Response, as frappe.response has no way to set the ETag
+    return Response(
+        frappe.as_json({"message": result}, indent=None),
+        status=200,
+        mimetype="application/json",
+        headers=headers,
+    )
+
+
+@frappe.whitelist()
+def list_job_artifacts(job_id: str):
+    """
+    List the artifacts a job has written.
+
+    Args:
+        job_id: Background Job ID
+
+    Returns:
+        dict: {job_id, artifacts: [{name, content_type, size, created_at, url}]}
+    """
+    from dartwing.dartwing_core.background_jobs.engine import _validate_job_access
+    from dartwing.dartwing_core.background_jobs.artifacts import list_artifacts
+
+    _validate_job_access(frappe.get_doc("Background Job", job_id))
+
+    return {"job_id": job_id, "artifacts": list_artifacts(job_id)}
+
+
+@frappe.whitelist()
+def download_job_artifact(job_id: str, name: str):
+    """
+    Download a job artifact, streamed and decompressed on the fly.
+
+    Supports single HTTP byte ranges (Range: bytes=start-end), answering
+    206 Partial Content, so large downloads can be resumed or read in parts.
+
+    Args:
+        job_id: Background Job ID
+        name: Artifact name
+
+    Returns:
+        Response: 200/206 with the artifact bytes, or 416 for an
+            unsatisfiable range
+
+    Raises:
+        DoesNotExistError: Job or artifact not found
+        PermissionError: User lacks access to the job
+    """
+    from dartwing.dartwing_core.background_jobs.engine import _validate_job_access
+    from dartwing.dartwing_core.background_jobs.artifacts import build_download_response
+
+    _validate_job_access(frappe.get_doc("Background Job", job_id))
+
+    range_header = frappe.request.headers.get("Range") if getattr(frappe, "request", None) else None
+    return build_download_response(job_id, name, range_header)
+
+
+@frappe.whitelist()
+def wait_for_job(job_id: str, since_version: int = None, timeout: float = None):
+    """
+    Long-poll a job: block until its status or progress changes.
+
+    Returns as soon as the job's status version moves past since_version (or
+    right away if it already has, or the job has finished); otherwise after
+    timeout seconds with changed=False. Pass the returned version as
+    since_version of the next call.
+
+    Only blocks when the site enables background_job_long_poll_enabled,
+    which requires threaded or gevent gunicorn workers. Otherwise it returns
+    at once with long_poll=False; poll get_job_status with the version
+    instead.
+
+    Args:
+        job_id: Background Job ID
+        since_version: Status version the client already has (optional)
+        timeout: Seconds to wait (default: 25, max: 50)
+
+    Returns:
+        dict: get_job_status fields, version, changed and long_poll
+    """
+    from dartwing.dartwing_core.background_jobs.config import WAIT_FOR_JOB_DEFAULT_TIMEOUT_SECONDS
+    from dartwing.dartwing_core.background_jobs.status_events import wait_for_job as engine_wait_for_job
+
+    return engine_wait_for_job(
+        job_id,
+        since_version=since_version,
+        timeout=float(timeout) if timeout is not None else WAIT_FOR_JOB_DEFAULT_TIMEOUT_SECONDS,
+    )
 
 
 @frappe.whitelist()
@@ -114,6 +271,28 @@ def cancel_job(job_id: str):
     }
 
 
+@frappe.whitelist()
+def cancel_jobs(job_ids: list):
+    """
+    Request cancellation of many jobs at once.
+
+    Args:
+        job_ids: List (or JSON list) of jobs to cancel
+
+    Returns:
+        dict: {canceled: [job_id, ...], skipped: [{job_id, reason}, ...]}
+
+    Raises:
+        ValidationError: Too many jobs in one request
+    """
+    from dartwing.dartwing_core.background_jobs.engine import cancel_jobs as engine_cancel_jobs
+
+    if isinstance(job_ids, str):
+        job_ids = frappe.parse_json(job_ids)
+
+    return engine_cancel_jobs(job_ids)
+
+
 @frappe.whitelist()
 def retry_job(job_id: str):
     """
@@ -136,6 +315,22 @@ def retry_job(job_id: str):
     }
 
 
+@frappe.whitelist()
+def get_dispatch_status(organization: str = None):
+    """
+    Retrieve the fair-dispatch state and per-organization backlog.
+
+    Args:
+        organization: Only report this organization (required for non-admin)
+
+    Returns:
+        dict: {priorities: {priority: {weight, credit, backlog, organizations}}, total_backlog}
+    """
+    from dartwing.dartwing_core.background_jobs.dispatch import get_dispatch_status as engine_get_dispatch_status
+
+    return engine_get_dispatch_status(organization=organization)
+
+
 @frappe.whitelist()
 def get_job_metrics(organization: str = None):
     """
@@ -166,3 +361,49 @@ def get_job_history(job_id: str):
     from dartwing.dartwing_core.background_jobs.engine import get_job_history as engine_get_job_history
 
     return engine_get_job_history(job_id)
+
+
+@frappe.whitelist()
+def get_archived_job(job_id: str):
+    """
+    Retrieve a job deleted by retention from the archive (System Manager only).
+
+    Args:
+        job_id: Job to look up
+
+    Returns:
+        dict: {job, logs, depends_on}
+    """
+    frappe.only_for("System Manager")
+
+    from dartwing.dartwing_core.background_jobs.archive import get_archived_job as archive_get_archived_job
+
+    record = archive_get_archived_job(job_id)
+    if record is None:
+        frappe.throw(_("Job {0} is not in the archive").format(job_id), frappe.DoesNotExistError)
+    return record
+
+
+@frappe.whitelist()
+def list_archived_jobs(organization: str = None, from_date: str = None, to_date: str = None, limit: int = 100):
+    """
+    List archived jobs (System Manager only).
+
+    Args:
+        organization: Filter by org
+        from_date: First day the jobs were last modified (inclusive)
+        to_date: Last day (inclusive)
+        limit: Maximum results (default: 100, max: 1000)
+
+    Returns:
+        dict: {jobs: [...]}
+    """
+    frappe.only_for("System Manager")
+
+    from dartwing.dartwing_core.background_jobs.archive import find_archived_jobs
+
+    return {
+        "jobs": find_archived_jobs(
+            organization=organization, from_date=from_date, to_date=to_date, limit=min(int(limit), 1000)
+        )
+    }
@@ -0,0 +1,333 @@
+"""
+Cold archive for Background Job Engine.
+
+Before the retention run deletes expired jobs, archive_jobs() writes each
+job with its execution log and dependencies as one JSON line to compressed
+archive files on local disk, partitioned by the day the job was last
+modified:
+
+    <site>/private/job_archive/2026/10/17/20261017T020000123456-<hash>.jsonl.gz
+    <site>/private/job_archive/2026/10/17/20261017T020000123456-<hash>.index.json
+    <site>/private/job_archive/2026/10/17/manifest.jsonl
+
+A file is written in one go per retention chunk. Every JOB_ARCHIVE_BLOCK_SIZE
+lines form a separate gzip member, so the file is a plain .jsonl.gz (zcat
+reads it) and a block can be decompressed on its own. The index holds each
+block's offset, the block and line of every job, and the blocks of every
+organization, so a lookup by job ID or organization only decompresses the
+blocks it needs. The index is written last: archive files without one are
+incomplete and ignored. Each partition's manifest then gets a line with the
+file's first and last job name, so a lookup by job ID only opens the indexes
+whose range covers it (files missing from a manifest, e.g. written before
+manifests existed, have their index read instead).
+
+If a chunk is archived but its delete rolls back, the next run archives
+those jobs again; readers return the most recent copy.
+"""
+
+import gzip
+import json
+import os
+from datetime import date
+from typing import Iterator, Optional
+
+import frappe
+from frappe.utils import cint, getdate, now_datetime
+
+from dartwing.dartwing_core.background_jobs.config import (
+    JOB_ARCHIVE_BLOCK_SIZE,
+    JOB_ARCHIVE_COMPRESSION_LEVEL,
+)
+
+ARCHIVE_ROOT = "job_archive"
+
+DATA_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".index.json"
+MANIFEST_FILE = "manifest.jsonl"
+
+_LOG_FIELDS = "from_status, to_status, timestamp, actor, message, retry_attempt"
+
+# Job fields returned by find_archived_jobs
+_SUMMARY_FIELDS = ("name", "organization", "job_type", "status", "priority", "creation", "modified")
+
+
+def is_enabled() -> bool:
+    """Whether the retention run archives jobs before deleting them (site config: background_job_archive_enabled)."""
+    return bool(cint(frappe.conf.get("background_job_archive_enabled", 1)))
+
+
+def archive_jobs(names: list) -> int:
+    """
+    Write jobs with their execution logs and dependencies to the archive.
+
+    The files are synced to disk before this returns, so the caller can
+    delete the jobs once it does. Raises if the archive cannot be written.
+
+    Args:
+        names: Background Job names
+
+    Returns:
+        Number of jobs archived
+    """
+    if not names:
+        return 0
+
+    values = {"names": tuple(names)}
+    jobs = frappe.db.sql(
+        "SELECT * FROM `tabBackground Job` WHERE name IN %(names)s ORDER BY name", values, as_dict=True
+    )
+
+    logs = {}
+    for log in frappe.db.sql(
+        f"""
+        SELECT background_job, {_LOG_FIELDS}
+        FROM `tabJob Execution Log`
+        WHERE background_job IN %(names)s
+        ORDER BY background_job, timestamp, creation
+        """,
+        values,
+        as_dict=True,
+    ):
+        logs.setdefault(log.pop("background_job"), []).append(log)
+
+    depends_on = {}
+    for row in frappe.db.sql(
+        """
+        SELECT background_job, depends_on FROM `tabBackground Job Dependency`
+        WHERE background_job IN %(names)s
+        ORDER BY background_job, depends_on
+        """,
+        values,
+        as_dict=True,
+    ):
+        depends_on.setdefault(row.background_job, []).append(row.depends_on)
+
+    partitions = {}
+    for job in jobs:
+        partitions.setdefault(getdate(job.modified), []).append({
+            "job": job,
+            "logs": logs.get(job.name, []),
+            "depends_on": depends_on.get(job.name, []),
+        })
+
+    for day, records in sorted(partitions.items()):
+        _write_file(day, records)
+
+    return len(jobs)
+
+
+def _write_file(day: date, records: list) -> str:
+    """Write one archive file and its index; returns the data file path."""
+    directory = _get_partition_dir(day)
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(
+        directory, f"{now_datetime().strftime('%Y%m%dT%H%M%S%f')}-{frappe.generate_hash(length=8)}"
+    )
+
+    index = {
+        "partition": str(day),
+        "created_at": str(now_datetime()),
+        "count": len(records),
+        "first_job": records[0]["job"]["name"],
+        "last_job": records[-1]["job"]["name"],
+        "blocks": [],
+        "jobs": {},
+        "organizations": {},
+    }
+
+    offset = 0
+    with open(base + DATA_SUFFIX + ".tmp", "wb") as f:
+        for start in range(0, len(records), JOB_ARCHIVE_BLOCK_SIZE):
+            block = len(index["blocks"])
+            lines = []
+            for line, record in enumerate(records[start:start + JOB_ARCHIVE_BLOCK_SIZE]):
+                job = record["job"]
+                index["jobs"][job["name"]] = [block, line]
+                organizations = index["organizations"].setdefault(job.get("organization") or "", [])
+                if not organizations or organizations[-1] != block:
+                    organizations.append(block)
+                lines.append(json.dumps(record, default=str, separators=(",", ":")))
+
+            data = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), JOB_ARCHIVE_COMPRESSION_LEVEL)
+            f.write(data)
+            index["blocks"].append([offset, len(data)])
+            offset += len(data)
+
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(base + DATA_SUFFIX + ".tmp", base + DATA_SUFFIX)
+
+    with open(base + INDEX_SUFFIX + ".tmp", "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(base + INDEX_SUFFIX + ".tmp", base + INDEX_SUFFIX)
+
+    _add_to_manifest(directory, os.path.basename(base), index["first_job"], index["last_job"])
+    return base + DATA_SUFFIX
+
+
+def _add_to_manifest(directory: str, name: str, first_job: str, last_job: str) -> None:
+    """Append an archive file's job name range to its partition's manifest."""
+    line = json.dumps({"file": name, "first_job": first_job, "last_job": last_job}, separators=(",", ":"))
+    with open(os.path.join(directory, MANIFEST_FILE), "a") as f:
+        f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def get_archived_job(job_id: str) -> Optional[dict]:
+    """
+    Look up an archived job by name.
+
+    Partitions and files are searched newest first; only indexes whose job
+    name range (from the partition manifest) covers job_id are opened.
+
+    Returns:
+        {"job": {...}, "logs": [...], "depends_on": [...]}, or None if the
+        job is not in the archive
+    """
+    for directory in reversed(list(_iter_partitions())):
+        ranges = _load_manifest(directory)
+        for entry in reversed(_list_dir(directory)):
+            if not entry.endswith(INDEX_SUFFIX):
+                continue
+            name = entry[: -len(INDEX_SUFFIX)]
+            base = os.path.join(directory, name)
+
+            index = None
+            if name not in ranges:
+                index = _load_index(base)
+                ranges[name] = (index["first_job"], index["last_job"])
+            first_job, last_job = ranges[name]
+            if not first_job <= job_id <= last_job:
+                continue
+
+            index = index or _load_index(base)
+            position = index["jobs"].get(job_id)
+            if position is None:
+                continue
+            block, line = position
+            return json.loads(_read_block(base, index, block)[line])
+    return None
+
+
+def find_archived_jobs(
+    organization: Optional[str] = None,
+    from_date=None,
+    to_date=None,
+    limit: int = 100,
+) -> list:
+    """
+    List archived jobs by organization and/or the day they were last modified.
+
+    Only partitions within the date range and blocks holding the
+    organization's jobs are read.
+
+    Args:
+        organization: Only jobs of this organization
+        from_date: First day (inclusive)
+        to_date: Last day (inclusive)
+        limit: Maximum number of jobs
+
+    Returns:
+        Job summaries (name, organization, job_type, status, priority,
+        creation, modified), oldest partition first
+    """
+    from_date = getdate(from_date) if from_date else None
+    to_date = getdate(to_date) if to_date else None
+
+    found = {}
+    for base in _iter_archives(from_date, to_date):
+        index = _load_index(base)
+        if organization is None:
+            blocks = range(len(index["blocks"]))
+        else:
+            blocks = index["organizations"].get(organization, [])
+
+        for block in blocks:
+            for line in _read_block(base, index, block):
+                job = json.loads(line)["job"]
+                if organization is not None and job.get("organization") != organization:
+                    continue
+                # A later copy of the same job replaces the earlier one
+                found.pop(job["name"], None)
+                found[job["name"]] = {field: job.get(field) for field in _SUMMARY_FIELDS}
+
+        if len(found) >= limit:
+            break
+
+    return list(found.values())[:limit]
+
+
+def _iter_archives(from_date: Optional[date] = None, to_date: Optional[date] = None) -> Iterator[str]:
+    """Yield the base path of every complete archive file in the date range, oldest first."""
+    for directory in _iter_partitions(from_date, to_date):
+        for entry in _list_dir(directory):
+            if entry.endswith(INDEX_SUFFIX):
+                yield os.path.join(directory, entry[: -len(INDEX_SUFFIX)])
+
+
+def _iter_partitions(from_date: Optional[date] = None, to_date: Optional[date] = None) -> Iterator[str]:
+    """Yield the directory of every partition in the date range, oldest first."""
+    root = get_archive_root()
+    low = from_date.strftime("%Y/%m/%d") if from_date else None
+    high = to_date.strftime("%Y/%m/%d") if to_date else None
+
+    for year in _list_dir(root):
+        if (low and year < low[:4]) or (high and year > high[:4]):
+            continue
+        for month in _list_dir(os.path.join(root, year)):
+            prefix = f"{year}/{month}"
+            if (low and prefix < low[:7]) or (high and prefix > high[:7]):
+                continue
+            for day in _list_dir(os.path.join(root, year, month)):
+                partition = f"{prefix}/{day}"
+                if (low and partition < low) or (high and partition > high):
+                    continue
+                yield os.path.join(root, year, month, day)
+
+
+def _list_dir(path: str) -> list:
+    try:
+        return sorted(entry for entry in os.listdir(path) if not entry.startswith("."))
+    except FileNotFoundError:
+        return []
+
+
+def _load_manifest(directory: str) -> dict:
+    """Return {file: (first_job, last_job)} of the files listed in a partition's manifest."""
+    ranges = {}
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Line torn by a crash mid-append; its file falls back to the index
+                    continue
+                ranges[entry["file"]] = (entry["first_job"], entry["last_job"])
+    except FileNotFoundError:
+        pass
+    return ranges
+
+
+def _load_index(base: str) -> dict:
+    with open(base + INDEX_SUFFIX) as f:
+        return json.load(f)
+
+
+def _read_block(base: str, index: dict, block: int) -> list:
+    offset, length = index["blocks"][block]
+    with open(base + DATA_SUFFIX, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return gzip.decompress(data).decode("utf-8").splitlines()
+
+
+def _get_partition_dir(day: date) -> str:
+    return os.path.join(get_archive_root(), day.strftime("%Y"), day.strftime("%m"), day.strftime("%d"))
+
+
+def get_archive_root() -> str:
+    return frappe.get_site_path("private", ARCHIVE_ROOT)
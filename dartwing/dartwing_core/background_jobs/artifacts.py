@@ -0,0 +1,415 @@
+"""
+Artifact store for Background Job Engine.
+
+Handlers write large outputs (reports, exports) through JobContext instead of
+returning them in output_reference. An artifact is stored on local disk under
+the site's private folder as fixed-size, independently zlib-compressed chunks
+plus a JSON manifest:
+
+    <site>/private/job_artifacts/<job_id>/<name>/manifest.json
+    <site>/private/job_artifacts/<job_id>/<name>/000000.z
+    <site>/private/job_artifacts/<job_id>/<name>/000001.z
+    ...
+
+Every chunk except the last holds exactly chunk_size uncompressed bytes, so a
+byte range maps directly to the chunks that cover it and a range read only
+decompresses those. Writes go to a temporary directory that is renamed into
+place on close, so readers never see a partial artifact.
+
+Artifacts are deleted with their job (Background Job on_trash) and by the
+daily cleanup sweep for directories whose job no longer exists.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+from typing import Iterator, Optional
+
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+
+from dartwing.dartwing_core.background_jobs.config import (
+    ARTIFACT_CHUNK_SIZE,
+    ARTIFACT_COMPRESSION_LEVEL,
+    ARTIFACT_MAX_PER_JOB,
+    ARTIFACT_MAX_SIZE_BYTES,
+)
+from dartwing.dartwing_core.background_jobs.errors import PermanentError
+
+ARTIFACT_ROOT = "job_artifacts"
+DOWNLOAD_METHOD = "dartwing.dartwing_core.api.jobs.download_job_artifact"
+
+MANIFEST_FILE = "manifest.json"
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Bytes yielded per piece while streaming a download
+_STREAM_PIECE_SIZE = 64 * 1024
+
+
+class ArtifactWriter:
+    """
+    Streams one artifact to disk as compressed chunks.
+
+    Usage:
+        with context.open_artifact("export.csv", "text/csv") as writer:
+            for row in rows:
+                writer.write(format_row(row))
+    """
+
+    def __init__(self, job_id: str, name: str, content_type: Optional[str] = None):
+        validate_name(name)
+
+        self.job_id = job_id
+        self.name = name
+        self.content_type = content_type or "application/octet-stream"
+        self.size = 0
+        self.manifest = None
+
+        job_dir = get_job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        existing = [entry for entry in os.listdir(job_dir) if not entry.startswith(".")]
+        if name not in existing and len(existing) >= ARTIFACT_MAX_PER_JOB:
+            raise PermanentError(f"Job {job_id} already has {ARTIFACT_MAX_PER_JOB} artifacts")
+
+        self._final_dir = os.path.join(job_dir, name)
+        self._tmp_dir = os.path.join(job_dir, f".{name}.{frappe.generate_hash(length=8)}.tmp")
+        os.makedirs(self._tmp_dir)
+
+        self._buffer = bytearray()
+        self._chunks = []
+        self._sha256 = hashlib.sha256()
+        self._closed = False
+
+    def write(self, data: bytes | str) -> int:
+        """
+        Append data to the artifact.
+
+        Args:
+            data: Bytes, or text (encoded as UTF-8)
+
+        Returns:
+            Number of bytes written
+
+        Raises:
+            PermanentError: If the artifact would exceed ARTIFACT_MAX_SIZE_BYTES
+        """
+        if self._closed:
+            raise ValueError(f"Artifact {self.name} is already closed")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        if self.size + len(data) > ARTIFACT_MAX_SIZE_BYTES:
+            raise PermanentError(
+                f"Artifact {self.name} exceeds the maximum size of {ARTIFACT_MAX_SIZE_BYTES} bytes"
+            )
+
+        self._buffer.extend(data)
+        self._sha256.update(data)
+        self.size += len(data)
+
+        while len(self._buffer) >= ARTIFACT_CHUNK_SIZE:
+            self._flush_chunk(bytes(self._buffer[:ARTIFACT_CHUNK_SIZE]))
+            del self._buffer[:ARTIFACT_CHUNK_SIZE]
+
+        return len(data)
+
+    def close(self) -> dict:
+        """
+        Flush the last chunk, write the manifest and publish the artifact.
+
+        Replaces an earlier artifact of the same name.
+
+        Returns:
+            The artifact manifest
+        """
+        if self._closed:
+            return self.manifest
+
+        if self._buffer or not self._chunks:
+            self._flush_chunk(bytes(self._buffer))
+            self._buffer.clear()
+
+        self.manifest = {
+            "name": self.name,
+            "content_type": self.content_type,
+            "size": self.size,
+            "chunk_size": ARTIFACT_CHUNK_SIZE,
+            "chunks": self._chunks,
+            "sha256": self._sha256.hexdigest(),
+            "created_at": str(now_datetime()),
+        }
+        with open(os.path.join(self._tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(self.manifest, f)
+
+        if os.path.isdir(self._final_dir):
+            shutil.rmtree(self._final_dir)
+        os.rename(self._tmp_dir, self._final_dir)
+
+        self._closed = True
+        return self.manifest
+
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        self._closed = True
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _flush_chunk(self, data: bytes) -> None:
+        compressed = zlib.compress(data, ARTIFACT_COMPRESSION_LEVEL)
+        with open(os.path.join(self._tmp_dir, _chunk_file(len(self._chunks))), "wb") as f:
+            f.write(compressed)
+        self._chunks.append(len(compressed))
+
+
+def write_artifact(job_id: str, name: str, data: bytes | str, content_type: Optional[str] = None) -> dict:
+    """
+    Store a complete artifact in one call.
+
+    Returns:
+        The artifact manifest
+    """
+    with ArtifactWriter(job_id, name, content_type) as writer:
+        writer.write(data)
+    return writer.manifest
+
+
+def get_manifest(job_id: str, name: str) -> Optional[dict]:
+    """Return an artifact's manifest, or None if it does not exist."""
+    validate_name(name)
+    try:
+        with open(os.path.join(get_job_dir(job_id), name, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_artifacts(job_id: str) -> list:
+    """
+    List a job's artifacts.
+
+    Returns:
+        List of dicts with name, content_type, size, created_at and url
+    """
+    job_dir = get_job_dir(job_id)
+    if not os.path.isdir(job_dir):
+        return []
+
+    artifacts = []
+    for name in sorted(os.listdir(job_dir)):
+        if name.startswith("."):
+            continue
+        manifest = get_manifest(job_id, name)
+        if manifest:
+            artifacts.append({
+                "name": name,
+                "content_type": manifest["content_type"],
+                "size": manifest["size"],
+                "created_at": manifest["created_at"],
+                "url": get_artifact_url(job_id, name),
+            })
+    return artifacts
+
+
+def iter_range(job_id: str, manifest: dict, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield the bytes start..end (inclusive) of an artifact.
+
+    Only the chunks covering the range are read and decompressed.
+
+    Args:
+        job_id: Background Job ID
+        manifest: Manifest from get_manifest()
+        start: First byte offset
+        end: Last byte offset (default: last byte of the artifact)
+    """
+    if end is None:
+        end = manifest["size"] - 1
+    if end < start:
+        return
+
+    chunk_size = manifest["chunk_size"]
+    artifact_dir = os.path.join(get_job_dir(job_id), manifest["name"])
+
+    for index in range(start // chunk_size, end // chunk_size + 1):
+        with open(os.path.join(artifact_dir, _chunk_file(index)), "rb") as f:
+            data = zlib.decompress(f.read())
+
+        chunk_start = index * chunk_size
+        piece = data[max(start - chunk_start, 0):end - chunk_start + 1]
+        for offset in range(0, len(piece), _STREAM_PIECE_SIZE):
+            yield piece[offset:offset + _STREAM_PIECE_SIZE]
+
+
+def read_artifact(job_id: str, name: str) -> bytes:
+    """Return a whole artifact (small artifacts and tests only)."""
+    manifest = get_manifest(job_id, name)
+    if not manifest:
+        raise frappe.DoesNotExistError(_("Artifact {0} not found").format(name))
+    return b"".join(iter_range(job_id, manifest))
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """
+    Parse a single-range HTTP Range header.
+
+    Multi-range and malformed headers are ignored (full response), as RFC 9110
+    allows.
+
+    Returns:
+        (start, end) inclusive, or None to send the whole artifact
+
+    Raises:
+        ValueError: If the range is not satisfiable
+    """
+    match = _RANGE_PATTERN.match((header or "").strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def build_download_response(job_id: str, name: str, range_header: Optional[str] = None):
+    """
+    Build a streaming HTTP response for an artifact, honoring Range.
+
+    Access to the job must be checked by the caller.
+
+    Returns:
+        werkzeug Response (200, 206 or 416)
+    """
+    from werkzeug.wrappers import Response
+
+    manifest = get_manifest(job_id, name)
+    if not manifest:
+        raise frappe.DoesNotExistError(_("Artifact {0} not found").format(name))
+
+    size = manifest["size"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{manifest["sha256"]}"',
+        "Content-Disposition": f'attachment; filename="{name}"',
+    }
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    if byte_range:
+        start, end = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status = 200
+    headers["Content-Length"] = str(end - start + 1)
+
+    return Response(
+        iter_range(job_id, manifest, start, end),
+        status=status,
+        headers=headers,
+        mimetype=manifest["content_type"],
+        direct_passthrough=True,
+    )
+
+
+def get_artifact_url(job_id: str, name: str) -> str:
+    """Return the download URL of an artifact (suitable for output_reference)."""
+    from urllib.parse import urlencode
+
+    return f"/api/method/{DOWNLOAD_METHOD}?{urlencode({'job_id': job_id, 'name': name})}"
+
+
+def delete_artifacts(job_id: str) -> None:
+    """Delete all artifacts of a job (best-effort)."""
+    try:
+        shutil.rmtree(get_job_dir(job_id), ignore_errors=False)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        frappe.log_error(f"Failed to delete artifacts of job {job_id}: {e}", "Background Job Artifacts")
+
+
+def cleanup_orphaned_artifacts(min_age_seconds: int = 3600, batch_size: int = 500) -> int:
+    """
+    Delete artifact directories whose job no longer exists.
+
+    Directories younger than min_age_seconds are skipped so artifacts of a job
+    whose insert is not yet committed are not removed.
+
+    Returns:
+        Number of job directories deleted
+    """
+    root = get_artifact_root()
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - min_age_seconds
+    candidates = [
+        job_id
+        for job_id in os.listdir(root)
+        if os.path.getmtime(os.path.join(root, job_id)) < cutoff
+    ]
+
+    deleted = 0
+    for i in range(0, len(candidates), batch_size):
+        batch = candidates[i:i + batch_size]
+        existing = set(frappe.get_all("Background Job", filters={"name": ("in", batch)}, pluck="name"))
+        for job_id in batch:
+            if job_id not in existing:
+                delete_artifacts(job_id)
+                deleted += 1
+    return deleted
+
+
+def validate_name(name: str) -> None:
+    """Reject artifact names that are not plain file names."""
+    if not name or not _NAME_PATTERN.match(name) or ".." in name:
+        frappe.throw(
+            _("Invalid artifact name '{0}'. Use letters, digits, '.', '_' and '-'.").format(name)
+        )
+
+
+def get_artifact_root() -> str:
+    return frappe.get_site_path("private", ARTIFACT_ROOT)
+
+
+def get_job_dir(job_id: str) -> str:
+    if not job_id or os.sep in job_id or job_id.startswith("."):
+        frappe.throw(_("Invalid job ID"))
+    return os.path.join(get_artifact_root(), job_id)
+
+
+def _chunk_file(index: int) -> str:
+    return f"{index:06d}.z"
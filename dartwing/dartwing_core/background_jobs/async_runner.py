@@ -0,0 +1,331 @@
+"""
+Asyncio handler support for Background Job Engine.
+
+Handlers may be `async def`. They run on a worker-local event loop (one
+daemon thread per process) with the job timeout enforced by
+asyncio.wait_for, which cancels the coroutine instead of abandoning it.
+
+An RQ worker runs one job at a time, so an I/O-bound handler there still
+occupies the worker while it waits. `bench dartwing-async-worker` runs many
+async jobs in one process instead: executors hand Queued jobs with async
+handlers to it through a Redis list while it is alive (see handoff()), and
+it runs each with the normal execute_job() on a thread of its own pool,
+while all handlers share the process's event loop. A waiting job costs a
+parked thread and no database connection.
+
+The same handoff, on its own list, feeds `bench dartwing-process-worker`
+with jobs of Process execution mode Job Types (see process_pool.py), so
+their handler processes outlive any one job.
+
+Handlers reach blocking APIs through the context, which runs the call on
+the job's own thread (where the site is initialised) and commits it:
+
+    async def sync_contacts(context: JobContext):
+        async with httpx.AsyncClient() as client:
+            contacts = (await client.get(url)).json()
+        await context.call(save_contacts, contacts)
+        await context.update_progress_async(100, "Done")
+
+Key layout (under the site prefix), per channel ("async" or "process"):
+    dartwing_core:background_job:<channel>:ready       job handoff list
+    dartwing_core:background_job:<channel>:heartbeat   set while a worker runs
+"""
+
+import asyncio
+import inspect
+import json
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import frappe
+
+from dartwing.dartwing_core.background_jobs.config import (
+    ASYNC_WORKER_DEFAULT_CONCURRENCY,
+    ASYNC_WORKER_HEARTBEAT_SECONDS,
+    ASYNC_WORKER_HEARTBEAT_TTL_SECONDS,
+)
+from dartwing.dartwing_core.background_jobs.errors import TransientError
+
+
+def is_async_handler(handler: Callable) -> bool:
+    """Whether a handler is an `async def` function."""
+    return inspect.iscoroutinefunction(handler)
+
+
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return this process's job event loop, starting it on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        # A forked work horse inherits the loop object but not its thread
+        if _loop is None or not _loop_thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="dartwing-job-event-loop", daemon=True
+            )
+            _loop_thread.start()
+        return _loop
+
+
+class _Bridge:
+    """Runs the blocking calls of one async handler on the job's thread."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self._calls = queue.SimpleQueue()
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        future = self.loop.create_future()
+        self._calls.put((fn, args, kwargs, future))
+        return await future
+
+    def serve(self, done) -> None:
+        """Run queued calls until the handler's future is done."""
+        done.add_done_callback(lambda _future: self._calls.put(None))
+        while True:
+            item = self._calls.get()
+            if item is None:
+                return
+
+            fn, args, kwargs, future = item
+            try:
+                result = fn(*args, **kwargs)
+                frappe.db.commit()
+            except Exception as e:
+                frappe.db.rollback()
+                self.loop.call_soon_threadsafe(_resolve, future, None, e)
+            else:
+                self.loop.call_soon_threadsafe(_resolve, future, result, None)
+            finally:
+                _release_db_connection()
+
+
+def _resolve(future: asyncio.Future, result: Any, error: Optional[Exception]) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+async def _guarded(handler: Callable, context) -> Any:
+    try:
+        return await handler(context)
+    except asyncio.TimeoutError as e:
+        # Keep a handler's own timeouts apart from the job timeout
+        raise TransientError(str(e) or "Handler operation timed out", cause=e)
+
+
+def run(handler: Callable, context, timeout_seconds: Optional[float] = None) -> Any:
+    """
+    Run an async handler on the event loop and wait for it.
+
+    Blocks the calling thread, which serves the handler's context.call()s
+    meanwhile. The calling thread's database transaction is committed and
+    its connection released first.
+
+    Args:
+        handler: `async def` handler
+        context: The job's JobContext
+        timeout_seconds: Cancel the handler after this many seconds (None:
+            no timeout)
+
+    Returns:
+        Handler result
+
+    Raises:
+        JobTimeoutError: If the handler exceeds timeout_seconds
+        Exception: Whatever the handler raised
+    """
+    from dartwing.dartwing_core.background_jobs.executor import JobTimeoutError
+
+    frappe.db.commit()
+    _release_db_connection()
+
+    loop = get_loop()
+    bridge = _Bridge(loop)
+    context._bridge = bridge
+    try:
+        coro = _guarded(handler, context)
+        if timeout_seconds:
+            coro = asyncio.wait_for(coro, timeout_seconds)
+        done = asyncio.run_coroutine_threadsafe(coro, loop)
+        bridge.serve(done)
+        try:
+            return done.result()
+        except asyncio.TimeoutError:
+            raise JobTimeoutError(f"Job exceeded {timeout_seconds}s timeout")
+    finally:
+        context._bridge = None
+
+
+def _release_db_connection() -> None:
+    try:
+        frappe.db.close()
+    except Exception:
+        # Reopened on demand; a failure only means the connection stays open
+        pass
+
+
+# Handoff channels: jobs with async def handlers (dartwing-async-worker) and
+# jobs of Process execution mode Job Types (dartwing-process-worker)
+HANDOFF_CHANNELS = ("async", "process")
+
+
+def _ready_key(channel: str = "async") -> str:
+    return frappe.cache().make_key(f"dartwing_core:background_job:{channel}:ready")
+
+
+def _heartbeat_key(channel: str = "async") -> str:
+    return frappe.cache().make_key(f"dartwing_core:background_job:{channel}:heartbeat")
+
+
+def handoff(job_id: str, channel: str = "async") -> bool:
+    """
+    Give a Queued job to the site's workers of a channel, if any is running.
+
+    Args:
+        job_id: Background Job ID
+        channel: "async" or "process" (see HANDOFF_CHANNELS)
+
+    Returns:
+        True if the job was handed off; False means run it here
+    """
+    if frappe.flags.in_job_handoff_worker:
+        return False
+
+    cache = frappe.cache()
+    if not cache.exists(_heartbeat_key(channel)):
+        return False
+
+    cache.rpush(_ready_key(channel), json.dumps({"job_id": job_id, "user": frappe.session.user}))
+    return True
+
+
+def get_handed_off_jobs() -> set:
+    """Return the IDs of jobs waiting in any handoff list."""
+    cache = frappe.cache()
+    return {
+        json.loads(entry)["job_id"]
+        for channel in HANDOFF_CHANNELS
+        for entry in cache.lrange(_ready_key(channel), 0, -1)
+    }
+
+
+def requeue_orphaned_jobs() -> int:
+    """
+    Send handed-off jobs back to dispatch when no worker of their channel is running.
+
+    Returns:
+        Number of jobs requeued
+    """
+    from dartwing.dartwing_core.background_jobs.dispatch import redispatch
+
+    cache = frappe.cache()
+    requeued = 0
+    for channel in HANDOFF_CHANNELS:
+        if cache.exists(_heartbeat_key(channel)):
+            continue
+
+        pipe = cache.pipeline()
+        pipe.lrange(_ready_key(channel), 0, -1)
+        pipe.delete(_ready_key(channel))
+        entries, _deleted = pipe.execute()
+
+        for entry in entries:
+            redispatch(json.loads(entry)["job_id"])
+        requeued += len(entries)
+    return requeued
+
+
+class AsyncJobWorker:
+    """
+    Long-running consumer of handed-off async jobs for a set of sites.
+
+    Takes a job only when one of its `concurrency` threads is free, so jobs
+    beyond that wait in Redis for another worker.
+    """
+
+    channel = "async"
+
+    def __init__(self, sites: list, concurrency: int = ASYNC_WORKER_DEFAULT_CONCURRENCY):
+        self.sites = sites
+        self.concurrency = concurrency
+        self._stopped = threading.Event()
+        self._keys = {}
+        self._cache = None
+
+    def run(self) -> None:
+        from dartwing.dartwing_core.background_jobs.circuit_breaker import start_invalidation_listener
+
+        for site in self.sites:
+            frappe.init(site=site)
+            try:
+                self._cache = frappe.cache()
+                self._keys[_ready_key(self.channel)] = (site, _heartbeat_key(self.channel))
+                start_invalidation_listener()
+            finally:
+                frappe.destroy()
+
+        signal.signal(signal.SIGTERM, lambda *_args: self.stop())
+        get_loop()
+
+        slots = threading.BoundedSemaphore(self.concurrency)
+        last_heartbeat = 0.0
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix=f"dartwing-{self.channel}-job") as pool:
+            while not self._stopped.is_set():
+                if time.monotonic() - last_heartbeat >= ASYNC_WORKER_HEARTBEAT_SECONDS:
+                    self._heartbeat()
+                    last_heartbeat = time.monotonic()
+
+                if not slots.acquire(timeout=1):
+                    continue
+                try:
+                    item = self._cache.blpop(list(self._keys), timeout=1)
+                except Exception as e:
+                    frappe.logger("dartwing.background_jobs").warning(f"{self.channel.capitalize()} worker cannot read jobs: {e}")
+                    item = None
+                    time.sleep(1)
+                if not item:
+                    slots.release()
+                    continue
+
+                site = self._keys[item[0]][0]
+                future = pool.submit(self._execute, site, json.loads(item[1]))
+                future.add_done_callback(lambda _future: slots.release())
+
+    def stop(self) -> None:
+        """Stop taking jobs; running jobs finish first."""
+        self._stopped.set()
+
+    def _heartbeat(self) -> None:
+        pipe = self._cache.pipeline(transaction=False)
+        for _site, heartbeat_key in self._keys.values():
+            pipe.set(heartbeat_key, 1, ex=ASYNC_WORKER_HEARTBEAT_TTL_SECONDS)
+        pipe.execute()
+
+    def _execute(self, site: str, entry: dict) -> None:
+        from dartwing.dartwing_core.background_jobs.executor import execute_job
+
+        frappe.init(site=site)
+        try:
+            frappe.connect()
+            frappe.set_user(entry["user"])
+            frappe.flags.in_job_handoff_worker = True
+            execute_job(background_job_id=entry["job_id"])
+        except Exception as e:
+            frappe.log_error(
+                f"{self.channel.capitalize()} worker failed to run job {entry['job_id']}: {e}",
+                "Background Job Async Worker",
+            )
+        finally:
+            frappe.destroy()
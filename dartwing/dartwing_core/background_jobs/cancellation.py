@@ -0,0 +1,76 @@
+"""
+Cancellation signals for Background Job Engine.
+
+Canceling a job sets a Redis key per job once the Canceled status is
+committed. A running handler's JobContext checks the key (at most every
+CANCEL_CHECK_INTERVAL_SECONDS) instead of reading the job row, so
+cancellation reaches the handler within a second without any SQL.
+
+Signals raised in one transaction (e.g. a bulk cancel) are written with a
+single pipelined round trip after commit.
+"""
+
+import frappe
+
+from dartwing.dartwing_core.background_jobs.config import CANCEL_SIGNAL_TTL_SECONDS
+
+
+def _key(job_id: str) -> str:
+    return frappe.cache().make_key(f"dartwing_core:background_job:cancel:{job_id}")
+
+
+def signal(job_ids: list) -> None:
+    """
+    Set the cancellation signal of jobs.
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    if not job_ids:
+        return
+
+    pipe = frappe.cache().pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.set(_key(job_id), 1, ex=CANCEL_SIGNAL_TTL_SECONDS)
+    pipe.execute()
+
+
+def signal_after_commit(job_id: str) -> None:
+    """
+    Queue a job's cancellation signal until the current transaction commits.
+
+    All signals queued in one transaction are sent together.
+    """
+    pending = getattr(frappe.local, "dartwing_pending_cancel_signals", None)
+    if pending is None:
+        pending = frappe.local.dartwing_pending_cancel_signals = []
+        frappe.db.after_commit.add(_flush_pending)
+        frappe.db.after_rollback.add(_discard_pending)
+    pending.append(job_id)
+
+
+def is_signaled(job_id: str) -> bool:
+    """
+    Check whether a job has been canceled.
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    return bool(frappe.cache().exists(_key(job_id)))
+
+
+def _flush_pending() -> None:
+    job_ids = frappe.local.dartwing_pending_cancel_signals or []
+    frappe.local.dartwing_pending_cancel_signals = None
+    try:
+        signal(job_ids)
+    except Exception as e:
+        # Running handlers fall back to reading the job status
+        frappe.log_error(
+            f"Failed to signal cancellation of {len(job_ids)} jobs: {e}",
+            "Background Job Cancellation",
+        )
+
+
+def _discard_pending() -> None:
+    frappe.local.dartwing_pending_cancel_signals = None
@@ -10,19 +10,111 @@ States:
 - CLOSED: Normal operation, jobs execute normally
 - OPEN: High failure rate detected, jobs are rejected
 - HALF_OPEN: Testing if the issue is resolved, limited job execution allowed
+
+Job outcomes are counted in Redis, in a ring buffer of
+CIRCUIT_BREAKER_WINDOW_BUCKETS time buckets per Job Type and organization
+that together span the failure rate window:
+    dartwing_core:background_job:circuit:<job_type>:<organization>:counts
+One script call per outcome updates the counts and decides, from a fixed
+number of buckets, whether the circuit trips. The Background Job Circuit
+Breaker table holds the durable state (and its history for auditing); its
+state is mirrored in the ...:state key so outcomes are handled without
+reading it.
+
+Each process also keeps all breaker rows of a site in memory (only open
+and half-open circuits have rows), so check_circuit_breaker() runs no
+queries. RQ work horses live for one job and always start cold, so the
+rows are also shared in Redis under the current version
+(dartwing_core:background_job:circuit:breakers:<version>, see
+shared_rows.py): a cold process loads them with one cache read, and only
+the first process after a state change queries the table. Every state change bumps a version in Redis and
+publishes it on
+    dartwing_core:background_job:circuit:invalidate
+Long-lived workers (dartwing-async-worker, dartwing-process-worker) listen on that channel and drop
+their copy on each message; other processes (e.g. RQ work horses, which
+live for one job) compare the version at most every
+CIRCUIT_STATE_CHECK_SECONDS. Once an open circuit's cooldown has elapsed,
+at most CIRCUIT_BREAKER_HALF_OPEN_PROBES jobs at a time run as probes;
+the other jobs are deferred until the probes decide the circuit.
 """
 
+import os
+import threading
+import time
+
 import frappe
 from frappe.utils import now_datetime, add_to_date
 from typing import Optional, Tuple
 from enum import Enum
 
+from dartwing.dartwing_core.background_jobs import shared_rows
 from dartwing.dartwing_core.background_jobs.config import (
     CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+    CIRCUIT_STATE_CHECK_SECONDS,
+    CIRCUIT_STATE_LISTENER_CHECK_SECONDS,
+    DEFAULT_TIMEOUT_SECONDS,
     CIRCUIT_BREAKER_MIN_SAMPLES,
     CIRCUIT_BREAKER_WINDOW_MINUTES,
     CIRCUIT_BREAKER_COOLDOWN_MINUTES,
+    CIRCUIT_BREAKER_STATE_TTL_SECONDS,
+    CIRCUIT_STATE_CACHE_TTL_SECONDS,
+    CIRCUIT_BREAKER_TRIP_TTL_SECONDS,
+    CIRCUIT_BREAKER_WINDOW_BUCKETS,
 )
+from dartwing.dartwing_core.background_jobs.registry import find_job_type, get_job_type
+
+
+# KEYS: counts hash, state key
+# ARGV: now, bucket seconds, buckets, success (1/0), failure threshold,
+#       min samples, trip TTL, breaker enabled (1/0)
+# Returns {total, failed, mirrored state or "", 1 if this outcome tripped the circuit}
+_RECORD_SCRIPT = """
+local bucket = math.floor(tonumber(ARGV[1]) / tonumber(ARGV[2]))
+local buckets = tonumber(ARGV[3])
+local slot = bucket % buckets
+if tonumber(redis.call('HGET', KEYS[1], slot .. ':t') or -1) ~= bucket then
+    redis.call('HSET', KEYS[1], slot .. ':t', bucket, slot .. ':s', 0, slot .. ':f', 0)
+end
+redis.call('HINCRBY', KEYS[1], slot .. (ARGV[4] == '1' and ':s' or ':f'), 1)
+redis.call('EXPIRE', KEYS[1], buckets * tonumber(ARGV[2]) * 2)
+
+local fields = redis.call('HGETALL', KEYS[1])
+local counts = {}
+for i = 1, #fields, 2 do
+    counts[fields[i]] = tonumber(fields[i + 1])
+end
+local total, failed = 0, 0
+for i = 0, buckets - 1 do
+    if (counts[i .. ':t'] or -1) > bucket - buckets then
+        failed = failed + (counts[i .. ':f'] or 0)
+        total = total + (counts[i .. ':s'] or 0) + (counts[i .. ':f'] or 0)
+    end
+end
+
+local state = redis.call('GET', KEYS[2])
+local tripped = 0
+if not state and ARGV[8] == '1' and total >= tonumber(ARGV[6])
+        and failed >= tonumber(ARGV[5]) * total then
+    redis.call('SET', KEYS[2], 'Opening', 'EX', ARGV[7])
+    tripped = 1
+end
+return {total, failed, state or '', tripped}
+"""
+
+# KEYS: probe sorted set; ARGV: now, lease expiry, job_id, limit
+# Returns 1 if job_id holds a probe slot
+_PROBE_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], ARGV[3]) == false
+        and redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2]) - now) + 60)
+return 1
+"""
 
 
 class CircuitState(str, Enum):
@@ -37,32 +129,195 @@ class CircuitBreakerOpen(Exception):
     pass
 
 
-def check_circuit_breaker(job_type: str, organization: str) -> None:
+class CircuitBreakerProbing(CircuitBreakerOpen):
+    """Raised when a half-open circuit already runs its maximum number of probe jobs."""
+    pass
+
+
+class _SiteCircuits:
+    """Breaker rows of one site, keyed by (job_type, organization)."""
+
+    def __init__(self, breakers: dict, version):
+        self.breakers = breakers
+        self.version = version
+        self.checked_at = time.monotonic()
+
+
+_circuits = {}
+_generations = {}
+_listeners = {}
+_lock = threading.Lock()
+
+
+def _version_key() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:circuit:version")
+
+
+def _channel() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:circuit:invalidate")
+
+
+def _get_remote_version():
+    try:
+        return frappe.cache().get(_version_key())
+    except Exception:
+        # Without Redis, fall back to reloading on every check interval
+        return object()
+
+
+def _get_circuits() -> _SiteCircuits:
+    site = frappe.local.site
+    circuits = _circuits.get(site)
+
+    if circuits:
+        listener = _listeners.get(site)
+        interval = (
+            CIRCUIT_STATE_LISTENER_CHECK_SECONDS
+            if listener and listener.is_alive()
+            else CIRCUIT_STATE_CHECK_SECONDS
+        )
+        if time.monotonic() - circuits.checked_at >= interval:
+            if _get_remote_version() == circuits.version:
+                circuits.checked_at = time.monotonic()
+            else:
+                circuits = None
+
+    if circuits is None:
+        generation = _generations.get(site)
+        # Read the version before the rows (see shared_rows.load())
+        version = _get_remote_version()
+        rows, current = shared_rows.load(
+            "dartwing_core:background_job:circuit:breakers",
+            version,
+            lambda: frappe.get_all(
+                "Background Job Circuit Breaker",
+                fields=["job_type", "organization", "state", "opened_at", "reason", "cooldown_minutes"],
+            ),
+            CIRCUIT_STATE_CACHE_TTL_SECONDS,
+        )
+        # Rows that may predate the version are reloaded at the next check
+        circuits = _SiteCircuits(
+            {(row.job_type, row.organization): row for row in rows}, version if current else object()
+        )
+        with _lock:
+            # An invalidation that arrived while loading may predate our rows
+            if _generations.get(site) == generation:
+                _circuits[site] = circuits
+    return circuits
+
+
+class _InvalidationListener:
+    """Per-process pub/sub listener dropping a site's cached circuit states."""
+
+    def __init__(self, site: str, pubsub, channel: str):
+        self._site = site
+        self._pubsub = pubsub
+        self._channel = channel
+        self._pid = os.getpid()
+        self._thread = threading.Thread(
+            target=self._run, name=f"dartwing-circuit-listener-{site}", daemon=True
+        )
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        # Threads do not survive fork; a forked child falls back to version checks
+        return self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self) -> None:
+        try:
+            self._pubsub.subscribe(self._channel)
+            while True:
+                message = self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message.get("type") == "message":
+                    _drop(self._site)
+        except Exception:
+            # Until the listener is restarted, version checks take over
+            _drop(self._site)
+
+
+def _drop(site: str) -> None:
+    with _lock:
+        _circuits.pop(site, None)
+        _generations[site] = _generations.get(site, 0) + 1
+
+
+def start_invalidation_listener() -> None:
+    """
+    Keep this process's circuit states current through pub/sub.
+
+    For long-lived processes that run many jobs; call with the site
+    initialised. Does nothing if the listener is already running.
+    """
+    site = frappe.local.site
+    with _lock:
+        listener = _listeners.get(site)
+        if listener and listener.is_alive():
+            return
+        _listeners[site] = _InvalidationListener(site, frappe.cache().pubsub(), _channel())
+
+
+def check_circuit_breaker(
+    job_type: str,
+    organization: str,
+    job_id: Optional[str] = None,
+    lease_seconds: int = DEFAULT_TIMEOUT_SECONDS,
+) -> bool:
     """
     Check if circuit breaker allows job execution.
 
+    Reads the cached circuit state; no queries unless it changed. A job
+    allowed through a half-open circuit holds a probe slot until
+    release_probe() or its lease expires.
+
     Args:
         job_type: Job type name
         organization: Organization name
+        job_id: Job about to run (None: probes are not limited)
+        lease_seconds: Job timeout; a probe slot is freed after it at the latest
+
+    Returns:
+        True if the job runs as a half-open probe
 
     Raises:
         CircuitBreakerOpen: If circuit is open and job should not execute
+        CircuitBreakerProbing: If the circuit is half-open and all probe
+            slots are taken
     """
-    state, reason = get_circuit_state(job_type, organization)
+    breaker = _get_circuits().breakers.get((job_type, organization))
+    if not breaker:
+        return False
 
+    state, reason = _get_state(breaker)
     if state == CircuitState.OPEN:
         raise CircuitBreakerOpen(
             f"Circuit breaker is OPEN for job type '{job_type}' in organization '{organization}'. "
             f"Reason: {reason}"
         )
+    if job_id is None:
+        return False
 
-    # If HALF_OPEN, allow execution but we'll monitor closely
+    limit = _config_value(
+        find_job_type(job_type) or {}, "circuit_breaker_half_open_probes", CIRCUIT_BREAKER_HALF_OPEN_PROBES
+    )
+    if not _acquire_probe(job_type, organization, job_id, lease_seconds, limit):
+        raise CircuitBreakerProbing(
+            f"Circuit breaker is HALF-OPEN for job type '{job_type}' in organization "
+            f"'{organization}' and {limit} probe job(s) are already running"
+        )
+
+    if breaker.state == CircuitState.OPEN:
+        # First probe after the cooldown records the transition
+        _transition_to_half_open(job_type, organization)
+    return True
 
 
 def get_circuit_state(job_type: str, organization: str) -> Tuple[CircuitState, Optional[str]]:
     """
     Get the current circuit breaker state for a job type.
 
+    An open circuit whose cooldown has elapsed is reported Half-Open; its
+    record is only updated once a probe job runs.
+
     Args:
         job_type: Job type name
         organization: Organization name
@@ -70,25 +325,21 @@ def get_circuit_state(job_type: str, organization: str) -> Tuple[CircuitState, O
     Returns:
         Tuple of (state, reason) where reason explains why circuit is open
     """
-    # Check if there's an active circuit breaker record
-    breaker = frappe.db.get_value(
-        "Background Job Circuit Breaker",
-        {"job_type": job_type, "organization": organization},
-        ["state", "opened_at", "reason", "cooldown_minutes"],
-        as_dict=True,
-    )
+    breaker = _get_circuits().breakers.get((job_type, organization))
 
     if not breaker:
         # No breaker record = circuit is closed (normal operation)
         return CircuitState.CLOSED, None
 
+    return _get_state(breaker)
+
+
+def _get_state(breaker) -> Tuple[CircuitState, Optional[str]]:
     if breaker.state == CircuitState.OPEN:
         # Check if cooldown period has elapsed
         if breaker.opened_at and breaker.cooldown_minutes:
             cooldown_end = add_to_date(breaker.opened_at, minutes=breaker.cooldown_minutes)
             if now_datetime() >= cooldown_end:
-                # Transition to HALF_OPEN
-                _transition_to_half_open(job_type, organization)
                 return CircuitState.HALF_OPEN, None
 
         return CircuitState.OPEN, breaker.reason
@@ -96,19 +347,82 @@ def get_circuit_state(job_type: str, organization: str) -> Tuple[CircuitState, O
     return CircuitState(breaker.state), breaker.reason
 
 
+def _probe_key(job_type: str, organization: str) -> str:
+    return _key(job_type, organization, "probes")
+
+
+def _acquire_probe(job_type: str, organization: str, job_id: str, lease_seconds: int, limit: int) -> bool:
+    now = time.time()
+    try:
+        script = frappe.cache().register_script(_PROBE_SCRIPT)
+        return bool(script(
+            keys=[_probe_key(job_type, organization)],
+            args=[now, now + lease_seconds, job_id, limit],
+        ))
+    except Exception as e:
+        # Fail open, like a half-open circuit without probe limits
+        frappe.log_error(
+            f"Circuit breaker probe check failed for job {job_id}: {e}",
+            "Circuit Breaker",
+        )
+        return True
+
+
+def release_probe(job_type: str, organization: str, job_id: str) -> None:
+    """Free a half-open probe slot (best-effort; slots expire with their lease)."""
+    try:
+        frappe.cache().zrem(_probe_key(job_type, organization), job_id)
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to release circuit breaker probe of job {job_id}: {e}",
+            "Circuit Breaker",
+        )
+
+
 def record_job_outcome(job_type: str, organization: str, success: bool) -> None:
     """
     Record a job execution outcome and update circuit breaker state.
 
+    Counts the outcome in the Redis ring buffer. A Half-Open circuit closes
+    on success and reopens on failure; a closed one opens once the failure
+    rate over the window reaches the threshold (only the outcome that trips
+    it writes the breaker record).
+
     Args:
         job_type: Job type name
         organization: Organization name
         success: True if job completed successfully, False if failed
     """
     try:
-        current_state, _ = get_circuit_state(job_type, organization)
+        # Get configuration from the in-process Job Type registry
+        job_type_config = get_job_type(job_type)
+
+        # Optional circuit breaker fields on Job Type allow per-job-type
+        # customization (documented in job_type.py docstring). If not set, fall
+        # back to system-wide constants from config.py. This pattern allows
+        # circuit breaker configuration without requiring schema changes.
+        failure_threshold = _config_value(job_type_config, 'circuit_breaker_failure_threshold', CIRCUIT_BREAKER_FAILURE_THRESHOLD)
+        min_samples = _config_value(job_type_config, 'circuit_breaker_min_samples', CIRCUIT_BREAKER_MIN_SAMPLES)
+        window_minutes = _config_value(job_type_config, 'circuit_breaker_window_minutes', CIRCUIT_BREAKER_WINDOW_MINUTES)
+
+        script = frappe.cache().register_script(_RECORD_SCRIPT)
+        total, failed, state, tripped = script(
+            keys=[_key(job_type, organization, "counts"), _key(job_type, organization, "state")],
+            args=[
+                int(time.time()),
+                max(1, window_minutes * 60 // CIRCUIT_BREAKER_WINDOW_BUCKETS),
+                CIRCUIT_BREAKER_WINDOW_BUCKETS,
+                1 if success else 0,
+                failure_threshold,
+                min_samples,
+                CIRCUIT_BREAKER_TRIP_TTL_SECONDS,
+                # Disabled breakers still count, so enabling one starts with a full window
+                1 if job_type_config.get('enable_circuit_breaker') else 0,
+            ],
+        )
+        state = state.decode() if isinstance(state, bytes) else state
 
-        if current_state == CircuitState.HALF_OPEN:
+        if state == CircuitState.HALF_OPEN:
             if success:
                 # Success in HALF_OPEN state -> close the circuit
                 _close_circuit(job_type, organization)
@@ -120,9 +434,15 @@ def record_job_outcome(job_type: str, organization: str, success: bool) -> None:
                     "Job failed during half-open state",
                     cooldown_minutes=10,
                 )
-        elif current_state == CircuitState.CLOSED:
-            # Check if we should open the circuit based on recent failure rate
-            _check_and_update_failure_rate(job_type, organization)
+        elif tripped:
+            cooldown_minutes = _config_value(job_type_config, 'circuit_breaker_cooldown_minutes', CIRCUIT_BREAKER_COOLDOWN_MINUTES)
+            _open_circuit(
+                job_type,
+                organization,
+                f"Failure rate {failed / total:.1%} exceeds threshold {failure_threshold:.1%} "
+                f"({failed}/{total} jobs failed in last {window_minutes} minutes)",
+                cooldown_minutes=cooldown_minutes,
+            )
 
     except Exception as e:
         # Circuit breaker failures shouldn't break job execution
@@ -132,69 +452,43 @@ def record_job_outcome(job_type: str, organization: str, success: bool) -> None:
         )
 
 
-def _check_and_update_failure_rate(job_type: str, organization: str) -> None:
-    """
-    Check recent failure rate and open circuit if threshold exceeded.
-
-    Uses a sliding window of the last N jobs to calculate failure rate.
-    """
-    # Get configuration from Job Type
-    job_type_doc = frappe.get_doc("Job Type", job_type)
-
-    # Use getattr() with defaults to support optional circuit breaker fields on Job Type.
-    # These fields allow per-job-type customization (documented in job_type.py docstring).
-    # If not set, fall back to system-wide constants from config.py.
-    # This pattern allows circuit breaker configuration without requiring schema changes.
-    failure_threshold = getattr(job_type_doc, 'circuit_breaker_failure_threshold', CIRCUIT_BREAKER_FAILURE_THRESHOLD)
-    min_samples = getattr(job_type_doc, 'circuit_breaker_min_samples', CIRCUIT_BREAKER_MIN_SAMPLES)
-    window_minutes = getattr(job_type_doc, 'circuit_breaker_window_minutes', CIRCUIT_BREAKER_WINDOW_MINUTES)
-
-    # Skip if circuit breaker is disabled for this job type
-    if not getattr(job_type_doc, 'enable_circuit_breaker', False):
-        return
-
-    # Get recent job outcomes
-    time_threshold = add_to_date(now_datetime(), minutes=-window_minutes)
-
-    result = frappe.db.sql(
-        """
-        SELECT
-            COUNT(*) as total,
-            SUM(CASE WHEN status IN ('Failed', 'Dead Letter', 'Timed Out') THEN 1 ELSE 0 END) as failed
-        FROM `tabBackground Job`
-        WHERE job_type = %(job_type)s
-            AND organization = %(organization)s
-            AND completed_at >= %(time_threshold)s
-            AND status IN ('Completed', 'Failed', 'Dead Letter', 'Timed Out')
-        """,
-        {
-            "job_type": job_type,
-            "organization": organization,
-            "time_threshold": time_threshold,
-        },
-        as_dict=True,
+def _key(job_type: str, organization: str, suffix: str) -> str:
+    return frappe.cache().make_key(
+        f"dartwing_core:background_job:circuit:{job_type}:{organization}:{suffix}"
     )
 
-    if not result or result[0].total < min_samples:
-        # Not enough data to make a decision
-        return
-
-    total = result[0].total
-    failed = result[0].failed or 0
-    failure_rate = failed / total if total > 0 else 0
-
-    if failure_rate >= failure_threshold:
-        # Open the circuit
-        cooldown_minutes = getattr(job_type_doc, 'circuit_breaker_cooldown_minutes', CIRCUIT_BREAKER_COOLDOWN_MINUTES)
-        _open_circuit(
-            job_type,
-            organization,
-            f"Failure rate {failure_rate:.1%} exceeds threshold {failure_threshold:.1%} "
-            f"({failed}/{total} jobs failed in last {window_minutes} minutes)",
-            cooldown_minutes=cooldown_minutes,
+
+def _mirror_state(job_type: str, organization: str, state: Optional[CircuitState]) -> None:
+    """
+    Publish a committed breaker state: mirror it in Redis for
+    record_job_outcome() and invalidate every process's cached states.
+    """
+    _drop(frappe.local.site)
+    try:
+        cache = frappe.cache()
+        if state is None:
+            # A closed circuit starts over with an empty window
+            cache.delete(
+                _key(job_type, organization, "state"),
+                _key(job_type, organization, "counts"),
+                _probe_key(job_type, organization),
+            )
+        else:
+            cache.set(_key(job_type, organization, "state"), state.value, ex=CIRCUIT_BREAKER_STATE_TTL_SECONDS)
+        cache.publish(_channel(), cache.incr(_version_key()))
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to publish circuit breaker state of {job_type} in {organization}: {e}",
+            "Circuit Breaker",
         )
 
 
+def _config_value(job_type_config, fieldname: str, default):
+    """Return an optional Job Type field, or the default when unset."""
+    value = job_type_config.get(fieldname)
+    return value if value is not None else default
+
+
 def _open_circuit(job_type: str, organization: str, reason: str, cooldown_minutes: int = None) -> None:
     """Open the circuit breaker."""
     if cooldown_minutes is None:
@@ -225,6 +519,7 @@ def _open_circuit(job_type: str, organization: str, reason: str, cooldown_minute
         doc.insert(ignore_permissions=True)
 
     frappe.db.commit()
+    _mirror_state(job_type, organization, CircuitState.OPEN)
 
     # Log as error since circuit opening is a system degradation event
     # This allows monitoring/alerting systems to track circuit breaker activations
@@ -235,11 +530,12 @@ def _open_circuit(job_type: str, organization: str, reason: str, cooldown_minute
 
 
 def _transition_to_half_open(job_type: str, organization: str) -> None:
-    """Transition circuit from OPEN to HALF_OPEN."""
+    """Transition circuit from OPEN to HALF_OPEN (once, if several probes start together)."""
     existing = frappe.db.get_value(
         "Background Job Circuit Breaker",
-        {"job_type": job_type, "organization": organization},
+        {"job_type": job_type, "organization": organization, "state": CircuitState.OPEN},
         "name",
+        for_update=True,
     )
 
     if existing:
@@ -248,10 +544,11 @@ def _transition_to_half_open(job_type: str, organization: str) -> None:
         doc.reason = "Cooldown period elapsed, testing recovery"
         doc.save(ignore_permissions=True)
         frappe.db.commit()
+        _mirror_state(job_type, organization, CircuitState.HALF_OPEN)
 
 
-def _close_circuit(job_type: str, organization: str) -> None:
-    """Close the circuit breaker (delete the record)."""
+def _close_circuit(job_type: str, organization: str) -> bool:
+    """Close the circuit breaker (delete the record); returns False if it was not open."""
     existing = frappe.db.get_value(
         "Background Job Circuit Breaker",
         {"job_type": job_type, "organization": organization},
@@ -261,12 +558,15 @@ def _close_circuit(job_type: str, organization: str) -> None:
     if existing:
         frappe.delete_doc("Background Job Circuit Breaker", existing, ignore_permissions=True)
         frappe.db.commit()
+        _mirror_state(job_type, organization, None)
 
         # Log recovery as info (not error) since circuit closing is a positive event
         # Different from opening (which uses log_error) to allow filtering in monitoring
         frappe.logger().info(
             f"Circuit breaker CLOSED for {job_type} in {organization}. System recovered."
         )
+        return True
+    return False
 
 
 def get_open_circuits(organization: Optional[str] = None) -> list:
@@ -295,8 +595,11 @@ def manually_close_circuit(job_type: str, organization: str) -> None:
     """
     Manually close a circuit breaker (admin override).
 
+    Also clears a stale Redis mirror when no breaker record exists anymore.
+
     Args:
         job_type: Job type name
         organization: Organization name
     """
-    _close_circuit(job_type, organization)
+    if not _close_circuit(job_type, organization):
+        _mirror_state(job_type, organization, None)
@@ -2,22 +2,253 @@
 Cleanup for Background Job Engine.
 
 Provides data retention cleanup for old job records.
+
+run_retention() deletes finished jobs older than their retention period
+(Job Type retention_days, or the default) together with their execution
+logs and dependency edges, plus old execution metrics, with set-based
+DELETEs in chunks of RETENTION_CHUNK_SIZE rows. Chunks of jobs are read
+without locks in (modified, name) order per status, along the (status,
+modified) index; only then are the chunk's rows locked by primary key and
+re-checked, so no lock covers live rows or gaps. It runs until nothing is
+left or RETENTION_TIME_BUDGET_SECONDS have passed; the next run continues.
+
+Unless disabled, the re-checked jobs of each chunk are written to the cold
+archive (see archive.py) and then deleted in the same transaction; if
+archiving fails, nothing is deleted. Jobs that changed since the chunk was
+read are neither archived nor deleted.
+
+SQL deletes skip Background Job.on_trash, so what it would do for a
+finished job is done here per chunk: dependency edges and status rollup
+counts in the same transaction, artifacts and status snapshots once the
+chunk is committed.
 """
 
+import time
+
 import frappe
 from frappe.utils import add_to_date, now_datetime
 
+from dartwing.dartwing_core.background_jobs import archive
 from dartwing.dartwing_core.background_jobs.config import (
     CLEANUP_BATCH_SIZE,
     DEFAULT_RETENTION_DAYS,
+    METRICS_ROLLUP_RETENTION_DAYS,
+    METRICS_SAMPLE_RETENTION_DAYS,
+    RETENTION_CHUNK_SIZE,
+    RETENTION_TIME_BUDGET_SECONDS,
 )
 
+# Statuses a job never leaves on its own (Dead Letter only by admin retry)
+RETAINED_STATUSES = ("Completed", "Dead Letter", "Canceled")
+
+
+def run_retention(
+    default_retention_days: int = DEFAULT_RETENTION_DAYS,
+    chunk_size: int = RETENTION_CHUNK_SIZE,
+    time_budget_seconds: float = RETENTION_TIME_BUDGET_SECONDS,
+) -> dict:
+    """
+    Delete expired jobs, their logs and old metrics in chunks.
+
+    Args:
+        default_retention_days: Retention of Job Types without retention_days
+        chunk_size: Rows deleted per transaction
+        time_budget_seconds: Stop starting new chunks after this long
+
+    Returns:
+        Dict with rows deleted per table, archived (jobs written to the
+        archive), and caught_up (False if the time budget ran out before
+        everything expired was deleted)
+    """
+    from dartwing.dartwing_core.background_jobs.registry import get_job_types
+
+    deadline = time.monotonic() + time_budget_seconds
+    report = {
+        "Background Job": 0,
+        "Job Execution Log": 0,
+        "Background Job Dependency": 0,
+        "Background Job Metrics": 0,
+        "Background Job Metrics Rollup": 0,
+        "archived": 0,
+        "caught_up": True,
+    }
+
+    overrides = {
+        config.name: config.retention_days
+        for config in get_job_types()
+        if config.get("retention_days")
+    }
+    policies = [({"job_type": job_type}, days) for job_type, days in sorted(overrides.items())]
+    policies.append(({"exclude": sorted(overrides)}, default_retention_days))
+
+    archive_first = archive.is_enabled()
+    for scope, days in policies:
+        cutoff = add_to_date(now_datetime(), days=-days)
+        if not _delete_jobs(scope, cutoff, chunk_size, deadline, archive_first, report):
+            report["caught_up"] = False
+            return report
+
+    for doctype, fieldname, days in (
+        ("Background Job Metrics", "recorded_at", METRICS_SAMPLE_RETENTION_DAYS),
+        ("Background Job Metrics Rollup", "bucket_start", METRICS_ROLLUP_RETENTION_DAYS),
+    ):
+        cutoff = add_to_date(now_datetime(), days=-days)
+        if not _delete_rows(doctype, fieldname, cutoff, chunk_size, deadline, report):
+            report["caught_up"] = False
+            return report
+
+    return report
+
+
+def _delete_jobs(scope: dict, cutoff, chunk_size: int, deadline: float, archive_first: bool, report: dict) -> bool:
+    """
+    Delete expired jobs of one retention policy.
+
+    Returns:
+        True once no expired job is left, False if the deadline passed first
+    """
+    conditions = ["status = %(status)s", "modified < %(cutoff)s"]
+    values = {"cutoff": cutoff, "limit": chunk_size}
+    if "job_type" in scope:
+        conditions.append("job_type = %(job_type)s")
+        values["job_type"] = scope["job_type"]
+    elif scope["exclude"]:
+        conditions.append("job_type NOT IN %(exclude)s")
+        values["exclude"] = tuple(scope["exclude"])
+
+    # One status at a time, so the (status, modified) index yields rows in
+    # (modified, name) order without sorting
+    for status in RETAINED_STATUSES:
+        values["status"] = status
+        after = ""
+        while True:
+            if time.monotonic() >= deadline:
+                return False
+
+            jobs = frappe.db.sql(
+                f"""
+                SELECT name, modified
+                FROM `tabBackground Job`
+                WHERE {" AND ".join(conditions)} {after}
+                ORDER BY modified, name
+                LIMIT %(limit)s
+                """,
+                values,
+                as_dict=True,
+            )
+            if not jobs:
+                break
+
+            deleted = _delete_job_chunk([job.name for job in jobs], cutoff, archive_first, report)
+            frappe.db.commit()
+            _after_job_chunk(deleted)
+
+            if len(jobs) < chunk_size:
+                break
+            after = "AND (modified > %(after)s OR (modified = %(after)s AND name > %(after_name)s))"
+            values["after"], values["after_name"] = jobs[-1].modified, jobs[-1].name
+
+    return True
+
+
+def _delete_job_chunk(names: list, cutoff, archive_first: bool, report: dict) -> list:
+    """
+    Archive and delete a chunk of jobs that are still expired, with their logs and edges.
+
+    Returns:
+        Names of the jobs deleted
+    """
+    from dartwing.dartwing_core.background_jobs import status_rollup
+
+    # Lock only the chunk's rows, by primary key; jobs that changed since the
+    # chunk was read (e.g. a Dead Letter job retried) are left alone
+    values = {"names": tuple(names), "statuses": RETAINED_STATUSES, "cutoff": cutoff}
+    jobs = frappe.db.sql(
+        """
+        SELECT name, organization, job_type, priority, status
+        FROM `tabBackground Job`
+        WHERE name IN %(names)s AND status IN %(statuses)s AND modified < %(cutoff)s
+        FOR UPDATE
+        """,
+        values,
+        as_dict=True,
+    )
+    if not jobs:
+        return []
+
+    values["names"] = tuple(job.name for job in jobs)
+    if archive_first:
+        report["archived"] += archive.archive_jobs(list(values["names"]))
+
+    for doctype, condition in (
+        ("Job Execution Log", "background_job IN %(names)s"),
+        ("Background Job Dependency", "background_job IN %(names)s OR depends_on IN %(names)s"),
+        ("Background Job", "name IN %(names)s AND status IN %(statuses)s AND modified < %(cutoff)s"),
+    ):
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE {condition}", values)
+        report[doctype] += _row_count()
+
+    groups = {}
+    for job in jobs:
+        group = (job.organization, job.job_type, job.priority, job.status)
+        groups[group] = groups.get(group, 0) + 1
+    for (organization, job_type, priority, status), count in groups.items():
+        status_rollup.record_transition(organization, job_type, priority, status, None, count=count)
+
+    return list(values["names"])
+
+
+def _after_job_chunk(names: list) -> None:
+    """Remove what lives outside the database once the deletes are committed."""
+    from dartwing.dartwing_core.background_jobs import status_snapshot
+    from dartwing.dartwing_core.background_jobs.artifacts import delete_artifacts
+
+    for job_id in names:
+        delete_artifacts(job_id)
+        status_snapshot.delete(job_id)
+
+
+def _delete_rows(doctype: str, fieldname: str, cutoff, chunk_size: int, deadline: float, report: dict) -> bool:
+    """
+    Delete rows of an append-only table older than cutoff.
+
+    Returns:
+        True once no expired row is left, False if the deadline passed first
+    """
+    while time.monotonic() < deadline:
+        names = frappe.db.sql(
+            f"""
+            SELECT name FROM `tab{doctype}`
+            WHERE `{fieldname}` < %(cutoff)s
+            ORDER BY name
+            LIMIT %(limit)s
+            """,
+            {"cutoff": cutoff, "limit": chunk_size},
+            pluck=True,
+        )
+        if not names:
+            return True
+
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name IN %(names)s", {"names": tuple(names)})
+        report[doctype] += _row_count()
+        frappe.db.commit()
+
+        if len(names) < chunk_size:
+            return True
+
+    return False
+
+
+def _row_count() -> int:
+    return frappe.db.sql("SELECT ROW_COUNT()")[0][0]
+
 
 def cleanup_old_jobs(retention_days: int = DEFAULT_RETENTION_DAYS, batch_size: int = CLEANUP_BATCH_SIZE):
     """
     Delete completed/failed jobs older than retention period.
 
-    Uses batched commits to prevent long-running transactions and lock timeouts.
+    Kept for callers of the old API; runs the retention engine with
+    retention_days as the default retention and batch_size rows per chunk.
 
     Args:
         retention_days: Number of days to retain jobs (default: 30)
@@ -26,53 +257,42 @@ def cleanup_old_jobs(retention_days: int = DEFAULT_RETENTION_DAYS, batch_size: i
     Returns:
         Count of jobs deleted
     """
-    cutoff_date = add_to_date(now_datetime(), days=-retention_days)
-
-    # Get jobs to delete (terminal states only)
-    jobs = frappe.get_all(
-        "Background Job",
-        filters={
-            "status": ("in", ["Completed", "Dead Letter", "Canceled"]),
-            "modified": ("<", cutoff_date),
-        },
-        pluck="name",
-        limit=1000,  # Delete in batches
-    )
-
-    deleted_count = 0
-    for i, job_id in enumerate(jobs):
-        try:
-            frappe.delete_doc("Background Job", job_id, force=True, delete_permanently=True)
-            deleted_count += 1
-
-            # Commit every batch_size deletions to prevent long transactions
-            if (i + 1) % batch_size == 0:
-                frappe.db.commit()
-        except Exception as e:
-            frappe.log_error(
-                f"Failed to delete old job {job_id}: {e}",
-                "Background Job Cleanup",
-            )
-
-    # Final commit for remaining deletions
-    if deleted_count > 0 and deleted_count % batch_size != 0:
-        frappe.db.commit()
-
-    return deleted_count
+    return run_retention(retention_days, batch_size)["Background Job"]
 
 
 def daily_cleanup():
     """
     Scheduled task: Run daily cleanup of old jobs.
 
-    This is called by Frappe's scheduler daily.
+    This is called by Frappe's scheduler daily. Artifacts of deleted jobs are
+    removed when the delete commits; the orphan sweep catches any left behind.
     """
     try:
-        deleted = cleanup_old_jobs()
-        if deleted:
-            frappe.logger().info(f"Background Job Cleanup: Deleted {deleted} old jobs")
+        report = run_retention()
+        deleted = {
+            table: count for table, count in report.items() if table not in ("archived", "caught_up") and count
+        }
+        if deleted or not report["caught_up"]:
+            frappe.logger().info(
+                f"Background Job Cleanup: Deleted {deleted or 'nothing'}, archived {report['archived']} jobs"
+                + ("" if report["caught_up"] else "; time budget used up, continuing next run")
+            )
     except Exception as e:
+        # Release the chunk's locks; it is retried next run
+        frappe.db.rollback()
         frappe.log_error(
             f"Error during job cleanup: {e}",
             "Background Job Cleanup",
         )
+
+    try:
+        from dartwing.dartwing_core.background_jobs.artifacts import cleanup_orphaned_artifacts
+
+        removed = cleanup_orphaned_artifacts()
+        if removed:
+            frappe.logger().info(f"Background Job Cleanup: Removed artifacts of {removed} deleted jobs")
+    except Exception as e:
+        frappe.log_error(
+            f"Error during artifact cleanup: {e}",
+            "Background Job Cleanup",
+        )
@@ -0,0 +1,233 @@
+"""
+Concurrency limits for Background Job Engine.
+
+Distributed counting semaphores backed by Redis sorted sets. Each semaphore
+("scope") holds one member per running job, scored by the lease expiry, so a
+worker that dies without releasing its slot frees it once the job's timeout
+has passed. A job acquires all of its scopes atomically in one Lua call or
+none of them.
+
+Scopes:
+    job_type:<job_type>                     Job Type max_concurrency
+    job_type:<job_type>:org:<organization>  Job Type max_concurrency_per_organization
+    org:<organization>                      per-organization limit across Job Types
+                                            (Organization max_concurrent_jobs, else
+                                            site config
+                                            background_job_max_concurrency_per_organization)
+
+Jobs that find a scope full are not failed: the executor defers them through
+the delay queue (action "dispatch") without touching retry_count, backing
+off exponentially per job (see record_deferral()).
+"""
+
+import time
+from dataclasses import dataclass
+
+import frappe
+from frappe.utils import cint
+
+from dartwing.dartwing_core.background_jobs.config import (
+    CONCURRENCY_DEFER_MAX_SECONDS,
+    CONCURRENCY_LEASE_GRACE_SECONDS,
+)
+
+# KEYS: one sorted set per scope; ARGV: now, expires_at, job_id, limit per key
+# Returns 0 when acquired, otherwise the 1-based index of the full scope
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+    local limit = tonumber(ARGV[3 + i])
+    if redis.call('ZSCORE', key, ARGV[3]) == false and redis.call('ZCARD', key) >= limit then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, ARGV[2], ARGV[3])
+    redis.call('EXPIRE', key, math.ceil(tonumber(ARGV[2]) - now) + 60)
+end
+return 0
+"""
+
+
+@dataclass
+class Slot:
+    """A concurrency scope and its limit."""
+
+    scope: str
+    limit: int
+
+
+def get_slots(job_type_doc, organization: str) -> list:
+    """
+    Return the concurrency scopes that apply to a job.
+
+    Args:
+        job_type_doc: Job Type (document or cached config)
+        organization: Organization of the job
+
+    Returns:
+        List of Slot; empty if the job is not limited
+    """
+    slots = []
+    job_type = job_type_doc.name
+
+    if cint(job_type_doc.get("max_concurrency")) > 0:
+        slots.append(Slot(f"job_type:{job_type}", cint(job_type_doc.max_concurrency)))
+
+    per_org = cint(job_type_doc.get("max_concurrency_per_organization"))
+    if per_org > 0:
+        slots.append(Slot(f"job_type:{job_type}:org:{organization}", per_org))
+
+    org_limit = _get_organization_limit(organization)
+    if org_limit > 0:
+        slots.append(Slot(f"org:{organization}", org_limit))
+
+    return slots
+
+
+def _get_organization_limit(organization: str) -> int:
+    """The Organization's own concurrency limit, falling back to the site default."""
+    if organization:
+        override = cint(frappe.get_cached_value("Organization", organization, "max_concurrent_jobs"))
+        if override > 0:
+            return override
+    return cint(frappe.conf.get("background_job_max_concurrency_per_organization"))
+
+
+def acquire(job_id: str, slots: list, lease_seconds: int) -> Slot | None:
+    """
+    Take a slot in every scope for job_id, or none of them.
+
+    Re-acquiring for a job that already holds its slots (e.g. a redelivered
+    token) succeeds and extends the lease.
+
+    Args:
+        job_id: Background Job ID
+        slots: Scopes from get_slots()
+        lease_seconds: Job timeout; the lease expires after it plus a grace
+            period if the worker never releases it
+
+    Returns:
+        None if acquired, otherwise the first Slot that is full
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    if not slots:
+        return None
+
+    cache = frappe.cache()
+    now = time.time()
+    keys = [_key(slot.scope) for slot in slots]
+
+    script = cache.register_script(_ACQUIRE_SCRIPT)
+    full = script(
+        keys=keys,
+        args=[now, now + lease_seconds + CONCURRENCY_LEASE_GRACE_SECONDS, job_id, *[slot.limit for slot in slots]],
+    )
+    if full:
+        return slots[int(full) - 1]
+
+    # Remember scopes and limits for get_usage()
+    cache.hset(_key("limits"), mapping={slot.scope: slot.limit for slot in slots})
+    return None
+
+
+def release(job_id: str, slots: list) -> None:
+    """Release job_id's slots and reset its deferral count (best-effort; leases expire on their own)."""
+    if not slots:
+        return
+
+    try:
+        pipe = frappe.cache().pipeline(transaction=False)
+        for slot in slots:
+            pipe.zrem(_key(slot.scope), job_id)
+        pipe.delete(_key(f"deferrals:{job_id}"))
+        pipe.execute()
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to release concurrency slots for job {job_id}: {e}",
+            "Background Job Concurrency",
+        )
+
+
+def record_deferral(job_id: str) -> int:
+    """
+    Count a deferral of job_id.
+
+    The count is kept until the job releases its slots, or expires after
+    twice CONCURRENCY_DEFER_MAX_SECONDS without a deferral.
+
+    Returns:
+        Number of times the job has been deferred, including this one
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    key = _key(f"deferrals:{job_id}")
+    pipe = frappe.cache().pipeline(transaction=False)
+    pipe.incr(key)
+    pipe.expire(key, CONCURRENCY_DEFER_MAX_SECONDS * 2)
+    count, _expire = pipe.execute()
+    return int(count)
+
+
+def get_usage(organizations: list | None = None) -> list:
+    """
+    Report current slot usage of every limited scope.
+
+    Args:
+        organizations: Only report scopes of these organizations (None: all)
+
+    Returns:
+        List of dicts with scope, job_type, organization, limit and in_use
+    """
+    cache = frappe.cache()
+    limits = {
+        _decode(scope): int(limit)
+        for scope, limit in (cache.hgetall(_key("limits")) or {}).items()
+    }
+
+    scopes = []
+    for scope, limit in sorted(limits.items()):
+        job_type, organization = _parse_scope(scope)
+        if organizations is not None and organization not in organizations:
+            continue
+        scopes.append((scope, job_type, organization, limit))
+    if not scopes:
+        return []
+
+    now = time.time()
+    pipe = cache.pipeline(transaction=False)
+    for scope, *_rest in scopes:
+        pipe.zcount(_key(scope), f"({now}", "+inf")
+    counts = pipe.execute()
+
+    return [
+        {
+            "scope": scope,
+            "job_type": job_type,
+            "organization": organization,
+            "limit": limit,
+            "in_use": int(in_use),
+        }
+        for (scope, job_type, organization, limit), in_use in zip(scopes, counts)
+    ]
+
+
+def _key(scope: str) -> str:
+    return frappe.cache().make_key(f"dartwing_core:background_job:concurrency:{scope}")
+
+
+def _parse_scope(scope: str) -> tuple:
+    """Split a scope into (job_type, organization)."""
+    if scope.startswith("org:"):
+        return None, scope[len("org:"):]
+
+    job_type, _sep, organization = scope[len("job_type:"):].partition(":org:")
+    return job_type, organization or None
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
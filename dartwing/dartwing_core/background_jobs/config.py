@@ -20,8 +20,64 @@ MAX_RATE_LIMIT_WINDOW_SECONDS = 86400
 # Default deduplication window in seconds (5 minutes)
 DEFAULT_DEDUPLICATION_WINDOW_SECONDS = 300
 
-# Delay before retrying a job with pending dependency
-DEPENDENCY_RETRY_DELAY_SECONDS = 30
+# Relative share of dispatch turns per priority among the priorities sharing
+# an RQ queue (smooth weighted round-robin)
+DISPATCH_PRIORITY_WEIGHTS = {
+    "Critical": 8,
+    "High": 4,
+    "Normal": 2,
+    "Low": 1,
+}
+
+# RQ queue of every dispatch token. Tokens are generic and choose their job
+# when they start, so with one queue the weights above arbitrate every
+# priority against every other instead of RQ's strict queue order
+DISPATCH_QUEUE = "default"
+
+# RQ timeout of a dispatch token. The job a token runs is chosen when it
+# starts, so this covers the 24 hour maximum Job Type timeout; once the job
+# is chosen the limit is narrowed to the job's own timeout plus the grace below
+DISPATCH_TOKEN_TIMEOUT_SECONDS = 86400 + 300
+
+# Time after a dispatched job's timeout for the executor to record the
+# outcome before RQ kills the work horse
+DISPATCH_JOB_TIMEOUT_GRACE_SECONDS = 120
+
+# Queued jobs older than this that are in no backlog are dispatched again by
+# the safety-net scan (e.g. after a push failed once the job was committed)
+DISPATCH_SAFETY_NET_MINUTES = 10
+
+# Queued jobs checked per page of the safety-net scan
+DISPATCH_SAFETY_NET_BATCH_SIZE = 500
+
+# Extra lifetime of a concurrency slot lease beyond the job timeout, after
+# which a slot held by a dead worker is reclaimed
+CONCURRENCY_LEASE_GRACE_SECONDS = 60
+
+# Delay before a job that found its concurrency limit full is dispatched
+# again. It doubles with each further deferral of the same job up to the
+# maximum below, jittered down by up to 50%; deferrals do not consume retry
+# attempts
+CONCURRENCY_DEFER_SECONDS = 2
+
+# Longest deferral delay; a job's deferral count is forgotten after twice
+# this long without a deferral
+CONCURRENCY_DEFER_MAX_SECONDS = 60
+
+# Time budget of one delay queue drainer (started every minute by the scheduler)
+DELAY_QUEUE_DRAIN_SECONDS = 55
+
+# Maximum delay queue entries popped per Redis call
+DELAY_QUEUE_BATCH_SIZE = 500
+
+# Retries overdue by this long are re-queued by the database safety-net scan
+RETRY_SCAN_GRACE_SECONDS = 60
+
+# Maximum jobs re-queued per safety-net scan
+RETRY_SCAN_BATCH_SIZE = 500
+
+# Maximum number of parent jobs a single job can depend on
+MAX_JOB_DEPENDENCIES = 50
 
 # Default batch size for cleanup operations
 CLEANUP_BATCH_SIZE = 100
@@ -29,14 +85,164 @@ CLEANUP_BATCH_SIZE = 100
 # Default retention period for completed jobs in days
 DEFAULT_RETENTION_DAYS = 30
 
-# Lock timeout for deduplication in seconds
-DEDUPLICATION_LOCK_TIMEOUT_SECONDS = 30
-
 # Progress update throttle interval in seconds (minimum time between updates)
 PROGRESS_THROTTLE_SECONDS = 1.0
 
+# Seconds between writes of buffered progress to the Background Job row
+# (site config: background_job_progress_flush_seconds)
+PROGRESS_FLUSH_INTERVAL_SECONDS = 5.0
+
 # Circuit breaker default configuration
 CIRCUIT_BREAKER_FAILURE_THRESHOLD = 0.5  # 50% failure rate triggers circuit open
 CIRCUIT_BREAKER_MIN_SAMPLES = 10  # Minimum jobs required before opening circuit
 CIRCUIT_BREAKER_WINDOW_MINUTES = 30  # Time window for failure rate calculation
 CIRCUIT_BREAKER_COOLDOWN_MINUTES = 15  # Wait time before testing recovery
+
+# Maximum number of jobs accepted by a single submit_jobs_batch() call
+MAX_BATCH_SIZE = 5000
+
+# Rows per multi-row INSERT when bulk-inserting batch jobs
+BATCH_INSERT_CHUNK_SIZE = 1000
+
+# Uncompressed bytes per job artifact chunk (unit of compression and of range reads)
+ARTIFACT_CHUNK_SIZE = 1024 * 1024
+
+# zlib level for artifact chunks (1 = fastest, 9 = smallest)
+ARTIFACT_COMPRESSION_LEVEL = 6
+
+# Largest artifact a handler may write, uncompressed
+ARTIFACT_MAX_SIZE_BYTES = 2 * 1024 * 1024 * 1024
+
+# Maximum number of artifacts per job
+ARTIFACT_MAX_PER_JOB = 100
+
+# Minimum seconds between cancellation checks of a running job (bounds cancel latency)
+CANCEL_CHECK_INTERVAL_SECONDS = 0.5
+
+# Lifetime of a cancellation signal in Redis; longer than any job timeout
+CANCEL_SIGNAL_TTL_SECONDS = 2 * 86400
+
+# Maximum number of jobs accepted by a single cancel_jobs() call
+MAX_BULK_CANCEL_JOBS = 1000
+
+# Seconds between database status checks of a running job, a safety net for
+# lost cancellation signals
+CANCEL_DB_CHECK_INTERVAL_SECONDS = 30
+
+# Idle lifetime of a job's Redis status snapshot (refreshed on every update)
+STATUS_SNAPSHOT_TTL_SECONDS = 3600
+
+# How long a positive organization access check is reused by status polls
+STATUS_ACCESS_CACHE_SECONDS = 60
+
+# Default and maximum time a wait_for_job() call blocks, in seconds (kept
+# below common proxy read timeouts)
+WAIT_FOR_JOB_DEFAULT_TIMEOUT_SECONDS = 25
+WAIT_FOR_JOB_MAX_TIMEOUT_SECONDS = 50
+
+# Waiters re-read the snapshot at least this often in case an event was missed
+WAIT_FOR_JOB_RECHECK_SECONDS = 2.0
+
+# How often a worker checks whether Job Types changed in another process
+JOB_TYPE_REGISTRY_CHECK_SECONDS = 1.0
+
+# Lifetime of the Job Type configs shared in Redis; a version bump switches
+# to a new key, so this only bounds how long superseded copies linger
+JOB_TYPE_REGISTRY_CACHE_TTL_SECONDS = 86400
+
+# Job Type execution modes: handlers run in a thread of the worker (default)
+# or in a pooled child process that is killed at the timeout
+EXECUTION_MODE_THREAD = "Thread"
+EXECUTION_MODE_PROCESS = "Process"
+
+# Idle handler processes kept per site for reuse (a dartwing-process-worker
+# keeps at least one per job it runs at once)
+PROCESS_POOL_MAX_IDLE = 2
+
+# Process mode jobs one dartwing-process-worker runs at once
+PROCESS_WORKER_DEFAULT_CONCURRENCY = 4
+
+# Jobs a handler process runs before it is replaced (bounds leaked memory)
+PROCESS_MAX_JOBS_PER_CHILD = 100
+
+# How often the memory (RSS) of a running handler process is checked
+PROCESS_MEMORY_CHECK_SECONDS = 0.5
+
+# Time a new handler process may take to start and connect to the site; the
+# job's timeout only starts once it has
+PROCESS_START_TIMEOUT_SECONDS = 60
+
+# Jobs with async def handlers one dartwing-async-worker process runs at once
+ASYNC_WORKER_DEFAULT_CONCURRENCY = 200
+
+# Async and process workers announce themselves this often; executors only
+# hand jobs to them while the announcement is younger than the TTL
+ASYNC_WORKER_HEARTBEAT_SECONDS = 5
+ASYNC_WORKER_HEARTBEAT_TTL_SECONDS = 15
+
+# Execution log entries buffered in one transaction before they are written
+# ahead of the commit
+EXECUTION_LOG_MAX_BUFFER = 500
+
+# Execution metrics: finished jobs are counted in Redis per minute bucket and
+# flushed to the rollup table by the minutely scheduler; a sampled share of
+# them (Job Type metrics_sample_rate, failures always) is also kept as an
+# individual Background Job Metrics row
+METRICS_ROLLUP_BUCKET_SECONDS = 60
+METRICS_DEFAULT_SAMPLE_RATE = 1.0
+
+# Samples written per multi-row insert when flushing metrics
+METRICS_FLUSH_BATCH_SIZE = 1000
+
+# Unflushed metrics expire from Redis after this long
+METRICS_BUFFER_TTL_SECONDS = 86400
+
+# Rollups keep a latency sketch (see sketch.py) per group: percentiles are
+# estimated to within this relative error; shorter durations count as the
+# minimum
+METRICS_SKETCH_RELATIVE_ACCURACY = 0.01
+METRICS_SKETCH_MIN_SECONDS = 0.001
+
+# Job status rollup rows older than this are folded into one baseline row
+# per group (must cover the longest window read from them)
+METRICS_STATUS_ROLLUP_COMPACT_HOURS = 48
+
+# Circuit breaker outcome counts: the failure rate window is split into this
+# many ring-buffer buckets in Redis (the window slides one bucket at a time)
+CIRCUIT_BREAKER_WINDOW_BUCKETS = 30
+
+# Redis mirror of a breaker's Open/Half-Open state; the breaker table stays
+# authoritative, so a lost or stale mirror only delays outcome handling
+CIRCUIT_BREAKER_STATE_TTL_SECONDS = 86400
+
+# A tripped circuit is marked Opening until its breaker record is written;
+# the mark expires if that fails, so counting resumes
+CIRCUIT_BREAKER_TRIP_TTL_SECONDS = 60
+
+# Jobs that may run at once as probes of a half-open circuit (Job Type
+# circuit_breaker_half_open_probes overrides); other jobs are deferred
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = 3
+
+# How often a process compares its cached circuit states with the version
+# in Redis: without a pub/sub listener, and as a safety net with one
+CIRCUIT_STATE_CHECK_SECONDS = 1
+CIRCUIT_STATE_LISTENER_CHECK_SECONDS = 60
+
+# Lifetime of the breaker rows shared in Redis; a state change switches to a
+# new version key, so this only bounds how long superseded copies linger
+CIRCUIT_STATE_CACHE_TTL_SECONDS = 86400
+
+# Retention deletes run in chunks of this many rows, one transaction each,
+# until caught up or out of time (the next run continues where it stopped)
+RETENTION_CHUNK_SIZE = 1000
+RETENTION_TIME_BUDGET_SECONDS = 600
+
+# Execution metrics samples and rollups older than this are deleted by the
+# retention run (rollups feed the dashboard's longer windows)
+METRICS_SAMPLE_RETENTION_DAYS = 30
+METRICS_ROLLUP_RETENTION_DAYS = 90
+
+# Expired jobs are archived (see archive.py) in gzip members of this many
+# jobs each; a lookup decompresses one member
+JOB_ARCHIVE_BLOCK_SIZE = 100
+JOB_ARCHIVE_COMPRESSION_LEVEL = 6
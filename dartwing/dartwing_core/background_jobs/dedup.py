@@ -0,0 +1,114 @@
+"""
+Deduplication index for Background Job Engine.
+
+Maps (organization, job_hash) to the id of the job that currently owns it.
+A submission claims the key with an atomic set-if-absent whose TTL equals the
+Job Type deduplication window; if the key already exists the same script
+returns the owning job id, so duplicates are detected in a single round trip
+without a distributed lock or a database lookup.
+
+Claims are released (compare-and-delete) when the owning job reaches a
+terminal state, so a job that finishes early does not block resubmission for
+the rest of the window.
+"""
+
+from typing import Optional
+
+import frappe
+
+# KEYS[1]: index key; ARGV: job_id, ttl_seconds
+# Returns nil when claimed, otherwise the id of the job that owns the key
+_CLAIM_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    return false
+end
+return redis.call('GET', KEYS[1])
+"""
+
+# KEYS[1]: index key; ARGV: job_id
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _key(organization: str, job_hash: str) -> str:
+    return frappe.cache().make_key(
+        f"dartwing_core:background_job:dedup:{organization}:{job_hash}"
+    )
+
+
+def _decode(value) -> Optional[str]:
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def claim(organization: str, job_hash: str, job_id: str, window_seconds: int) -> Optional[str]:
+    """
+    Claim (organization, job_hash) for job_id.
+
+    Args:
+        organization: Organization name
+        job_hash: Hash from engine.generate_job_hash()
+        job_id: Name the new job will be inserted with
+        window_seconds: Deduplication window (claim TTL)
+
+    Returns:
+        None if the claim succeeded, otherwise the id of the existing job
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    script = frappe.cache().register_script(_CLAIM_SCRIPT)
+    return _decode(script(keys=[_key(organization, job_hash)], args=[job_id, window_seconds]))
+
+
+def claim_many(organization: str, claims: list, window_seconds: int) -> dict:
+    """
+    Claim many (organization, job_hash) keys in one pipelined round trip.
+
+    Args:
+        organization: Organization name
+        claims: List of (job_hash, job_id) tuples
+        window_seconds: Deduplication window (claim TTL)
+
+    Returns:
+        Dict of {job_hash: existing job id} for the hashes that were already
+        claimed; hashes missing from the result were claimed successfully
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    cache = frappe.cache()
+    script = cache.register_script(_CLAIM_SCRIPT)
+    pipe = cache.pipeline(transaction=False)
+    for job_hash, job_id in claims:
+        script(keys=[_key(organization, job_hash)], args=[job_id, window_seconds], client=pipe)
+
+    existing = {}
+    for (job_hash, _job_id), result in zip(claims, pipe.execute()):
+        if result is not None:
+            existing[job_hash] = _decode(result)
+    return existing
+
+
+def release(organization: str, job_hash: str, job_id: str) -> None:
+    """
+    Release a claim if it is still owned by job_id.
+
+    Best-effort: the claim expires with its TTL if Redis is unavailable.
+    """
+    if not job_hash:
+        return
+
+    try:
+        script = frappe.cache().register_script(_RELEASE_SCRIPT)
+        script(keys=[_key(organization, job_hash)], args=[job_id])
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to release deduplication claim for job {job_id}: {e}",
+            "Background Job Deduplication",
+        )
@@ -0,0 +1,210 @@
+"""
+Delay queue for Background Job Engine.
+
+Time-ordered queue of deferred actions (e.g. a retry after backoff) backed by
+a Redis sorted set scored by due time. Members are "<action>:<job_id>", so
+scheduling the same action for a job twice keeps a single entry.
+
+A drain loop started by the scheduler every minute (or right away when an
+entry is due sooner and no drainer is running) pops due members with one
+Lua call and runs their action, sleeping until the next due time (at most a
+second) in between; actions therefore fire within about a second of their
+due time regardless of volume. Only one drainer runs per site (SET NX lease),
+and the loop exits as soon as nothing is due before its time budget ends, so
+it only occupies a worker while deferred work is imminent.
+
+Redis is not the durable record: each action's owner (e.g. Background Job's
+next_retry_at) must keep enough state in the database for a slower safety-net
+scan to recover entries lost with Redis.
+"""
+
+import time
+
+import frappe
+
+from dartwing.dartwing_core.background_jobs.config import (
+    DELAY_QUEUE_BATCH_SIZE,
+    DELAY_QUEUE_DRAIN_SECONDS,
+)
+
+# Action name -> dotted path of a callable taking the job id
+ACTIONS = {
+    "retry": "dartwing.dartwing_core.background_jobs.retry.run_scheduled_retry",
+    "dispatch": "dartwing.dartwing_core.background_jobs.dispatch.redispatch",
+}
+
+# Longest sleep between polls; bounds the delay for newly scheduled entries
+_MAX_POLL_INTERVAL_SECONDS = 1.0
+
+# KEYS[1]: sorted set; ARGV: now, limit
+# Returns the due members and removes them atomically
+_POP_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+# KEYS[1]: lease key; ARGV: token
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _queue_key() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:delayed")
+
+
+def _lease_key() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:delayed:drainer")
+
+
+def schedule(action: str, job_id: str, due_at: float) -> None:
+    """
+    Schedule an action for a job.
+
+    Args:
+        action: Key of ACTIONS
+        job_id: Background Job ID passed to the action
+        due_at: Unix timestamp at which the action should run
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown delay queue action: {action}")
+
+    cache = frappe.cache()
+    cache.zadd(_queue_key(), {f"{action}:{job_id}": due_at})
+
+    # Short delays should not wait for the next scheduler tick to start a drainer
+    if due_at - time.time() < DELAY_QUEUE_DRAIN_SECONDS and not cache.exists(_lease_key()):
+        _start_drainer()
+
+
+def unschedule(action: str, job_id: str) -> None:
+    """Remove a scheduled action (best-effort)."""
+    try:
+        frappe.cache().zrem(_queue_key(), f"{action}:{job_id}")
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to unschedule {action} for job {job_id}: {e}",
+            "Background Job Delay Queue",
+        )
+
+
+def get_scheduled(action: str, job_ids: list) -> set:
+    """Return the job IDs among job_ids that have the action scheduled."""
+    if not job_ids:
+        return set()
+
+    pipe = frappe.cache().pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.zscore(_queue_key(), f"{action}:{job_id}")
+    return {job_id for job_id, score in zip(job_ids, pipe.execute()) if score is not None}
+
+
+def pop_due(now: float = None, limit: int = DELAY_QUEUE_BATCH_SIZE) -> list:
+    """
+    Atomically remove and return members that are due.
+
+    Returns:
+        List of (action, job_id) tuples
+    """
+    script = frappe.cache().register_script(_POP_DUE_SCRIPT)
+    items = script(keys=[_queue_key()], args=[now if now is not None else time.time(), limit])
+
+    due = []
+    for item in items:
+        if isinstance(item, bytes):
+            item = item.decode()
+        action, _sep, job_id = item.partition(":")
+        due.append((action, job_id))
+    return due
+
+
+def next_due_at() -> float | None:
+    """Return the due time of the earliest member, or None if empty."""
+    head = frappe.cache().zrange(_queue_key(), 0, 0, withscores=True)
+    return float(head[0][1]) if head else None
+
+
+def drain(max_seconds: float = DELAY_QUEUE_DRAIN_SECONDS) -> int:
+    """
+    Run due actions until nothing is due within the time budget.
+
+    Called every minute by the scheduler. Returns immediately if another
+    drainer holds the lease.
+
+    Args:
+        max_seconds: Time budget of this drainer
+
+    Returns:
+        Number of actions run
+    """
+    cache = frappe.cache()
+    token = frappe.generate_hash(length=12)
+    if not cache.set(_lease_key(), token, nx=True, ex=int(max_seconds) + 10):
+        return 0
+
+    deadline = time.monotonic() + max_seconds
+    processed = 0
+    try:
+        while True:
+            for action, job_id in pop_due():
+                _run_action(action, job_id)
+                processed += 1
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            next_due = next_due_at()
+            if next_due is None or next_due - time.time() > remaining:
+                # Nothing due before the next scheduler run starts a drainer
+                break
+
+            time.sleep(min(max(next_due - time.time(), 0.05), _MAX_POLL_INTERVAL_SECONDS))
+    finally:
+        cache.register_script(_RELEASE_LEASE_SCRIPT)(keys=[_lease_key()], args=[token])
+
+    # Hand over to a fresh drainer instead of leaving imminent entries to the
+    # next scheduler tick
+    next_due = next_due_at()
+    if next_due is not None and next_due - time.time() < max_seconds:
+        _start_drainer()
+
+    return processed
+
+
+def _start_drainer() -> None:
+    """Start a drainer in the background; extra ones exit on the lease."""
+    frappe.enqueue(
+        "dartwing.dartwing_core.background_jobs.scheduler.drain_delay_queue",
+        queue="short",
+    )
+
+
+def _run_action(action: str, job_id: str) -> None:
+    """Run one action in its own transaction; failures are logged, not raised."""
+    path = ACTIONS.get(action)
+    if not path:
+        frappe.log_error(
+            f"Unknown delay queue action '{action}' for job {job_id}",
+            "Background Job Delay Queue",
+        )
+        return
+
+    try:
+        frappe.get_attr(path)(job_id)
+        frappe.db.commit()
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(
+            f"Delay queue action '{action}' failed for job {job_id}: {e}",
+            "Background Job Delay Queue",
+        )
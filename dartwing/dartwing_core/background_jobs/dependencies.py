@@ -0,0 +1,384 @@
+"""
+Dependency graph for Background Job Engine.
+
+A job may wait for any number of parent jobs. Each edge is a Background Job
+Dependency row (background_job waits for depends_on); Background Job's own
+depends_on field keeps the first parent for display and backward
+compatibility.
+
+Jobs with unmet dependencies stay Pending and are not enqueued. When a parent
+completes, executor._handle_success calls release_dependents(), which enqueues
+every child whose last parent just completed. A parent that ends in Dead
+Letter or Canceled cascades that state to all of its descendants. The
+minutely scheduler scan (release_ready_jobs) is only a safety net for releases
+lost to a crash between the parent's commit and the release.
+
+Edges are only created together with the child and only point at jobs that
+already exist, so the graph cannot contain cycles.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+
+from dartwing.dartwing_core.background_jobs.config import MAX_JOB_DEPENDENCIES
+
+# Parent statuses that can never lead to completion
+FAILED_PARENT_STATUSES = ("Dead Letter", "Canceled")
+
+# Child statuses a failed parent is cascaded to (not yet running)
+WAITING_STATUSES = ("Pending", "Queued")
+
+
+def normalize_parents(depends_on) -> list:
+    """
+    Normalize the depends_on argument of submit_job() to a list of job ids.
+
+    Accepts a single job id, a list of ids, or a JSON / comma-separated
+    string of ids (as sent by API clients). Duplicates are dropped, order is
+    kept.
+    """
+    if not depends_on:
+        return []
+
+    if isinstance(depends_on, str):
+        value = depends_on.strip()
+        if value.startswith("["):
+            depends_on = json.loads(value)
+        else:
+            depends_on = value.split(",")
+
+    parents = []
+    for parent in depends_on:
+        parent = (parent or "").strip()
+        if parent and parent not in parents:
+            parents.append(parent)
+    return parents
+
+
+def validate_parents(organization: str, parents: list) -> dict:
+    """
+    Ensure all parents exist and belong to the organization.
+
+    Args:
+        organization: Organization of the child job
+        parents: Parent job ids from normalize_parents()
+
+    Returns:
+        Dict of {parent job id: status}
+
+    Raises:
+        frappe.ValidationError: Unknown parent, parent in another
+            organization, or too many parents
+    """
+    if len(parents) > MAX_JOB_DEPENDENCIES:
+        frappe.throw(
+            _("A job cannot depend on more than {0} jobs").format(MAX_JOB_DEPENDENCIES)
+        )
+
+    rows = frappe.get_all(
+        "Background Job",
+        filters={"name": ("in", parents)},
+        fields=["name", "organization", "status"],
+        ignore_permissions=True,
+    )
+    found = {row.name: row for row in rows}
+
+    for parent in parents:
+        row = found.get(parent)
+        if not row:
+            frappe.throw(_("Dependency job '{0}' not found").format(parent))
+        if row.organization != organization:
+            frappe.throw(_("Dependent job must be in the same organization"))
+
+    return {row.name: row.status for row in rows}
+
+
+def add_dependencies(job, parents: list) -> None:
+    """
+    Record the dependency edges of a newly inserted job.
+
+    Args:
+        job: Background Job document (already inserted)
+        parents: Validated parent job ids
+    """
+    if not parents:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        "Background Job Dependency",
+        [
+            "name", "owner", "creation", "modified", "modified_by", "docstatus",
+            "background_job", "depends_on", "organization",
+        ],
+        [
+            (
+                frappe.generate_hash(length=10), user, now, now, user, 0,
+                job.name, parent, job.organization,
+            )
+            for parent in parents
+        ],
+    )
+
+
+def get_parent_state(job_id: str) -> tuple:
+    """
+    Summarize the state of a job's parents.
+
+    Returns:
+        ("ready", None) if every parent completed (or the job has none),
+        ("failed", (parent, status)) if a parent can no longer complete,
+        ("waiting", None) otherwise
+    """
+    parents = frappe.db.sql(
+        """
+        SELECT d.depends_on, p.status
+        FROM `tabBackground Job Dependency` d
+        INNER JOIN `tabBackground Job` p ON p.name = d.depends_on
+        WHERE d.background_job = %s
+        """,
+        (job_id,),
+    )
+    if not parents:
+        # Jobs submitted before the dependency graph only have depends_on
+        depends_on = frappe.db.get_value("Background Job", job_id, "depends_on")
+        if depends_on:
+            status = frappe.db.get_value("Background Job", depends_on, "status")
+            parents = [(depends_on, status)] if status else []
+
+    waiting = False
+    for parent, status in parents:
+        if status in FAILED_PARENT_STATUSES:
+            return "failed", (parent, status)
+        if status != "Completed":
+            waiting = True
+    return ("waiting", None) if waiting else ("ready", None)
+
+
+def release_dependents(parent_id: str) -> list:
+    """
+    Enqueue children of a completed job whose last parent just completed.
+
+    Called right after the parent's completion is committed. If two parents of
+    a child complete concurrently, the one that commits last sees both and
+    releases the child; release_job() makes a double release harmless.
+
+    Args:
+        parent_id: Job that just completed
+
+    Returns:
+        List of released job ids
+    """
+    children = frappe.get_all(
+        "Background Job Dependency",
+        filters={"depends_on": parent_id},
+        pluck="background_job",
+        ignore_permissions=True,
+    )
+    if not children:
+        return []
+
+    released = [job_id for job_id in _get_ready_jobs(children) if release_job(job_id)]
+    frappe.db.commit()
+    return released
+
+
+def release_job(job_id: str) -> bool:
+    """
+    Enqueue a Pending job whose dependencies are satisfied.
+
+    Locks the row so concurrent releases of the same job enqueue it once.
+
+    Returns:
+        True if the job was enqueued by this call
+    """
+    from dartwing.dartwing_core.background_jobs.engine import _enqueue_job
+
+    status = frappe.db.get_value("Background Job", job_id, "status", for_update=True)
+    if status != "Pending":
+        return False
+
+    _enqueue_job(frappe.get_doc("Background Job", job_id))
+    return True
+
+
+def cascade_failure(parent_id: str, parent_status: str) -> list:
+    """
+    Propagate a parent's Dead Letter or Canceled status to its descendants.
+
+    Descendants that have not started yet (Pending or Queued) get the same
+    status: Canceled if the parent was canceled, Dead Letter otherwise.
+    Descendants are walked breadth-first here instead of recursively through
+    each child's on_update.
+
+    Args:
+        parent_id: Job that reached a failed terminal status
+        parent_status: "Dead Letter" or "Canceled"
+
+    Returns:
+        List of job ids that were updated
+    """
+    updated = []
+    frontier = [(parent_id, parent_status)]
+
+    while frontier:
+        failed_parent, failed_status = frontier.pop(0)
+        children = frappe.get_all(
+            "Background Job Dependency",
+            filters={"depends_on": failed_parent},
+            pluck="background_job",
+            ignore_permissions=True,
+        )
+        if not children:
+            continue
+
+        waiting = frappe.get_all(
+            "Background Job",
+            filters={"name": ("in", children), "status": ("in", WAITING_STATUSES)},
+            pluck="name",
+            ignore_permissions=True,
+        )
+        for job_id in waiting:
+            job = frappe.get_doc("Background Job", job_id, for_update=True)
+            if job.status not in WAITING_STATUSES:
+                continue
+
+            fail_waiting_job(job, failed_parent, failed_status)
+            updated.append(job_id)
+            frontier.append((job_id, job.status))
+
+    return updated
+
+
+def fail_waiting_job(job, parent_id: str, parent_status: str) -> None:
+    """
+    Move a job that can no longer run because a parent failed.
+
+    The job becomes Canceled if the parent was canceled, Dead Letter
+    otherwise. Its own descendants are handled by the caller
+    (cascade_failure), not by the job's on_update.
+
+    Args:
+        job: Pending or Queued Background Job document
+        parent_id: Parent that failed
+        parent_status: Status of the failed parent
+    """
+    from dartwing.dartwing_core.background_jobs.progress import publish_job_status_changed
+
+    old_status = job.status
+    job.status = "Canceled" if parent_status == "Canceled" else "Dead Letter"
+    job.error_message = f"Parent job {parent_id} ended with status: {parent_status}"
+    job.error_type = "Permanent"
+    job.completed_at = now_datetime()
+    if job.status == "Canceled":
+        job.canceled_at = job.completed_at
+        job.canceled_by = frappe.session.user
+    job.flags.in_dependency_cascade = True
+    job.save(ignore_permissions=True)
+
+    publish_job_status_changed(
+        job_id=job.name,
+        organization=job.organization,
+        from_status=old_status,
+        to_status=job.status,
+        error_message=job.error_message,
+    )
+
+
+def recheck_after_commit(job_id: str) -> None:
+    """
+    Re-check a newly submitted waiting job once its transaction commits.
+
+    A parent that completes while the child is being submitted cannot see the
+    child's uncommitted edges in release_dependents(). One query after commit
+    closes that gap; the release itself runs as a short background job since
+    the submitting transaction is already over.
+    """
+    def recheck():
+        if _get_ready_jobs([job_id]):
+            frappe.enqueue(
+                "dartwing.dartwing_core.background_jobs.dependencies.release_if_ready",
+                queue="short",
+                job_id=job_id,
+            )
+
+    frappe.db.after_commit.add(recheck)
+
+
+def release_if_ready(job_id: str) -> None:
+    """Release a Pending job if all of its dependencies completed."""
+    if _get_ready_jobs([job_id]) and release_job(job_id):
+        frappe.db.commit()
+
+
+def release_ready_jobs(limit: int = 500) -> list:
+    """
+    Safety net: release Pending jobs whose dependencies are all complete.
+
+    Normally children are released by release_dependents() as soon as their
+    last parent completes; this only catches releases lost to a crash.
+
+    Returns:
+        List of released job ids
+    """
+    ready = frappe.db.sql(
+        """
+        SELECT bj.name
+        FROM `tabBackground Job` bj
+        WHERE bj.status = 'Pending'
+        AND EXISTS (
+            SELECT 1 FROM `tabBackground Job Dependency` d
+            WHERE d.background_job = bj.name
+        )
+        AND NOT EXISTS (
+            SELECT 1
+            FROM `tabBackground Job Dependency` d
+            INNER JOIN `tabBackground Job` parent ON parent.name = d.depends_on
+            WHERE d.background_job = bj.name
+            AND parent.status != 'Completed'
+        )
+        LIMIT %s
+        """,
+        (limit,),
+        pluck=True,
+    )
+
+    released = []
+    for job_id in ready:
+        try:
+            if release_job(job_id):
+                released.append(job_id)
+        except Exception as e:
+            frappe.log_error(
+                f"Failed to enqueue dependent job {job_id}: {e}",
+                "Background Job Scheduler",
+            )
+
+    if ready:
+        frappe.db.commit()
+    return released
+
+
+def _get_ready_jobs(job_ids: list) -> list:
+    """Return the Pending jobs among job_ids whose parents all completed."""
+    return frappe.db.sql(
+        """
+        SELECT bj.name
+        FROM `tabBackground Job` bj
+        WHERE bj.name IN %(job_ids)s
+        AND bj.status = 'Pending'
+        AND NOT EXISTS (
+            SELECT 1
+            FROM `tabBackground Job Dependency` d
+            INNER JOIN `tabBackground Job` parent ON parent.name = d.depends_on
+            WHERE d.background_job = bj.name
+            AND parent.status != 'Completed'
+        )
+        """,
+        {"job_ids": tuple(job_ids)},
+        pluck=True,
+    )
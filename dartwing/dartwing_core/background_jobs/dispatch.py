@@ -0,0 +1,385 @@
+"""
+Fair dispatch for Background Job Engine.
+
+Jobs are not bound to an RQ job when they are enqueued. Each Queued job is
+pushed to a Redis backlog list per (priority, organization), and a generic
+dispatch_next() token is enqueued in the DISPATCH_QUEUE RQ queue. Whichever
+worker runs a token pops the job that should run next:
+
+- Across priorities: smooth weighted round-robin over those that have a
+  backlog (DISPATCH_PRIORITY_WEIGHTS, Critical 8 : High 4 : Normal 2 :
+  Low 1), so higher priorities overtake lower ones and Low still makes
+  progress. All tokens share one RQ queue, since RQ would serve separate
+  queues in strict listen order and starve the later ones.
+- Within a priority: round-robin over organizations with a backlog, so an
+  organization that submits 50k jobs gets one turn per cycle like every
+  other tenant.
+
+Selection is a single Lua call, so concurrent workers never pick the same
+job. There is one token per pushed job; a token that pops a job which is no
+longer Queued (e.g. canceled) moves on to the next one.
+
+Pushed jobs are also kept in a set until they are popped. A push that fails
+after the Queued status is committed, or a backlog lost with Redis, would
+leave a job Queued that no token ever runs; redispatch_lost_jobs() pushes
+Queued jobs again that are old enough and held by nothing (backlog set,
+delay queue or async handoff list). Tokens are enqueued
+with DISPATCH_TOKEN_TIMEOUT_SECONDS since their job is unknown until they
+start; once a token has popped its job, RQ's hard limit is narrowed to that
+job's own timeout (see _narrow_time_limit()).
+
+Key layout (under the site prefix):
+    dartwing_core:background_job:dispatch:<priority>:org:<org>  backlog list
+    dartwing_core:background_job:dispatch:<priority>:orgs       org ring
+    dartwing_core:background_job:dispatch:<priority>:active     orgs in ring
+    dartwing_core:background_job:dispatch:wrr                   WRR state
+    dartwing_core:background_job:dispatch:queued                jobs in a backlog
+"""
+
+import signal
+import threading
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, now_datetime
+
+from dartwing.dartwing_core.background_jobs.config import (
+    DEFAULT_TIMEOUT_SECONDS,
+    DISPATCH_JOB_TIMEOUT_GRACE_SECONDS,
+    DISPATCH_PRIORITY_WEIGHTS,
+    DISPATCH_QUEUE,
+    DISPATCH_SAFETY_NET_BATCH_SIZE,
+    DISPATCH_SAFETY_NET_MINUTES,
+    DISPATCH_TOKEN_TIMEOUT_SECONDS,
+)
+
+DISPATCH_METHOD = "dartwing.dartwing_core.background_jobs.dispatch.dispatch_next"
+
+# ARGV: prefix, priority, organization, job_id...
+_PUSH_SCRIPT = """
+local prefix = ARGV[1]
+local base = prefix .. ARGV[2]
+redis.call('RPUSH', base .. ':org:' .. ARGV[3], unpack(ARGV, 4))
+redis.call('SADD', prefix .. 'queued', unpack(ARGV, 4))
+if redis.call('SADD', base .. ':active', ARGV[3]) == 1 then
+    redis.call('LPUSH', base .. ':orgs', ARGV[3])
+end
+return 1
+"""
+
+# ARGV: prefix, then priority, weight pairs in priority order
+# Returns {priority, organization, job_id} or nil when every backlog is empty
+_POP_SCRIPT = """
+local prefix = ARGV[1]
+local state = prefix .. 'wrr'
+local best, best_current = nil, nil
+local total = 0
+
+for i = 2, #ARGV, 2 do
+    local priority = ARGV[i]
+    local weight = tonumber(ARGV[i + 1])
+    if redis.call('LLEN', prefix .. priority .. ':orgs') > 0 then
+        total = total + weight
+        local current = redis.call('HINCRBY', state, priority, weight)
+        if best == nil or current > best_current then
+            best, best_current = priority, current
+        end
+    else
+        redis.call('HSET', state, priority, 0)
+    end
+end
+
+if best == nil then
+    return false
+end
+redis.call('HINCRBY', state, best, -total)
+
+local base = prefix .. best
+local ring = base .. ':orgs'
+while true do
+    local org = redis.call('RPOPLPUSH', ring, ring)
+    if not org then
+        return false
+    end
+    local backlog = base .. ':org:' .. org
+    local job_id = redis.call('LPOP', backlog)
+    if redis.call('LLEN', backlog) == 0 then
+        redis.call('LREM', ring, 0, org)
+        redis.call('SREM', base .. ':active', org)
+    end
+    if job_id then
+        redis.call('SREM', prefix .. 'queued', job_id)
+        return {best, org, job_id}
+    end
+end
+"""
+
+
+def _prefix() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:dispatch:")
+
+
+def _weight_args() -> list:
+    args = []
+    for priority, weight in DISPATCH_PRIORITY_WEIGHTS.items():
+        args.extend([priority, weight])
+    return args
+
+
+def push(jobs: list) -> None:
+    """
+    Add Queued jobs to the dispatch backlog and enqueue one token per job.
+
+    Must run after the jobs' Queued status is committed, otherwise a token of
+    another job could pop them first.
+
+    Args:
+        jobs: Dicts with name, organization and priority
+    """
+    from rq import Queue
+    from frappe.utils.background_jobs import get_queue, execute_job as rq_execute_job
+
+    cache = frappe.cache()
+    prefix = _prefix()
+    script = cache.register_script(_PUSH_SCRIPT)
+
+    grouped = {}
+    for job in jobs:
+        grouped.setdefault((job["priority"], job["organization"]), []).append(job["name"])
+
+    pipe = cache.pipeline(transaction=False)
+    for (priority, organization), job_ids in grouped.items():
+        script(args=[prefix, _normalize_priority(priority), organization, *job_ids], client=pipe)
+    pipe.execute()
+
+    # Which job a token runs is only chosen when it starts
+    queue = get_queue(DISPATCH_QUEUE, is_async=True)
+    queue.enqueue_many([
+        Queue.prepare_data(
+            rq_execute_job,
+            kwargs={
+                "site": frappe.local.site,
+                "user": frappe.session.user,
+                "method": DISPATCH_METHOD,
+                "event": None,
+                "job_name": DISPATCH_METHOD,
+                "is_async": True,
+                "kwargs": {},
+            },
+            timeout=DISPATCH_TOKEN_TIMEOUT_SECONDS,
+        )
+        for _job in jobs
+    ])
+
+
+def pop() -> tuple | None:
+    """
+    Select and remove the next job to run.
+
+    Returns:
+        (priority, organization, job_id) or None if every backlog is empty
+    """
+    script = frappe.cache().register_script(_POP_SCRIPT)
+    result = script(args=[_prefix(), *_weight_args()])
+    if not result:
+        return None
+    return tuple(value.decode() if isinstance(value, bytes) else value for value in result)
+
+
+def dispatch_next(queue: str | None = None) -> None:
+    """
+    RQ entry point of a dispatch token: run the next job chosen by pop().
+
+    Jobs that are no longer Queued (canceled while waiting) are skipped.
+
+    Args:
+        queue: Ignored; passed by tokens enqueued while priorities were
+            dispatched through separate RQ queues
+    """
+    from dartwing.dartwing_core.background_jobs.executor import execute_job
+
+    while True:
+        selected = pop()
+        if not selected:
+            return
+
+        _priority, _organization, job_id = selected
+        job = frappe.db.get_value("Background Job", job_id, ["status", "timeout_seconds"], as_dict=True)
+        if job and job.status == "Queued":
+            _narrow_time_limit(job.timeout_seconds)
+            execute_job(background_job_id=job_id)
+            return
+
+
+def _narrow_time_limit(timeout_seconds: int | None) -> None:
+    """
+    Shorten the token's RQ hard limit to the popped job's own timeout.
+
+    RQ's death penalty armed SIGALRM for DISPATCH_TOKEN_TIMEOUT_SECONDS; only
+    the alarm is re-armed, so RQ's handler stays and RQ disarms it when the
+    token ends. The executor stops waiting for the handler at the job
+    timeout; the grace period leaves time to record the outcome before RQ
+    kills the work horse. Outside an RQ work horse's main thread this does
+    nothing.
+    """
+    from rq import get_current_job
+
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if get_current_job() is None or not in_main_thread or not hasattr(signal, "SIGALRM"):
+        return
+
+    timeout = timeout_seconds if timeout_seconds is not None else DEFAULT_TIMEOUT_SECONDS
+    _shorten_alarm(timeout + DISPATCH_JOB_TIMEOUT_GRACE_SECONDS)
+
+
+def _shorten_alarm(seconds: int) -> None:
+    """Make a pending SIGALRM fire within seconds; without one, do nothing."""
+    remaining = signal.alarm(0)
+    if remaining:
+        signal.alarm(min(seconds, remaining))
+
+
+def redispatch(job_id: str) -> None:
+    """
+    Delay queue action: put a deferred job back into the dispatch backlog.
+
+    Used for jobs that found a concurrency limit full; they stay Queued and
+    keep their retry count.
+    """
+    job = frappe.db.get_value(
+        "Background Job", job_id, ["name", "organization", "priority", "status"], as_dict=True
+    )
+    if job and job.status == "Queued":
+        push([job])
+
+
+def redispatch_lost_jobs(batch_size: int = DISPATCH_SAFETY_NET_BATCH_SIZE) -> int:
+    """
+    Safety net: push Queued jobs that nothing will run back to the backlog.
+
+    Jobs Queued for more than DISPATCH_SAFETY_NET_MINUTES are pushed again
+    unless they are still in a backlog, deferred in the delay queue or
+    handed to an async or process worker. A job whose token is starting it
+    during the scan may be pushed twice; the executor's claim (executor._claim_job())
+    runs it once and the other token finds it no longer Queued.
+
+    Returns:
+        Number of jobs pushed again
+    """
+    from dartwing.dartwing_core.background_jobs import async_runner, delay_queue
+
+    cache = frappe.cache()
+    queued_key = _prefix() + "queued"
+    handed_off = async_runner.get_handed_off_jobs()
+    values = {
+        "cutoff": add_to_date(now_datetime(), minutes=-DISPATCH_SAFETY_NET_MINUTES),
+        "limit": batch_size,
+    }
+
+    pushed = 0
+    after = ""
+    while True:
+        # Keyset pages over the (status, modified) index, oldest first
+        jobs = frappe.db.sql(
+            f"""
+            SELECT name, organization, priority, modified
+            FROM `tabBackground Job`
+            WHERE status = 'Queued' AND modified < %(cutoff)s {after}
+            ORDER BY modified, name
+            LIMIT %(limit)s
+            """,
+            values,
+            as_dict=True,
+        )
+        if not jobs:
+            return pushed
+
+        pipe = cache.pipeline(transaction=False)
+        for job in jobs:
+            pipe.sismember(queued_key, job.name)
+        in_backlog = pipe.execute()
+        deferred = delay_queue.get_scheduled("dispatch", [job.name for job in jobs])
+
+        lost = [
+            job for job, queued in zip(jobs, in_backlog)
+            if not queued and job.name not in deferred and job.name not in handed_off
+        ]
+        if lost:
+            push(lost)
+            pushed += len(lost)
+            frappe.logger().info(
+                f"Background Job Dispatch: Dispatched lost Queued jobs again: {[job.name for job in lost][:20]}"
+            )
+
+        if len(jobs) < batch_size:
+            return pushed
+        after = "AND (modified > %(after)s OR (modified = %(after)s AND name > %(after_name)s))"
+        values["after"], values["after_name"] = jobs[-1].modified, jobs[-1].name
+
+
+def get_dispatch_status(organization: str = None) -> dict:
+    """
+    Describe the dispatch state: backlog per priority and organization.
+
+    Args:
+        organization: Only report this organization's backlog (required for
+            non-admin users)
+
+    Returns:
+        Dict with per-priority weight, WRR credit, organization ring order,
+        and backlog per organization
+    """
+    from dartwing.dartwing_core.background_jobs.engine import (
+        _is_system_manager,
+        _validate_organization_access,
+    )
+
+    if organization:
+        _validate_organization_access(organization)
+    elif not _is_system_manager():
+        frappe.throw(_("Organization is required"), frappe.PermissionError)
+
+    cache = frappe.cache()
+    prefix = _prefix()
+    wrr = {
+        (key.decode() if isinstance(key, bytes) else key): int(value)
+        for key, value in (cache.hgetall(prefix + "wrr") or {}).items()
+    }
+
+    priorities = {}
+    for priority, weight in DISPATCH_PRIORITY_WEIGHTS.items():
+        base = prefix + priority
+        if organization:
+            orgs = [organization]
+        else:
+            orgs = [
+                org.decode() if isinstance(org, bytes) else org
+                for org in cache.lrange(base + ":orgs", 0, -1)
+            ]
+            # RPOPLPUSH serves the tail of the ring first
+            orgs.reverse()
+
+        pipe = cache.pipeline(transaction=False)
+        for org in orgs:
+            pipe.llen(f"{base}:org:{org}")
+        backlog = dict(zip(orgs, pipe.execute())) if orgs else {}
+
+        priorities[priority] = {
+            "weight": weight,
+            "credit": wrr.get(priority, 0),
+            "backlog": sum(backlog.values()),
+            "organizations": [
+                {"organization": org, "backlog": count}
+                for org, count in backlog.items()
+                if count or organization
+            ],
+        }
+
+    return {
+        "priorities": priorities,
+        "total_backlog": sum(p["backlog"] for p in priorities.values()),
+    }
+
+
+def _normalize_priority(priority: str) -> str:
+    return priority if priority in DISPATCH_PRIORITY_WEIGHTS else "Normal"
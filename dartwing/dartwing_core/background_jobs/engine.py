@@ -6,11 +6,13 @@ Provides the main API for job submission, status checking, and management.
 
 import hashlib
 import json
-from contextlib import contextmanager
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, add_to_date
-from typing import Optional, Iterator
+from frappe.utils import now_datetime, cint
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dartwing.dartwing_core.background_jobs.rate_limiter import RateLimitStatus
 
 try:
     import redis
@@ -23,8 +25,25 @@ from dartwing.dartwing_core.background_jobs.config import (
     DEFAULT_DEDUPLICATION_WINDOW_SECONDS,
     DEFAULT_RATE_LIMIT_WINDOW_SECONDS,
     MAX_RATE_LIMIT_WINDOW_SECONDS,
-    DEDUPLICATION_LOCK_TIMEOUT_SECONDS,
+    MAX_BATCH_SIZE,
+    BATCH_INSERT_CHUNK_SIZE,
+    MAX_BULK_CANCEL_JOBS,
+    STATUS_ACCESS_CACHE_SECONDS,
+)
+from dartwing.dartwing_core.background_jobs.dependencies import (
+    normalize_parents,
+    validate_parents,
 )
+from dartwing.dartwing_core.background_jobs import execution_log, status_rollup
+
+# Naming series of the Background Job doctype (see background_job.json)
+JOB_NAMING_SERIES = "JOB-.YYYY.-"
+JOB_NAMING_DIGITS = 5
+
+JOB_PRIORITIES = ("Low", "Normal", "High", "Critical")
+
+# Statuses a job never leaves on its own (mirrors BackgroundJob.is_terminal)
+TERMINAL_STATUSES = ("Completed", "Dead Letter", "Canceled")
 
 
 def submit_job(
@@ -32,7 +51,7 @@ def submit_job(
     organization: str,
     parameters: dict = None,
     priority: str = "Normal",
-    depends_on: str = None,
+    depends_on: str | list = None,
 ) -> "frappe.Document":
     """
     Submit a new background job for execution.
@@ -42,7 +61,8 @@ def submit_job(
         organization: Organization name
         parameters: Job-specific input parameters (optional)
         priority: Low/Normal/High/Critical (default: Normal)
-        depends_on: Parent job ID to wait for (optional)
+        depends_on: Parent job ID, or list of parent job IDs, to wait for
+            (optional). The job stays Pending until all parents complete.
 
     Returns:
         Background Job document
@@ -55,67 +75,304 @@ def submit_job(
     # Phase 1: Validation
     _validate_organization_access(organization)
     job_type_doc = _get_job_type(job_type)
-    _check_rate_limit(job_type_doc)
     _validate_job_type_permission(job_type_doc, job_type)
+    parents = normalize_parents(depends_on)
+    if parents:
+        validate_parents(organization, parents)
 
     # Phase 2: Prepare job parameters
     job_hash = generate_job_hash(job_type, organization, parameters or {})
     deduplication_window = _get_deduplication_window(job_type_doc)
 
     # Phase 3: Create job (with optional deduplication)
-    if deduplication_window > 0:
-        # Check redis availability early before entering context manager
-        # This fails fast with a clear error if redis is not installed
-        if not redis:
-            raise ImportError(
-                "Redis module is not available. The background job system requires redis for "
-                "distributed locking when deduplication is enabled. Please install redis: pip install redis"
-            )
-        with _deduplication_lock(organization=organization, job_hash=job_hash):
-            _check_duplicate_and_throw(job_hash, deduplication_window)
-            return _create_job_record(
-                job_type, organization, parameters, priority,
-                depends_on, job_hash, job_type_doc
-            )
-    else:
-        return _create_job_record(
+    if deduplication_window <= 0:
+        rate_limit = _check_rate_limit(job_type_doc, organization)
+        job = _create_job_record(
+            job_type, organization, parameters, priority,
+            parents, job_hash, job_type_doc, rate_limit
+        )
+        # Write the creation history now so the caller can read it back
+        execution_log.flush()
+        return job
+
+    _require_redis()
+    job_name = _reserve_job_names(1)[0]
+    existing = _claim_job_hashes(organization, [(job_hash, job_name)], deduplication_window)
+    if existing:
+        from dartwing.dartwing_core.background_jobs import status_snapshot
+
+        snapshot = status_snapshot.get(existing[job_hash]) or {}
+        frappe.throw(
+            _("Duplicate job detected. Existing job: {0} (status: {1})").format(
+                existing[job_hash], snapshot.get("status") or _("Unknown")
+            ),
+            exc=frappe.DuplicateEntryError,
+        )
+
+    try:
+        rate_limit = _check_rate_limit(job_type_doc, organization)
+        job = _create_job_record(
             job_type, organization, parameters, priority,
-            depends_on, job_hash, job_type_doc
+            parents, job_hash, job_type_doc, rate_limit, name=job_name
         )
+    except Exception:
+        _release_job_hashes(organization, [(job_hash, job_name)])
+        raise
 
+    # Don't let a rolled-back submission block resubmission for the window
+    frappe.db.after_rollback.add(
+        lambda: _release_job_hashes(organization, [(job_hash, job_name)])
+    )
+    execution_log.flush()
+    return job
 
-def get_job_status(job_id: str) -> dict:
+
+def submit_jobs_batch(
+    job_type: str,
+    organization: str,
+    parameters_list: list,
+    priority: str = None,
+) -> dict:
     """
-    Get current status and progress of a job.
+    Submit many jobs of one Job Type for a single organization.
+
+    Organization access, Job Type, permission and rate limit are validated once
+    for the whole batch. Duplicates are claimed in the Redis deduplication
+    index with one pipelined round trip, the rows are written with multi-row
+    inserts and the jobs are pushed to the dispatcher with pipelines once the
+    transaction commits.
 
     Args:
-        job_id: Background Job ID
+        job_type: Job Type identifier (e.g., "pdf_generation")
+        organization: Organization name
+        parameters_list: One parameters dict per job
+        priority: Low/Normal/High/Critical (default: Job Type default priority)
 
     Returns:
-        Dict with job status details
+        Dict with batch_id, job_ids of the submitted jobs and the duplicates
+        that were skipped (index into parameters_list and existing job id)
+
+    Raises:
+        frappe.ValidationError: Invalid input parameters or rate limit exceeded
+        frappe.PermissionError: User lacks permission
     """
-    job = frappe.get_doc("Background Job", job_id)
+    if not isinstance(parameters_list, (list, tuple)) or not parameters_list:
+        frappe.throw(_("parameters_list must be a non-empty list of parameter dicts"))
+    if len(parameters_list) > MAX_BATCH_SIZE:
+        frappe.throw(
+            _("A batch cannot contain more than {0} jobs").format(MAX_BATCH_SIZE)
+        )
 
-    # Check permission
-    _validate_job_access(job)
+    # Phase 1: Validation (once per batch)
+    _validate_organization_access(organization)
+    _validate_organization_active(organization)
+    job_type_doc = _get_job_type(job_type)
+    _validate_job_type_permission(job_type_doc, job_type)
+
+    priority = priority or job_type_doc.default_priority or "Normal"
+    if priority not in JOB_PRIORITIES:
+        frappe.throw(_("Invalid priority: {0}").format(priority))
+
+    # Phase 2: Hash every job; later occurrences of a hash resolve to the first
+    hashes = [
+        generate_job_hash(job_type, organization, parameters or {})
+        for parameters in parameters_list
+    ]
+    deduplication_window = _get_deduplication_window(job_type_doc)
+    candidates = []
+    in_batch_duplicates = []
+    first_index = {}
+    for index, job_hash in enumerate(hashes):
+        if deduplication_window > 0 and job_hash in first_index:
+            in_batch_duplicates.append((index, first_index[job_hash]))
+        else:
+            first_index[job_hash] = index
+            candidates.append((index, parameters_list[index], job_hash))
+
+    # Phase 3: Claim the deduplication index for the whole batch in one round trip
+    names = _reserve_job_names(len(candidates))
+    existing = {}
+    if deduplication_window > 0:
+        _require_redis()
+        existing = _claim_job_hashes(
+            organization,
+            [(job_hash, name) for (_index, _params, job_hash), name in zip(candidates, names)],
+            deduplication_window,
+        )
+
+    to_submit = []
+    duplicates = []
+    name_by_index = {}
+    for (index, parameters, job_hash), name in zip(candidates, names):
+        if job_hash in existing:
+            duplicates.append({"index": index, "existing_job": existing[job_hash]})
+        else:
+            to_submit.append((name, parameters, job_hash))
+            name_by_index[index] = name
+    for index, first in in_batch_duplicates:
+        existing_job = name_by_index.get(first) or existing[hashes[first]]
+        duplicates.append({"index": index, "existing_job": existing_job})
+    duplicates.sort(key=lambda duplicate: duplicate["index"])
+
+    batch_id = f"BATCH-{frappe.generate_hash(length=10)}"
+    if not to_submit:
+        return {"batch_id": batch_id, "job_ids": [], "duplicates": duplicates, "rate_limit": None}
+
+    # Phase 4: Bulk insert jobs and their creation log entries
+    claimed = [(job_hash, name) for name, _params, job_hash in to_submit] if deduplication_window > 0 else []
+    try:
+        rate_limit = _check_rate_limit(job_type_doc, organization, count=len(to_submit))
+        job_rows = _bulk_insert_batch_jobs(
+            job_type_doc, organization, priority, batch_id, to_submit
+        )
+    except Exception:
+        _release_job_hashes(organization, claimed)
+        raise
+    frappe.db.after_rollback.add(lambda: _release_job_hashes(organization, claimed))
+
+    # Phase 5: Dispatch the jobs once the rows are committed
+    frappe.db.after_commit.add(lambda: _dispatch_jobs(job_rows))
 
     return {
-        "job_id": job.name,
-        "job_type": job.job_type,
-        "status": job.status,
-        "progress": job.progress or 0,
-        "progress_message": job.progress_message,
-        "created_at": str(job.created_at) if job.created_at else None,
-        "started_at": str(job.started_at) if job.started_at else None,
-        "completed_at": str(job.completed_at) if job.completed_at else None,
-        "retry_count": job.retry_count or 0,
-        "next_retry_at": str(job.next_retry_at) if job.next_retry_at else None,
-        "output_reference": job.output_reference,
-        "error_message": job.error_message,
-        "error_type": job.error_type,
+        "batch_id": batch_id,
+        "job_ids": [row["name"] for row in job_rows],
+        "duplicates": duplicates,
+        "rate_limit": rate_limit.as_dict() if rate_limit else None,
     }
 
 
+def get_batch_status(batch_id: str) -> dict:
+    """
+    Get aggregated status and progress for all jobs in a batch.
+
+    Args:
+        batch_id: Batch ID returned by submit_jobs_batch()
+
+    Returns:
+        Dict with job counts by status, overall progress and completion flag
+    """
+    rows = frappe.db.sql(
+        """
+        SELECT organization, owner_user, status, COUNT(*) AS count,
+            SUM(CASE WHEN status = 'Completed' THEN 100 ELSE IFNULL(progress, 0) END) AS progress
+        FROM `tabBackground Job`
+        WHERE batch_id = %(batch_id)s
+        GROUP BY organization, owner_user, status
+        """,
+        {"batch_id": batch_id},
+        as_dict=True,
+    )
+
+    if not rows:
+        frappe.throw(_("Batch {0} not found").format(batch_id), frappe.DoesNotExistError)
+
+    # A batch belongs to one organization and one submitting user
+    _validate_job_access(frappe._dict(organization=rows[0].organization, owner_user=rows[0].owner_user))
+
+    by_status = {}
+    for row in rows:
+        by_status[row.status] = by_status.get(row.status, 0) + row.count
+
+    total = sum(by_status.values())
+    finished = sum(by_status.get(status, 0) for status in TERMINAL_STATUSES)
+
+    return {
+        "batch_id": batch_id,
+        "organization": rows[0].organization,
+        "total": total,
+        "job_count_by_status": by_status,
+        "progress": round(sum(row.progress or 0 for row in rows) / total, 2) if total else 0,
+        "is_finished": finished == total,
+    }
+
+
+def get_job_status(job_id: str, if_version: int | None = None) -> dict:
+    """
+    Get current status and progress of a job.
+
+    Served from the job's Redis status snapshot (see status_snapshot.py); the
+    document is only loaded when there is no snapshot, which is then rebuilt.
+
+    Args:
+        job_id: Background Job ID
+        if_version: Snapshot version the caller already has
+
+    Returns:
+        Dict with job status details and version, or
+        {job_id, version, not_modified: True} if if_version is current
+    """
+    from dartwing.dartwing_core.background_jobs import status_snapshot
+
+    snapshot = _get_status_snapshot(job_id)
+    if snapshot:
+        _validate_snapshot_access(snapshot)
+    else:
+        job = frappe.get_doc("Background Job", job_id)
+
+        # Check permission
+        _validate_job_access(job)
+
+        snapshot = _rebuild_status_snapshot(job)
+
+    version = snapshot.get("version")
+    if version and if_version and cint(if_version) == version:
+        return {"job_id": job_id, "version": version, "not_modified": True}
+
+    status = {field: snapshot.get(field) for field in status_snapshot.SNAPSHOT_FIELDS}
+    status["version"] = version
+    return status
+
+
+def _get_status_snapshot(job_id: str) -> dict | None:
+    from dartwing.dartwing_core.background_jobs import status_snapshot
+
+    try:
+        return status_snapshot.get(job_id)
+    except Exception:
+        # Cache unavailable: serve from the database
+        return None
+
+
+def _rebuild_status_snapshot(job) -> dict:
+    """Store the snapshot of a job read from the database and return it."""
+    from dartwing.dartwing_core.background_jobs import status_snapshot
+
+    snapshot = status_snapshot.build(job)
+    try:
+        version = status_snapshot.write(job, create_only=True)
+        if version:
+            snapshot["version"] = version
+        else:
+            # Written concurrently (e.g. by a transition); that one is newer
+            snapshot = status_snapshot.get(job.name) or snapshot
+    except Exception:
+        snapshot["version"] = None
+    return snapshot
+
+
+def _validate_snapshot_access(snapshot: dict):
+    """
+    Validate user has access to a job described by its status snapshot.
+
+    Same rules as _validate_job_access(); positive organization checks are
+    reused for STATUS_ACCESS_CACHE_SECONDS so repeated polls skip the
+    membership queries.
+    """
+    if _is_system_manager():
+        return
+
+    if snapshot.get("owner_user") == frappe.session.user:
+        return
+
+    cache = frappe.cache()
+    cache_key = f"dartwing_core:job_status_access:{frappe.session.user}:{snapshot.get('organization')}"
+    if cache.get_value(cache_key):
+        return
+
+    _validate_organization_access(snapshot.get("organization"))
+    cache.set_value(cache_key, True, expires_in_sec=STATUS_ACCESS_CACHE_SECONDS)
+
+
 def cancel_job(job_id: str) -> "frappe.Document":
     """
     Cancel a pending or running job.
@@ -124,8 +381,9 @@ def cancel_job(job_id: str) -> "frappe.Document":
     changes between the check and the update.
 
     Note: This function marks the job as canceled in the database but does NOT
-    immediately terminate a running RQ worker. Running jobs detect cancellation
-    cooperatively by calling `JobContext.is_canceled()` at progress checkpoints.
+    immediately terminate a running RQ worker. Once the cancellation commits, a
+    Redis signal is set that running jobs detect cooperatively (within about a
+    second) by calling `JobContext.is_canceled()` at progress checkpoints.
     Jobs that don't check for cancellation will run to completion.
 
     See GitHub Issue #34 for planned RQ job termination enhancement.
@@ -176,6 +434,75 @@ def cancel_job(job_id: str) -> "frappe.Document":
     return job
 
 
+def cancel_jobs(job_ids: list) -> dict:
+    """
+    Cancel many pending or running jobs in one transaction.
+
+    Jobs that cannot be canceled (already finished, not accessible) are
+    skipped rather than failing the whole request. Running jobs are signaled
+    with one Redis round trip after commit.
+
+    Args:
+        job_ids: Jobs to cancel (at most MAX_BULK_CANCEL_JOBS)
+
+    Returns:
+        Dict with canceled (job IDs) and skipped ({job_id, reason} dicts)
+    """
+    from dartwing.dartwing_core.background_jobs.progress import publish_job_status_changed
+
+    job_ids = list(dict.fromkeys(job_ids or []))
+    if len(job_ids) > MAX_BULK_CANCEL_JOBS:
+        frappe.throw(_("Cannot cancel more than {0} jobs at once").format(MAX_BULK_CANCEL_JOBS))
+    if not job_ids:
+        return {"canceled": [], "skipped": []}
+
+    # Lock all rows up front, in a stable order to avoid deadlocks
+    existing = set(frappe.db.sql(
+        "SELECT name FROM `tabBackground Job` WHERE name IN %s ORDER BY name FOR UPDATE",
+        (job_ids,),
+        pluck=True,
+    ))
+
+    canceled, skipped, transitions = [], [], []
+    for job_id in job_ids:
+        if job_id not in existing:
+            skipped.append({"job_id": job_id, "reason": _("Not found")})
+            continue
+
+        job = frappe.get_doc("Background Job", job_id)
+        try:
+            _validate_job_access(job, require_write=True)
+        except frappe.PermissionError:
+            skipped.append({"job_id": job_id, "reason": _("Not permitted")})
+            continue
+
+        if not job.can_cancel():
+            skipped.append({
+                "job_id": job_id,
+                "reason": _("Cannot cancel job in status: {0}").format(job.status),
+            })
+            continue
+
+        transitions.append((job, job.status))
+        job.status = "Canceled"
+        job.canceled_at = now_datetime()
+        job.canceled_by = frappe.session.user
+        job.save(ignore_permissions=True)
+        canceled.append(job_id)
+
+    frappe.db.commit()
+
+    for job, old_status in transitions:
+        publish_job_status_changed(
+            job_id=job.name,
+            organization=job.organization,
+            from_status=old_status,
+            to_status="Canceled",
+        )
+
+    return {"canceled": canceled, "skipped": skipped}
+
+
 def retry_job(job_id: str) -> "frappe.Document":
     """
     Manually retry a failed or dead letter job (admin only).
@@ -311,6 +638,9 @@ def get_job_history(job_id: str) -> dict:
     job = frappe.get_doc("Background Job", job_id)
     _validate_job_access(job)
 
+    # Include transitions of this transaction that are still buffered
+    execution_log.flush()
+
     logs = frappe.get_all(
         "Job Execution Log",
         filters={"background_job": job_id},
@@ -352,28 +682,27 @@ def _get_deduplication_window(job_type_doc: "frappe.Document") -> int:
     return DEFAULT_DEDUPLICATION_WINDOW_SECONDS
 
 
-def _check_duplicate_and_throw(job_hash: str, window_seconds: int) -> None:
-    """Check for duplicate job and throw if found."""
-    existing = _check_duplicate(job_hash, window_seconds)
-    if existing:
-        frappe.throw(
-            _("Duplicate job detected. Existing job: {0} (status: {1})").format(
-                existing.name, existing.status
-            ),
-            exc=frappe.DuplicateEntryError,
-        )
-
-
 def _create_job_record(
     job_type: str,
     organization: str,
     parameters: dict,
     priority: str,
-    depends_on: str,
+    parents: list,
     job_hash: str,
     job_type_doc: "frappe.Document",
+    rate_limit: Optional["RateLimitStatus"] = None,
+    name: Optional[str] = None,
 ) -> "frappe.Document":
-    """Create a new Background Job record and enqueue it for execution."""
+    """
+    Create a new Background Job record and enqueue it for execution.
+
+    Jobs with dependencies are only enqueued if all parents already completed;
+    otherwise they stay Pending until dependencies.release_dependents() runs
+    for their last parent.
+
+    The rate limit status (if any) is attached as job.flags.rate_limit so the
+    API layer can return the remaining quota to clients.
+    """
     job = frappe.new_doc("Background Job")
     job.job_type = job_type
     job.organization = organization
@@ -392,14 +721,168 @@ def _create_job_record(
         if job_type_doc.max_retries is not None
         else DEFAULT_MAX_RETRIES
     )
-    job.depends_on = depends_on
+    job.depends_on = parents[0] if parents else None
     job.created_at = now_datetime()
 
-    job.insert(ignore_permissions=True)
-    _enqueue_job(job)
+    job.insert(ignore_permissions=True, set_name=name)
+    if parents:
+        _link_dependencies(job, parents)
+    else:
+        _enqueue_job(job)
+    job.flags.rate_limit = rate_limit
     return job
 
 
+def _link_dependencies(job, parents: list) -> None:
+    """Record dependency edges and enqueue the job only if its parents are done."""
+    from dartwing.dartwing_core.background_jobs import dependencies
+
+    dependencies.add_dependencies(job, parents)
+    state, failed = dependencies.get_parent_state(job.name)
+
+    if state == "ready":
+        _enqueue_job(job)
+    elif state == "failed":
+        parent_id, parent_status = failed
+        dependencies.fail_waiting_job(job, parent_id, parent_status)
+    else:
+        dependencies.recheck_after_commit(job.name)
+
+
+def _validate_organization_active(organization: str) -> None:
+    """Ensure organization exists and is not suspended (BackgroundJob.validate_organization)."""
+    status = frappe.db.get_value("Organization", organization, "status")
+    if status is None and not frappe.db.exists("Organization", organization):
+        frappe.throw(_("Organization '{0}' not found").format(organization))
+    if status == "Suspended":
+        frappe.throw(_("Cannot create jobs for suspended organization '{0}'").format(organization))
+
+
+def _reserve_job_names(count: int) -> list:
+    """
+    Reserve `count` consecutive names from the Background Job naming series.
+
+    Equivalent to `count` calls of frappe.model.naming.getseries() but with a
+    single locked read and a single update of `tabSeries`.
+    """
+    from frappe.model.naming import parse_naming_series
+
+    prefix = parse_naming_series(JOB_NAMING_SERIES)
+    current = frappe.db.sql(
+        "SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE",
+        (prefix,),
+    )
+
+    if current and current[0][0] is not None:
+        start = cint(current[0][0])
+        frappe.db.sql(
+            "UPDATE `tabSeries` SET `current` = `current` + %s WHERE `name` = %s",
+            (count, prefix),
+        )
+    else:
+        start = 0
+        frappe.db.sql(
+            "INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, %s)",
+            (prefix, count),
+        )
+
+    return [
+        f"{prefix}{str(start + offset).zfill(JOB_NAMING_DIGITS)}"
+        for offset in range(1, count + 1)
+    ]
+
+
+def _bulk_insert_batch_jobs(
+    job_type_doc: "frappe.Document",
+    organization: str,
+    priority: str,
+    batch_id: str,
+    jobs: list,
+) -> list:
+    """
+    Insert batch jobs directly in Queued status with multi-row inserts.
+
+    Bypasses the per-document ORM path (validate/on_update), so the checks it
+    would run are done once by submit_jobs_batch() and the "Job created" /
+    "Job enqueued" execution log entries and status rollup counts are
+    written here in bulk as well.
+
+    Args:
+        job_type_doc: Validated Job Type document
+        organization: Validated organization
+        priority: Priority applied to all jobs
+        batch_id: Batch ID stamped on every job
+        jobs: List of (name, parameters, job_hash) tuples; names come from
+            _reserve_job_names()
+
+    Returns:
+        List of dicts with name, job_hash, organization and priority of the
+        inserted jobs (used for dispatching)
+    """
+    now = now_datetime()
+    user = frappe.session.user
+    timeout_seconds = (
+        job_type_doc.default_timeout
+        if job_type_doc.default_timeout is not None
+        else DEFAULT_TIMEOUT_SECONDS
+    )
+    max_retries = (
+        job_type_doc.max_retries
+        if job_type_doc.max_retries is not None
+        else DEFAULT_MAX_RETRIES
+    )
+    job_fields = [
+        "name", "owner", "creation", "modified", "modified_by", "docstatus",
+        "naming_series", "job_type", "organization", "owner_user", "status",
+        "priority", "batch_id", "progress", "retry_count", "max_retries",
+        "input_parameters", "job_hash", "timeout_seconds", "created_at",
+    ]
+    job_values = []
+    log_values = []
+    for name, parameters, job_hash in jobs:
+        job_values.append((
+            name, user, now, now, user, 0,
+            JOB_NAMING_SERIES, job_type_doc.name, organization, user, "Queued",
+            priority, batch_id, 0, 0, max_retries,
+            json.dumps(parameters) if parameters is not None else None,
+            job_hash, timeout_seconds, now,
+        ))
+        for from_status, to_status, message in (
+            (None, "Pending", "Job created"),
+            ("Pending", "Queued", "Job enqueued"),
+        ):
+            log_values.append((
+                frappe.generate_hash(length=10), user, now, now, user, 0,
+                name, organization, from_status, to_status, now, user, message, None,
+            ))
+
+    frappe.db.bulk_insert(
+        "Background Job", job_fields, job_values, chunk_size=BATCH_INSERT_CHUNK_SIZE
+    )
+    frappe.db.bulk_insert(
+        "Job Execution Log",
+        execution_log.LOG_FIELDS,
+        log_values,
+        chunk_size=BATCH_INSERT_CHUNK_SIZE,
+    )
+    status_rollup.record_transition(
+        organization, job_type_doc.name, priority, None, "Pending", count=len(jobs)
+    )
+    status_rollup.record_transition(
+        organization, job_type_doc.name, priority, "Pending", "Queued", count=len(jobs)
+    )
+
+    return [
+        {
+            "name": name,
+            "job_hash": job_hash,
+            "organization": organization,
+            "priority": priority,
+        }
+        for name, _parameters, job_hash in jobs
+    ]
+
+
 def _is_system_manager() -> bool:
     """Check if current user has System Manager role."""
     return "System Manager" in frappe.get_roles()
@@ -471,12 +954,13 @@ def _validate_job_access(job, require_write: bool = False):
             frappe.throw(_("You don't have permission to modify this job"), frappe.PermissionError)
 
 
-def _get_job_type(job_type: str) -> "frappe.Document":
-    """Get and validate job type document."""
-    if not frappe.db.exists("Job Type", job_type):
-        frappe.throw(_("Job Type '{0}' not found").format(job_type))
+def _get_job_type(job_type: str) -> "frappe._dict":
+    """Get and validate job type configuration from the in-process registry."""
+    from dartwing.dartwing_core.background_jobs.registry import find_job_type
 
-    job_type_doc = frappe.get_cached_doc("Job Type", job_type)
+    job_type_doc = find_job_type(job_type)
+    if not job_type_doc:
+        frappe.throw(_("Job Type '{0}' not found").format(job_type))
 
     if not job_type_doc.is_enabled:
         frappe.throw(_("Job Type '{0}' is disabled").format(job_type))
@@ -484,137 +968,142 @@ def _get_job_type(job_type: str) -> "frappe.Document":
     return job_type_doc
 
 
-def _check_rate_limit(job_type_doc: "frappe.Document"):
+def _check_rate_limit(
+    job_type_doc: "frappe.Document", organization: str, count: int = 1
+) -> Optional["RateLimitStatus"]:
     """
-    Check if user has exceeded rate limit for this job type.
+    Check and consume the user's rate limit for this job type and organization.
+
+    Uses the Redis sliding-window limiter in rate_limiter.py, which admits
+    submissions atomically so concurrent requests cannot exceed the limit.
 
     Args:
         job_type_doc: Job Type document with rate limit configuration
+        organization: Organization the jobs are submitted for
+        count: Number of jobs about to be submitted (default: 1)
+
+    Returns:
+        RateLimitStatus with remaining quota and reset time, or None if no
+        limit applies
 
     Raises:
         frappe.ValidationError: If rate limit exceeded
-
-    Note:
-        This rate limit check has a minor race condition window where concurrent
-        requests could all check the count before any job is created, allowing
-        slightly more jobs than the limit. This is acceptable as rate limiting is
-        a soft UX protection, not a hard security boundary. The window is typically
-        <100ms and unlikely to cause significant limit violations in practice.
     """
     # Skip if no rate limit configured (None or 0 both mean "no limit")
     # Note: 'if not rate_limit' is True when rate_limit is None or 0 (both falsy)
     if not job_type_doc.rate_limit:
-        return
+        return None
 
-    # System Manager bypasses rate limiting (check early to avoid DB query)
+    # System Manager bypasses rate limiting
     if _is_system_manager():
-        return
+        return None
 
     window_seconds = job_type_doc.rate_limit_window if job_type_doc.rate_limit_window is not None else DEFAULT_RATE_LIMIT_WINDOW_SECONDS
     if window_seconds < 1:
         frappe.throw(_("Rate limit window must be at least 1 second"))
     if window_seconds > MAX_RATE_LIMIT_WINDOW_SECONDS:
         frappe.throw(_("Rate limit window cannot exceed 24 hours ({0} seconds)").format(MAX_RATE_LIMIT_WINDOW_SECONDS))
-    cutoff = add_to_date(now_datetime(), seconds=-window_seconds)
 
-    # Count recent jobs by this user for this job type
-    recent_count = frappe.db.count(
-        "Background Job",
-        {
-            "job_type": job_type_doc.name,
-            "owner_user": frappe.session.user,
-            "creation": (">=", cutoff),
-        },
-    )
+    from dartwing.dartwing_core.background_jobs import rate_limiter
 
-    if recent_count >= job_type_doc.rate_limit:
+    try:
+        status = rate_limiter.acquire(
+            job_type=job_type_doc.name,
+            organization=organization,
+            user=frappe.session.user,
+            limit=job_type_doc.rate_limit,
+            window_seconds=window_seconds,
+            count=count,
+        )
+    except Exception as e:
+        # Rate limiting is a soft UX protection - don't block submissions
+        # when the cache service is unavailable
+        frappe.log_error(
+            f"Rate limit check failed for {job_type_doc.name} in {organization}: {e}",
+            "Background Job Rate Limit",
+        )
+        return None
+
+    if not status.allowed:
         frappe.throw(
             _(
                 "Rate limit exceeded for '{0}' jobs. You have submitted {1} of {2} allowed "
-                "submissions in the last {3} seconds. Please wait before submitting more jobs."
-            ).format(job_type_doc.name, recent_count, job_type_doc.rate_limit, window_seconds)
+                "submissions in the last {3} seconds. Please wait {4} seconds before submitting more jobs."
+            ).format(job_type_doc.name, status.used, status.limit, window_seconds, status.retry_after)
         )
 
+    return status
 
-def _check_duplicate(job_hash: str, window_seconds: int) -> Optional["frappe.Document"]:
-    """Check for existing duplicate job within window (non-locking version)."""
-    cutoff = add_to_date(now_datetime(), seconds=-window_seconds)
 
-    existing = frappe.db.get_value(
-        "Background Job",
-        {
-            "job_hash": job_hash,
-            "creation": (">=", cutoff),
-            "status": ("not in", ["Completed", "Dead Letter", "Canceled"]),
-        },
-        ["name", "status"],
-        as_dict=True,
-    )
-
-    return existing
+def _require_redis() -> None:
+    """Fail fast with a clear error if the redis module is not installed."""
+    if not redis:
+        raise ImportError(
+            "Redis module is not available. The background job system requires redis for "
+            "the deduplication index when deduplication is enabled. Please install redis: pip install redis"
+        )
 
 
-@contextmanager
-def _deduplication_lock(organization: str, job_hash: str, timeout_seconds: int = DEDUPLICATION_LOCK_TIMEOUT_SECONDS) -> Iterator[None]:
+def _claim_job_hashes(organization: str, claims: list, window_seconds: int) -> dict:
     """
-    Serialize duplicate detection + insert across workers.
+    Claim the deduplication index for new jobs.
 
-    This is required because the current schema intentionally does not enforce a
-    unique constraint on job_hash (the same job must be allowed again after the
-    deduplication window). A distributed lock prevents concurrent inserts of the
-    same (organization, job_hash) within the same window.
+    All claims go to Redis in one pipelined round trip (see dedup.py) and the
+    result is trusted as is: a claim is released when its job reaches a
+    terminal state or is deleted (BackgroundJob.release_deduplication_claim),
+    so an existing claim means a live job owns the hash. A claim whose release
+    was lost expires with the deduplication window.
+
+    Args:
+        organization: Organization name
+        claims: List of (job_hash, job name) tuples for the new jobs
+        window_seconds: Deduplication window (claim TTL)
+
+    Returns:
+        Dict of {job_hash: existing job name} for hashes owned by another
+        job; all other hashes were claimed for the new jobs
 
     Raises:
         frappe.ValidationError: If Redis is unavailable
     """
-    lock_key = f"dartwing_core:background_job:dedup:{organization}:{job_hash}"
-
-    # Define specific exceptions to catch for Redis connectivity issues
-    # Note: redis.ConnectionError is a subclass of redis.RedisError
-    # Only catch redis.RedisError to avoid catching unrelated built-in ConnectionError exceptions
-    # Redis availability is checked in submit_job() before calling this function
-    redis_exceptions = (redis.RedisError,)
+    from dartwing.dartwing_core.background_jobs import dedup
 
     try:
-        lock = frappe.cache().lock(lock_key, timeout=timeout_seconds)
-        lock.acquire()
-    except redis_exceptions as e:
-        # Log detailed context for debugging
+        return dedup.claim_many(organization, claims, window_seconds)
+
+    except redis.RedisError as e:
         import traceback  # Only used for error logging in this handler
 
-        error_details = (
-            f"Lock key: {lock_key}\n"
+        frappe.log_error(
             f"Organization: {organization}\n"
-            f"Job hash: {job_hash}\n"
-            f"Timeout: {timeout_seconds}s\n\n"
+            f"Job hashes: {[job_hash for job_hash, _name in claims][:20]}\n\n"
             f"Error: {str(e)}\n\n"
-            f"Traceback:\n{traceback.format_exc()}"
+            f"Traceback:\n{traceback.format_exc()}",
+            "Redis Deduplication Index Failed",
         )
-        frappe.log_error(error_details, "Redis Lock Acquisition Failed")
         frappe.throw(
             _("Unable to submit job due to cache service unavailability. "
               "Please try again in a few moments or contact support if this persists."),
             title=_("Cache Service Unavailable")
         )
 
-    try:
-        yield
-    finally:
-        try:
-            lock.release()
-        except Exception:
-            # If Redis connection drops, the lock will expire by timeout.
-            pass
+
+def _release_job_hashes(organization: str, claims: list) -> None:
+    """Release deduplication claims of jobs that were not created."""
+    from dartwing.dartwing_core.background_jobs import dedup
+
+    for job_hash, job_name in claims:
+        dedup.release(organization, job_hash, job_name)
 
 
 def _enqueue_job(job, is_retry: bool = False):
     """
     Enqueue job for background execution.
 
-    Note: We intentionally do NOT call frappe.db.commit() here. The
-    enqueue_after_commit=True parameter ensures the RQ job is only
-    enqueued after the outer transaction commits. This preserves
-    atomicity when submit_job() is called within a larger transaction.
+    Note: We intentionally do NOT call frappe.db.commit() here. The job is
+    only pushed to the dispatcher (see dispatch.py) after the outer
+    transaction commits. This preserves atomicity when submit_job() is
+    called within a larger transaction.
     """
     from dartwing.dartwing_core.background_jobs.progress import publish_job_status_changed
 
@@ -623,7 +1112,7 @@ def _enqueue_job(job, is_retry: bool = False):
         old_status = job.status
         job.status = "Queued"
         job.save(ignore_permissions=True)
-        # Removed: frappe.db.commit() - rely on enqueue_after_commit=True
+        # Removed: frappe.db.commit() - dispatch happens after commit
 
         publish_job_status_changed(
             job_id=job.name,
@@ -632,22 +1121,28 @@ def _enqueue_job(job, is_retry: bool = False):
             to_status="Queued",
         )
 
-    # Map priority to Frappe queue
-    queue_map = {
-        "Critical": "short",
-        "High": "short",
-        "Normal": "default",
-        "Low": "long",
-    }
-    queue = queue_map.get(job.priority, "default")
-
-    # Enqueue using Frappe's background jobs
-    # Use enqueue_after_commit to ensure job record is persisted before RQ picks it up
-    frappe.enqueue(
-        "dartwing.dartwing_core.background_jobs.executor.execute_job",
-        background_job_id=job.name,
-        queue=queue,
-        timeout=job.timeout_seconds if job.timeout_seconds is not None else DEFAULT_TIMEOUT_SECONDS,
-        is_async=True,
-        enqueue_after_commit=True,
-    )
+    # Hand the job to the fair dispatcher once the Queued status is committed
+    job_ref = {"name": job.name, "organization": job.organization, "priority": job.priority}
+    frappe.db.after_commit.add(lambda: _dispatch_jobs([job_ref]))
+
+
+def _dispatch_jobs(jobs: list) -> None:
+    """
+    Push committed Queued jobs to the dispatcher (see dispatch.py).
+
+    Pushes all backlog entries and RQ tokens with pipelines, so a batch costs
+    a few round trips instead of one per job. If the push fails the jobs stay
+    Queued and dispatch.redispatch_lost_jobs() pushes them again later.
+
+    Args:
+        jobs: Dicts with name, organization and priority
+    """
+    from dartwing.dartwing_core.background_jobs import dispatch
+
+    try:
+        dispatch.push(jobs)
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to dispatch jobs {[job['name'] for job in jobs][:20]}: {e}",
+            "Background Job Dispatch",
+        )
@@ -62,6 +62,17 @@ class PermanentError(JobError):
     is_retryable = False
 
 
+class JobMemoryLimitError(PermanentError):
+    """
+    Raised when a handler running in process mode exceeds its Job Type's
+    max_memory_mb and is killed.
+
+    Treated as permanent: the same input would exhaust memory again.
+    """
+
+    is_retryable = False
+
+
 class JobCanceledError(JobError):
     """
     Raised by handlers when they detect the job has been canceled.
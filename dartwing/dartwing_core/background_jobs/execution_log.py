@@ -0,0 +1,78 @@
+"""
+Job Execution Log writer for Background Job Engine.
+
+The execution log is append-only: entries are never updated or validated
+after the fact, so they do not go through the document ORM. Transitions are
+buffered per transaction and written with multi-row INSERTs just before the
+transaction commits (or earlier once EXECUTION_LOG_MAX_BUFFER entries are
+pending), and discarded with it on rollback. A job's status save therefore
+adds no log insert of its own, and bulk transitions (cancel_jobs, retries,
+dependency cascades) write their whole log in one statement.
+
+Readers in the same transaction call flush() first to see pending entries
+(get_job_history does).
+"""
+
+import frappe
+from frappe.utils import now_datetime
+
+from dartwing.dartwing_core.background_jobs.config import (
+    BATCH_INSERT_CHUNK_SIZE,
+    EXECUTION_LOG_MAX_BUFFER,
+)
+
+LOG_FIELDS = [
+    "name", "owner", "creation", "modified", "modified_by", "docstatus",
+    "background_job", "organization", "from_status", "to_status",
+    "timestamp", "actor", "message", "retry_attempt",
+]
+
+
+def append(
+    background_job: str,
+    organization: str,
+    from_status: str | None,
+    to_status: str,
+    message: str,
+    retry_attempt: int | None = None,
+) -> None:
+    """
+    Buffer an execution log entry until the current transaction commits.
+
+    The timestamp and actor are taken now, as a document insert would.
+    """
+    pending = getattr(frappe.local, "dartwing_pending_execution_logs", None)
+    if pending is None:
+        pending = frappe.local.dartwing_pending_execution_logs = []
+        frappe.db.before_commit.add(flush)
+        frappe.db.after_rollback.add(_discard_pending)
+
+    now = now_datetime()
+    user = frappe.session.user
+    pending.append((
+        frappe.generate_hash(length=10), user, now, now, user, 0,
+        background_job, organization, from_status, to_status,
+        now, user, message, retry_attempt,
+    ))
+
+    if len(pending) >= EXECUTION_LOG_MAX_BUFFER:
+        frappe.local.dartwing_pending_execution_logs = []
+        _write(pending)
+
+
+def flush() -> None:
+    """Write all buffered entries of the current transaction."""
+    pending = getattr(frappe.local, "dartwing_pending_execution_logs", None)
+    frappe.local.dartwing_pending_execution_logs = None
+    if pending:
+        _write(pending)
+
+
+def _write(rows: list) -> None:
+    frappe.db.bulk_insert(
+        "Job Execution Log", LOG_FIELDS, rows, chunk_size=BATCH_INSERT_CHUNK_SIZE
+    )
+
+
+def _discard_pending() -> None:
+    frappe.local.dartwing_pending_execution_logs = None
@@ -5,14 +5,19 @@ Handles job execution with timeout handling, checkpoint support, and error
 classification.
 """
 
+import random
+import time
+
 import frappe
-from frappe.utils import now_datetime, add_to_date
+from frappe.utils import now_datetime
 from typing import Any, Callable
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
 from dartwing.dartwing_core.background_jobs.config import (
     DEFAULT_TIMEOUT_SECONDS,
-    DEPENDENCY_RETRY_DELAY_SECONDS,
+    CONCURRENCY_DEFER_MAX_SECONDS,
+    CONCURRENCY_DEFER_SECONDS,
+    EXECUTION_MODE_PROCESS,
 )
 from dartwing.dartwing_core.background_jobs.progress import JobContext, publish_job_status_changed
 from dartwing.dartwing_core.background_jobs.errors import (
@@ -22,10 +27,14 @@ from dartwing.dartwing_core.background_jobs.errors import (
     JobCanceledError,
     ERROR_TYPE_CIRCUIT_BREAKER,
 )
+from dartwing.dartwing_core.background_jobs import concurrency
+from dartwing.dartwing_core.background_jobs.registry import find_job_type, get_job_type
 from dartwing.dartwing_core.background_jobs.circuit_breaker import (
     check_circuit_breaker,
     record_job_outcome,
+    release_probe,
     CircuitBreakerOpen,
+    CircuitBreakerProbing,
 )
 
 
@@ -66,13 +75,27 @@ def execute_job(background_job_id: str | None = None, job_id: str | None = None)
         )
         return
 
+    # Async handlers run multiplexed in an async worker, and Process mode jobs
+    # on the pooled handler processes of a process worker, when one is running
+    if _hand_off_job(job):
+        return
+
     # Check dependency
     if not _check_dependency(job):
         return
 
     # Check circuit breaker
     try:
-        check_circuit_breaker(job.job_type, job.organization)
+        probing = check_circuit_breaker(
+            job.job_type,
+            job.organization,
+            job.name,
+            job.timeout_seconds if job.timeout_seconds is not None else DEFAULT_TIMEOUT_SECONDS,
+        )
+    except CircuitBreakerProbing as e:
+        # Half-open: wait for the probes instead of failing the job
+        _defer_job(job, str(e))
+        return
     except CircuitBreakerOpen as e:
         # Circuit is open - don't execute, mark as failed
         job.status = "Dead Letter"
@@ -91,10 +114,80 @@ def execute_job(background_job_id: str | None = None, job_id: str | None = None)
         )
         return
 
+    # Check concurrency limits; over-limit jobs are deferred, not failed
+    slots = _acquire_concurrency_slots(job)
+    if slots is None:
+        if probing:
+            release_probe(job.job_type, job.organization, job.name)
+        return
+
+    if not _claim_job(job):
+        # Another dispatch of the job started it; the slots and probe it
+        # holds under the job's name are that worker's
+        return
+
+    try:
+        _run_job(job)
+    finally:
+        concurrency.release(job.name, slots)
+        if probing:
+            release_probe(job.job_type, job.organization, job.name)
+
+
+def _hand_off_job(job) -> bool:
+    """
+    Give a job to a long-lived worker (see async_runner.py): Process mode
+    Job Types to dartwing-process-worker, async handlers to
+    dartwing-async-worker.
+    """
+    from dartwing.dartwing_core.background_jobs import async_runner
+
+    try:
+        config = find_job_type(job.job_type) or {}
+        if config.get("execution_mode") == EXECUTION_MODE_PROCESS:
+            return async_runner.handoff(job.name, channel="process")
+        if not async_runner.is_async_handler(_get_handler(job.job_type)):
+            return False
+        return async_runner.handoff(job.name)
+    except Exception:
+        # Run it here; handler errors are reported by _run_job()
+        return False
+
+
+def _claim_job(job) -> bool:
+    """
+    Atomically take a Queued job for this worker.
+
+    A job can be dispatched more than once, e.g. pushed again by the dispatch
+    safety net while a token starts it, and both copies may have read it as
+    Queued. The conditional UPDATE locks the row: a concurrent claim waits
+    until this worker commits the Running status, then matches nothing. Only
+    started_at is written, so the Running save still sees the Queued status
+    before it.
+
+    Returns:
+        False if the job is no longer Queued
+    """
+    job.started_at = now_datetime()
+    frappe.db.sql(
+        """
+        UPDATE `tabBackground Job` SET started_at = %(started_at)s
+        WHERE name = %(name)s AND status = 'Queued'
+        """,
+        {"started_at": job.started_at, "name": job.name},
+    )
+    if frappe.db.sql("SELECT ROW_COUNT()")[0][0] != 1:
+        # Release the row lock the UPDATE took
+        frappe.db.rollback()
+        return False
+    return True
+
+
+def _run_job(job) -> None:
+    """Run a claimed job that passed all admission checks, holding its concurrency slots."""
     # Transition to Running
     old_status = job.status
     job.status = "Running"
-    job.started_at = now_datetime()
     job.save(ignore_permissions=True)
     frappe.db.commit()
 
@@ -123,7 +216,11 @@ def execute_job(background_job_id: str | None = None, job_id: str | None = None)
 
     # Execute with timeout
     try:
-        result = _execute_with_timeout(handler, context, context.timeout_seconds)
+        try:
+            result = _execute(handler, context)
+        finally:
+            # Persist buffered progress before the status transition
+            _flush_progress(context)
         _handle_success(job, result)
     except JobCanceledError:
         _handle_canceled(job)
@@ -133,9 +230,78 @@ def execute_job(background_job_id: str | None = None, job_id: str | None = None)
         _handle_failure(job, e)
 
 
+def _flush_progress(context: JobContext) -> None:
+    """Write the handler's last buffered progress to the job row."""
+    try:
+        context.flush_progress()
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to flush progress for job {context.job_id}: {e}",
+            "Background Job Progress",
+        )
+
+
+def _acquire_concurrency_slots(job) -> list | None:
+    """
+    Take the job's concurrency slots (see concurrency.py).
+
+    Returns:
+        The acquired slots (empty if the job is not limited), or None if a
+        limit is full and the job was deferred
+    """
+    try:
+        slots = concurrency.get_slots(get_job_type(job.job_type), job.organization)
+        full = concurrency.acquire(
+            job.name,
+            slots,
+            job.timeout_seconds if job.timeout_seconds is not None else DEFAULT_TIMEOUT_SECONDS,
+        )
+    except Exception as e:
+        # Fail open: a cache outage should not stop job execution
+        frappe.log_error(
+            f"Concurrency check failed for job {job.name}, running without limits: {e}",
+            "Background Job Concurrency",
+        )
+        return []
+
+    if full:
+        _defer_job(job, f"concurrency limit {full.scope}")
+        return None
+    return slots
+
+
+def _defer_job(job, reason: str) -> None:
+    """
+    Dispatch the job again later, without consuming a retry attempt.
+
+    The job stays Queued; only a delay queue entry is written. The delay
+    doubles with each deferral of the same job and is jittered, so jobs
+    waiting for the same full limit spread out instead of retrying together.
+    """
+    from dartwing.dartwing_core.background_jobs import delay_queue
+
+    try:
+        delay = _get_defer_delay(concurrency.record_deferral(job.name))
+        delay_queue.schedule("dispatch", job.name, time.time() + delay)
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to defer job {job.name} ({reason}): {e}",
+            "Background Job Concurrency",
+        )
+
+
+def _get_defer_delay(deferrals: int) -> float:
+    """Delay before the nth deferral of a job is dispatched again (equal jitter)."""
+    backoff = min(CONCURRENCY_DEFER_SECONDS * 2 ** min(deferrals - 1, 16), CONCURRENCY_DEFER_MAX_SECONDS)
+    return backoff * (0.5 + random.random() * 0.5)
+
+
 def _check_dependency(job) -> bool:
     """
-    Check if job dependency is satisfied.
+    Check if job dependencies are satisfied.
+
+    Jobs with unmet dependencies are normally kept Pending by the engine and
+    never reach a worker; this guards jobs enqueued by other paths.
 
     Args:
         job: Background Job document
@@ -146,35 +312,37 @@ def _check_dependency(job) -> bool:
     if not job.depends_on:
         return True
 
-    parent_status = frappe.db.get_value("Background Job", job.depends_on, "status")
+    from dartwing.dartwing_core.background_jobs.dependencies import (
+        get_parent_state,
+        fail_waiting_job,
+        cascade_failure,
+    )
+
+    state, failed = get_parent_state(job.name)
 
-    if parent_status == "Completed":
+    if state == "ready":
         return True
 
-    if parent_status in ["Failed", "Dead Letter", "Canceled", "Timed Out"]:
-        # Parent failed - fail this job too
-        job.status = "Dead Letter"
-        job.error_message = f"Parent job {job.depends_on} failed with status: {parent_status}"
-        job.error_type = "Permanent"
-        job.completed_at = now_datetime()
-        job.save(ignore_permissions=True)
+    if state == "failed":
+        # Parent can no longer complete - fail this job and its descendants too
+        parent_id, parent_status = failed
+        fail_waiting_job(job, parent_id, parent_status)
+        cascade_failure(job.name, job.status)
         frappe.db.commit()
-
-        publish_job_status_changed(
-            job_id=job.name,
-            organization=job.organization,
-            from_status="Queued",
-            to_status="Dead Letter",
-            error_message=job.error_message,
-        )
         return False
 
-    # Parent still in progress (Pending/Queued/Running)
-    # Schedule retry so scheduler picks this job up again after delay
-    # This prevents orphaned jobs that would otherwise wait forever
-    job.next_retry_at = add_to_date(now_datetime(), seconds=DEPENDENCY_RETRY_DELAY_SECONDS)
+    # Parents still in progress: wait as Pending, release_dependents() enqueues
+    # the job again when its last parent completes
+    job.status = "Pending"
     job.save(ignore_permissions=True)
     frappe.db.commit()
+
+    publish_job_status_changed(
+        job_id=job.name,
+        organization=job.organization,
+        from_status="Queued",
+        to_status="Pending",
+    )
     return False
 
 
@@ -188,17 +356,43 @@ def _get_handler(job_type: str) -> Callable:
     Returns:
         The handler callable
     """
-    from dartwing.dartwing_core.doctype.job_type.job_type import get_handler
+    from dartwing.dartwing_core.background_jobs.registry import get_handler
 
     return get_handler(job_type)
 
 
+def _execute(handler: Callable, context: JobContext) -> Any:
+    """
+    Run the handler in the Job Type's execution mode.
+
+    "Process" Job Types run in a pooled child process that is killed at the
+    timeout or memory limit (see process_pool.py); `async def` handlers run
+    on the worker's event loop (see async_runner.py); all others run in a
+    thread.
+    """
+    config = find_job_type(context.job_type) or {}
+    if config.get("execution_mode") == EXECUTION_MODE_PROCESS:
+        from dartwing.dartwing_core.background_jobs import process_pool
+
+        return process_pool.execute(context, max_memory_mb=config.get("max_memory_mb"))
+
+    from dartwing.dartwing_core.background_jobs import async_runner
+
+    if async_runner.is_async_handler(handler):
+        return async_runner.run(handler, context, context.timeout_seconds)
+
+    return _execute_with_timeout(handler, context, context.timeout_seconds)
+
+
 def _execute_with_timeout(handler: Callable, context: JobContext, timeout_seconds: int) -> Any:
     """
     Execute handler with portable thread-based timeout.
 
     Uses ThreadPoolExecutor for cross-platform compatibility (works on Windows
-    and in non-main threads, unlike signal.SIGALRM).
+    and in non-main threads, unlike signal.SIGALRM). A handler that times out
+    is abandoned, not stopped: the executor does not wait for its thread, and
+    the thread ends with the RQ work horse. Job Types that need a hard stop
+    use process execution mode.
 
     Args:
         handler: Job handler function
@@ -211,12 +405,15 @@ def _execute_with_timeout(handler: Callable, context: JobContext, timeout_second
     Raises:
         JobTimeoutError: If execution exceeds timeout
     """
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(handler, context)
-        try:
-            return future.result(timeout=timeout_seconds)
-        except FuturesTimeoutError:
-            raise JobTimeoutError(f"Job exceeded {timeout_seconds}s timeout")
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(handler, context)
+    try:
+        return future.result(timeout=timeout_seconds)
+    except FuturesTimeoutError:
+        raise JobTimeoutError(f"Job exceeded {timeout_seconds}s timeout")
+    finally:
+        # Waiting here would hold the worker for as long as a hung handler runs
+        executor.shutdown(wait=False)
 
 
 def _handle_success(job, result: Any):
@@ -247,6 +444,27 @@ def _handle_success(job, result: Any):
     # Record successful outcome for circuit breaker
     record_job_outcome(job.job_type, job.organization, success=True)
 
+    # Release children whose last parent was this job
+    _release_dependents(job)
+
+
+def _release_dependents(job):
+    """
+    Enqueue dependent jobs right away instead of waiting for the scheduler.
+
+    Best-effort: the minutely scheduler scan releases anything missed here.
+    """
+    try:
+        from dartwing.dartwing_core.background_jobs.dependencies import release_dependents
+
+        release_dependents(job.name)
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(
+            f"Failed to release dependents of job {job.name}: {str(e)}",
+            "Background Job Dependencies",
+        )
+
 
 def _call_timeout_handler(job):
     """
@@ -259,7 +477,7 @@ def _call_timeout_handler(job):
         job: Background Job document that timed out
     """
     try:
-        from dartwing.dartwing_core.doctype.job_type.job_type import get_timeout_handler
+        from dartwing.dartwing_core.background_jobs.registry import get_timeout_handler
 
         timeout_handler = get_timeout_handler(job.job_type)
         if not timeout_handler:
@@ -275,7 +493,12 @@ def _call_timeout_handler(job):
         )
 
         # Call timeout handler (best effort - don't fail if cleanup fails)
-        timeout_handler(context)
+        from dartwing.dartwing_core.background_jobs import async_runner
+
+        if async_runner.is_async_handler(timeout_handler):
+            async_runner.run(timeout_handler, context, context.timeout_seconds)
+        else:
+            timeout_handler(context)
 
     except Exception as e:
         # Log but don't raise - timeout handler failures shouldn't prevent retry scheduling
@@ -386,6 +609,9 @@ def _record_job_metrics(job):
             status=job.status,
             # error_type is only set for failures (timeout/error), not for successful completions
             error_type=getattr(job, 'error_type', None),
+            job_type=job.job_type,
+            organization=job.organization,
+            priority=job.priority,
         )
     except Exception as e:
         # Metrics recording is best-effort - don't fail the job
@@ -3,34 +3,29 @@ Metrics for Background Job Engine.
 
 Provides operational metrics for monitoring job queue health, including
 execution time tracking and performance analytics.
+
+Execution times are buffered in Redis as jobs finish and written in bulk
+by the minutely flush_metrics() task:
+    dartwing_core:background_job:metrics:rollup:<bucket>  counters per group
+    dartwing_core:background_job:metrics:buckets          buckets to flush
+    dartwing_core:background_job:metrics:samples          sampled executions
 """
 
+import json
+import random
+from datetime import datetime
+
 import frappe
 from frappe.utils import now_datetime, add_to_date
-from typing import Optional, List
-
-
-def _calculate_percentile(values: List[float], percentile: float) -> float:
-    """
-    Calculate a percentile from a sorted or unsorted list of values.
+from typing import Optional
 
-    Args:
-        values: List of numeric values
-        percentile: Percentile to calculate (0.0 to 1.0, e.g., 0.95 for p95)
-
-    Returns:
-        The calculated percentile value, or 0 if the list is empty
-
-    Note:
-        Uses the proper percentile calculation: index = (len - 1) * percentile
-        This avoids off-by-one errors and matches standard percentile algorithms.
-    """
-    if not values:
-        return 0
-    # Ensure values are sorted
-    sorted_values = sorted(values)
-    index = int((len(sorted_values) - 1) * percentile)
-    return sorted_values[index]
+from dartwing.dartwing_core.background_jobs import sketch
+from dartwing.dartwing_core.background_jobs.config import (
+    METRICS_BUFFER_TTL_SECONDS,
+    METRICS_DEFAULT_SAMPLE_RATE,
+    METRICS_FLUSH_BATCH_SIZE,
+    METRICS_ROLLUP_BUCKET_SECONDS,
+)
 
 
 def get_metrics(organization: str = None) -> dict:
@@ -42,7 +37,7 @@ def get_metrics(organization: str = None) -> dict:
 
     Returns:
         Dict with job_count_by_status, queue_depth_by_priority,
-        processing_time, failure_rate_by_type
+        processing_time, failure_rate_by_type, concurrency_slots
     """
     filters = {}
     if organization:
@@ -70,6 +65,7 @@ def get_metrics(organization: str = None) -> dict:
         "queue_depth_by_priority": _get_queue_depth_by_priority(filters),
         "processing_time": _get_processing_time(filters),
         "failure_rate_by_type": _get_failure_rate_by_type(filters),
+        "concurrency_slots": _get_concurrency_slots(filters),
         "timestamp": str(now_datetime()),
     }
 
@@ -112,12 +108,32 @@ def _empty_metrics() -> dict:
         "queue_depth_by_priority": {},
         "processing_time": {"average_seconds": 0, "p95_seconds": 0},
         "failure_rate_by_type": {},
+        "concurrency_slots": [],
         "timestamp": str(now_datetime()),
     }
 
 
+def _get_concurrency_slots(filters: dict) -> list:
+    """Get slot usage of concurrency-limited scopes (best-effort; reads Redis)."""
+    from dartwing.dartwing_core.background_jobs.concurrency import get_usage
+
+    org_filter = filters.get("organization")
+    if isinstance(org_filter, tuple):
+        organizations = list(org_filter[1] or [])
+    elif org_filter:
+        organizations = [org_filter]
+    else:
+        organizations = None
+
+    try:
+        return get_usage(organizations)
+    except Exception as e:
+        frappe.log_error(f"Failed to read concurrency slots: {e}", "Background Job Metrics")
+        return []
+
+
 def _get_job_count_by_status(filters: dict) -> dict:
-    """Get count of jobs by status with parameterized queries."""
+    """Get count of jobs by status from the status rollups (see status_rollup.py)."""
     conditions = ["1=1"]
     values = {}
 
@@ -125,20 +141,21 @@ def _get_job_count_by_status(filters: dict) -> dict:
 
     result = frappe.db.sql(
         f"""
-        SELECT status, COUNT(*) as count
-        FROM `tabBackground Job`
+        SELECT status, SUM(net_change) as count
+        FROM `tabBackground Job Status Rollup`
         WHERE {" AND ".join(conditions)}
         GROUP BY status
+        HAVING count > 0
         """,
         values,
         as_dict=True,
     )
 
-    return {row.status: row.count for row in result}
+    return {row.status: int(row.count) for row in result}
 
 
 def _get_queue_depth_by_priority(filters: dict) -> dict:
-    """Get count of queued jobs by priority with parameterized queries."""
+    """Get count of queued jobs by priority from the status rollups."""
     conditions = ["status IN ('Pending', 'Queued')"]
     values = {}
 
@@ -146,57 +163,39 @@ def _get_queue_depth_by_priority(filters: dict) -> dict:
 
     result = frappe.db.sql(
         f"""
-        SELECT priority, COUNT(*) as count
-        FROM `tabBackground Job`
+        SELECT priority, SUM(net_change) as count
+        FROM `tabBackground Job Status Rollup`
         WHERE {" AND ".join(conditions)}
         GROUP BY priority
+        HAVING count > 0
         """,
         values,
         as_dict=True,
     )
 
-    return {row.priority: row.count for row in result}
+    return {row.priority: int(row.count) for row in result}
 
 
 def _get_processing_time(filters: dict) -> dict:
     """Get average and p95 processing time for completed jobs in last hour."""
-    conditions = ["status = 'Completed'", "completed_at >= %(one_hour_ago)s", "started_at IS NOT NULL"]
-    values = {}
+    conditions = ["status = 'Completed'", "bucket_start >= %(one_hour_ago)s"]
+    values = {"one_hour_ago": add_to_date(now_datetime(), hours=-1)}
 
     _apply_organization_filter(filters, conditions, values)
 
-    one_hour_ago = add_to_date(now_datetime(), hours=-1)
-    values["one_hour_ago"] = one_hour_ago
-
     result = frappe.db.sql(
         f"""
-        SELECT
-            AVG(TIMESTAMPDIFF(SECOND, started_at, completed_at)) as avg_seconds,
-            COUNT(*) as total_count
-        FROM `tabBackground Job`
+        SELECT job_count, total_seconds, duration_sketch
+        FROM `tabBackground Job Metrics Rollup`
         WHERE {" AND ".join(conditions)}
         """,
         values,
         as_dict=True,
     )
 
-    avg_seconds = result[0].avg_seconds if result and result[0].avg_seconds else 0
-
-    # Get p95 using a percentile approach
-    p95_result = frappe.db.sql(
-        f"""
-        SELECT TIMESTAMPDIFF(SECOND, started_at, completed_at) as duration
-        FROM `tabBackground Job`
-        WHERE {" AND ".join(conditions)}
-        ORDER BY duration
-        """,
-        values,
-        as_list=True,
-    )
-
-    # Calculate p95 percentile using helper function
-    durations = [r[0] for r in p95_result if r[0] is not None] if p95_result else []
-    p95_seconds = _calculate_percentile(durations, 0.95)
+    total_count = sum(row.job_count or 0 for row in result)
+    avg_seconds = sum(row.total_seconds or 0 for row in result) / total_count if total_count else 0
+    p95_seconds = sketch.merge_all(row.duration_sketch for row in result).quantile(0.95)
 
     return {
         "average_seconds": round(avg_seconds, 2) if avg_seconds else 0,
@@ -205,22 +204,19 @@ def _get_processing_time(filters: dict) -> dict:
 
 
 def _get_failure_rate_by_type(filters: dict) -> dict:
-    """Get failure rate by job type for jobs in last 24 hours."""
-    conditions = ["created_at >= %(one_day_ago)s"]
-    values = {}
+    """Get the share of executions per job type that failed in the last 24 hours."""
+    conditions = ["bucket_start >= %(one_day_ago)s"]
+    values = {"one_day_ago": add_to_date(now_datetime(), hours=-24)}
 
     _apply_organization_filter(filters, conditions, values)
 
-    one_day_ago = add_to_date(now_datetime(), hours=-24)
-    values["one_day_ago"] = one_day_ago
-
     result = frappe.db.sql(
         f"""
         SELECT
             job_type,
-            COUNT(*) as total,
-            SUM(CASE WHEN status IN ('Failed', 'Dead Letter', 'Timed Out') THEN 1 ELSE 0 END) as failed
-        FROM `tabBackground Job`
+            SUM(job_count) as total,
+            SUM(CASE WHEN status IN ('Failed', 'Dead Letter', 'Timed Out') THEN job_count ELSE 0 END) as failed
+        FROM `tabBackground Job Metrics Rollup`
         WHERE {" AND ".join(conditions)}
         GROUP BY job_type
         HAVING total > 0
@@ -235,57 +231,119 @@ def _get_failure_rate_by_type(filters: dict) -> dict:
     }
 
 
+# KEYS: rollup hash, bucket index, samples list
+# ARGV: group, seconds, bucket_start, bucket score, ttl, sample JSON or "",
+#       latency sketch bin, job id
+_RECORD_SCRIPT = """
+local hash, group, seconds = KEYS[1], ARGV[1], tonumber(ARGV[2])
+redis.call('HINCRBY', hash, group .. '|n', 1)
+redis.call('HINCRBY', hash, group .. '|b' .. ARGV[7], 1)
+redis.call('HINCRBYFLOAT', hash, group .. '|sum', ARGV[2])
+local current = redis.call('HGET', hash, group .. '|min')
+if not current or seconds < tonumber(current) then
+    redis.call('HSET', hash, group .. '|min', ARGV[2])
+end
+current = redis.call('HGET', hash, group .. '|max')
+if not current or seconds > tonumber(current) then
+    redis.call('HSET', hash, group .. '|max', ARGV[2], group .. '|maxjob', ARGV[8])
+end
+redis.call('EXPIRE', hash, ARGV[5])
+redis.call('ZADD', KEYS[2], ARGV[4], ARGV[3])
+if ARGV[6] ~= '' then
+    redis.call('RPUSH', KEYS[3], ARGV[6])
+    redis.call('EXPIRE', KEYS[3], ARGV[5])
+end
+return 1
+"""
+
+# Separates job type, organization and status in rollup hash fields
+_GROUP_SEPARATOR = "\t"
+
+_SAMPLE_FIELDS = [
+    "name", "owner", "creation", "modified", "modified_by", "docstatus",
+    "job_id", "job_type", "organization", "priority",
+    "execution_time_seconds", "status", "error_type", "recorded_at",
+]
+
+_ROLLUP_FIELDS = [
+    "name", "owner", "creation", "modified", "modified_by", "docstatus",
+    "bucket_start", "job_type", "organization", "status",
+    "job_count", "total_seconds", "min_seconds", "max_seconds", "max_job_id",
+    "duration_sketch",
+]
+
+
+def _key(suffix: str) -> str:
+    return frappe.cache().make_key(f"dartwing_core:background_job:metrics:{suffix}")
+
+
 def record_execution_metrics(
     job_id: str,
     execution_time_seconds: float,
     status: str,
     error_type: Optional[str] = None,
+    job_type: Optional[str] = None,
+    organization: Optional[str] = None,
+    priority: Optional[str] = None,
 ):
     """
-    Record execution metrics for a completed job.
+    Record execution metrics for a finished job.
 
-    This function stores execution time and outcome data that can be used for
-    performance analysis, SLA monitoring, and identifying slow job types.
+    Buffers the execution in Redis with one script call and no database
+    access: every job is added to its minute's rollup (count, total, min and
+    max time per Job Type, organization and status), and a sampled share is
+    also queued as an individual sample. flush_metrics() writes both to the
+    database in bulk every minute.
+
+    Successful jobs are sampled at the Job Type's metrics_sample_rate
+    (default METRICS_DEFAULT_SAMPLE_RATE); failures are always sampled.
 
     Args:
         job_id: Background Job ID
         execution_time_seconds: Total execution time in seconds
         status: Final job status (Completed, Failed, Timed Out, etc.)
         error_type: Error classification if job failed (Transient, Permanent, etc.)
-
-    Performance Considerations:
-        This performs an individual database insert for each job completion.
-        At high scale (hundreds/thousands of jobs per second), this could become
-        a bottleneck. Consider these optimizations for high-volume scenarios:
-
-        1. Batch metrics writes: Collect metrics in memory and flush periodically
-        2. Async queue: Use a background queue (Redis, RabbitMQ) to decouple metrics
-           recording from job execution
-        3. Sampling: Record metrics for only a percentage of jobs
-        4. Pre-aggregation: Calculate statistics in-memory and store summaries
-
-    Note:
-        This data is stored in a separate metrics table to avoid bloating the main
-        Background Job table with historical data. Metrics can be aggregated and
-        archived periodically.
+        job_type, organization, priority: The job's fields; read from the
+            job if not given
     """
     try:
-        job = frappe.get_doc("Background Job", job_id)
-
-        # Create a metrics record (lightweight record for analytics)
-        metrics_doc = frappe.get_doc({
-            "doctype": "Background Job Metrics",
-            "job_id": job_id,
-            "job_type": job.job_type,
-            "organization": job.organization,
-            "priority": job.priority,
-            "execution_time_seconds": execution_time_seconds,
-            "status": status,
-            "error_type": error_type,
-            "recorded_at": now_datetime(),
-        })
-        metrics_doc.insert(ignore_permissions=True)
-        frappe.db.commit()
+        if job_type is None:
+            job = frappe.db.get_value(
+                "Background Job", job_id, ["job_type", "organization", "priority"], as_dict=True
+            )
+            job_type, organization, priority = job.job_type, job.organization, job.priority
+
+        now = now_datetime()
+        bucket_score = _bucket_score(now)
+        bucket_start = str(get_bucket_start(now))
+
+        sample = ""
+        if status != "Completed" or random.random() < _get_sample_rate(job_type):
+            sample = json.dumps({
+                "job_id": job_id,
+                "job_type": job_type,
+                "organization": organization,
+                "priority": priority,
+                "execution_time_seconds": execution_time_seconds,
+                "status": status,
+                "error_type": error_type,
+                "recorded_at": str(now),
+            })
+
+        script = frappe.cache().register_script(_RECORD_SCRIPT)
+        script(
+            keys=[_key(f"rollup:{bucket_start}"), _key("buckets"), _key("samples")],
+            args=[
+                _GROUP_SEPARATOR.join([job_type or "", organization or "", status]),
+                float(execution_time_seconds),
+                bucket_start,
+                bucket_score,
+                METRICS_BUFFER_TTL_SECONDS,
+                sample,
+                sketch.bin_index(float(execution_time_seconds)),
+                job_id,
+            ],
+        )
 
     except Exception as e:
         # Metrics recording failures shouldn't break job execution
@@ -295,6 +353,122 @@ def record_execution_metrics(
         )
 
 
+def _bucket_score(moment: datetime) -> int:
+    """Start of the rollup bucket containing moment, in epoch seconds."""
+    return int(moment.timestamp()) // METRICS_ROLLUP_BUCKET_SECONDS * METRICS_ROLLUP_BUCKET_SECONDS
+
+
+def get_bucket_start(moment: datetime) -> datetime:
+    """Start of the rollup bucket (METRICS_ROLLUP_BUCKET_SECONDS) containing moment."""
+    return datetime.fromtimestamp(_bucket_score(moment))
+
+
+def _get_sample_rate(job_type: Optional[str]) -> float:
+    from dartwing.dartwing_core.background_jobs.registry import find_job_type
+
+    config = find_job_type(job_type) if job_type else None
+    if not config or config.get("metrics_sample_rate") is None:
+        return METRICS_DEFAULT_SAMPLE_RATE
+    return config.metrics_sample_rate
+
+
+def flush_metrics() -> dict:
+    """
+    Write buffered samples and closed rollup buckets to the database.
+
+    Called every minute by the scheduler; one commit for everything flushed.
+    Entries are removed from Redis before they are inserted, so a failed
+    flush loses them rather than counting them twice.
+
+    Returns:
+        Dict with the number of samples and rollup rows written
+    """
+    cache = frappe.cache()
+    user = frappe.session.user
+    now = now_datetime()
+
+    samples = []
+    samples_key = _key("samples")
+    while True:
+        pipe = cache.pipeline()
+        pipe.lrange(samples_key, 0, METRICS_FLUSH_BATCH_SIZE - 1)
+        pipe.ltrim(samples_key, METRICS_FLUSH_BATCH_SIZE, -1)
+        batch, _trimmed = pipe.execute()
+        samples.extend(json.loads(entry) for entry in batch)
+        if len(batch) < METRICS_FLUSH_BATCH_SIZE:
+            break
+
+    rollups = []
+    buckets_key = _key("buckets")
+    open_from = _bucket_score(now)
+    for bucket_start in cache.zrangebyscore(buckets_key, "-inf", f"({open_from}"):
+        bucket_start = bucket_start.decode() if isinstance(bucket_start, bytes) else bucket_start
+        rollup_key = _key(f"rollup:{bucket_start}")
+        pipe = cache.pipeline()
+        pipe.hgetall(rollup_key)
+        pipe.delete(rollup_key)
+        pipe.zrem(buckets_key, bucket_start)
+        counters, _deleted, _removed = pipe.execute()
+        rollups.extend(_parse_rollup(bucket_start, counters))
+
+    if samples:
+        frappe.db.bulk_insert(
+            "Background Job Metrics",
+            _SAMPLE_FIELDS,
+            [
+                (
+                    frappe.generate_hash(length=10), user, now, now, user, 0,
+                    sample["job_id"], sample["job_type"], sample["organization"],
+                    sample["priority"], sample["execution_time_seconds"],
+                    sample["status"], sample["error_type"], sample["recorded_at"],
+                )
+                for sample in samples
+            ],
+            chunk_size=METRICS_FLUSH_BATCH_SIZE,
+        )
+    if rollups:
+        frappe.db.bulk_insert(
+            "Background Job Metrics Rollup",
+            _ROLLUP_FIELDS,
+            [(frappe.generate_hash(length=10), user, now, now, user, 0, *row) for row in rollups],
+            chunk_size=METRICS_FLUSH_BATCH_SIZE,
+        )
+    if samples or rollups:
+        frappe.db.commit()
+
+    return {"samples": len(samples), "rollups": len(rollups)}
+
+
+def _parse_rollup(bucket_start: str, counters: dict) -> list:
+    """
+    Turn a rollup hash into rows of bucket_start, job_type, organization,
+    status, count, total, min, max, slowest job and serialized latency sketch.
+    """
+    groups = {}
+    slowest = {}
+    sketches = {}
+    for field, value in (counters or {}).items():
+        field = field.decode() if isinstance(field, bytes) else field
+        group, _sep, stat = field.rpartition("|")
+        if stat == "maxjob":
+            slowest[group] = value.decode() if isinstance(value, bytes) else value
+        elif stat.startswith("b"):
+            sketches.setdefault(group, sketch.LatencySketch()).bins[int(stat[1:])] = int(value)
+        else:
+            groups.setdefault(group, {})[stat] = float(value)
+
+    rows = []
+    for group, stats in groups.items():
+        job_type, organization, status = group.split(_GROUP_SEPARATOR)
+        rows.append((
+            bucket_start, job_type or None, organization or None, status,
+            int(stats.get("n", 0)), stats.get("sum", 0.0),
+            stats.get("min", 0.0), stats.get("max", 0.0), slowest.get(group),
+            sketches.get(group, sketch.LatencySketch()).to_json(),
+        ))
+    return rows
+
+
 def get_execution_time_stats(
     organization: Optional[str] = None,
     job_type: Optional[str] = None,
@@ -309,9 +483,10 @@ def get_execution_time_stats(
         hours: Time window in hours (default: 24)
 
     Returns:
-        Dict with average, median, p50, p95, p99 execution times, and sample count
+        Dict with average, min, max, p50, p95, p99 execution times, and sample count
+        (p50/p95/p99 are within METRICS_SKETCH_RELATIVE_ACCURACY)
     """
-    conditions = ["recorded_at >= %(time_threshold)s"]
+    conditions = []
     values = {"time_threshold": add_to_date(now_datetime(), hours=-hours)}
 
     if organization:
@@ -322,22 +497,20 @@ def get_execution_time_stats(
         conditions.append("job_type = %(job_type)s")
         values["job_type"] = job_type
 
-    # Get basic stats
-    result = frappe.db.sql(
+    # Rollup rows are bounded by time buckets and groups, not by job count;
+    # percentiles come from their merged latency sketches (see sketch.py)
+    rows = frappe.db.sql(
         f"""
-        SELECT
-            AVG(execution_time_seconds) as avg_time,
-            MIN(execution_time_seconds) as min_time,
-            MAX(execution_time_seconds) as max_time,
-            COUNT(*) as sample_count
-        FROM `tabBackground Job Metrics`
-        WHERE {" AND ".join(conditions)}
+        SELECT job_count, total_seconds, min_seconds, max_seconds, duration_sketch
+        FROM `tabBackground Job Metrics Rollup`
+        WHERE {" AND ".join(["bucket_start >= %(time_threshold)s", *conditions])}
         """,
         values,
         as_dict=True,
     )
 
-    if not result or not result[0].sample_count:
+    sample_count = sum(row.job_count or 0 for row in rows)
+    if not sample_count:
         return {
             "average_seconds": 0,
             "min_seconds": 0,
@@ -348,32 +521,17 @@ def get_execution_time_stats(
             "sample_count": 0,
         }
 
-    stats = result[0]
-
-    # Get percentiles
-    # NOTE: This loads all execution times into memory for sorting and percentile calculation.
-    # For large datasets (thousands+ of jobs), this could be inefficient.
-    # Performance improvement options:
-    #   1. Use SQL window functions: PERCENT_RANK() or NTILE() (requires MySQL 8.0+/MariaDB 10.2+)
-    #   2. Use sampling: SELECT ... ORDER BY RAND() LIMIT N for approximate percentiles
-    #   3. Pre-aggregate percentiles in a separate summary table updated periodically
-    percentiles_result = frappe.db.sql(
-        f"""
-        SELECT execution_time_seconds
-        FROM `tabBackground Job Metrics`
-        WHERE {" AND ".join(conditions)}
-        ORDER BY execution_time_seconds
-        """,
-        values,
-        as_list=True,
+    stats = frappe._dict(
+        avg_time=sum(row.total_seconds or 0 for row in rows) / sample_count,
+        min_time=min(row.min_seconds for row in rows if row.job_count),
+        max_time=max(row.max_seconds for row in rows if row.job_count),
+        sample_count=sample_count,
     )
 
-    times = [r[0] for r in percentiles_result if r[0] is not None]
-
-    # Calculate percentiles using helper function
-    p50 = _calculate_percentile(times, 0.50)
-    p95 = _calculate_percentile(times, 0.95)
-    p99 = _calculate_percentile(times, 0.99)
+    durations = sketch.merge_all(row.duration_sketch for row in rows)
+    p50 = durations.quantile(0.50)
+    p95 = durations.quantile(0.95)
+    p99 = durations.quantile(0.99)
 
     return {
         "average_seconds": round(stats.avg_time, 2) if stats.avg_time else 0,
@@ -395,6 +553,10 @@ def get_slowest_jobs(
     """
     Get the slowest jobs within a time window.
 
+    Read from the rollups, which keep the slowest job of each minute and
+    group: two jobs of the same minute, Job Type, organization and status
+    never both appear.
+
     Args:
         organization: Filter by organization (optional)
         job_type: Filter by job type (optional)
@@ -402,9 +564,10 @@ def get_slowest_jobs(
         limit: Maximum number of results (default: 10)
 
     Returns:
-        List of dicts with job_id, job_type, execution_time_seconds, status
+        List of dicts with job_id, job_type, execution_time_seconds, status,
+        recorded_at (start of the minute the job finished in)
     """
-    conditions = ["recorded_at >= %(time_threshold)s"]
+    conditions = ["bucket_start >= %(time_threshold)s", "max_job_id IS NOT NULL"]
     values = {
         "time_threshold": add_to_date(now_datetime(), hours=-hours),
         "limit": limit,
@@ -421,14 +584,14 @@ def get_slowest_jobs(
     result = frappe.db.sql(
         f"""
         SELECT
-            job_id,
+            max_job_id as job_id,
             job_type,
-            execution_time_seconds,
+            max_seconds as execution_time_seconds,
             status,
-            recorded_at
-        FROM `tabBackground Job Metrics`
+            bucket_start as recorded_at
+        FROM `tabBackground Job Metrics Rollup`
         WHERE {" AND ".join(conditions)}
-        ORDER BY execution_time_seconds DESC
+        ORDER BY max_seconds DESC
         LIMIT %(limit)s
         """,
         values,
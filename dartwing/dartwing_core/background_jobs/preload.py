@@ -0,0 +1,148 @@
+"""
+Handler preloading for Background Job Engine.
+
+RQ workers fork a work horse per job, so a handler module imported while
+running a job is thrown away with the child and imported again for the next
+one. Preloading imports every enabled Job Type's handler and timeout handler
+in the worker's parent process (and warms the Job Type registry), so forked
+children inherit them copy-on-write and the first job of a type is as fast
+as any other.
+
+The parent only preloads once, so `bench dartwing-worker` also installs a
+hook that runs before each fork (install_fork_hook()): it checks the job's
+site for Job Type changes at most every JOB_TYPE_REGISTRY_CHECK_SECONDS and
+preloads again when they changed, so work horses keep forking warm.
+
+Used by the `bench dartwing-worker` and `bench dartwing-preload-handlers`
+commands (dartwing/commands.py).
+"""
+
+import gc
+import time
+
+import frappe
+
+from dartwing.dartwing_core.background_jobs import registry
+from dartwing.dartwing_core.background_jobs.config import JOB_TYPE_REGISTRY_CHECK_SECONDS
+
+# (field on Job Type, registry resolver)
+_HANDLER_FIELDS = (
+    ("handler_method", registry.get_handler),
+    ("timeout_handler_method", registry.get_timeout_handler),
+)
+
+# Sites preloaded in this process -> monotonic time of the last version check
+_preloaded_sites = {}
+
+
+def preload_handlers() -> list:
+    """
+    Import the handlers of all enabled Job Types of the current site.
+
+    Failures are reported, not raised, so one broken handler does not keep a
+    worker from starting.
+
+    Returns:
+        List of dicts with job_type, field, handler, seconds and error, slowest
+        import first
+    """
+    report = []
+    for config in registry.get_job_types(enabled_only=True):
+        for fieldname, resolve in _HANDLER_FIELDS:
+            handler_path = config.get(fieldname)
+            if not handler_path:
+                continue
+
+            error = None
+            start = time.perf_counter()
+            try:
+                resolve(config.name)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - start
+
+            report.append({
+                "job_type": config.name,
+                "field": fieldname,
+                "handler": handler_path,
+                "seconds": round(seconds, 4),
+                "error": error,
+            })
+
+    report.sort(key=lambda row: row["seconds"], reverse=True)
+    _preloaded_sites[frappe.local.site] = time.monotonic()
+
+    logger = frappe.logger("dartwing.background_jobs")
+    for row in report:
+        if row["error"]:
+            logger.warning(f"Failed to preload {row['handler']} ({row['job_type']}): {row['error']}")
+        else:
+            logger.info(f"Preloaded {row['handler']} ({row['job_type']}) in {row['seconds']:.3f}s")
+
+    return report
+
+
+def refresh_site(site: str) -> bool:
+    """
+    Preload a site's handlers again if its Job Types changed since the last check.
+
+    Runs in the worker's parent between jobs. Checks at most every
+    JOB_TYPE_REGISTRY_CHECK_SECONDS per site; sites that were never
+    preloaded are skipped. Failures are logged, not raised.
+
+    Returns:
+        True if the site's Job Types were reloaded
+    """
+    checked_at = _preloaded_sites.get(site)
+    if checked_at is None or time.monotonic() - checked_at < JOB_TYPE_REGISTRY_CHECK_SECONDS:
+        return False
+    _preloaded_sites[site] = time.monotonic()
+
+    frappe.init(site=site)
+    try:
+        if registry.is_current():
+            return False
+
+        frappe.connect()
+        registry.reload()
+        preload_handlers()
+        # As after the first preload, keep refcount updates in the children
+        # from dirtying the new objects' pages
+        gc.freeze()
+        return True
+    except Exception as e:
+        frappe.logger("dartwing.background_jobs").warning(
+            f"Failed to refresh preloaded Job Types of {site}: {e}"
+        )
+        return False
+    finally:
+        frappe.destroy()
+
+
+def install_fork_hook(worker_class, sites: list) -> None:
+    """
+    Refresh the parent's Job Types of a job's site before RQ forks its work horse.
+
+    Args:
+        worker_class: RQ Worker class whose fork_work_horse() is wrapped
+        sites: Sites preloaded by this worker
+    """
+    fork_work_horse = worker_class.fork_work_horse
+    sites = set(sites)
+
+    def fork_work_horse_with_refresh(self, job, queue):
+        site = (job.kwargs or {}).get("site")
+        if site in sites:
+            refresh_site(site)
+        return fork_work_horse(self, job, queue)
+
+    worker_class.fork_work_horse = fork_work_horse_with_refresh
+
+
+def format_report(site: str, report: list) -> str:
+    """Render a preload report as a text table for the bench commands."""
+    lines = [f"{site}: {len(report)} handler(s)"]
+    for row in report:
+        status = f"FAILED {row['error']}" if row["error"] else f"{row['seconds'] * 1000:8.1f} ms"
+        lines.append(f"  {status}  {row['job_type']}.{row['field']}  {row['handler']}")
+    return "\n".join(lines)
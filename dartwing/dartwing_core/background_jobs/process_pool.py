@@ -0,0 +1,316 @@
+"""
+Process-isolated job execution for Background Job Engine.
+
+Job Types with execution_mode "Process" run their handler in a child
+process instead of a thread of the worker. Unlike a thread, a child can be
+stopped: it is killed (SIGKILL) at the job's timeout, or as soon as its
+resident memory exceeds the Job Type's max_memory_mb, so a runaway handler
+cannot keep using CPU, memory or database connections after the job was
+rescheduled.
+
+Children are spawned (not forked, which would share the worker's database
+connection), connect to the site once and then run jobs sent over a pipe
+until they have run PROCESS_MAX_JOBS_PER_CHILD jobs. Idle children are
+kept per site for the next job; the pool lives as long as the process
+executing jobs.
+
+RQ runs each job in a work horse forked for that job alone, so a pool there
+dies with the horse. Run `bench dartwing-process-worker` to reuse children:
+while it is alive, executors hand Process mode jobs to it (see
+async_runner.handoff()) and it runs up to --processes of them at once,
+keeping that many idle children per site between jobs. Without it a
+Process mode job runs in the RQ work horse and spawns a child of its own,
+paying for interpreter start, imports and the site connection every time.
+The job's timeout starts once the child reports it is ready (within
+PROCESS_START_TIMEOUT_SECONDS), so that startup delays the job but does not
+use up its time.
+
+Progress reported by the handler is sent back over the pipe and applied to
+the worker's JobContext (snapshot, flushes and broadcasts as in thread
+mode); the result or the handler's exception comes back the same way. The
+child commits the handler's writes when it returns and rolls them back when
+it raises or is killed.
+"""
+
+import multiprocessing
+import pickle
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import frappe
+
+from dartwing.dartwing_core.background_jobs.async_runner import AsyncJobWorker
+from dartwing.dartwing_core.background_jobs.config import (
+    PROCESS_MAX_JOBS_PER_CHILD,
+    PROCESS_MEMORY_CHECK_SECONDS,
+    PROCESS_POOL_MAX_IDLE,
+    PROCESS_START_TIMEOUT_SECONDS,
+    PROCESS_WORKER_DEFAULT_CONCURRENCY,
+)
+from dartwing.dartwing_core.background_jobs.errors import (
+    JobCanceledError,
+    JobMemoryLimitError,
+    PermanentError,
+    TransientError,
+    classify_error,
+)
+from dartwing.dartwing_core.background_jobs.progress import JobContext
+
+
+class _Worker:
+    """A handler process and the parent's end of its pipe."""
+
+    def __init__(self, site: str, sites_path: str):
+        mp = multiprocessing.get_context("spawn")
+        self.conn, child_conn = mp.Pipe()
+        self.process = mp.Process(
+            target=_child_main,
+            args=(child_conn, site, sites_path),
+            name=f"dartwing-job-process-{site}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.site = site
+        self.jobs = 0
+        self.ready = False
+
+    def rss(self) -> int:
+        import psutil
+
+        return psutil.Process(self.process.pid).memory_info().rss
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.join(5)
+        except Exception:
+            pass
+        self.conn.close()
+
+
+_idle = {}
+_max_idle = PROCESS_POOL_MAX_IDLE
+_lock = threading.Lock()
+
+
+def _checkout() -> _Worker:
+    site = frappe.local.site
+    with _lock:
+        workers = _idle.get(site, [])
+        while workers:
+            worker = workers.pop()
+            if worker.process.is_alive():
+                return worker
+            worker.kill()
+    return _Worker(site, frappe.local.sites_path)
+
+
+def _checkin(worker: _Worker) -> None:
+    if worker.jobs >= PROCESS_MAX_JOBS_PER_CHILD:
+        worker.kill()
+        return
+
+    with _lock:
+        workers = _idle.setdefault(worker.site, [])
+        if len(workers) < _max_idle:
+            workers.append(worker)
+            return
+    worker.kill()
+
+
+class ProcessJobWorker(AsyncJobWorker):
+    """
+    Long-running consumer of handed-off Process mode jobs for a set of sites.
+
+    Each of its `concurrency` threads runs one job at a time in a pooled
+    handler process, and the pool keeps as many idle children per site, so
+    every job finds a child that is already connected.
+    """
+
+    channel = "process"
+
+    def __init__(self, sites: list, concurrency: int = PROCESS_WORKER_DEFAULT_CONCURRENCY):
+        global _max_idle
+        super().__init__(sites, concurrency)
+        _max_idle = max(PROCESS_POOL_MAX_IDLE, concurrency)
+
+
+def execute(context: JobContext, max_memory_mb: Optional[int] = None) -> Any:
+    """
+    Run a job's handler in a pooled child process.
+
+    Args:
+        context: The job's JobContext in this process; receives the handler's
+            progress
+        max_memory_mb: Kill the handler once its resident memory exceeds this
+            (None or 0: no limit)
+
+    Returns:
+        Handler result
+
+    Raises:
+        JobTimeoutError: If the handler exceeds context.timeout_seconds
+        JobMemoryLimitError: If the handler exceeds max_memory_mb
+        JobCanceledError: If the job is canceled while reporting progress
+        TransientError: If the child process dies
+        Exception: Whatever the handler raised
+    """
+    worker = _checkout()
+    try:
+        try:
+            worker.conn.send({
+                "job_id": context.job_id,
+                "job_type": context.job_type,
+                "organization": context.organization,
+                "parameters": context.parameters,
+                "timeout_seconds": context.timeout_seconds,
+                "user": frappe.session.user,
+            })
+        except OSError as e:
+            raise TransientError(f"Handler process is not reachable: {e}", cause=e)
+        worker.jobs += 1
+        kind, value = _wait_for_result(worker, context, max_memory_mb)
+    except BaseException:
+        worker.kill()
+        raise
+
+    _checkin(worker)
+    if kind == "error":
+        raise value
+    return value
+
+
+def _wait_for_result(worker: _Worker, context: JobContext, max_memory_mb: Optional[int]) -> tuple:
+    """
+    Relay progress until the child reports the handler's outcome.
+
+    Returns:
+        ("result", value) or ("error", exception)
+    """
+    from dartwing.dartwing_core.background_jobs.executor import JobTimeoutError
+
+    _wait_until_ready(worker)
+
+    deadline = time.monotonic() + context.timeout_seconds
+    memory_limit = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+    next_memory_check = time.monotonic()
+
+    while True:
+        now = time.monotonic()
+        if now >= deadline:
+            raise JobTimeoutError(f"Job exceeded {context.timeout_seconds}s timeout")
+
+        if memory_limit and now >= next_memory_check:
+            next_memory_check = now + PROCESS_MEMORY_CHECK_SECONDS
+            rss = worker.rss()
+            if rss > memory_limit:
+                raise JobMemoryLimitError(
+                    f"Job exceeded {max_memory_mb} MB memory limit "
+                    f"({rss // (1024 * 1024)} MB resident)"
+                )
+
+        if not worker.conn.poll(min(deadline - now, PROCESS_MEMORY_CHECK_SECONDS)):
+            continue
+
+        kind, *payload = _receive(worker)
+
+        if kind == "progress":
+            # Raises JobCanceledError for canceled jobs, which kills the child
+            context.update_progress(*payload)
+            continue
+        return kind, payload[0]
+
+
+def _wait_until_ready(worker: _Worker) -> None:
+    """Wait until a new child has connected to the site."""
+    if worker.ready:
+        return
+
+    if not worker.conn.poll(PROCESS_START_TIMEOUT_SECONDS):
+        raise TransientError(f"Handler process did not start within {PROCESS_START_TIMEOUT_SECONDS}s")
+    _receive(worker)
+    worker.ready = True
+
+
+def _receive(worker: _Worker) -> tuple:
+    try:
+        return worker.conn.recv()
+    except EOFError:
+        worker.process.join(1)
+        raise TransientError(
+            f"Handler process exited unexpectedly (exit code {worker.process.exitcode})"
+        )
+
+
+@dataclass
+class _PipeJobContext(JobContext):
+    """JobContext of the child process; progress goes to the parent."""
+
+    _conn: Any = field(default=None, repr=False)
+
+    def update_progress(self, percent: int, message: Optional[str] = None, force: bool = False) -> None:
+        if self.is_canceled():
+            raise JobCanceledError("Job was canceled")
+        self._conn.send(("progress", percent, message, force))
+
+    def flush_progress(self) -> None:
+        # The parent's JobContext owns the Background Job row
+        pass
+
+
+def _child_main(conn, site: str, sites_path: str) -> None:
+    """Entry point of a handler process: run jobs until the parent goes away."""
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    try:
+        conn.send(("ready",))
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            conn.send(_run_request(conn, request))
+    finally:
+        frappe.destroy()
+
+
+def _run_request(conn, request: dict) -> tuple:
+    from dartwing.dartwing_core.background_jobs import async_runner
+    from dartwing.dartwing_core.background_jobs.registry import get_handler
+
+    frappe.set_user(request.pop("user"))
+    context = _PipeJobContext(_conn=conn, **request)
+    try:
+        handler = get_handler(context.job_type)
+        if async_runner.is_async_handler(handler):
+            # The parent enforces the timeout
+            result = async_runner.run(handler, context)
+        else:
+            result = handler(context)
+        frappe.db.commit()
+    except Exception as e:
+        frappe.db.rollback()
+        return ("error", _portable_error(e))
+
+    try:
+        pickle.dumps(result)
+    except Exception as e:
+        return ("error", PermanentError(f"Handler returned a result that cannot be pickled: {e}"))
+    return ("result", result)
+
+
+def _portable_error(error: Exception) -> Exception:
+    """
+    Return the error if it survives pickling, else an equivalent JobError.
+
+    The replacement keeps the retry classification and message.
+    """
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        error_class = TransientError if classify_error(error) else PermanentError
+        return error_class(f"{type(error).__name__}: {error}")
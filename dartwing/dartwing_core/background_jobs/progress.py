@@ -10,14 +10,20 @@ import threading
 import frappe
 from frappe.utils import now_datetime
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Any, Callable, Optional, TYPE_CHECKING
 
 from dartwing.dartwing_core.background_jobs.config import (
+    CANCEL_CHECK_INTERVAL_SECONDS,
+    CANCEL_DB_CHECK_INTERVAL_SECONDS,
     DEFAULT_TIMEOUT_SECONDS,
+    PROGRESS_FLUSH_INTERVAL_SECONDS,
     PROGRESS_THROTTLE_SECONDS,
 )
 from dartwing.dartwing_core.background_jobs.errors import JobCanceledError
 
+if TYPE_CHECKING:
+    from dartwing.dartwing_core.background_jobs.artifacts import ArtifactWriter
+
 
 @dataclass
 class JobContext:
@@ -27,15 +33,14 @@ class JobContext:
     Provides access to job parameters and methods to update progress.
 
     Thread Safety:
-        JobContext instances now use a threading.Lock to protect access to the
-        _last_broadcast field during throttling checks. This prevents race
-        conditions when multiple threads call update_progress() concurrently.
+        JobContext instances use threading.Locks to protect the broadcast
+        throttle and the buffered progress. This prevents race conditions when
+        multiple threads call update_progress() concurrently.
 
-        While update_progress() is now thread-safe for the throttling mechanism,
+        While update_progress() is thread-safe for throttling and buffering,
         be aware that:
-        - Database updates are still not atomic across threads
-        - Multiple threads updating progress rapidly may still cause race conditions
-          in the database layer
+        - Database flushes are still not atomic across threads
+        - The last writer wins when multiple threads report progress at once
 
         Best practice: Call update_progress() from a single thread when possible
 
@@ -49,6 +54,21 @@ class JobContext:
 
             context.update_progress(100, "Done!")
             return {"output_reference": result}
+
+        Large outputs should be written as artifacts instead:
+
+            with context.open_artifact("report.csv", "text/csv") as writer:
+                for row in rows:
+                    writer.write(row)
+            return {"output_reference": get_artifact_url(context.job_id, "report.csv")}
+
+        Handlers may also be `async def` (see async_runner.py); they use the
+        async variants and run blocking calls through call():
+
+            async def my_async_handler(context: JobContext):
+                data = await fetch(context.parameters["url"])
+                await context.call(store, data)
+                await context.update_progress_async(100, "Done!")
     """
 
     job_id: str
@@ -58,25 +78,38 @@ class JobContext:
     timeout_seconds: int = DEFAULT_TIMEOUT_SECONDS
     _canceled: bool = field(default=False, repr=False)
     _last_broadcast: float = field(default=0.0, repr=False)
+    _last_cancel_check: float = field(default=float("-inf"), repr=False)
+    _last_cancel_db_check: float = field(default_factory=time.monotonic, repr=False)
     _broadcast_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _progress: tuple = field(default=(0, None), repr=False)
+    _progress_dirty: bool = field(default=False, repr=False)
+    _last_flush: float = field(default_factory=time.monotonic, repr=False)
+    _flush_interval: float = field(default_factory=lambda: _get_flush_interval(), repr=False)
+    _progress_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _bridge: Any = field(default=None, repr=False)
 
     def update_progress(self, percent: int, message: Optional[str] = None, force: bool = False) -> None:
         """
         Update job progress and broadcast to connected clients.
 
-        Progress updates are throttled to max once per PROGRESS_THROTTLE_SECONDS
-        to prevent flooding Socket.IO with high-frequency updates. The database
-        is always updated, but broadcasts are rate-limited.
+        Progress is written to the job's Redis status snapshot on every call
+        (read by get_job_status) and coalesced into the Background
+        Job row at most every PROGRESS_FLUSH_INTERVAL_SECONDS, plus once more
+        when the job changes status. A handler reporting progress per record
+        therefore costs a few database writes per minute, not one per record.
 
-        Note: Progress updates use update_modified=False to avoid unnecessary
-        database overhead. Progress data is eventually consistent and may not
-        survive job crashes. For critical state that must persist across
-        failures, use checkpoints stored in input_parameters or external storage.
+        Socket.IO broadcasts are throttled to max once per
+        PROGRESS_THROTTLE_SECONDS to prevent flooding connected clients.
+
+        Note: Progress data is eventually consistent and may not survive job
+        crashes. For critical state that must persist across failures, use
+        checkpoints stored in input_parameters or external storage.
 
         Args:
             percent: Progress percentage (0-100)
             message: Optional status message describing current step
-            force: If True, bypass throttling and always broadcast (use for 100%)
+            force: If True, bypass throttling and always broadcast and flush
+                (use for 100%)
 
         Raises:
             JobCanceledError: If job has been marked for cancellation
@@ -88,13 +121,14 @@ class JobContext:
         # Clamp percent to valid range
         percent = max(0, min(100, percent))
 
-        # Update database (always)
-        frappe.db.set_value(
-            "Background Job",
-            self.job_id,
-            {"progress": percent, "progress_message": message},
-            update_modified=False,
-        )
+        with self._progress_lock:
+            self._progress = (percent, message)
+            self._progress_dirty = True
+
+        _buffer_progress(self.job_id, percent, message)
+
+        if force or time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush_progress()
 
         # Throttle Socket.IO broadcasts to prevent flooding
         # Always broadcast at 100% completion or if forced
@@ -120,23 +154,145 @@ class JobContext:
                 progress_message=message,
             )
 
+    def flush_progress(self) -> None:
+        """
+        Write the latest buffered progress to the Background Job row.
+
+        Called on the flush cadence by update_progress() and by the executor
+        before every status transition; does nothing if nothing changed.
+        Uses update_modified=False to avoid unnecessary database overhead.
+        """
+        with self._progress_lock:
+            if not self._progress_dirty:
+                return
+            percent, message = self._progress
+            self._progress_dirty = False
+            self._last_flush = time.monotonic()
+
+        frappe.db.set_value(
+            "Background Job",
+            self.job_id,
+            {"progress": percent, "progress_message": message},
+            update_modified=False,
+        )
+
+    def open_artifact(self, name: str, content_type: Optional[str] = None) -> "ArtifactWriter":
+        """
+        Open a streaming writer for a job artifact (see artifacts.py).
+
+        Use as a context manager; the artifact becomes visible when it closes.
+
+        Args:
+            name: File name of the artifact, unique within the job
+            content_type: MIME type served on download
+
+        Returns:
+            ArtifactWriter
+        """
+        from dartwing.dartwing_core.background_jobs.artifacts import ArtifactWriter
+
+        return ArtifactWriter(self.job_id, name, content_type)
+
+    def write_artifact(self, name: str, data: bytes | str, content_type: Optional[str] = None) -> str:
+        """
+        Store a complete artifact.
+
+        Returns:
+            Download URL of the artifact, suitable for output_reference
+        """
+        from dartwing.dartwing_core.background_jobs.artifacts import get_artifact_url, write_artifact
+
+        write_artifact(self.job_id, name, data, content_type)
+        return get_artifact_url(self.job_id, name)
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function (database access, Frappe APIs) from an async handler.
+
+        The call runs on the job's own thread, where the site is initialised,
+        and is committed on return (rolled back if it raises), so each call is
+        its own transaction.
+
+        Returns:
+            The function's result
+        """
+        if self._bridge is None:
+            return fn(*args, **kwargs)
+        return await self._bridge.call(fn, *args, **kwargs)
+
+    async def update_progress_async(
+        self, percent: int, message: Optional[str] = None, force: bool = False
+    ) -> None:
+        """
+        update_progress() for async handlers.
+
+        Raises:
+            JobCanceledError: If job has been marked for cancellation
+        """
+        await self.call(self.update_progress, percent, message, force)
+
+    async def is_canceled_async(self) -> bool:
+        """is_canceled() for async handlers; cheap to await in a loop."""
+        if self._canceled:
+            return True
+        if time.monotonic() - self._last_cancel_check < CANCEL_CHECK_INTERVAL_SECONDS:
+            return False
+        return await self.call(self.is_canceled)
+
     def is_canceled(self) -> bool:
         """
         Check if job has been marked for cancellation.
 
+        Reads the job's Redis cancellation signal (see cancellation.py) at most
+        every CANCEL_CHECK_INTERVAL_SECONDS, so calling this in a tight loop is
+        cheap. The job row is only read every CANCEL_DB_CHECK_INTERVAL_SECONDS
+        as a safety net, or on every check while Redis is unavailable.
+
         Returns:
             True if job should stop, False otherwise
         """
         if self._canceled:
             return True
 
-        # Check database for cancellation flag
-        status = frappe.db.get_value("Background Job", self.job_id, "status")
-        if status == "Canceled":
+        now = time.monotonic()
+        if now - self._last_cancel_check < CANCEL_CHECK_INTERVAL_SECONDS:
+            return False
+        self._last_cancel_check = now
+
+        from dartwing.dartwing_core.background_jobs.cancellation import is_signaled
+
+        try:
+            canceled = is_signaled(self.job_id)
+            check_db = now - self._last_cancel_db_check >= CANCEL_DB_CHECK_INTERVAL_SECONDS
+        except Exception:
+            canceled = False
+            check_db = True
+
+        if not canceled and check_db:
+            self._last_cancel_db_check = now
+            canceled = frappe.db.get_value("Background Job", self.job_id, "status") == "Canceled"
+
+        if canceled:
             self._canceled = True
-            return True
+        return canceled
 
-        return False
+
+def _get_flush_interval() -> float:
+    """Progress flush cadence, overridable in site config."""
+    return float(
+        frappe.conf.get("background_job_progress_flush_seconds") or PROGRESS_FLUSH_INTERVAL_SECONDS
+    )
+
+
+def _buffer_progress(job_id: str, percent: int, message: Optional[str]) -> None:
+    """Merge the latest progress into the job's status snapshot (best-effort)."""
+    from dartwing.dartwing_core.background_jobs import status_snapshot
+
+    try:
+        status_snapshot.merge_progress(job_id, percent, message)
+    except Exception:
+        # The database flush still records progress, only less often
+        pass
 
 
 def _validate_broadcast_params(job_id: str, organization: str) -> bool:
@@ -0,0 +1,126 @@
+"""
+Rate limiting for Background Job Engine.
+
+Sliding-window limiter backed by a Redis sorted set per
+(user, job type, organization). Each submission is recorded as a member scored
+by its timestamp; a Lua script trims expired members, counts the remaining
+ones and admits the submission atomically, so concurrent requests cannot
+exceed the limit and no database query is needed on the submit path.
+"""
+
+import time
+from dataclasses import dataclass
+
+import frappe
+
+# KEYS[1]: sorted set of submissions
+# ARGV: now_ms, window_ms, limit, count, member_prefix
+# Returns {allowed (0/1), used, oldest_ms}
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local count = tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local used = redis.call('ZCARD', KEYS[1])
+local allowed = 0
+
+if used + count <= limit then
+    for i = 1, count do
+        redis.call('ZADD', KEYS[1], now, ARGV[5] .. ':' .. i)
+    end
+    used = used + count
+    allowed = 1
+end
+
+if used > 0 then
+    redis.call('PEXPIRE', KEYS[1], window)
+end
+
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+local oldest_ms = now
+if oldest[2] then
+    oldest_ms = tonumber(oldest[2])
+end
+
+return {allowed, used, oldest_ms}
+"""
+
+
+@dataclass
+class RateLimitStatus:
+    """Outcome of a rate limit check, returned to API clients."""
+
+    allowed: bool
+    limit: int
+    used: int
+    window_seconds: int
+    reset_at: float
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds until the oldest submission leaves the window."""
+        return max(0, int(self.reset_at - time.time() + 0.999))
+
+    def as_dict(self) -> dict:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "window_seconds": self.window_seconds,
+            "reset_at": int(self.reset_at),
+            "retry_after": self.retry_after,
+        }
+
+
+def acquire(
+    job_type: str,
+    organization: str,
+    user: str,
+    limit: int,
+    window_seconds: int,
+    count: int = 1,
+) -> RateLimitStatus:
+    """
+    Try to record `count` submissions in the sliding window.
+
+    Either all `count` submissions are admitted or none are.
+
+    Args:
+        job_type: Job Type name
+        organization: Organization name
+        user: Submitting user
+        limit: Maximum submissions per window
+        window_seconds: Window length in seconds
+        count: Number of submissions to record (default: 1)
+
+    Returns:
+        RateLimitStatus with the decision, remaining quota and reset time
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    cache = frappe.cache()
+    key = cache.make_key(
+        f"dartwing_core:background_job:rate_limit:{job_type}:{organization}:{user}"
+    )
+    now_ms = int(time.time() * 1000)
+    window_ms = window_seconds * 1000
+
+    script = cache.register_script(_SLIDING_WINDOW_SCRIPT)
+    allowed, used, oldest_ms = script(
+        keys=[key],
+        args=[now_ms, window_ms, limit, count, f"{now_ms}:{frappe.generate_hash(length=8)}"],
+    )
+
+    return RateLimitStatus(
+        allowed=bool(allowed),
+        limit=limit,
+        used=int(used),
+        window_seconds=window_seconds,
+        reset_at=(int(oldest_ms) + window_ms) / 1000,
+    )
@@ -0,0 +1,208 @@
+"""
+Job Type registry for Background Job Engine.
+
+Every process keeps all Job Types of a site in memory, and handler and
+timeout handler callables are imported once on first use. Submission,
+validation, circuit breaker and execution code read Job Type configuration
+from here, so dispatching a job does no Job Type queries once the registry
+is warm.
+
+RQ forks a fresh work horse per job, so processes often start cold. The
+loaded configs are therefore also kept in Redis under the current version
+(see shared_rows.py); a cold process reads them with one cache call, and
+only the first process after a change queries the Job Type table.
+
+Saving or deleting a Job Type bumps a version counter in Redis after
+commit. Each process compares its version with Redis at most every
+JOB_TYPE_REGISTRY_CHECK_SECONDS and reloads when it changed; the saving
+process drops its copy right away.
+
+Configs are frappe._dicts with the Job Type's fields; treat them as
+read-only, they are shared by every caller in the process.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+import frappe
+from frappe import _
+
+from dartwing.dartwing_core.background_jobs import shared_rows
+from dartwing.dartwing_core.background_jobs.config import (
+    JOB_TYPE_REGISTRY_CACHE_TTL_SECONDS,
+    JOB_TYPE_REGISTRY_CHECK_SECONDS,
+)
+
+
+class _SiteRegistry:
+    """Job Type configs and resolved handlers of one site."""
+
+    def __init__(self, configs: dict, version):
+        self.configs = configs
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.handlers = {}
+
+
+_registries = {}
+_lock = threading.Lock()
+
+
+def _version_key() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:job_type_registry:version")
+
+
+def _get_remote_version():
+    try:
+        return frappe.cache().get(_version_key())
+    except Exception:
+        # Without Redis, fall back to reloading on every check interval
+        return object()
+
+
+def _load() -> _SiteRegistry:
+    # Read the version before the rows (see shared_rows.load())
+    version = _get_remote_version()
+    rows, current = shared_rows.load(
+        "dartwing_core:background_job:job_type_registry:configs",
+        version,
+        lambda: frappe.get_all("Job Type", fields=["*"]),
+        JOB_TYPE_REGISTRY_CACHE_TTL_SECONDS,
+    )
+    # Rows that may predate the version are reloaded at the next check
+    return _SiteRegistry({row["name"]: frappe._dict(row) for row in rows}, version if current else object())
+
+
+def _get_registry() -> _SiteRegistry:
+    site = frappe.local.site
+    registry = _registries.get(site)
+
+    if registry and time.monotonic() - registry.checked_at >= JOB_TYPE_REGISTRY_CHECK_SECONDS:
+        if _get_remote_version() == registry.version:
+            registry.checked_at = time.monotonic()
+        else:
+            registry = None
+
+    if registry is None:
+        registry = _load()
+        with _lock:
+            _registries[site] = registry
+    return registry
+
+
+def get_job_type(job_type: str) -> frappe._dict:
+    """
+    Return the configuration of a Job Type.
+
+    Raises:
+        frappe.DoesNotExistError: If the Job Type does not exist
+    """
+    config = _get_registry().configs.get(job_type)
+    if config is None:
+        frappe.throw(_("Job Type '{0}' not found").format(job_type), frappe.DoesNotExistError)
+    return config
+
+
+def find_job_type(job_type: str) -> Optional[frappe._dict]:
+    """Return the configuration of a Job Type, or None if it does not exist."""
+    return _get_registry().configs.get(job_type)
+
+
+def get_job_types(enabled_only: bool = False) -> list:
+    """Return the configurations of all Job Types, sorted by name."""
+    configs = _get_registry().configs
+    return [
+        configs[name]
+        for name in sorted(configs)
+        if configs[name].is_enabled or not enabled_only
+    ]
+
+
+def get_handler(job_type: str) -> Callable:
+    """
+    Return the handler callable of an enabled Job Type.
+
+    Raises:
+        frappe.DoesNotExistError: If the Job Type does not exist
+        frappe.ValidationError: If the Job Type is disabled or handler_method
+            is malformed
+        ImportError: If the handler module cannot be imported
+        AttributeError: If the handler function does not exist
+    """
+    config = get_job_type(job_type)
+    if not config.is_enabled:
+        frappe.throw(_("Job Type '{0}' is disabled").format(job_type))
+
+    return _resolve(job_type, "handler_method", "handler")
+
+
+def get_timeout_handler(job_type: str) -> Optional[Callable]:
+    """
+    Return the timeout handler callable of a Job Type, or None if not configured.
+
+    Raises:
+        Same as get_handler(), except for disabled Job Types
+    """
+    if not get_job_type(job_type).timeout_handler_method:
+        return None
+
+    return _resolve(job_type, "timeout_handler_method", "timeout handler")
+
+
+def is_current() -> bool:
+    """Whether this process holds the latest Job Types of the current site."""
+    registry = _registries.get(frappe.local.site)
+    return registry is not None and _get_remote_version() == registry.version
+
+
+def reload() -> None:
+    """Load the current site's Job Types again, dropping resolved handlers."""
+    registry = _load()
+    with _lock:
+        _registries[frappe.local.site] = registry
+
+
+def invalidate() -> None:
+    """
+    Drop this process's Job Types and tell other processes to reload theirs.
+
+    Called after a Job Type is saved or deleted; the version is bumped after
+    commit so other processes cannot reload the old rows.
+    """
+    _registries.pop(frappe.local.site, None)
+
+    def _bump():
+        _registries.pop(frappe.local.site, None)
+        try:
+            frappe.cache().incr(_version_key())
+        except Exception as e:
+            frappe.log_error(
+                f"Failed to publish Job Type registry invalidation: {e}",
+                "Background Job Registry",
+            )
+
+    frappe.db.after_commit.add(_bump)
+
+
+def _resolve(job_type: str, fieldname: str, label: str) -> Callable:
+    registry = _get_registry()
+    cache_key = (job_type, fieldname)
+    handler = registry.handlers.get(cache_key)
+    if handler is not None:
+        return handler
+
+    handler_path = registry.configs[job_type].get(fieldname)
+
+    # Defensive validation: the Job Type could be modified directly in the
+    # database, bypassing JobType.validate_handler_method()
+    if "." not in handler_path:
+        frappe.throw(
+            _("Invalid {0} method format for Job Type '{1}': '{2}'. "
+              "Expected format: 'module.function'").format(label, job_type, handler_path)
+        )
+
+    module_path, func_name = handler_path.rsplit(".", 1)
+    handler = getattr(frappe.get_module(module_path), func_name)
+    registry.handlers[cache_key] = handler
+    return handler
@@ -2,12 +2,26 @@
 Retry Policy for Background Job Engine.
 
 Implements exponential backoff with jitter for transient failures.
+
+Retries are scheduled in the Redis delay queue (delay_queue.py) so they fire
+within about a second of their backoff. next_retry_at on the job stays the
+durable record; process_retry_queue() re-queues retries that are overdue by
+more than RETRY_SCAN_GRACE_SECONDS, i.e. ones lost with Redis.
 """
 
 import random
+import time
 import frappe
 from frappe.utils import now_datetime, add_to_date
 
+from dartwing.dartwing_core.background_jobs.config import (
+    RETRY_SCAN_GRACE_SECONDS,
+    RETRY_SCAN_BATCH_SIZE,
+)
+
+# Statuses a job can be retried from
+RETRYABLE_STATUSES = ("Failed", "Timed Out")
+
 
 def calculate_backoff(attempt: int, base_delay: int = 60) -> int:
     """
@@ -58,6 +72,21 @@ def schedule_retry(job_id: str):
     job.save(ignore_permissions=True)
     frappe.db.commit()
 
+    _schedule_in_delay_queue(job.name, time.time() + backoff_seconds)
+
+
+def _schedule_in_delay_queue(job_id: str, due_at: float) -> None:
+    """Schedule the retry in Redis; the safety-net scan covers failures."""
+    from dartwing.dartwing_core.background_jobs import delay_queue
+
+    try:
+        delay_queue.schedule("retry", job_id, due_at)
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to schedule retry for job {job_id}, falling back to scheduler scan: {e}",
+            "Background Job Retry Scheduler",
+        )
+
 
 def _move_to_dead_letter(job):
     """Move job to dead letter queue after exhausting retries."""
@@ -78,41 +107,66 @@ def _move_to_dead_letter(job):
     )
 
 
+def run_scheduled_retry(job_id: str) -> None:
+    """
+    Re-queue a job whose retry came due in the delay queue.
+
+    Called by delay_queue.drain(), which commits.
+    """
+    _retry_job(job_id)
+
+
 def process_retry_queue():
     """
-    Process jobs that are ready for retry.
+    Safety net: re-queue jobs whose retry is overdue.
 
-    This function is called by the scheduler to re-queue jobs that have
-    passed their retry wait time.
+    Retries normally fire from the delay queue; this scheduled scan only picks
+    up jobs whose next_retry_at passed more than RETRY_SCAN_GRACE_SECONDS ago,
+    e.g. because Redis lost the delay queue entry.
     """
-    now = now_datetime()
+    cutoff = add_to_date(now_datetime(), seconds=-RETRY_SCAN_GRACE_SECONDS)
 
-    # Find jobs ready for retry
     jobs = frappe.get_all(
         "Background Job",
         filters={
-            "status": ("in", ["Failed", "Timed Out"]),
-            "next_retry_at": ("<=", now),
+            "status": ("in", RETRYABLE_STATUSES),
+            "next_retry_at": ("<=", cutoff),
         },
-        fields=["name", "organization", "status"],
-        limit=100,  # Process in batches
+        pluck="name",
+        order_by="next_retry_at asc",
+        limit=RETRY_SCAN_BATCH_SIZE,
     )
 
-    for job_data in jobs:
+    for job_id in jobs:
         try:
-            _retry_job(job_data.name, job_data.organization, job_data.status)
+            _retry_job(job_id)
+            frappe.db.commit()
         except Exception as e:
+            frappe.db.rollback()
             frappe.log_error(
-                f"Failed to retry job {job_data.name}: {e}",
+                f"Failed to retry job {job_id}: {e}",
                 "Background Job Retry Scheduler",
             )
 
 
-def _retry_job(job_id: str, organization: str, old_status: str):
-    """Re-queue a single job for retry."""
+def _retry_job(job_id: str) -> bool:
+    """
+    Re-queue a single job for retry.
+
+    Locks the row and re-checks the status, so a retry that fires from both
+    the delay queue and the safety-net scan, or for a job canceled meanwhile,
+    is skipped.
+
+    Returns:
+        True if the job was re-queued
+    """
     from dartwing.dartwing_core.background_jobs.progress import publish_job_status_changed
     from dartwing.dartwing_core.background_jobs.engine import _enqueue_job
 
+    status = frappe.db.get_value("Background Job", job_id, "status", for_update=True)
+    if status not in RETRYABLE_STATUSES:
+        return False
+
     job = frappe.get_doc("Background Job", job_id)
 
     # Clear error state for retry
@@ -125,4 +179,10 @@ def _retry_job(job_id: str, organization: str, old_status: str):
     # Re-enqueue
     _enqueue_job(job, is_retry=True)
 
-    frappe.db.commit()
+    publish_job_status_changed(
+        job_id=job.name,
+        organization=job.organization,
+        from_status=status,
+        to_status="Queued",
+    )
+    return True
@@ -4,6 +4,7 @@ Sample Job Handlers for Background Job Engine.
 Provides example job handlers for testing the job engine.
 """
 
+import asyncio
 import time
 import frappe
 from dartwing.dartwing_core.background_jobs.progress import JobContext
@@ -62,13 +63,17 @@ def execute_echo_job(context: JobContext) -> dict:
     """
     Simple echo job that immediately returns input parameters.
 
-    Useful for quick testing of job submission and completion.
+    Useful for quick testing of job submission and completion. The parameters
+    are returned as the "output.json" artifact.
     """
     context.update_progress(50, "Processing...")
+    output_reference = context.write_artifact(
+        "output.json", frappe.as_json(context.parameters), "application/json"
+    )
     context.update_progress(100, "Done!")
 
     return {
-        "output_reference": frappe.as_json(context.parameters),
+        "output_reference": output_reference,
     }
 
 
@@ -104,3 +109,25 @@ def execute_long_running_job(context: JobContext) -> dict:
     return {
         "output_reference": f"Completed after {duration} seconds",
     }
+
+
+async def execute_async_wait_job(context: JobContext) -> dict:
+    """
+    Async job that waits without blocking a worker, for testing async workers.
+
+    Parameters:
+        duration (int): How long to wait in seconds (default: 5)
+    """
+    duration = context.parameters.get("duration", 5)
+    steps = 10
+
+    for i in range(steps):
+        if await context.is_canceled_async():
+            raise JobCanceledError("Job was canceled")
+
+        await asyncio.sleep(duration / steps)
+        await context.update_progress_async((i + 1) * 10, f"Waited {i + 1} of {steps} steps...")
+
+    return {
+        "output_reference": f"Waited {duration} seconds",
+    }
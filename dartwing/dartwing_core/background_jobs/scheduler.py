@@ -9,7 +9,7 @@ import frappe
 
 def process_retry_queue():
     """
-    Scheduled task: Process jobs ready for retry.
+    Scheduled task: Re-queue retries the delay queue missed.
 
     This should be called every minute by Frappe's scheduler.
     """
@@ -24,38 +24,100 @@ def process_retry_queue():
         )
 
 
+def drain_delay_queue():
+    """
+    Scheduled task: Run delayed actions (retries) as they come due.
+
+    Started every minute; runs for up to DELAY_QUEUE_DRAIN_SECONDS while
+    entries are due and returns at once if another drainer is active.
+    """
+    from dartwing.dartwing_core.background_jobs.delay_queue import drain
+
+    try:
+        drain()
+    except Exception as e:
+        frappe.log_error(
+            f"Error draining delay queue: {e}",
+            "Background Job Scheduler",
+        )
+
+
 def process_dependent_jobs():
     """
-    Scheduled task: Check dependent jobs that may be ready to run.
-
-    This checks jobs that are waiting on a parent job and enqueues them
-    if the parent has completed.
-    """
-    from dartwing.dartwing_core.background_jobs.engine import _enqueue_job
-
-    # Find queued jobs with dependencies that are now satisfied
-    jobs = frappe.db.sql(
-        """
-        SELECT bj.name, bj.depends_on
-        FROM `tabBackground Job` bj
-        INNER JOIN `tabBackground Job` parent ON bj.depends_on = parent.name
-        WHERE bj.status = 'Queued'
-        AND bj.depends_on IS NOT NULL
-        AND parent.status = 'Completed'
-        LIMIT 100
-        """,
-        as_dict=True,
-    )
-
-    for job_data in jobs:
-        try:
-            job = frappe.get_doc("Background Job", job_data.name)
-            _enqueue_job(job)
-        except Exception as e:
-            frappe.log_error(
-                f"Failed to enqueue dependent job {job_data.name}: {e}",
-                "Background Job Scheduler",
-            )
-
-    if jobs:
-        frappe.db.commit()
+    Scheduled task: Release dependent jobs whose parents have all completed.
+
+    Dependent jobs are released by the executor as soon as their last parent
+    completes (dependencies.release_dependents); this minutely scan is only a
+    safety net for releases lost to a worker crash.
+    """
+    from dartwing.dartwing_core.background_jobs.dependencies import release_ready_jobs
+
+    try:
+        release_ready_jobs()
+    except Exception as e:
+        frappe.log_error(
+            f"Error releasing dependent jobs: {e}",
+            "Background Job Scheduler",
+        )
+
+
+def redispatch_lost_jobs():
+    """
+    Scheduled task: Dispatch Queued jobs again that are in no backlog, e.g.
+    because the push after their commit failed.
+    """
+    from dartwing.dartwing_core.background_jobs.dispatch import redispatch_lost_jobs as do_redispatch
+
+    try:
+        do_redispatch()
+    except Exception as e:
+        frappe.log_error(
+            f"Error redispatching lost jobs: {e}",
+            "Background Job Scheduler",
+        )
+
+
+def requeue_orphaned_async_jobs():
+    """
+    Scheduled task: Dispatch handed-off jobs again when no async or process
+    worker is running anymore to take them.
+    """
+    from dartwing.dartwing_core.background_jobs.async_runner import requeue_orphaned_jobs
+
+    try:
+        requeue_orphaned_jobs()
+    except Exception as e:
+        frappe.log_error(
+            f"Error requeuing orphaned handed-off jobs: {e}",
+            "Background Job Scheduler",
+        )
+
+
+def flush_metrics():
+    """
+    Scheduled task: Write buffered execution metrics and rollups to the database.
+    """
+    from dartwing.dartwing_core.background_jobs.metrics import flush_metrics as flush
+
+    try:
+        flush()
+    except Exception as e:
+        frappe.log_error(
+            f"Error flushing execution metrics: {e}",
+            "Background Job Scheduler",
+        )
+
+
+def compact_status_rollups():
+    """
+    Scheduled task: Fold old job status rollup rows into their baseline rows.
+    """
+    from dartwing.dartwing_core.background_jobs.status_rollup import compact
+
+    try:
+        compact()
+    except Exception as e:
+        frappe.log_error(
+            f"Error compacting job status rollups: {e}",
+            "Background Job Scheduler",
+        )
@@ -0,0 +1,84 @@
+"""
+Version-keyed copies of small tables in Redis for Background Job Engine.
+
+RQ forks a fresh work horse per job, so per-process caches (the Job Type
+registry, circuit breaker states) often start cold. load() keeps the rows
+of such a table in Redis under the version counter that is bumped after
+every change to it commits: a cold process reads them with one cache call,
+and only the first process after a change queries the table.
+
+Rows are only shared if they were read in a transaction snapshot taken
+after the version was read. Under REPEATABLE READ a transaction that read
+anything before a change committed keeps seeing the old rows even though
+Redis already holds the new version; sharing them would hand every process
+stale rows until the next change. A transaction without pending writes is
+therefore committed before the query, so the query starts a fresh
+snapshot; with writes pending the rows are used but neither shared nor
+trusted to be as new as the version.
+"""
+
+from typing import Callable
+
+import frappe
+
+
+def is_shareable(version) -> bool:
+    """Whether version came from Redis (callers use a fresh object() while Redis is unavailable)."""
+    return version is None or isinstance(version, (bytes, str, int))
+
+
+def load(key_prefix: str, version, query: Callable[[], list], expires_in_sec: int) -> tuple:
+    """
+    Return the rows shared in Redis for version, querying and sharing them on a miss.
+
+    Read version from Redis before calling this.
+
+    Args:
+        key_prefix: Redis key of the copies, without the version
+        version: Version counter value read from Redis
+        query: Reads the rows from the database
+        expires_in_sec: Lifetime of a shared copy
+
+    Returns:
+        (rows, current): current is False if the rows may be older than
+        version, in which case the caller should not keep them as version
+    """
+    shared = is_shareable(version)
+    key = f"{key_prefix}:{_decode(version) or 0}"
+
+    if shared:
+        try:
+            rows = frappe.cache().get_value(key)
+            if rows is not None:
+                return rows, True
+        except Exception:
+            # Load from the database instead
+            pass
+
+    current = _start_fresh_snapshot()
+    rows = query()
+    if shared and current:
+        try:
+            frappe.cache().set_value(key, rows, expires_in_sec=expires_in_sec)
+        except Exception:
+            # The next cold process queries the table again
+            pass
+    return rows, current
+
+
+def _start_fresh_snapshot() -> bool:
+    """
+    End the current transaction if it has nothing to write, so the next read
+    sees every change committed so far.
+
+    Returns:
+        False if writes are pending (the transaction's snapshot may be older)
+    """
+    if frappe.db.transaction_writes:
+        return False
+    frappe.db.commit()
+    return True
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
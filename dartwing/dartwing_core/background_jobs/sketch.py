@@ -0,0 +1,99 @@
+"""
+Mergeable latency sketch for Background Job Engine metrics.
+
+A LatencySketch is a logarithmic histogram (the DDSketch layout): a duration
+x is counted in bin i = ceil(log_gamma(x)), which holds the values in
+(gamma^(i-1), gamma^i] with gamma = (1 + a) / (1 - a) for the relative
+accuracy a (METRICS_SKETCH_RELATIVE_ACCURACY).
+
+Error bound: quantile(q) returns the duration at rank (count - 1) * q of
+the counted durations to within a relative error of a, e.g. a reported p99
+of 20.0s means the true p99 lies in [19.8, 20.2] at the default 1%.
+Durations below METRICS_SKETCH_MIN_SECONDS are counted as that minimum.
+
+Size bound: bins are sparse and only exist for durations that occurred; a
+sketch never holds more than log(max / min) / log(gamma) bins, about 1,100
+for 1 ms to 30 days at 1%, however many durations it counts. Merging adds
+bin counts, so sketches of any number of rollup rows combine into one of
+the same bounded size, and the result is identical to a sketch fed all
+their durations directly.
+"""
+
+import json
+import math
+
+from dartwing.dartwing_core.background_jobs.config import (
+    METRICS_SKETCH_MIN_SECONDS,
+    METRICS_SKETCH_RELATIVE_ACCURACY,
+)
+
+_GAMMA = (1 + METRICS_SKETCH_RELATIVE_ACCURACY) / (1 - METRICS_SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+def bin_index(seconds: float) -> int:
+    """Bin a duration is counted in."""
+    return math.ceil(math.log(max(seconds, METRICS_SKETCH_MIN_SECONDS)) / _LOG_GAMMA)
+
+
+def bin_value(index: int) -> float:
+    """Representative duration of a bin, within the relative accuracy of all its values."""
+    return 2 * _GAMMA ** index / (_GAMMA + 1)
+
+
+class LatencySketch:
+    """Sparse bin counts of a set of durations."""
+
+    def __init__(self, bins: dict | None = None):
+        self.bins = dict(bins or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    def add(self, seconds: float, count: int = 1) -> None:
+        index = bin_index(seconds)
+        self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other: "LatencySketch") -> None:
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the counted durations.
+
+        Args:
+            q: Quantile (0.0 to 1.0, e.g. 0.95 for p95)
+
+        Returns:
+            The estimated duration in seconds, or 0 if the sketch is empty
+        """
+        total = self.count
+        if not total:
+            return 0
+        rank = int((total - 1) * q)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return bin_value(index)
+        return bin_value(max(self.bins))
+
+    def to_json(self) -> str:
+        return json.dumps({str(index): count for index, count in sorted(self.bins.items())})
+
+    @classmethod
+    def from_json(cls, value: str | None) -> "LatencySketch":
+        if not value:
+            return cls()
+        return cls({int(index): count for index, count in json.loads(value).items()})
+
+
+def merge_all(values) -> LatencySketch:
+    """Merge serialized sketches (None entries are skipped)."""
+    merged = LatencySketch()
+    for value in values:
+        if value:
+            merged.merge(LatencySketch.from_json(value))
+    return merged
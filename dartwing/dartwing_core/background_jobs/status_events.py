@@ -0,0 +1,210 @@
+"""
+Long-poll waiting for Background Job Engine.
+
+wait_for_job() blocks an API request until a job's status snapshot version
+moves past the version the client already has, so clients can wait for a
+job instead of polling get_job_status() every second.
+
+Every snapshot change is published on a per-job Redis channel (see
+status_snapshot.py), the same writes that follow publish_job_status_changed()
+transitions and progress updates. Each web worker process runs one listener
+thread that owns a single pub/sub connection, subscribes to the channels of
+jobs that have local waiters and wakes them with threading.Events. A waiter
+therefore costs a sleeping thread and no Redis or database connection of its
+own; the request's database connection is released before it blocks.
+
+Waiters also re-read the snapshot every WAIT_FOR_JOB_RECHECK_SECONDS, which
+covers events published before the listener finished subscribing.
+
+A waiting request still occupies its web worker. With gunicorn's default sync
+workers every waiter takes a whole worker for up to
+WAIT_FOR_JOB_MAX_TIMEOUT_SECONDS, so blocking is off unless the site enables
+it (site config background_job_long_poll_enabled), which it should only do
+when gunicorn runs threaded or gevent workers (--worker-class gthread with
+--threads, or gevent). While disabled, wait_for_job() returns the current
+status at once with long_poll False, and clients poll get_job_status() with
+the returned version (304 Not Modified while unchanged).
+"""
+
+import threading
+import time
+
+import frappe
+from frappe.utils import cint
+
+from dartwing.dartwing_core.background_jobs.config import (
+    WAIT_FOR_JOB_DEFAULT_TIMEOUT_SECONDS,
+    WAIT_FOR_JOB_MAX_TIMEOUT_SECONDS,
+    WAIT_FOR_JOB_RECHECK_SECONDS,
+)
+
+# How long the listener blocks on the socket before applying (un)subscriptions
+_LISTEN_POLL_SECONDS = 0.2
+
+
+class _StatusListener:
+    """Per-process pub/sub listener fanning job change events out to waiters."""
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._subscribed = set()
+        self._thread = None
+
+    def add(self, channel: str) -> threading.Event:
+        event = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(channel, set()).add(event)
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="dartwing-job-status-listener", daemon=True
+                )
+                self._thread.start()
+        return event
+
+    def remove(self, channel: str, event: threading.Event) -> None:
+        with self._lock:
+            events = self._waiters.get(channel)
+            if events is not None:
+                events.discard(event)
+                if not events:
+                    del self._waiters[channel]
+
+    def _run(self) -> None:
+        try:
+            while True:
+                self._sync_subscriptions()
+                message = self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=_LISTEN_POLL_SECONDS
+                )
+                if message and message.get("type") == "message":
+                    self._notify(_decode(message["channel"]))
+        except Exception:
+            # Waiters fall back to re-reading the snapshot; the next add()
+            # starts a new listener thread
+            self._subscribed.clear()
+            try:
+                self._pubsub.reset()
+            except Exception:
+                pass
+
+    def _sync_subscriptions(self) -> None:
+        with self._lock:
+            wanted = set(self._waiters)
+        added = wanted - self._subscribed
+        removed = self._subscribed - wanted
+        if added:
+            self._pubsub.subscribe(*added)
+        if removed:
+            self._pubsub.unsubscribe(*removed)
+        self._subscribed = wanted
+
+    def _notify(self, channel: str) -> None:
+        with self._lock:
+            events = list(self._waiters.get(channel, ()))
+        for event in events:
+            event.set()
+
+
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+def _get_listener() -> _StatusListener:
+    site = frappe.local.site
+    with _listeners_lock:
+        listener = _listeners.get(site)
+        if listener is None:
+            # Created in a request so the connection uses the site's config
+            listener = _listeners[site] = _StatusListener(frappe.cache().pubsub())
+        return listener
+
+
+def is_long_poll_enabled() -> bool:
+    """Whether wait_for_job() may block (site config: background_job_long_poll_enabled)."""
+    return bool(cint(frappe.conf.get("background_job_long_poll_enabled")))
+
+
+def wait_for_job(
+    job_id: str,
+    since_version: int | None = None,
+    timeout: float = WAIT_FOR_JOB_DEFAULT_TIMEOUT_SECONDS,
+) -> dict:
+    """
+    Wait until a job's status or progress changes, or the timeout elapses.
+
+    Returns right away if the job already moved past since_version, has
+    finished, no version is available (cache unavailable), or long polling
+    is disabled for the site; clients then fall back to polling.
+
+    Args:
+        job_id: Background Job ID
+        since_version: Status version the caller already has (None: return
+            the current status)
+        timeout: Maximum seconds to block (capped at
+            WAIT_FOR_JOB_MAX_TIMEOUT_SECONDS)
+
+    Returns:
+        get_job_status() result plus changed (False on timeout) and
+        long_poll (False if the call did not block because long polling is
+        disabled)
+    """
+    from dartwing.dartwing_core.background_jobs import status_snapshot
+    from dartwing.dartwing_core.background_jobs.engine import TERMINAL_STATUSES, get_job_status
+
+    since_version = cint(since_version) or None
+    long_poll = is_long_poll_enabled()
+    timeout = max(0.0, min(float(timeout or 0), WAIT_FOR_JOB_MAX_TIMEOUT_SECONDS)) if long_poll else 0.0
+
+    # Checks access and (re)builds the snapshot
+    status = get_job_status(job_id)
+    if (
+        not since_version
+        or not status.get("version")
+        or status["version"] != since_version
+        or status["status"] in TERMINAL_STATUSES
+        or not timeout
+    ):
+        return dict(status, changed=status.get("version") != since_version, long_poll=long_poll)
+
+    _release_db_connection()
+
+    channel = _decode(status_snapshot.get_channel(job_id))
+    listener = _get_listener()
+    event = listener.add(channel)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event.wait(min(remaining, WAIT_FOR_JOB_RECHECK_SECONDS))
+            event.clear()
+
+            try:
+                snapshot = status_snapshot.get(job_id)
+            except Exception:
+                break
+            if not snapshot or snapshot.get("version") != since_version:
+                break
+    finally:
+        listener.remove(channel, event)
+
+    status = get_job_status(job_id)
+    return dict(status, changed=status.get("version") != since_version, long_poll=long_poll)
+
+
+def _release_db_connection() -> None:
+    """Give the request's database connection back while the request sleeps."""
+    try:
+        frappe.db.rollback()
+        frappe.db.close()
+    except Exception:
+        # The connection is reopened on demand; a failure here only means
+        # the waiter keeps holding it
+        pass
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
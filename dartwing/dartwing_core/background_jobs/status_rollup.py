@@ -0,0 +1,200 @@
+"""
+Job status rollups for Background Job Engine metrics.
+
+Every status transition adds to the Background Job Status Rollup row of its
+minute, organization, Job Type, priority and status: `entered` counts jobs
+that reached the status, `net_change` is entered minus left. The number of
+jobs currently in a status is therefore the sum of net_change over all rows,
+which get_metrics() reads instead of counting Background Job rows.
+
+Transitions are buffered per transaction and upserted just before it
+commits (discarded on rollback), like the execution log. Rows older than
+METRICS_STATUS_ROLLUP_COMPACT_HOURS are folded into one baseline row per
+group by compact(), so the table grows with groups, not with jobs.
+
+rebuild() recomputes everything from the Background Job table (bench
+dartwing-rebuild-job-rollups) for backfills and after bulk deletes.
+"""
+
+from datetime import datetime
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from dartwing.dartwing_core.background_jobs.config import (
+    BATCH_INSERT_CHUNK_SIZE,
+    METRICS_STATUS_ROLLUP_COMPACT_HOURS,
+)
+
+# bucket_start of the rows holding compacted history
+BASELINE_BUCKET = datetime(2000, 1, 1)
+
+_GROUP_FIELDS = ["bucket_start", "organization", "job_type", "priority", "status"]
+
+
+def record_transition(
+    organization: str,
+    job_type: str,
+    priority: str,
+    from_status: str | None,
+    to_status: str | None,
+    count: int = 1,
+) -> None:
+    """
+    Buffer a status transition until the current transaction commits.
+
+    Args:
+        organization, job_type, priority: The job's fields
+        from_status: Previous status, None for a new job
+        to_status: New status, None for a deleted job
+        count: Number of jobs making this transition
+    """
+    pending = getattr(frappe.local, "dartwing_pending_status_rollups", None)
+    if pending is None:
+        pending = frappe.local.dartwing_pending_status_rollups = {}
+        frappe.db.before_commit.add(flush)
+        frappe.db.after_rollback.add(_discard_pending)
+
+    from dartwing.dartwing_core.background_jobs.metrics import get_bucket_start
+
+    bucket = get_bucket_start(now_datetime())
+    if from_status:
+        _add(pending, (bucket, organization, job_type, priority, from_status), 0, -count)
+    if to_status:
+        _add(pending, (bucket, organization, job_type, priority, to_status), count, count)
+
+
+def _add(pending: dict, group: tuple, entered: int, net_change: int) -> None:
+    counts = pending.setdefault(group, [0, 0])
+    counts[0] += entered
+    counts[1] += net_change
+
+
+def flush() -> None:
+    """Upsert all buffered transitions of the current transaction."""
+    pending = getattr(frappe.local, "dartwing_pending_status_rollups", None)
+    frappe.local.dartwing_pending_status_rollups = None
+    if pending:
+        _upsert([
+            (*group, entered, net_change)
+            for group, (entered, net_change) in pending.items()
+            if entered or net_change
+        ])
+
+
+def _upsert(rows: list) -> None:
+    # Fixed row order keeps concurrent commits from deadlocking
+    rows = sorted(rows, key=lambda row: tuple(str(value) for value in row))
+    now = now_datetime()
+    user = frappe.session.user
+    for start in range(0, len(rows), BATCH_INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + BATCH_INSERT_CHUNK_SIZE]
+        values = []
+        for row in chunk:
+            values.extend((frappe.generate_hash(length=10), user, now, now, user, 0, *row))
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tabBackground Job Status Rollup`
+                (name, owner, creation, modified, modified_by, docstatus,
+                 {", ".join(_GROUP_FIELDS)}, entered, net_change)
+            VALUES {", ".join(["(" + ", ".join(["%s"] * 13) + ")"] * len(chunk))}
+            ON DUPLICATE KEY UPDATE
+                entered = entered + VALUES(entered),
+                net_change = net_change + VALUES(net_change)
+            """,
+            values,
+        )
+
+
+def _discard_pending() -> None:
+    frappe.local.dartwing_pending_status_rollups = None
+
+
+def compact() -> int:
+    """
+    Fold rows older than METRICS_STATUS_ROLLUP_COMPACT_HOURS into the baseline rows.
+
+    Returns:
+        Number of rows folded
+    """
+    values = {
+        "baseline": BASELINE_BUCKET,
+        "cutoff": add_to_date(now_datetime(), hours=-METRICS_STATUS_ROLLUP_COMPACT_HOURS),
+        "user": frappe.session.user,
+    }
+    where = "bucket_start > %(baseline)s AND bucket_start < %(cutoff)s"
+
+    folded = frappe.db.sql(
+        f"SELECT COUNT(*) FROM `tabBackground Job Status Rollup` WHERE {where}", values
+    )[0][0]
+    if not folded:
+        return 0
+
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabBackground Job Status Rollup`
+            (name, owner, creation, modified, modified_by, docstatus,
+             {", ".join(_GROUP_FIELDS)}, entered, net_change)
+        SELECT SUBSTRING(MD5(CONCAT_WS(':', organization, job_type, priority, status)), 1, 10),
+            %(user)s, NOW(), NOW(), %(user)s, 0,
+            %(baseline)s, organization, job_type, priority, status,
+            SUM(entered), SUM(net_change)
+        FROM `tabBackground Job Status Rollup`
+        WHERE {where}
+        GROUP BY organization, job_type, priority, status
+        ON DUPLICATE KEY UPDATE
+            entered = entered + VALUES(entered),
+            net_change = net_change + VALUES(net_change)
+        """,
+        values,
+    )
+    frappe.db.sql(f"DELETE FROM `tabBackground Job Status Rollup` WHERE {where}", values)
+    frappe.db.commit()
+    return folded
+
+
+def rebuild() -> int:
+    """
+    Recompute all status rollups from the Background Job table.
+
+    Current job counts become baseline rows; transitions of the last
+    METRICS_STATUS_ROLLUP_COMPACT_HOURS are restored from the Job Execution
+    Log as entered counts of their minute.
+
+    Returns:
+        Number of rollup rows written
+    """
+    from dartwing.dartwing_core.background_jobs.metrics import get_bucket_start
+
+    frappe.db.delete("Background Job Status Rollup")
+
+    rows = [
+        (BASELINE_BUCKET, row.organization, row.job_type, row.priority, row.status, 0, row.count)
+        for row in frappe.db.sql(
+            """
+            SELECT organization, job_type, priority, status, COUNT(*) as count
+            FROM `tabBackground Job`
+            GROUP BY organization, job_type, priority, status
+            """,
+            as_dict=True,
+        )
+    ]
+
+    entered = {}
+    for row in frappe.db.sql(
+        """
+        SELECT l.timestamp, j.organization, j.job_type, j.priority, l.to_status
+        FROM `tabJob Execution Log` l
+        INNER JOIN `tabBackground Job` j ON j.name = l.background_job
+        WHERE l.timestamp >= %(since)s
+        """,
+        {"since": add_to_date(now_datetime(), hours=-METRICS_STATUS_ROLLUP_COMPACT_HOURS)},
+        as_dict=True,
+    ):
+        group = (get_bucket_start(row.timestamp), row.organization, row.job_type, row.priority, row.to_status)
+        entered[group] = entered.get(group, 0) + 1
+    rows.extend((*group, count, 0) for group, count in entered.items())
+
+    _upsert(rows)
+    frappe.db.commit()
+    return len(rows)
@@ -0,0 +1,209 @@
+"""
+Status snapshots for Background Job Engine.
+
+A compact JSON snapshot of each active job's status (status, progress,
+message, timestamps, output reference) lives in a Redis hash next to a
+version number, so get_job_status() can answer polls without loading the
+Background Job document:
+
+    dartwing_core:background_job:status:<job_id>   {data: <json>, version: <n>}
+
+- Every save of a Background Job rewrites the snapshot after commit.
+- Buffered progress from a running handler is merged into it.
+- A poll that sends the version it already has gets "not modified".
+- Every new version is published on a per-job channel for long-poll
+  waiters (see status_events.py).
+
+Versions come from one site-wide counter, so a snapshot that expired and
+was rebuilt never reuses a version a client has seen. A full write carries
+the document's modified timestamp and is ignored if the stored snapshot is
+newer, so late after-commit callbacks cannot roll a snapshot back.
+"""
+
+import json
+from typing import Optional
+
+import frappe
+
+from dartwing.dartwing_core.background_jobs.config import STATUS_SNAPSHOT_TTL_SECONDS
+
+# Fields of a snapshot, in get_job_status() response order
+SNAPSHOT_FIELDS = (
+    "job_id",
+    "job_type",
+    "status",
+    "progress",
+    "progress_message",
+    "created_at",
+    "started_at",
+    "completed_at",
+    "retry_count",
+    "next_retry_at",
+    "output_reference",
+    "error_message",
+    "error_type",
+)
+
+# KEYS: snapshot hash, version counter; ARGV: mode, json, ttl, change channel
+# mode "full": replace unless the stored snapshot is newer (by modified)
+# mode "create": write only if no snapshot exists
+# mode "merge": update fields of an existing snapshot only
+# Returns the new version, or 0 if nothing was written
+_WRITE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'data')
+local mode = ARGV[1]
+local data = ARGV[2]
+
+if mode == 'create' and current then
+    return 0
+end
+if mode == 'merge' then
+    if not current then
+        return 0
+    end
+    local merged = cjson.decode(current)
+    for k, v in pairs(cjson.decode(ARGV[2])) do
+        merged[k] = v
+    end
+    data = cjson.encode(merged)
+elseif mode == 'full' and current then
+    local stored = cjson.decode(current)['modified']
+    local incoming = cjson.decode(ARGV[2])['modified']
+    if type(stored) == 'string' and type(incoming) == 'string' and incoming < stored then
+        return 0
+    end
+end
+
+local version = redis.call('INCR', KEYS[2])
+redis.call('HSET', KEYS[1], 'data', data, 'version', version)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+redis.call('PUBLISH', ARGV[4], version)
+return version
+"""
+
+
+def _key(job_id: str) -> str:
+    return frappe.cache().make_key(f"dartwing_core:background_job:status:{job_id}")
+
+
+def get_channel(job_id: str) -> str:
+    """Pub/sub channel that receives the new version whenever the snapshot changes."""
+    return frappe.cache().make_key(f"dartwing_core:background_job:status:changed:{job_id}")
+
+
+def _version_key() -> str:
+    return frappe.cache().make_key("dartwing_core:background_job:status:version")
+
+
+def build(job) -> dict:
+    """Build the snapshot of a Background Job document."""
+    return {
+        "job_id": job.name,
+        "job_type": job.job_type,
+        "status": job.status,
+        "progress": job.progress or 0,
+        "progress_message": job.progress_message,
+        "created_at": str(job.created_at) if job.created_at else None,
+        "started_at": str(job.started_at) if job.started_at else None,
+        "completed_at": str(job.completed_at) if job.completed_at else None,
+        "retry_count": job.retry_count or 0,
+        "next_retry_at": str(job.next_retry_at) if job.next_retry_at else None,
+        "output_reference": job.output_reference,
+        "error_message": job.error_message,
+        "error_type": job.error_type,
+        # Not returned to clients; used for access checks and ordering
+        "organization": job.organization,
+        "owner_user": job.owner_user,
+        "modified": str(job.modified) if job.modified else None,
+    }
+
+
+def write(job, create_only: bool = False) -> int:
+    """
+    Store a job's snapshot.
+
+    Args:
+        job: Background Job document
+        create_only: Only write if no snapshot exists (lazy rebuild on read)
+
+    Returns:
+        New version, or 0 if the stored snapshot was kept
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    return _run("create" if create_only else "full", job.name, build(job))
+
+
+def merge_progress(job_id: str, progress: int, progress_message: Optional[str]) -> int:
+    """
+    Update the progress of an existing snapshot.
+
+    Returns:
+        New version, or 0 if the job has no snapshot
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    return _run("merge", job_id, {"progress": progress, "progress_message": progress_message})
+
+
+def get(job_id: str) -> Optional[dict]:
+    """
+    Return a job's snapshot with its version, or None if there is none.
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    values = frappe.cache().hgetall(_key(job_id))
+    if not values:
+        return None
+
+    values = {_decode(k): _decode(v) for k, v in values.items()}
+    if "data" not in values:
+        return None
+
+    snapshot = json.loads(values["data"])
+    snapshot["version"] = int(values.get("version") or 0)
+    return snapshot
+
+
+def write_after_commit(job) -> None:
+    """Refresh a job's snapshot once the current transaction commits."""
+    snapshot = build(job)
+
+    def _write():
+        try:
+            _run("full", snapshot["job_id"], snapshot)
+        except Exception as e:
+            # Drop the stale snapshot so the next poll rebuilds it from the row
+            frappe.log_error(
+                f"Failed to update status snapshot of job {snapshot['job_id']}: {e}",
+                "Background Job Status",
+            )
+            delete(snapshot["job_id"])
+
+    frappe.db.after_commit.add(_write)
+
+
+def delete(job_id: str) -> None:
+    """Remove a job's snapshot (best-effort)."""
+    try:
+        frappe.cache().delete(_key(job_id))
+    except Exception:
+        pass
+
+
+def _run(mode: str, job_id: str, data: dict) -> int:
+    script = frappe.cache().register_script(_WRITE_SCRIPT)
+    return int(
+        script(
+            keys=[_key(job_id), _version_key()],
+            args=[mode, json.dumps(data, default=str), STATUS_SNAPSHOT_TTL_SECONDS, get_channel(job_id)],
+        )
+        or 0
+    )
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -14,8 +14,8 @@ from frappe.utils import now_datetime
 # Valid status transitions
 VALID_TRANSITIONS = {
     None: ["Pending"],  # Creation
-    "Pending": ["Queued", "Canceled"],
-    "Queued": ["Running", "Canceled", "Dead Letter"],
+    "Pending": ["Queued", "Canceled", "Dead Letter"],  # Dead Letter: parent failed
+    "Queued": ["Running", "Canceled", "Dead Letter", "Pending"],  # Pending: waiting on parents
     "Running": ["Completed", "Failed", "Dead Letter", "Canceled", "Timed Out"],
     "Failed": ["Queued", "Dead Letter"],  # Retry or exhaust
     "Timed Out": ["Queued", "Dead Letter"],  # Retry or exhaust
@@ -52,7 +52,9 @@ class BackgroundJob(Document):
         if not self.job_type:
             return
 
-        job_type = frappe.db.get_value("Job Type", self.job_type, ["name", "is_enabled"], as_dict=True)
+        from dartwing.dartwing_core.background_jobs.registry import find_job_type
+
+        job_type = find_job_type(self.job_type)
         if not job_type:
             frappe.throw(_("Job Type '{0}' not found").format(self.job_type))
 
@@ -101,7 +103,9 @@ class BackgroundJob(Document):
             self.owner_user = self.owner_user or frappe.session.user
 
             if self.job_type:
-                job_type = frappe.get_cached_doc("Job Type", self.job_type)
+                from dartwing.dartwing_core.background_jobs.registry import get_job_type
+
+                job_type = get_job_type(self.job_type)
                 if self.timeout_seconds is None:
                     self.timeout_seconds = job_type.default_timeout if job_type.default_timeout is not None else 300
                 if self.max_retries is None:
@@ -110,11 +114,96 @@ class BackgroundJob(Document):
                     self.priority = job_type.default_priority or "Normal"
 
     def on_update(self):
-        """Log state transitions for audit."""
+        """Log state transitions for audit and propagate them to caches and dependents."""
         self.log_state_transition()
+        self.update_status_rollup()
+        self.release_deduplication_claim()
+        self.signal_cancellation()
+        self.cascade_to_dependents()
+        self.update_status_snapshot()
+
+    def update_status_rollup(self):
+        """Count the status change in the metrics rollups (written at commit)."""
+        if not hasattr(self, "_doc_before_save"):
+            return
+
+        old_status = self._doc_before_save.status if self._doc_before_save else None
+        if old_status == self.status:
+            return
+
+        from dartwing.dartwing_core.background_jobs import status_rollup
+
+        status_rollup.record_transition(
+            self.organization, self.job_type, self.priority, old_status, self.status
+        )
+
+    def update_status_snapshot(self):
+        """Refresh the Redis status snapshot served to pollers."""
+        from dartwing.dartwing_core.background_jobs import status_snapshot
+
+        status_snapshot.write_after_commit(self)
+
+    def signal_cancellation(self):
+        """Notify a running handler once the Canceled status is committed."""
+        if self.status != "Canceled":
+            return
+        old_status = self._doc_before_save.status if getattr(self, "_doc_before_save", None) else None
+        if old_status == self.status:
+            return
+
+        from dartwing.dartwing_core.background_jobs.cancellation import signal_after_commit
+
+        signal_after_commit(self.name)
+
+    def cascade_to_dependents(self):
+        """Fail or cancel jobs waiting on this one when it can no longer complete."""
+        if self.status not in ("Dead Letter", "Canceled") or self.flags.in_dependency_cascade:
+            return
+        old_status = self._doc_before_save.status if getattr(self, "_doc_before_save", None) else None
+        if old_status == self.status:
+            return
+
+        from dartwing.dartwing_core.background_jobs.dependencies import cascade_failure
+
+        cascade_failure(self.name, self.status)
+
+    def on_trash(self):
+        """Free the deduplication index, drop execution log, dependency edges, artifacts, status snapshot and rollup count."""
+        self.release_deduplication_claim(force=True)
+        frappe.db.delete("Job Execution Log", {"background_job": self.name})
+        frappe.db.delete("Background Job Dependency", {"background_job": self.name})
+        frappe.db.delete("Background Job Dependency", {"depends_on": self.name})
+
+        from dartwing.dartwing_core.background_jobs.artifacts import delete_artifacts
+
+        from dartwing.dartwing_core.background_jobs import status_rollup, status_snapshot
+
+        status_rollup.record_transition(
+            self.organization, self.job_type, self.priority, self.status, None
+        )
+
+        # Files are not transactional; keep them if the delete rolls back
+        frappe.db.after_commit.add(lambda: delete_artifacts(self.name))
+        frappe.db.after_commit.add(lambda: status_snapshot.delete(self.name))
+
+    def release_deduplication_claim(self, force=False):
+        """Release the dedup index claim once the job reaches a terminal state."""
+        if not self.job_hash or not (force or self.is_terminal()):
+            return
+        if not force:
+            old_status = self._doc_before_save.status if getattr(self, "_doc_before_save", None) else None
+            if old_status == self.status:
+                return
+
+        from dartwing.dartwing_core.background_jobs import dedup
+
+        # After commit, so a rolled-back transition keeps blocking duplicates
+        frappe.db.after_commit.add(
+            lambda: dedup.release(self.organization, self.job_hash, self.name)
+        )
 
     def log_state_transition(self):
-        """Create Job Execution Log entry for status changes."""
+        """Record a Job Execution Log entry for status changes (written at commit)."""
         if not hasattr(self, "_doc_before_save"):
             return
 
@@ -122,17 +211,16 @@ class BackgroundJob(Document):
         if old_status == self.status:
             return
 
-        # Create log entry
-        log = frappe.new_doc("Job Execution Log")
-        log.background_job = self.name
-        log.organization = self.organization
-        log.from_status = old_status
-        log.to_status = self.status
-        log.timestamp = now_datetime()
-        log.actor = frappe.session.user
-        log.message = self._get_transition_message(old_status, self.status)
-        log.retry_attempt = self.retry_count if self.status == "Queued" and old_status == "Failed" else None
-        log.insert(ignore_permissions=True)
+        from dartwing.dartwing_core.background_jobs import execution_log
+
+        execution_log.append(
+            background_job=self.name,
+            organization=self.organization,
+            from_status=old_status,
+            to_status=self.status,
+            message=self._get_transition_message(old_status, self.status),
+            retry_attempt=self.retry_count if self.status == "Queued" and old_status == "Failed" else None,
+        )
 
     def _get_transition_message(self, from_status, to_status):
         """Generate human-readable transition message."""
@@ -146,6 +234,8 @@ class BackgroundJob(Document):
             ("Running", "Timed Out"): f"Job timed out after {self.timeout_seconds}s",
             ("Running", "Canceled"): "Job canceled during execution",
             ("Pending", "Canceled"): "Job canceled before execution",
+            ("Pending", "Dead Letter"): f"Job moved to dead letter: {self.error_message or 'Parent job failed'}",
+            ("Queued", "Pending"): "Job waiting for parent jobs to complete",
             ("Queued", "Canceled"): "Job canceled while queued",
             ("Failed", "Queued"): f"Job re-queued for retry (attempt {self.retry_count + 1})",
             ("Failed", "Dead Letter"): "Job exhausted retries, moved to dead letter",
@@ -162,3 +252,19 @@ class BackgroundJob(Document):
     def is_terminal(self):
         """Check if job is in a terminal state."""
         return self.status in ["Completed", "Dead Letter", "Canceled"]
+
+
+# Composite indexes of the engine's hot queries. DocType JSON cannot declare
+# them, so they are created here on every migrate (add_index skips existing ones).
+INDEXES = [
+    ["status", "next_retry_at"],  # Retry safety-net scan (retry.process_retry_queue)
+    ["status", "completed_at"],  # Dead letter list, newest first
+    ["status", "modified"],  # Retention run (cleanup.run_retention)
+    ["job_type", "status"],  # Per-Job-Type retention, Job Type delete check
+    ["organization", "status", "created_at"],  # list_jobs filters and order
+]
+
+
+def on_doctype_update():
+    for fields in INDEXES:
+        frappe.db.add_index("Background Job", fields)
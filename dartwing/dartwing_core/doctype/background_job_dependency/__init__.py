@@ -0,0 +1 @@
+# Background Job Dependency Doctype
@@ -0,0 +1,19 @@
+"""
+Background Job Dependency Controller.
+
+Edge of the job dependency graph: background_job waits for depends_on.
+Edges are written by the engine when a job is submitted (see
+background_jobs/dependencies.py) and never change afterwards.
+"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class BackgroundJobDependency(Document):
+    pass
+
+
+def on_doctype_update():
+    # Children of a parent are read from the index alone (release_dependents, cascade_failure)
+    frappe.db.add_index("Background Job Dependency", ["depends_on", "background_job"])
@@ -0,0 +1 @@
+# Background Job Metrics Doctype
@@ -0,0 +1,14 @@
+"""
+Background Job Metrics Controller.
+
+Execution time sample of one finished job. Only a sampled share of jobs is
+stored (see Job Type metrics_sample_rate); counts and totals come from
+Background Job Metrics Rollup. Rows are bulk-inserted by
+background_jobs/metrics.py.
+"""
+
+from frappe.model.document import Document
+
+
+class BackgroundJobMetrics(Document):
+    pass
@@ -0,0 +1 @@
+# Background Job Metrics Rollup Doctype
@@ -0,0 +1,14 @@
+"""
+Background Job Metrics Rollup Controller.
+
+Execution counts, times and latency sketch (see background_jobs/sketch.py)
+of all finished jobs per minute, Job Type, organization and status, pre-aggregated in Redis and bulk-inserted by
+background_jobs/metrics.py. A bucket may be split over several rows;
+readers aggregate them.
+"""
+
+from frappe.model.document import Document
+
+
+class BackgroundJobMetricsRollup(Document):
+    pass
@@ -0,0 +1 @@
+# Background Job Status Rollup Doctype
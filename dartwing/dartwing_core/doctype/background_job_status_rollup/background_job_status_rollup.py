@@ -0,0 +1,23 @@
+"""
+Background Job Status Rollup Controller.
+
+Status transitions of jobs per minute, organization, Job Type, priority and
+status, upserted by background_jobs/status_rollup.py. The sum of net_change
+over all rows of a status is the number of jobs currently in it.
+"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class BackgroundJobStatusRollup(Document):
+    pass
+
+
+def on_doctype_update():
+    # Transitions are added to their group's row with INSERT ... ON DUPLICATE KEY UPDATE
+    frappe.db.add_unique(
+        "Background Job Status Rollup",
+        ["bucket_start", "organization", "job_type", "priority", "status"],
+        constraint_name="unique_status_rollup_group",
+    )
@@ -20,9 +20,24 @@ class JobType(Document):
         - circuit_breaker_min_samples (int): Minimum jobs before opening circuit
         - circuit_breaker_window_minutes (int): Time window for failure rate calculation
         - circuit_breaker_cooldown_minutes (int): Wait time before testing recovery
+        - circuit_breaker_half_open_probes (int): Jobs run at once to test recovery
 
     Optional Timeout Handler Field:
         - timeout_handler_method (str): Python path to cleanup function for timeouts
+
+    Optional Concurrency Fields (0 or empty means no limit):
+        - max_concurrency (int): Jobs of this type running at once, site-wide
+        - max_concurrency_per_organization (int): Jobs of this type running at once per organization
+
+    Execution Fields:
+        - execution_mode (str): "Thread" (default) or "Process" for a killable child process
+        - max_memory_mb (int): Resident memory limit of the handler process (Process mode only)
+
+    Metrics Fields:
+        - metrics_sample_rate (float): Share of successful jobs kept as execution time samples
+
+    Retention Fields:
+        - retention_days (int): Days finished jobs are kept (0 or empty: site default)
     """
 
     def validate(self):
@@ -31,6 +46,10 @@ class JobType(Document):
         self.validate_timeout()
         self.validate_max_retries()
         self.validate_rate_limit()
+        self.validate_concurrency()
+        self.validate_max_memory()
+        self.validate_metrics_sample_rate()
+        self.validate_retention_days()
 
     def validate_handler_method(self):
         """Ensure handler method path is valid Python dotted path."""
@@ -169,6 +188,43 @@ class JobType(Document):
         if self.rate_limit is not None and self.rate_limit != 0 and self.rate_limit > 10000:
             frappe.throw(_("Rate limit cannot exceed 10,000 jobs per window"))
 
+    def validate_concurrency(self):
+        """Ensure concurrency limits are not negative."""
+        for fieldname in ("max_concurrency", "max_concurrency_per_organization"):
+            if self.get(fieldname) is not None and self.get(fieldname) < 0:
+                frappe.throw(
+                    _("{0} cannot be negative. Use 0 or leave empty for no limit.").format(
+                        _(self.meta.get_label(fieldname))
+                    )
+                )
+
+    def validate_max_memory(self):
+        """Ensure the memory limit is not negative."""
+        if self.max_memory_mb is not None and self.max_memory_mb < 0:
+            frappe.throw(_("Max memory cannot be negative. Use 0 or leave empty for no limit."))
+
+    def validate_metrics_sample_rate(self):
+        """Ensure the sample rate is a fraction."""
+        if self.metrics_sample_rate is not None and not 0 <= self.metrics_sample_rate <= 1:
+            frappe.throw(_("Metrics sample rate must be between 0 and 1"))
+
+    def validate_retention_days(self):
+        """Ensure retention period is non-negative."""
+        if self.retention_days is not None and self.retention_days < 0:
+            frappe.throw(_("Retention days cannot be negative"))
+
+    def on_update(self):
+        """Reload Job Type configuration in every worker."""
+        from dartwing.dartwing_core.background_jobs import registry
+
+        registry.invalidate()
+
+    def on_trash(self):
+        """Forget the deleted Job Type in every worker."""
+        from dartwing.dartwing_core.background_jobs import registry
+
+        registry.invalidate()
+
     def before_delete(self):
         """Prevent deletion if jobs reference this type."""
         jobs_count = frappe.db.count("Background Job", {"job_type": self.name})
@@ -184,6 +240,9 @@ def get_handler(job_type: str):
     """
     Get the handler function for a job type.
 
+    Resolved through the in-process Job Type registry (see
+    background_jobs/registry.py), so repeated calls do no queries.
+
     Args:
         job_type: Job type name
 
@@ -196,26 +255,9 @@ def get_handler(job_type: str):
         AttributeError: If handler function not found
         frappe.ValidationError: If handler_method format is invalid
     """
-    job_type_doc = frappe.get_doc("Job Type", job_type)
-
-    if not job_type_doc.is_enabled:
-        frappe.throw(_("Job Type '{0}' is disabled").format(job_type))
-
-    handler_path = job_type_doc.handler_method
-
-    # Defensive validation: ensure handler_method contains at least one dot
-    # While validate_handler_method() should prevent this, the Job Type could
-    # be modified directly in the database, bypassing validation
-    if "." not in handler_path:
-        frappe.throw(
-            _("Invalid handler method format for Job Type '{0}': '{1}'. "
-              "Expected format: 'module.function'").format(job_type, handler_path)
-        )
+    from dartwing.dartwing_core.background_jobs.registry import get_handler as registry_get_handler
 
-    module_path, func_name = handler_path.rsplit(".", 1)
-
-    module = frappe.get_module(module_path)
-    return getattr(module, func_name)
+    return registry_get_handler(job_type)
 
 
 def get_timeout_handler(job_type: str):
@@ -234,20 +276,8 @@ def get_timeout_handler(job_type: str):
         AttributeError: If timeout handler function not found
         frappe.ValidationError: If timeout_handler_method format is invalid
     """
-    job_type_doc = frappe.get_doc("Job Type", job_type)
-
-    if not job_type_doc.timeout_handler_method:
-        return None
-
-    handler_path = job_type_doc.timeout_handler_method
-
-    if "." not in handler_path:
-        frappe.throw(
-            _("Invalid timeout handler method format for Job Type '{0}': '{1}'. "
-              "Expected format: 'module.function'").format(job_type, handler_path)
-        )
-
-    module_path, func_name = handler_path.rsplit(".", 1)
+    from dartwing.dartwing_core.background_jobs.registry import (
+        get_timeout_handler as registry_get_timeout_handler,
+    )
 
-    module = frappe.get_module(module_path)
-    return getattr(module, func_name)
+    return registry_get_timeout_handler(job_type)
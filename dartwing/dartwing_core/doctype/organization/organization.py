@@ -139,6 +139,7 @@ class Organization(Document):
         self._validate_org_name()
         self._validate_org_type()
         self._validate_org_type_immutability()
+        self._validate_max_concurrent_jobs()
         self._set_defaults()
 
         # Validate link integrity for existing records (Issue #12)
@@ -172,6 +173,13 @@ class Organization(Document):
         if not self.is_new() and self.has_value_changed("org_type"):
             frappe.throw(_("Organization type cannot be changed after creation"))
 
+    def _validate_max_concurrent_jobs(self) -> None:
+        """Ensure the background job concurrency override is not negative."""
+        if self.max_concurrent_jobs and self.max_concurrent_jobs < 0:
+            frappe.throw(
+                _("Max Concurrent Background Jobs cannot be negative. Use 0 or leave empty for the site default.")
+            )
+
     def _set_defaults(self) -> None:
         """Set default values."""
         if not self.status:
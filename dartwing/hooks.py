@@ -203,10 +203,19 @@ scheduler_events = {
 	"cron": {
 		# Process retry queue every minute
 		"* * * * *": [
+			"dartwing.dartwing_core.background_jobs.scheduler.drain_delay_queue",
 			"dartwing.dartwing_core.background_jobs.scheduler.process_retry_queue",
 			"dartwing.dartwing_core.background_jobs.scheduler.process_dependent_jobs",
+			"dartwing.dartwing_core.background_jobs.scheduler.requeue_orphaned_async_jobs",
+			"dartwing.dartwing_core.background_jobs.scheduler.flush_metrics",
+		],
+		"*/5 * * * *": [
+			"dartwing.dartwing_core.background_jobs.scheduler.redispatch_lost_jobs",
 		],
 	},
+	"hourly": [
+		"dartwing.dartwing_core.background_jobs.scheduler.compact_status_rollups",
+	],
 	"daily": [
 		"dartwing.dartwing_core.background_jobs.cleanup.daily_cleanup",
 	],
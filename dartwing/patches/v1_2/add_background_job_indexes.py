@@ -0,0 +1,7 @@
+def execute():
+    """Create the composite indexes of the Background Job Engine's hot queries on existing sites."""
+    from dartwing.dartwing_core.doctype.background_job import background_job
+    from dartwing.dartwing_core.doctype.background_job_dependency import background_job_dependency
+
+    background_job.on_doctype_update()
+    background_job_dependency.on_doctype_update()
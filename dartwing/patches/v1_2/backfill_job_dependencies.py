@@ -0,0 +1,40 @@
+import frappe
+
+
+def execute():
+    """Move single-parent job dependencies to Background Job Dependency.
+
+    Jobs submitted before the dependency graph only have the depends_on field.
+    Each of them gets a dependency edge, and jobs the executor deferred while
+    their parent was still running (Queued with a next_retry_at but no longer
+    in RQ) go back to Pending so they are released when the parent completes.
+    """
+    if not frappe.db.table_exists("Background Job Dependency"):
+        return
+
+    frappe.db.sql(
+        """
+        INSERT INTO `tabBackground Job Dependency`
+            (name, owner, creation, modified, modified_by, docstatus,
+             background_job, depends_on, organization)
+        SELECT SUBSTRING(MD5(CONCAT(bj.name, ':', bj.depends_on)), 1, 10),
+            'Administrator', NOW(), NOW(), 'Administrator', 0,
+            bj.name, bj.depends_on, bj.organization
+        FROM `tabBackground Job` bj
+        WHERE IFNULL(bj.depends_on, '') != ''
+        AND NOT EXISTS (
+            SELECT 1 FROM `tabBackground Job Dependency` d
+            WHERE d.background_job = bj.name
+        )
+        """
+    )
+
+    frappe.db.sql(
+        """
+        UPDATE `tabBackground Job`
+        SET status = 'Pending', next_retry_at = NULL
+        WHERE status = 'Queued'
+        AND IFNULL(depends_on, '') != ''
+        AND next_retry_at IS NOT NULL
+        """
+    )
@@ -0,0 +1,5 @@
+def execute():
+    """Build the job status rollups read by get_metrics from the existing jobs."""
+    from dartwing.dartwing_core.background_jobs.status_rollup import rebuild
+
+    rebuild()
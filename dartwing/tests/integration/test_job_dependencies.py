@@ -0,0 +1,143 @@
+"""
+Integration tests for job dependencies (multi-parent DAG).
+"""
+
+import unittest
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestJobDependencies(FrappeTestCase):
+    """Test dependency release and failure cascading."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures."""
+        super().setUpClass()
+
+        if not frappe.db.exists("Organization", "TEST-ORG-001"):
+            org = frappe.new_doc("Organization")
+            org.organization_name = "Test Organization"
+            org.status = "Active"
+            org.insert(ignore_permissions=True)
+            cls.test_org = org.name
+        else:
+            cls.test_org = "TEST-ORG-001"
+
+        if not frappe.db.exists("Job Type", "test_dependency_job"):
+            job_type = frappe.new_doc("Job Type")
+            job_type.type_name = "test_dependency_job"
+            job_type.display_name = "Test Dependency Job"
+            job_type.handler_method = "dartwing.dartwing_core.background_jobs.samples.execute_echo_job"
+            job_type.default_timeout = 60
+            job_type.deduplication_window = 0
+            job_type.is_enabled = 1
+            job_type.insert(ignore_permissions=True)
+
+        frappe.db.commit()
+
+    def setUp(self):
+        """Set up each test."""
+        jobs = frappe.get_all("Background Job", filters={"job_type": "test_dependency_job"}, pluck="name")
+        if jobs:
+            frappe.db.delete("Background Job Dependency", {"background_job": ("in", jobs)})
+        frappe.db.delete("Background Job", {"job_type": "test_dependency_job"})
+        frappe.db.commit()
+
+    def _submit(self, role, depends_on=None):
+        from dartwing.dartwing_core.background_jobs import submit_job
+
+        return submit_job(
+            job_type="test_dependency_job",
+            organization=self.test_org,
+            parameters={"role": role},
+            depends_on=depends_on,
+        )
+
+    def _complete(self, job_id):
+        frappe.db.set_value("Background Job", job_id, "status", "Completed")
+
+    def test_child_with_unmet_parents_stays_pending(self):
+        """A child is not enqueued while any parent is unfinished."""
+        parent_a = self._submit("a")
+        parent_b = self._submit("b")
+
+        child = self._submit("child", depends_on=[parent_a.name, parent_b.name])
+
+        self.assertEqual(child.status, "Pending")
+        self.assertEqual(child.depends_on, parent_a.name)
+        edges = frappe.get_all(
+            "Background Job Dependency",
+            filters={"background_job": child.name},
+            pluck="depends_on",
+        )
+        self.assertEqual(set(edges), {parent_a.name, parent_b.name})
+
+    def test_child_released_when_last_parent_completes(self):
+        """release_dependents enqueues the child only after all parents complete."""
+        from dartwing.dartwing_core.background_jobs.dependencies import release_dependents
+
+        parent_a = self._submit("a")
+        parent_b = self._submit("b")
+        child = self._submit("child", depends_on=[parent_a.name, parent_b.name])
+
+        self._complete(parent_a.name)
+        self.assertEqual(release_dependents(parent_a.name), [])
+        self.assertEqual(frappe.db.get_value("Background Job", child.name, "status"), "Pending")
+
+        self._complete(parent_b.name)
+        self.assertEqual(release_dependents(parent_b.name), [child.name])
+        self.assertEqual(frappe.db.get_value("Background Job", child.name, "status"), "Queued")
+
+    def test_child_of_completed_parents_is_enqueued(self):
+        """A child whose parents already completed is enqueued on submit."""
+        parent = self._submit("parent")
+        self._complete(parent.name)
+
+        child = self._submit("child", depends_on=parent.name)
+
+        self.assertEqual(child.status, "Queued")
+
+    def test_dead_letter_cascades_to_descendants(self):
+        """A dead-lettered parent dead-letters children and grandchildren."""
+        parent = self._submit("parent")
+        child = self._submit("child", depends_on=parent.name)
+        grandchild = self._submit("grandchild", depends_on=child.name)
+
+        parent.reload()
+        parent.status = "Dead Letter"
+        parent.save(ignore_permissions=True)
+
+        self.assertEqual(frappe.db.get_value("Background Job", child.name, "status"), "Dead Letter")
+        self.assertEqual(frappe.db.get_value("Background Job", grandchild.name, "status"), "Dead Letter")
+
+    def test_cancel_cascades_to_descendants(self):
+        """Canceling a parent cancels jobs waiting on it."""
+        from dartwing.dartwing_core.background_jobs import cancel_job
+
+        parent = self._submit("parent")
+        child = self._submit("child", depends_on=parent.name)
+
+        cancel_job(parent.name)
+
+        self.assertEqual(frappe.db.get_value("Background Job", child.name, "status"), "Canceled")
+
+    def test_unknown_parent_rejected(self):
+        """Depending on a job that does not exist is a validation error."""
+        with self.assertRaises(frappe.ValidationError):
+            self._submit("child", depends_on=["JOB-0000-99999"])
+
+    def test_scheduler_safety_net_releases_ready_jobs(self):
+        """The minutely scan releases children whose release was missed."""
+        from dartwing.dartwing_core.background_jobs.dependencies import release_ready_jobs
+
+        parent = self._submit("parent")
+        child = self._submit("child", depends_on=parent.name)
+        self._complete(parent.name)
+
+        self.assertIn(child.name, release_ready_jobs())
+        self.assertEqual(frappe.db.get_value("Background Job", child.name, "status"), "Queued")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Query plan tests for the Background Job Engine.
+
+Seeds a few thousand jobs with execution logs and dependency edges, runs the
+engine's read paths while recording every SELECT they issue, and EXPLAINs
+each one: none may scan a whole seeded table.
+"""
+
+import re
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime
+
+PREFIX = "QPLAN"
+ORGANIZATIONS = [f"{PREFIX}-ORG-{i:02d}" for i in range(20)]
+JOB_TYPES = [f"{PREFIX}_job_type_{i}" for i in range(5)]
+JOB_COUNT = 4000
+
+# Full table or full index scans estimated at this many rows or more fail
+FULL_SCAN_MIN_ROWS = 500
+
+_FULL_SCAN_TYPES = ("ALL", "index")
+
+
+def _status_of(i: int) -> str:
+    if i % 40 == 0:
+        return "Failed"
+    if i % 40 == 1:
+        return "Dead Letter"
+    if i % 40 == 2:
+        return "Pending"
+    if i % 40 == 3:
+        return "Running"
+    return "Completed"
+
+
+class TestJobQueryPlans(FrappeTestCase):
+    """EXPLAIN the engine's queries against a seeded dataset."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from dartwing.dartwing_core.background_jobs.execution_log import LOG_FIELDS
+        from dartwing.dartwing_core.doctype.background_job import background_job
+        from dartwing.dartwing_core.doctype.background_job_dependency import background_job_dependency
+
+        background_job.on_doctype_update()
+        background_job_dependency.on_doctype_update()
+
+        cls._delete_seed()
+        now = now_datetime()
+        user = "Administrator"
+
+        jobs, logs, edges = [], [], []
+        for i in range(JOB_COUNT):
+            name = f"{PREFIX}-{i:06d}"
+            status = _status_of(i)
+            created = add_to_date(now, minutes=-i)
+            jobs.append((
+                name, user, created, created, user, 0,
+                JOB_TYPES[i % len(JOB_TYPES)], ORGANIZATIONS[i % len(ORGANIZATIONS)], user,
+                status, "Normal", f"{PREFIX}-BATCH-{i // 100}", created,
+                created if status in ("Completed", "Dead Letter") else None,
+                add_to_date(now, hours=1) if status == "Failed" else None,
+            ))
+            for to_status in ("Pending", status):
+                logs.append((
+                    frappe.generate_hash(length=10), user, created, created, user, 0,
+                    name, ORGANIZATIONS[i % len(ORGANIZATIONS)], None, to_status,
+                    created, user, "seeded", None,
+                ))
+            if status == "Pending":
+                # Waits for the Running job next to it
+                edges.append((
+                    frappe.generate_hash(length=10), user, created, created, user, 0,
+                    name, f"{PREFIX}-{i + 1:06d}", ORGANIZATIONS[i % len(ORGANIZATIONS)],
+                ))
+
+        frappe.db.bulk_insert(
+            "Background Job",
+            [
+                "name", "owner", "creation", "modified", "modified_by", "docstatus",
+                "job_type", "organization", "owner_user", "status", "priority", "batch_id",
+                "created_at", "completed_at", "next_retry_at",
+            ],
+            jobs,
+        )
+        frappe.db.bulk_insert("Job Execution Log", LOG_FIELDS, logs)
+        frappe.db.bulk_insert(
+            "Background Job Dependency",
+            ["name", "owner", "creation", "modified", "modified_by", "docstatus",
+             "background_job", "depends_on", "organization"],
+            edges,
+        )
+        frappe.db.commit()
+
+        for doctype in ("Background Job", "Job Execution Log", "Background Job Dependency"):
+            frappe.db.sql(f"ANALYZE TABLE `tab{doctype}`")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._delete_seed()
+        frappe.db.commit()
+        super().tearDownClass()
+
+    @classmethod
+    def _delete_seed(cls):
+        frappe.db.sql("DELETE FROM `tabJob Execution Log` WHERE background_job LIKE %s", (f"{PREFIX}-%",))
+        frappe.db.sql("DELETE FROM `tabBackground Job Dependency` WHERE background_job LIKE %s", (f"{PREFIX}-%",))
+        frappe.db.sql("DELETE FROM `tabBackground Job` WHERE name LIKE %s", (f"{PREFIX}-%",))
+
+    def _capture(self, fn, *args, **kwargs) -> list:
+        """Run fn and return the SELECTs it issued."""
+        sql = frappe.db.sql
+        captured = []
+
+        def record(query, values=(), *sql_args, **sql_kwargs):
+            if str(query).lstrip().upper().startswith("SELECT"):
+                captured.append((str(query), values))
+            return sql(query, values, *sql_args, **sql_kwargs)
+
+        with patch.object(frappe.db, "sql", side_effect=record):
+            fn(*args, **kwargs)
+
+        self.assertTrue(captured, f"{fn.__name__} issued no SELECT")
+        return captured
+
+    def assertNoFullScans(self, fn, *args, **kwargs):
+        for query, values in self._capture(fn, *args, **kwargs):
+            query = re.sub(r"\s+FOR\s+UPDATE\s*$", "", query.strip(), flags=re.IGNORECASE)
+            for row in frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True):
+                if row.type in _FULL_SCAN_TYPES and (row.rows or 0) >= FULL_SCAN_MIN_ROWS:
+                    self.fail(
+                        f"{fn.__name__} scans all of {row.table} ({row.rows} rows):\n{query}\n{row}"
+                    )
+
+    def test_indexes_exist(self):
+        from dartwing.dartwing_core.doctype.background_job.background_job import INDEXES
+
+        columns = {}
+        for row in frappe.db.sql("SHOW INDEX FROM `tabBackground Job`", as_dict=True):
+            columns.setdefault(row.Key_name, []).append(row.Column_name)
+        for fields in INDEXES:
+            self.assertIn(fields, list(columns.values()))
+
+    def test_retry_scan(self):
+        from dartwing.dartwing_core.background_jobs.retry import process_retry_queue
+
+        self.assertNoFullScans(process_retry_queue)
+
+    def test_list_jobs(self):
+        from dartwing.dartwing_core.background_jobs.engine import list_jobs
+
+        self.assertNoFullScans(list_jobs, organization=ORGANIZATIONS[3])
+        self.assertNoFullScans(list_jobs, organization=ORGANIZATIONS[3], status="Completed")
+
+    def test_dead_letter_list(self):
+        from dartwing.dartwing_core.background_jobs.dead_letter import get_dead_letter_jobs
+
+        self.assertNoFullScans(get_dead_letter_jobs)
+        self.assertNoFullScans(get_dead_letter_jobs, organization=ORGANIZATIONS[1])
+
+    def test_batch_status(self):
+        from dartwing.dartwing_core.background_jobs.engine import get_batch_status
+
+        self.assertNoFullScans(get_batch_status, f"{PREFIX}-BATCH-7")
+
+    def test_job_history(self):
+        from dartwing.dartwing_core.background_jobs.engine import get_job_history
+
+        self.assertNoFullScans(get_job_history, f"{PREFIX}-000042")
+
+    def test_dependency_scans(self):
+        from dartwing.dartwing_core.background_jobs import dependencies
+
+        # QPLAN-000002 is Pending on the Running QPLAN-000003: nothing is released
+        self.assertNoFullScans(dependencies.get_parent_state, f"{PREFIX}-000002")
+        self.assertNoFullScans(dependencies.release_dependents, f"{PREFIX}-000003")
+        self.assertNoFullScans(dependencies.release_ready_jobs)
+
+    def test_dispatch_safety_net_scan(self):
+        from dartwing.dartwing_core.background_jobs.dispatch import redispatch_lost_jobs
+
+        self.assertNoFullScans(redispatch_lost_jobs)
+
+    def test_retention_scan(self):
+        from dartwing.dartwing_core.background_jobs import cleanup
+
+        # Cutoffs far in the past: the queries run, nothing is deleted
+        with patch.object(cleanup, "METRICS_SAMPLE_RETENTION_DAYS", 36500), \
+                patch.object(cleanup, "METRICS_ROLLUP_RETENTION_DAYS", 36500):
+            self.assertNoFullScans(cleanup.run_retention, default_retention_days=36500)
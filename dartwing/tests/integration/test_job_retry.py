@@ -67,6 +67,27 @@ class TestJobRetry(FrappeTestCase):
         self.assertEqual(job.retry_count, 1)
         self.assertIsNotNone(job.next_retry_at)
 
+    def test_schedule_retry_adds_delay_queue_entry(self):
+        """Scheduled retry should be due in the delay queue at next_retry_at."""
+        from dartwing.dartwing_core.background_jobs import delay_queue
+        from dartwing.dartwing_core.background_jobs.retry import schedule_retry
+
+        job = frappe.new_doc("Background Job")
+        job.job_type = "test_retry_job"
+        job.organization = self.test_org
+        job.owner_user = frappe.session.user
+        job.status = "Failed"
+        job.retry_count = 0
+        job.max_retries = 3
+        job.insert(ignore_permissions=True)
+        frappe.db.commit()
+
+        schedule_retry(job.name)
+
+        due_at = frappe.cache().zscore(delay_queue._queue_key(), f"retry:{job.name}")
+        self.assertIsNotNone(due_at)
+        delay_queue.unschedule("retry", job.name)
+
     def test_exhausted_retries_moves_to_dead_letter(self):
         """Job that exhausts retries should move to dead letter."""
         from dartwing.dartwing_core.background_jobs.retry import schedule_retry
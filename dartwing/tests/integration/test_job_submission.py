@@ -262,5 +262,123 @@ class TestGetJobStatus(FrappeTestCase):
         self.assertIn("created_at", status)
 
 
+class TestBatchSubmission(FrappeTestCase):
+    """Integration tests for batch job submission."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures."""
+        super().setUpClass()
+
+        if not frappe.db.exists("Organization", "TEST-ORG-001"):
+            org = frappe.new_doc("Organization")
+            org.organization_name = "Test Organization"
+            org.status = "Active"
+            org.insert(ignore_permissions=True)
+            cls.test_org = org.name
+        else:
+            cls.test_org = "TEST-ORG-001"
+
+        if not frappe.db.exists("Job Type", "test_batch_job"):
+            job_type = frappe.new_doc("Job Type")
+            job_type.type_name = "test_batch_job"
+            job_type.display_name = "Test Batch Job"
+            job_type.handler_method = "dartwing.dartwing_core.background_jobs.samples.execute_echo_job"
+            job_type.default_timeout = 60
+            job_type.default_priority = "Normal"
+            job_type.max_retries = 2
+            job_type.deduplication_window = 5
+            job_type.is_enabled = 1
+            job_type.insert(ignore_permissions=True)
+
+        frappe.db.commit()
+
+    def setUp(self):
+        """Set up each test."""
+        frappe.db.delete("Background Job", {"job_type": "test_batch_job"})
+        frappe.db.commit()
+
+    def test_batch_creates_queued_jobs(self):
+        """Every job in a batch should be created in Queued status with the batch id."""
+        from dartwing.dartwing_core.background_jobs.engine import submit_jobs_batch
+
+        result = submit_jobs_batch(
+            job_type="test_batch_job",
+            organization=self.test_org,
+            parameters_list=[{"member": i} for i in range(5)],
+        )
+
+        self.assertEqual(len(result["job_ids"]), 5)
+        self.assertEqual(len(set(result["job_ids"])), 5)
+        jobs = frappe.get_all(
+            "Background Job",
+            filters={"batch_id": result["batch_id"]},
+            fields=["name", "status", "max_retries", "timeout_seconds"],
+        )
+        self.assertEqual(len(jobs), 5)
+        for job in jobs:
+            self.assertTrue(job.name.startswith("JOB-"))
+            self.assertEqual(job.status, "Queued")
+            self.assertEqual(job.max_retries, 2)
+            self.assertEqual(job.timeout_seconds, 60)
+
+    def test_batch_writes_execution_log(self):
+        """Batch jobs should get the same creation history as single submissions."""
+        from dartwing.dartwing_core.background_jobs.engine import submit_jobs_batch
+
+        result = submit_jobs_batch(
+            job_type="test_batch_job",
+            organization=self.test_org,
+            parameters_list=[{"member": "log"}],
+        )
+
+        logs = frappe.get_all(
+            "Job Execution Log",
+            filters={"background_job": result["job_ids"][0]},
+            pluck="to_status",
+        )
+        self.assertEqual(sorted(logs), ["Pending", "Queued"])
+
+    def test_batch_skips_duplicates(self):
+        """Duplicates within the batch and against existing jobs should be skipped."""
+        from dartwing.dartwing_core.background_jobs.engine import submit_jobs_batch
+
+        first = submit_jobs_batch(
+            job_type="test_batch_job",
+            organization=self.test_org,
+            parameters_list=[{"member": 1}],
+        )
+        second = submit_jobs_batch(
+            job_type="test_batch_job",
+            organization=self.test_org,
+            parameters_list=[{"member": 1}, {"member": 2}, {"member": 2}],
+        )
+
+        self.assertEqual(len(second["job_ids"]), 1)
+        self.assertEqual(
+            second["duplicates"],
+            [
+                {"index": 0, "existing_job": first["job_ids"][0]},
+                {"index": 2, "existing_job": second["job_ids"][0]},
+            ],
+        )
+
+    def test_batch_status_aggregates_jobs(self):
+        """Batch status should aggregate counts and progress of all jobs."""
+        from dartwing.dartwing_core.background_jobs.engine import get_batch_status, submit_jobs_batch
+
+        result = submit_jobs_batch(
+            job_type="test_batch_job",
+            organization=self.test_org,
+            parameters_list=[{"member": i} for i in range(3)],
+        )
+
+        status = get_batch_status(result["batch_id"])
+
+        self.assertEqual(status["total"], 3)
+        self.assertEqual(status["job_count_by_status"], {"Queued": 3})
+        self.assertFalse(status["is_finished"])
+
+
 if __name__ == "__main__":
     unittest.main()
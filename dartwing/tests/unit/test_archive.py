@@ -0,0 +1,158 @@
+"""
+Unit tests for the cold job archive.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+def _job(name, organization, modified):
+    return frappe._dict(
+        name=name, organization=organization, job_type="report", status="Completed",
+        priority="Normal", creation=modified, modified=modified,
+    )
+
+
+class TestArchive(unittest.TestCase):
+    """Test archive files, indexes and lookups."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import archive
+
+        self.archive = archive
+        self.site_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.site_dir, ignore_errors=True)
+        self.jobs = []
+        self.db = MagicMock()
+        self.db.sql.side_effect = self._sql
+        hashes = (f"h{i:07d}" for i in range(1000))
+        for patcher in (
+            patch.object(
+                archive.frappe, "get_site_path",
+                side_effect=lambda *parts: os.path.join(self.site_dir, *parts), create=True,
+            ),
+            patch.object(archive.frappe, "db", self.db, create=True),
+            patch.object(archive.frappe, "generate_hash", side_effect=lambda length: next(hashes), create=True),
+            patch.object(archive, "JOB_ARCHIVE_BLOCK_SIZE", 2),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _sql(self, query, values=None, as_dict=False):
+        names = values["names"]
+        if "`tabBackground Job`" in query:
+            return [job for job in self.jobs if job.name in names]
+        if "`tabJob Execution Log`" in query:
+            return [
+                frappe._dict(background_job=name, from_status="Running", to_status="Completed",
+                             timestamp=datetime(2026, 1, 5, 10), actor="a@example.com",
+                             message="done", retry_attempt=None)
+                for name in names
+            ]
+        return [frappe._dict(background_job=names[-1], depends_on=names[0])]
+
+    def _archive(self, jobs):
+        self.jobs = jobs
+        return self.archive.archive_jobs([job.name for job in jobs])
+
+    def test_jobs_partitioned_by_day_with_index(self):
+        count = self._archive([
+            _job("JOB-2026-00001", "ORG-1", datetime(2026, 1, 5, 10)),
+            _job("JOB-2026-00002", "ORG-2", datetime(2026, 1, 5, 11)),
+            _job("JOB-2026-00003", "ORG-1", datetime(2026, 1, 5, 12)),
+            _job("JOB-2026-00004", "ORG-1", datetime(2026, 1, 6, 9)),
+        ])
+
+        self.assertEqual(count, 4)
+        bases = list(self.archive._iter_archives())
+        self.assertEqual(len(bases), 2)
+        self.assertIn(os.path.join("2026", "01", "05"), bases[0])
+
+        index = self.archive._load_index(bases[0])
+        self.assertEqual(index["count"], 3)
+        self.assertEqual(len(index["blocks"]), 2)
+        self.assertEqual(index["organizations"], {"ORG-1": [0, 1], "ORG-2": [0]})
+
+        # Gzip members concatenate to one ordinary .jsonl.gz file
+        with gzip.open(bases[0] + self.archive.DATA_SUFFIX, "rt") as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+    def test_lookup_by_id_reads_one_block(self):
+        self._archive([
+            _job(f"JOB-2026-{i:05d}", "ORG-1", datetime(2026, 1, 5, 10)) for i in range(1, 6)
+        ])
+
+        with patch.object(self.archive.gzip, "decompress", wraps=gzip.decompress) as decompress:
+            record = self.archive.get_archived_job("JOB-2026-00003")
+
+        decompress.assert_called_once()
+        self.assertEqual(record["job"]["name"], "JOB-2026-00003")
+        self.assertEqual(record["logs"][0]["to_status"], "Completed")
+        self.assertEqual(record["logs"][0]["timestamp"], "2026-01-05 10:00:00")
+        self.assertIsNone(self.archive.get_archived_job("JOB-2026-09999"))
+
+    def test_lookup_by_id_opens_only_candidate_indexes(self):
+        for start in range(1, 10, 3):
+            self._archive([
+                _job(f"JOB-2026-{i:05d}", "ORG-1", datetime(2026, 1, 5, 10)) for i in range(start, start + 3)
+            ])
+
+        with patch.object(self.archive, "_load_index", wraps=self.archive._load_index) as load_index:
+            record = self.archive.get_archived_job("JOB-2026-00005")
+            self.assertIsNone(self.archive.get_archived_job("JOB-2026-09999"))
+
+        self.assertEqual(record["job"]["name"], "JOB-2026-00005")
+        load_index.assert_called_once()
+        self.assertIn("h0000001", load_index.call_args[0][0])
+
+    def test_lookup_falls_back_to_index_without_manifest(self):
+        self._archive([_job("JOB-2026-00001", "ORG-1", datetime(2026, 1, 5, 10))])
+        base = next(self.archive._iter_archives())
+        os.remove(os.path.join(os.path.dirname(base), self.archive.MANIFEST_FILE))
+
+        self.assertEqual(self.archive.get_archived_job("JOB-2026-00001")["job"]["name"], "JOB-2026-00001")
+        self.assertIsNone(self.archive.get_archived_job("JOB-2026-00002"))
+
+    def test_filter_by_organization_and_date(self):
+        self._archive([
+            _job("JOB-2026-00001", "ORG-1", datetime(2026, 1, 5, 10)),
+            _job("JOB-2026-00002", "ORG-2", datetime(2026, 1, 5, 11)),
+            _job("JOB-2026-00003", "ORG-1", datetime(2026, 2, 1, 9)),
+        ])
+
+        names = [job["name"] for job in self.archive.find_archived_jobs(organization="ORG-1")]
+        self.assertEqual(names, ["JOB-2026-00001", "JOB-2026-00003"])
+
+        names = [
+            job["name"]
+            for job in self.archive.find_archived_jobs(from_date="2026-01-01", to_date="2026-01-31")
+        ]
+        self.assertEqual(names, ["JOB-2026-00001", "JOB-2026-00002"])
+
+    def test_rearchived_job_returns_latest_copy(self):
+        job = _job("JOB-2026-00001", "ORG-1", datetime(2026, 1, 5, 10))
+        self._archive([job])
+        job = _job("JOB-2026-00001", "ORG-1", datetime(2026, 1, 5, 10))
+        job["status"] = "Dead Letter"
+        self._archive([job])
+
+        self.assertEqual(self.archive.get_archived_job("JOB-2026-00001")["job"]["status"], "Dead Letter")
+        self.assertEqual(len(self.archive.find_archived_jobs()), 1)
+
+    def test_files_without_index_are_ignored(self):
+        self._archive([_job("JOB-2026-00001", "ORG-1", datetime(2026, 1, 5, 10))])
+        base = next(self.archive._iter_archives())
+        os.remove(base + self.archive.INDEX_SUFFIX)
+
+        self.assertIsNone(self.archive.get_archived_job("JOB-2026-00001"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Unit tests for the job artifact store.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+
+class TestArtifacts(unittest.TestCase):
+    """Test chunked storage, range reads and Range header parsing."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import artifacts
+
+        self.artifacts = artifacts
+        self.site_dir = tempfile.mkdtemp()
+        patcher = patch.object(
+            artifacts.frappe,
+            "get_site_path",
+            side_effect=lambda *parts: os.path.join(self.site_dir, *parts),
+            create=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.site_dir, ignore_errors=True)
+
+        chunk_patcher = patch.object(artifacts, "ARTIFACT_CHUNK_SIZE", 10)
+        chunk_patcher.start()
+        self.addCleanup(chunk_patcher.stop)
+
+    def test_streamed_artifact_is_chunked_and_round_trips(self):
+        data = b"".join(f"row-{i};".encode() for i in range(20))
+
+        with self.artifacts.ArtifactWriter("JOB-2026-00001", "export.csv", "text/csv") as writer:
+            for offset in range(0, len(data), 7):
+                writer.write(data[offset:offset + 7])
+
+        manifest = writer.manifest
+        self.assertEqual(manifest["size"], len(data))
+        self.assertEqual(len(manifest["chunks"]), -(-len(data) // 10))
+        self.assertEqual(self.artifacts.read_artifact("JOB-2026-00001", "export.csv"), data)
+
+    def test_range_read_spans_chunk_boundaries(self):
+        data = bytes(range(256)) * 2
+        manifest = self.artifacts.write_artifact("JOB-2026-00001", "blob.bin", data)
+
+        for start, end in [(0, 0), (5, 24), (9, 10), (500, 511)]:
+            got = b"".join(self.artifacts.iter_range("JOB-2026-00001", manifest, start, end))
+            self.assertEqual(got, data[start:end + 1])
+
+    def test_failed_write_leaves_no_artifact(self):
+        with self.assertRaises(RuntimeError):
+            with self.artifacts.ArtifactWriter("JOB-2026-00001", "partial.txt") as writer:
+                writer.write("some data")
+                raise RuntimeError("handler failed")
+
+        self.assertIsNone(self.artifacts.get_manifest("JOB-2026-00001", "partial.txt"))
+        self.assertEqual(os.listdir(self.artifacts.get_job_dir("JOB-2026-00001")), [])
+
+    def test_invalid_names_rejected(self):
+        for name in ["../secret", "a/b", ".hidden", ""]:
+            with self.assertRaises(self.artifacts.frappe.ValidationError):
+                self.artifacts.validate_name(name)
+
+    def test_delete_artifacts(self):
+        self.artifacts.write_artifact("JOB-2026-00001", "out.json", "{}")
+        self.artifacts.delete_artifacts("JOB-2026-00001")
+
+        self.assertEqual(self.artifacts.list_artifacts("JOB-2026-00001"), [])
+
+
+class TestParseRange(unittest.TestCase):
+    """Test HTTP Range header parsing."""
+
+    def test_ranges(self):
+        from dartwing.dartwing_core.background_jobs.artifacts import parse_range
+
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertEqual(parse_range("bytes=10-19", 100), (10, 19))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=90-500", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-30", 100), (70, 99))
+
+    def test_unsatisfiable(self):
+        from dartwing.dartwing_core.background_jobs.artifacts import parse_range
+
+        with self.assertRaises(ValueError):
+            parse_range("bytes=100-", 100)
+        with self.assertRaises(ValueError):
+            parse_range("bytes=20-10", 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Unit tests for asyncio handler support.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class TestAsyncRun(unittest.TestCase):
+    """Test running async handlers on the worker event loop."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import async_runner
+        from dartwing.dartwing_core.background_jobs.progress import JobContext
+
+        self.async_runner = async_runner
+        self.db = MagicMock()
+        patcher = patch.object(async_runner.frappe, "db", self.db, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.context = JobContext(job_id="JOB-1", job_type="async", organization="ORG-1")
+
+    def test_returns_handler_result(self):
+        async def handler(context):
+            await asyncio.sleep(0)
+            return {"output_reference": context.job_id}
+
+        result = self.async_runner.run(handler, self.context, 5)
+
+        self.assertEqual(result, {"output_reference": "JOB-1"})
+        self.assertIsNone(self.context._bridge)
+
+    def test_blocking_calls_run_on_job_thread_and_commit(self):
+        threads = []
+
+        async def handler(context):
+            return await context.call(lambda: threads.append(threading.current_thread()) or "ok")
+
+        self.assertEqual(self.async_runner.run(handler, self.context, 5), "ok")
+        self.assertEqual(threads, [threading.current_thread()])
+        self.assertGreaterEqual(self.db.commit.call_count, 2)
+
+    def test_progress_reported_through_job_thread(self):
+        async def handler(context):
+            await context.update_progress_async(40, "Waiting")
+
+        with patch.object(type(self.context), "update_progress") as update_progress:
+            self.async_runner.run(handler, self.context, 5)
+
+        update_progress.assert_called_once_with(40, "Waiting", False)
+
+    def test_handler_error_propagates(self):
+        from dartwing.dartwing_core.background_jobs.errors import PermanentError
+
+        async def handler(context):
+            await context.call(lambda: None)
+            raise PermanentError("bad input")
+
+        with self.assertRaises(PermanentError):
+            self.async_runner.run(handler, self.context, 5)
+
+    def test_timeout_cancels_handler(self):
+        from dartwing.dartwing_core.background_jobs.executor import JobTimeoutError
+
+        canceled = threading.Event()
+
+        async def handler(context):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                canceled.set()
+                raise
+
+        with self.assertRaises(JobTimeoutError):
+            self.async_runner.run(handler, self.context, 0.05)
+        self.assertTrue(canceled.wait(1))
+
+    def test_handler_timeout_is_not_job_timeout(self):
+        from dartwing.dartwing_core.background_jobs.errors import TransientError
+        from dartwing.dartwing_core.background_jobs.executor import JobTimeoutError
+
+        async def handler(context):
+            await asyncio.wait_for(asyncio.sleep(10), 0.01)
+
+        with self.assertRaises(TransientError) as raised:
+            self.async_runner.run(handler, self.context, 5)
+        self.assertNotIsInstance(raised.exception, JobTimeoutError)
+
+    def test_waiting_jobs_share_the_loop(self):
+        from dartwing.dartwing_core.background_jobs.progress import JobContext
+
+        async def handler(context):
+            await asyncio.sleep(0.3)
+
+        def run_job(i):
+            context = JobContext(job_id=f"JOB-{i}", job_type="async", organization="ORG-1")
+            self.async_runner.run(handler, context, 5)
+
+        threads = [threading.Thread(target=run_job, args=(i,)) for i in range(100)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.monotonic() - start, 3)
+
+
+class TestHandoff(unittest.TestCase):
+    """Test handing jobs to async workers."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import async_runner
+
+        self.async_runner = async_runner
+        self.cache = MagicMock()
+        self.cache.make_key.side_effect = lambda key: key.encode()
+        for patcher in (
+            patch.object(async_runner.frappe, "cache", return_value=self.cache),
+            patch.object(async_runner.frappe, "flags", frappe._dict(), create=True),
+            patch.object(async_runner.frappe, "session", frappe._dict(user="a@example.com"), create=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_no_handoff_without_worker(self):
+        self.cache.exists.return_value = 0
+
+        self.assertFalse(self.async_runner.handoff("JOB-1"))
+        self.cache.rpush.assert_not_called()
+
+    def test_handoff_to_running_worker(self):
+        self.cache.exists.return_value = 1
+
+        self.assertTrue(self.async_runner.handoff("JOB-1"))
+        key, entry = self.cache.rpush.call_args[0]
+        self.assertEqual(key, b"dartwing_core:background_job:async:ready")
+        self.assertEqual(json.loads(entry), {"job_id": "JOB-1", "user": "a@example.com"})
+
+    def test_process_channel_has_its_own_list(self):
+        self.cache.exists.return_value = 1
+
+        self.assertTrue(self.async_runner.handoff("JOB-1", channel="process"))
+        self.cache.exists.assert_called_once_with(b"dartwing_core:background_job:process:heartbeat")
+        self.assertEqual(self.cache.rpush.call_args[0][0], b"dartwing_core:background_job:process:ready")
+
+    def test_orphans_requeued_only_for_channels_without_worker(self):
+        self.cache.exists.side_effect = lambda key: key == b"dartwing_core:background_job:async:heartbeat"
+        self.cache.pipeline.return_value.execute.return_value = [[json.dumps({"job_id": "JOB-1", "user": "a"})], 1]
+
+        with patch("dartwing.dartwing_core.background_jobs.dispatch.redispatch") as redispatch:
+            self.assertEqual(self.async_runner.requeue_orphaned_jobs(), 1)
+
+        redispatch.assert_called_once_with("JOB-1")
+        self.cache.pipeline.return_value.delete.assert_called_once_with(
+            b"dartwing_core:background_job:process:ready"
+        )
+
+    def test_async_worker_runs_jobs_itself(self):
+        self.cache.exists.return_value = 1
+        self.async_runner.frappe.flags.in_job_handoff_worker = True
+
+        self.assertFalse(self.async_runner.handoff("JOB-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Unit tests for push-based job cancellation.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class TestJobContextCancellation(unittest.TestCase):
+    """Test that JobContext reads the Redis signal instead of the job row."""
+
+    def _context(self):
+        from dartwing.dartwing_core.background_jobs.progress import JobContext
+
+        return JobContext(job_id="JOB-2026-00001", job_type="sync_contacts", organization="ORG-001")
+
+    def test_signal_detected_without_sql(self):
+        from dartwing.dartwing_core.background_jobs import progress
+
+        db = MagicMock()
+        context = self._context()
+        with patch("dartwing.dartwing_core.background_jobs.cancellation.is_signaled", return_value=True), \
+                patch.object(progress.frappe, "db", db, create=True):
+            self.assertTrue(context.is_canceled())
+            self.assertTrue(context.is_canceled())
+
+        db.get_value.assert_not_called()
+
+    def test_checks_are_throttled(self):
+        context = self._context()
+        with patch(
+            "dartwing.dartwing_core.background_jobs.cancellation.is_signaled", return_value=False
+        ) as is_signaled:
+            for _i in range(100):
+                self.assertFalse(context.is_canceled())
+
+        is_signaled.assert_called_once_with("JOB-2026-00001")
+
+    def test_falls_back_to_database_when_redis_unavailable(self):
+        from dartwing.dartwing_core.background_jobs import progress
+
+        db = MagicMock()
+        db.get_value.return_value = "Canceled"
+        context = self._context()
+        with patch(
+            "dartwing.dartwing_core.background_jobs.cancellation.is_signaled",
+            side_effect=ConnectionError("down"),
+        ), patch.object(progress.frappe, "db", db, create=True):
+            self.assertTrue(context.is_canceled())
+
+        db.get_value.assert_called_once_with("Background Job", "JOB-2026-00001", "status")
+
+
+class TestSignalAfterCommit(unittest.TestCase):
+    """Test that signals of one transaction are sent together after commit."""
+
+    def test_signals_batched_until_commit(self):
+        from dartwing.dartwing_core.background_jobs import cancellation
+
+        db = MagicMock()
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: key
+        with patch.object(cancellation.frappe, "db", db, create=True), \
+                patch.object(cancellation.frappe, "local", frappe._dict()), \
+                patch.object(cancellation.frappe, "cache", return_value=cache):
+            cancellation.signal_after_commit("JOB-2026-00001")
+            cancellation.signal_after_commit("JOB-2026-00002")
+
+            db.after_commit.add.assert_called_once()
+            cache.pipeline.assert_not_called()
+
+            flush = db.after_commit.add.call_args.args[0]
+            flush()
+
+        pipe = cache.pipeline.return_value
+        self.assertEqual(
+            [c.args[0] for c in pipe.set.call_args_list],
+            [
+                "dartwing_core:background_job:cancel:JOB-2026-00001",
+                "dartwing_core:background_job:cancel:JOB-2026-00002",
+            ],
+        )
+        pipe.execute.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,220 @@
+"""
+Unit tests for circuit breaker outcome handling.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class TestRecordJobOutcome(unittest.TestCase):
+    """Test decisions made from the Redis outcome counters."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import circuit_breaker
+
+        self.circuit_breaker = circuit_breaker
+        self.db = MagicMock()
+        self.cache = MagicMock()
+        self.cache.make_key.side_effect = lambda key: key.encode()
+        self.script = self.cache.register_script.return_value
+        self.config = frappe._dict(enable_circuit_breaker=1, circuit_breaker_window_minutes=10)
+        for patcher in (
+            patch.object(circuit_breaker.frappe, "db", self.db, create=True),
+            patch.object(circuit_breaker.frappe, "cache", return_value=self.cache),
+            patch.object(circuit_breaker.frappe, "log_error", create=True),
+            patch.object(circuit_breaker, "get_job_type", return_value=self.config),
+            patch.object(circuit_breaker, "_open_circuit"),
+            patch.object(circuit_breaker, "_close_circuit"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _record(self, success, result):
+        self.script.return_value = result
+        self.circuit_breaker.record_job_outcome("report", "ORG-1", success=success)
+        return self.script.call_args.kwargs
+
+    def test_outcome_counted_without_database_access(self):
+        call = self._record(True, [5, 0, b"", 0])
+
+        self.db.sql.assert_not_called()
+        self.db.get_value.assert_not_called()
+        self.assertEqual(
+            call["keys"],
+            [b"dartwing_core:background_job:circuit:report:ORG-1:counts",
+             b"dartwing_core:background_job:circuit:report:ORG-1:state"],
+        )
+        # 10 minute window in 30 buckets of 20 seconds
+        self.assertEqual(call["args"][1:4], [20, 30, 1])
+        self.circuit_breaker._open_circuit.assert_not_called()
+
+    def test_tripping_outcome_opens_circuit(self):
+        self._record(False, [10, 6, b"", 1])
+
+        self.circuit_breaker._open_circuit.assert_called_once()
+        reason = self.circuit_breaker._open_circuit.call_args[0][2]
+        self.assertIn("(6/10 jobs failed in last 10 minutes)", reason)
+
+    def test_half_open_success_closes_circuit(self):
+        self._record(True, [3, 2, b"Half-Open", 0])
+
+        self.circuit_breaker._close_circuit.assert_called_once_with("report", "ORG-1")
+
+    def test_half_open_failure_reopens_circuit(self):
+        self._record(False, [3, 2, b"Half-Open", 0])
+
+        self.circuit_breaker._open_circuit.assert_called_once()
+
+    def test_disabled_breaker_never_trips(self):
+        self.config["enable_circuit_breaker"] = 0
+
+        call = self._record(False, [10, 10, b"", 0])
+
+        self.assertEqual(call["args"][7], 0)
+        self.circuit_breaker._open_circuit.assert_not_called()
+
+    def test_redis_error_does_not_raise(self):
+        self.script.side_effect = ConnectionError("down")
+
+        self.circuit_breaker.record_job_outcome("report", "ORG-1", success=False)
+
+        self.circuit_breaker.frappe.log_error.assert_called_once()
+
+
+
+class TestCircuitStateCache(unittest.TestCase):
+    """Test the cached circuit state read before every job."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import circuit_breaker
+
+        self.circuit_breaker = circuit_breaker
+        self.cache = MagicMock()
+        self.cache.make_key.side_effect = lambda key: key.encode()
+        self.cache.get.return_value = b"1"
+        self.cache.get_value.return_value = None
+        self.probe = self.cache.register_script.return_value
+        self.probe.return_value = 1
+        self.breakers = []
+        self.db = MagicMock(transaction_writes=0)
+        for patcher in (
+            patch.object(circuit_breaker.frappe, "local", frappe._dict(site="site1")),
+            patch.object(circuit_breaker.frappe, "db", self.db, create=True),
+            patch.object(circuit_breaker.frappe, "cache", return_value=self.cache),
+            patch.object(circuit_breaker.frappe, "get_all", side_effect=lambda *a, **k: self.breakers, create=True),
+            patch.object(circuit_breaker.frappe, "log_error", create=True),
+            patch.object(circuit_breaker, "find_job_type", return_value=frappe._dict()),
+            patch.object(circuit_breaker, "_transition_to_half_open"),
+            patch.object(circuit_breaker, "_circuits", {}),
+            patch.object(circuit_breaker, "_generations", {}),
+            patch.object(circuit_breaker, "_listeners", {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _breaker(self, state="Open", minutes_ago=1, cooldown=15):
+        from frappe.utils import add_to_date, now_datetime
+
+        self.breakers.append(frappe._dict(
+            job_type="report", organization="ORG-1", state=state, reason="Too many failures",
+            opened_at=add_to_date(now_datetime(), minutes=-minutes_ago), cooldown_minutes=cooldown,
+        ))
+
+    def test_closed_circuit_checked_from_cache(self):
+        for _i in range(5):
+            self.assertFalse(self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1"))
+
+        self.circuit_breaker.frappe.get_all.assert_called_once()
+
+    def test_cold_process_reads_breakers_from_cache(self):
+        self._breaker()
+        self.cache.get_value.return_value = list(self.breakers)
+
+        with self.assertRaises(self.circuit_breaker.CircuitBreakerOpen):
+            self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+        self.cache.get_value.assert_called_once_with("dartwing_core:background_job:circuit:breakers:1")
+        self.circuit_breaker.frappe.get_all.assert_not_called()
+
+    def test_loaded_breakers_shared_under_version(self):
+        self._breaker()
+
+        self.circuit_breaker.get_circuit_state("report", "ORG-1")
+
+        key, rows = self.cache.set_value.call_args.args
+        self.assertEqual(key, "dartwing_core:background_job:circuit:breakers:1")
+        self.assertEqual(rows, self.breakers)
+
+    def test_breakers_read_in_a_snapshot_taken_after_the_version(self):
+        # execute_job has already read the job, opening a snapshot that may
+        # predate the breaker change behind the current version
+        calls = MagicMock()
+        calls.attach_mock(self.cache.get, "version")
+        calls.attach_mock(self.db.commit, "commit")
+        calls.attach_mock(self.circuit_breaker.frappe.get_all, "get_all")
+        calls.attach_mock(self.cache.set_value, "set_value")
+
+        self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+        names = [name for name, _args, _kwargs in calls.mock_calls]
+        self.assertEqual(names[:4], ["version", "commit", "get_all", "set_value"])
+
+    def test_breakers_read_with_pending_writes_are_not_shared(self):
+        self.db.transaction_writes = 1
+        self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+        self.db.commit.assert_not_called()
+        self.cache.set_value.assert_not_called()
+
+        # Reloaded at the next check even though the version is unchanged
+        self._breaker()
+        with patch.object(self.circuit_breaker, "CIRCUIT_STATE_CHECK_SECONDS", 0):
+            with self.assertRaises(self.circuit_breaker.CircuitBreakerOpen):
+                self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+    def test_changed_version_reloads(self):
+        self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+        self._breaker()
+        self.cache.get.return_value = b"2"
+
+        with patch.object(self.circuit_breaker, "CIRCUIT_STATE_CHECK_SECONDS", 0):
+            with self.assertRaises(self.circuit_breaker.CircuitBreakerOpen):
+                self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+    def test_invalidation_message_drops_cache(self):
+        self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+        self.circuit_breaker._drop("site1")
+        self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1")
+
+        self.assertEqual(self.circuit_breaker.frappe.get_all.call_count, 2)
+
+    def test_first_probe_after_cooldown_moves_to_half_open(self):
+        self._breaker(minutes_ago=20)
+
+        self.assertTrue(self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-1"))
+        self.circuit_breaker._transition_to_half_open.assert_called_once_with("report", "ORG-1")
+        self.assertEqual(self.probe.call_args.kwargs["args"][2:], ["JOB-1", 3])
+
+    def test_probes_limited(self):
+        self._breaker(state="Half-Open")
+        self.probe.return_value = 0
+
+        with self.assertRaises(self.circuit_breaker.CircuitBreakerProbing):
+            self.circuit_breaker.check_circuit_breaker("report", "ORG-1", "JOB-4")
+        self.circuit_breaker._transition_to_half_open.assert_not_called()
+
+    def test_state_change_published(self):
+        self.cache.incr.return_value = 7
+
+        self.circuit_breaker._mirror_state("report", "ORG-1", self.circuit_breaker.CircuitState.OPEN)
+
+        self.cache.publish.assert_called_once_with(
+            b"dartwing_core:background_job:circuit:invalidate", 7
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Unit tests for job concurrency limits.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+def _job_type(**fields):
+    return frappe._dict(name="sync_contacts", **fields)
+
+
+class TestConcurrency(unittest.TestCase):
+    """Test scope selection and the Lua acquire wrapper."""
+
+    def test_unlimited_job_type_has_no_slots(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        with patch.object(concurrency.frappe, "conf", frappe._dict(), create=True), \
+                patch.object(concurrency.frappe, "get_cached_value", return_value=None, create=True):
+            self.assertEqual(concurrency.get_slots(_job_type(max_concurrency=0), "ORG-001"), [])
+
+    def test_slots_for_every_configured_limit(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        conf = frappe._dict(background_job_max_concurrency_per_organization=10)
+        job_type = _job_type(max_concurrency=5, max_concurrency_per_organization=2)
+        with patch.object(concurrency.frappe, "conf", conf, create=True), \
+                patch.object(concurrency.frappe, "get_cached_value", return_value=0, create=True):
+            slots = concurrency.get_slots(job_type, "ORG-001")
+
+        self.assertEqual(
+            [(slot.scope, slot.limit) for slot in slots],
+            [
+                ("job_type:sync_contacts", 5),
+                ("job_type:sync_contacts:org:ORG-001", 2),
+                ("org:ORG-001", 10),
+            ],
+        )
+
+    def test_organization_limit_overrides_site_default(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        conf = frappe._dict(background_job_max_concurrency_per_organization=10)
+        with patch.object(concurrency.frappe, "conf", conf, create=True), \
+                patch.object(concurrency.frappe, "get_cached_value", return_value=40, create=True) as get_cached_value:
+            slots = concurrency.get_slots(_job_type(), "ORG-001")
+
+        get_cached_value.assert_called_once_with("Organization", "ORG-001", "max_concurrent_jobs")
+        self.assertEqual([(slot.scope, slot.limit) for slot in slots], [("org:ORG-001", 40)])
+
+    def test_acquire_returns_full_slot(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        slots = [concurrency.Slot("job_type:sync_contacts", 5), concurrency.Slot("org:ORG-001", 10)]
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.register_script.return_value = MagicMock(return_value=2)
+        with patch.object(concurrency.frappe, "cache", return_value=cache):
+            full = concurrency.acquire("JOB-2026-00001", slots, lease_seconds=300)
+
+        self.assertEqual(full, slots[1])
+        call = cache.register_script.return_value.call_args.kwargs
+        self.assertEqual(
+            call["keys"],
+            [
+                "site|dartwing_core:background_job:concurrency:job_type:sync_contacts",
+                "site|dartwing_core:background_job:concurrency:org:ORG-001",
+            ],
+        )
+        self.assertEqual(call["args"][2:], ["JOB-2026-00001", 5, 10])
+        cache.hset.assert_not_called()
+
+    def test_acquire_records_limits(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        slots = [concurrency.Slot("job_type:sync_contacts", 5)]
+        cache = MagicMock()
+        cache.register_script.return_value = MagicMock(return_value=0)
+        with patch.object(concurrency.frappe, "cache", return_value=cache):
+            self.assertIsNone(concurrency.acquire("JOB-2026-00001", slots, lease_seconds=300))
+
+        self.assertEqual(cache.hset.call_args.kwargs["mapping"], {"job_type:sync_contacts": 5})
+
+    def test_acquire_without_slots_skips_redis(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        with patch.object(concurrency.frappe, "cache") as cache:
+            self.assertIsNone(concurrency.acquire("JOB-2026-00001", [], lease_seconds=300))
+
+        cache.assert_not_called()
+
+    def test_release_swallows_redis_errors(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        cache = MagicMock()
+        cache.pipeline.return_value.execute.side_effect = ConnectionError("down")
+        with patch.object(concurrency.frappe, "cache", return_value=cache), \
+                patch.object(concurrency.frappe, "log_error") as log_error:
+            concurrency.release("JOB-2026-00001", [concurrency.Slot("org:ORG-001", 10)])
+
+        log_error.assert_called_once()
+
+    def test_release_resets_deferral_count(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        with patch.object(concurrency.frappe, "cache", return_value=cache):
+            concurrency.release("JOB-2026-00001", [concurrency.Slot("org:ORG-001", 10)])
+
+        cache.pipeline.return_value.delete.assert_called_once_with(
+            "site|dartwing_core:background_job:concurrency:deferrals:JOB-2026-00001"
+        )
+
+    def test_record_deferral_counts_per_job(self):
+        from dartwing.dartwing_core.background_jobs import concurrency
+
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.pipeline.return_value.execute.return_value = [3, True]
+        with patch.object(concurrency.frappe, "cache", return_value=cache):
+            self.assertEqual(concurrency.record_deferral("JOB-2026-00001"), 3)
+
+        key = "site|dartwing_core:background_job:concurrency:deferrals:JOB-2026-00001"
+        cache.pipeline.return_value.incr.assert_called_once_with(key)
+        cache.pipeline.return_value.expire.assert_called_once_with(key, concurrency.CONCURRENCY_DEFER_MAX_SECONDS * 2)
+
+    def test_parse_scope(self):
+        from dartwing.dartwing_core.background_jobs.concurrency import _parse_scope
+
+        self.assertEqual(_parse_scope("job_type:sync_contacts"), ("sync_contacts", None))
+        self.assertEqual(_parse_scope("job_type:sync_contacts:org:ORG-001"), ("sync_contacts", "ORG-001"))
+        self.assertEqual(_parse_scope("org:ORG-001"), (None, "ORG-001"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit tests for the Redis deduplication index.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+class TestDedupIndex(unittest.TestCase):
+    """Test claim/replace/release wiring to the Lua scripts."""
+
+    def _mock_cache(self, script_result=None, pipeline_results=None):
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.register_script.return_value = MagicMock(return_value=script_result)
+        cache.pipeline.return_value.execute.return_value = pipeline_results or []
+        return cache
+
+    def test_claim_success_returns_none(self):
+        from dartwing.dartwing_core.background_jobs import dedup
+
+        cache = self._mock_cache(script_result=None)
+        with patch.object(dedup.frappe, "cache", return_value=cache):
+            self.assertIsNone(dedup.claim("ORG-001", "abc", "JOB-2026-00001", 300))
+
+        kwargs = cache.register_script.return_value.call_args.kwargs
+        self.assertEqual(kwargs["keys"], ["site|dartwing_core:background_job:dedup:ORG-001:abc"])
+        self.assertEqual(kwargs["args"], ["JOB-2026-00001", 300])
+
+    def test_claim_returns_existing_owner(self):
+        from dartwing.dartwing_core.background_jobs import dedup
+
+        cache = self._mock_cache(script_result=b"JOB-2026-00001")
+        with patch.object(dedup.frappe, "cache", return_value=cache):
+            self.assertEqual(dedup.claim("ORG-001", "abc", "JOB-2026-00002", 300), "JOB-2026-00001")
+
+    def test_claim_many_single_round_trip(self):
+        from dartwing.dartwing_core.background_jobs import dedup
+
+        cache = self._mock_cache(pipeline_results=[None, b"JOB-2026-00001", None])
+        claims = [("h1", "JOB-2026-00010"), ("h2", "JOB-2026-00011"), ("h3", "JOB-2026-00012")]
+        with patch.object(dedup.frappe, "cache", return_value=cache):
+            existing = dedup.claim_many("ORG-001", claims, 300)
+
+        self.assertEqual(existing, {"h2": "JOB-2026-00001"})
+        cache.pipeline.return_value.execute.assert_called_once()
+        self.assertEqual(cache.register_script.return_value.call_count, 3)
+
+    def test_release_swallows_errors(self):
+        from dartwing.dartwing_core.background_jobs import dedup
+
+        cache = self._mock_cache()
+        cache.register_script.return_value.side_effect = ConnectionError("down")
+        with patch.object(dedup.frappe, "cache", return_value=cache), \
+                patch.object(dedup.frappe, "log_error") as log_error:
+            dedup.release("ORG-001", "abc", "JOB-2026-00001")
+
+        log_error.assert_called_once()
+
+    def test_release_without_hash_is_noop(self):
+        from dartwing.dartwing_core.background_jobs import dedup
+
+        with patch.object(dedup.frappe, "cache") as cache:
+            dedup.release("ORG-001", None, "JOB-2026-00001")
+
+        cache.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for the Redis delay queue.
+"""
+
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+class TestDelayQueue(unittest.TestCase):
+    """Test scheduling, popping and draining with a mocked Redis."""
+
+    def _mock_cache(self, due_batches=(), lease_acquired=True):
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.set.return_value = lease_acquired
+        cache.zrange.return_value = []
+        pop_script = MagicMock(side_effect=list(due_batches) + [[]] * 10)
+        release_script = MagicMock()
+        cache.register_script.side_effect = (
+            lambda source: pop_script if "ZRANGEBYSCORE" in source else release_script
+        )
+        return cache, pop_script, release_script
+
+    def test_schedule_member_and_score(self):
+        from dartwing.dartwing_core.background_jobs import delay_queue
+
+        cache, _pop, _release = self._mock_cache()
+        with patch.object(delay_queue.frappe, "cache", return_value=cache):
+            delay_queue.schedule("retry", "JOB-2026-00001", 1700000000.5)
+
+        cache.zadd.assert_called_once_with(
+            "site|dartwing_core:background_job:delayed", {"retry:JOB-2026-00001": 1700000000.5}
+        )
+
+    def test_schedule_unknown_action_rejected(self):
+        from dartwing.dartwing_core.background_jobs import delay_queue
+
+        with self.assertRaises(ValueError):
+            delay_queue.schedule("nope", "JOB-2026-00001", time.time())
+
+    def test_pop_due_decodes_members(self):
+        from dartwing.dartwing_core.background_jobs import delay_queue
+
+        cache, _pop, _release = self._mock_cache(due_batches=[[b"retry:JOB-2026-00001"]])
+        with patch.object(delay_queue.frappe, "cache", return_value=cache):
+            self.assertEqual(delay_queue.pop_due(), [("retry", "JOB-2026-00001")])
+
+    def test_drain_skips_when_lease_held(self):
+        from dartwing.dartwing_core.background_jobs import delay_queue
+
+        cache, pop_script, _release = self._mock_cache(lease_acquired=False)
+        with patch.object(delay_queue.frappe, "cache", return_value=cache):
+            self.assertEqual(delay_queue.drain(max_seconds=1), 0)
+
+        pop_script.assert_not_called()
+
+    def test_drain_runs_due_actions_and_releases_lease(self):
+        from dartwing.dartwing_core.background_jobs import delay_queue
+
+        cache, _pop, release_script = self._mock_cache(
+            due_batches=[[b"retry:JOB-2026-00001", b"retry:JOB-2026-00002"]]
+        )
+        with patch.object(delay_queue.frappe, "cache", return_value=cache), \
+                patch.object(delay_queue, "_run_action") as run_action:
+            processed = delay_queue.drain(max_seconds=5)
+
+        self.assertEqual(processed, 2)
+        run_action.assert_any_call("retry", "JOB-2026-00002")
+        release_script.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+Unit tests for fair job dispatch.
+"""
+
+import signal
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+class TestDispatch(unittest.TestCase):
+    """Test token handling around the Lua selection script."""
+
+    def test_pop_decodes_selection(self):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.register_script.return_value = MagicMock(return_value=[b"High", b"ORG-001", b"JOB-2026-00001"])
+        with patch.object(dispatch.frappe, "cache", return_value=cache):
+            self.assertEqual(dispatch.pop(), ("High", "ORG-001", "JOB-2026-00001"))
+
+        args = cache.register_script.return_value.call_args.kwargs["args"]
+        self.assertEqual(args[0], "site|dartwing_core:background_job:dispatch:")
+        self.assertEqual(args[1:], ["Critical", 8, "High", 4, "Normal", 2, "Low", 1])
+
+    def test_tokens_of_any_queue_select_among_all_priorities(self):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.register_script.return_value = MagicMock(return_value=None)
+        with patch.object(dispatch.frappe, "cache", return_value=cache):
+            # Tokens enqueued while priorities had separate queues
+            dispatch.dispatch_next(queue="short")
+            dispatch.dispatch_next(queue="long")
+
+        for call in cache.register_script.return_value.call_args_list:
+            self.assertEqual(call.kwargs["args"][1:], ["Critical", 8, "High", 4, "Normal", 2, "Low", 1])
+
+    def test_pop_empty_backlog(self):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        cache = MagicMock()
+        cache.register_script.return_value = MagicMock(return_value=None)
+        with patch.object(dispatch.frappe, "cache", return_value=cache):
+            self.assertIsNone(dispatch.pop())
+
+    def test_dispatch_next_skips_jobs_no_longer_queued(self):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        selections = [("Normal", "ORG-001", "JOB-2026-00001"), ("Normal", "ORG-002", "JOB-2026-00002")]
+        db = MagicMock()
+        db.get_value.side_effect = [
+            dispatch.frappe._dict(status="Canceled", timeout_seconds=60),
+            dispatch.frappe._dict(status="Queued", timeout_seconds=900),
+        ]
+        with patch.object(dispatch, "pop", side_effect=selections), \
+                patch.object(dispatch.frappe, "db", db, create=True), \
+                patch.object(dispatch, "_narrow_time_limit") as time_limit, \
+                patch("dartwing.dartwing_core.background_jobs.executor.execute_job") as execute_job:
+            dispatch.dispatch_next()
+
+        execute_job.assert_called_once_with(background_job_id="JOB-2026-00002")
+        # RQ's hard limit follows the job that was popped, not the token
+        time_limit.assert_called_once_with(900)
+
+    def test_dispatch_next_stops_when_backlog_empty(self):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        with patch.object(dispatch, "pop", return_value=None), \
+                patch("dartwing.dartwing_core.background_jobs.executor.execute_job") as execute_job:
+            dispatch.dispatch_next()
+
+        execute_job.assert_not_called()
+
+
+    @unittest.skipUnless(hasattr(signal, "SIGALRM"), "needs SIGALRM")
+    def test_job_time_limit_keeps_the_tokens_alarm_handler(self):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        fired = []
+
+        def handler(signum, frame):
+            fired.append(signum)
+
+        previous = signal.signal(signal.SIGALRM, handler)
+        try:
+            # RQ's death penalty for the token
+            signal.alarm(86400)
+            dispatch._shorten_alarm(1020)
+
+            self.assertIs(signal.getsignal(signal.SIGALRM), handler)
+            self.assertLessEqual(signal.alarm(0), 1020)
+
+            # Without a pending alarm nothing is armed
+            dispatch._shorten_alarm(1020)
+            self.assertEqual(signal.alarm(0), 0)
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
+        self.assertEqual(fired, [])
+
+
+class TestRedispatchLostJobs(unittest.TestCase):
+    """Test the safety net for Queued jobs no token will run."""
+
+    def _run(self, pages, in_backlog, deferred=(), handed_off=()):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.pipeline.return_value.execute.side_effect = in_backlog
+        db = MagicMock()
+        db.queries = []
+        pages = iter(pages)
+
+        def sql(query, values, as_dict=False):
+            db.queries.append((query, dict(values)))
+            return next(pages)
+
+        db.sql.side_effect = sql
+        with patch.object(dispatch.frappe, "cache", return_value=cache), \
+                patch.object(dispatch.frappe, "db", db, create=True), \
+                patch.object(dispatch.frappe, "logger", MagicMock(), create=True), \
+                patch.object(dispatch, "push") as push, \
+                patch("dartwing.dartwing_core.background_jobs.delay_queue.get_scheduled", return_value=set(deferred)), \
+                patch(
+                    "dartwing.dartwing_core.background_jobs.async_runner.get_handed_off_jobs",
+                    return_value=set(handed_off),
+                ):
+            pushed = dispatch.redispatch_lost_jobs(batch_size=2)
+        return pushed, push, db
+
+    def _job(self, name, modified="2026-10-17 00:00:00"):
+        from dartwing.dartwing_core.background_jobs import dispatch
+
+        return dispatch.frappe._dict(name=name, organization="ORG-001", priority="Normal", modified=modified)
+
+    def test_only_jobs_held_by_nothing_are_pushed(self):
+        jobs = [self._job("JOB-1"), self._job("JOB-2"), self._job("JOB-3"), self._job("JOB-4")]
+
+        pushed, push, db = self._run(
+            [jobs[:2], jobs[2:], []],
+            [[True, False], [False, False]],
+            deferred={"JOB-3"},
+            handed_off={"JOB-4"},
+        )
+
+        self.assertEqual(pushed, 1)
+        push.assert_called_once_with([jobs[1]])
+
+        # The second page continues after the last job of the first
+        query, values = db.queries[1]
+        self.assertIn("name > %(after_name)s", query)
+        self.assertEqual(values["after_name"], "JOB-2")
+
+    def test_nothing_old_enough(self):
+        pushed, push, db = self._run([[]], [])
+
+        self.assertEqual(pushed, 0)
+        push.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for the buffered Job Execution Log writer.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class TestExecutionLogBuffer(unittest.TestCase):
+    """Test buffering, commit-time flushing and rollback."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import execution_log
+
+        self.execution_log = execution_log
+        self.db = MagicMock()
+        for patcher in (
+            patch.object(execution_log.frappe, "local", frappe._dict()),
+            patch.object(execution_log.frappe, "db", self.db, create=True),
+            patch.object(execution_log.frappe, "session", frappe._dict(user="a@example.com"), create=True),
+            patch.object(execution_log.frappe, "generate_hash", return_value="abc", create=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _append(self, to_status="Running", from_status="Queued"):
+        self.execution_log.append("JOB-1", "ORG-1", from_status, to_status, "Worker started execution")
+
+    def test_entries_written_together_before_commit(self):
+        self._append("Running", "Queued")
+        self._append("Completed", "Running")
+        self.db.bulk_insert.assert_not_called()
+
+        flush = self.db.before_commit.add.call_args[0][0]
+        flush()
+
+        self.db.bulk_insert.assert_called_once()
+        doctype, fields, rows = self.db.bulk_insert.call_args[0]
+        self.assertEqual(doctype, "Job Execution Log")
+        self.assertEqual(
+            [dict(zip(fields, row))["to_status"] for row in rows], ["Running", "Completed"]
+        )
+        row = dict(zip(fields, rows[0]))
+        self.assertEqual(row["actor"], "a@example.com")
+        self.assertEqual(row["organization"], "ORG-1")
+        self.assertIsNone(row["retry_attempt"])
+
+    def test_commit_hooks_registered_once_per_transaction(self):
+        self._append()
+        self._append()
+
+        self.db.before_commit.add.assert_called_once()
+        self.db.after_rollback.add.assert_called_once()
+
+    def test_rollback_discards_entries(self):
+        self._append()
+
+        self.db.after_rollback.add.call_args[0][0]()
+        self.execution_log.flush()
+
+        self.db.bulk_insert.assert_not_called()
+
+    def test_large_transactions_written_in_batches(self):
+        with patch.object(self.execution_log, "EXECUTION_LOG_MAX_BUFFER", 3):
+            for _i in range(7):
+                self._append()
+        self.execution_log.flush()
+
+        self.assertEqual(
+            [len(call[0][2]) for call in self.db.bulk_insert.call_args_list], [3, 3, 1]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,13 @@ Unit tests for Background Job Executor.
 Focuses on backward-compatible worker argument handling for already-enqueued jobs.
 """
 
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
+import frappe
+
 
 class TestExecuteJobArgCompatibility(unittest.TestCase):
     def test_accepts_legacy_job_id_kwarg(self):
@@ -34,5 +38,114 @@ class TestExecuteJobArgCompatibility(unittest.TestCase):
             get_doc.assert_called_once_with("Background Job", "JOB-456")
 
 
+class TestExecuteWithTimeout(unittest.TestCase):
+    def test_timeout_does_not_wait_for_hung_handler(self):
+        from dartwing.dartwing_core.background_jobs.executor import JobTimeoutError, _execute_with_timeout
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        started = time.monotonic()
+        with self.assertRaises(JobTimeoutError):
+            _execute_with_timeout(lambda context: release.wait(10), MagicMock(), 0.05)
+
+        self.assertLess(time.monotonic() - started, 5)
+
+
+class TestClaimJob(unittest.TestCase):
+    """Test that a job dispatched twice runs once."""
+
+    def _claim(self, rows_changed):
+        from dartwing.dartwing_core.background_jobs import executor
+
+        db = MagicMock()
+        db.sql.side_effect = lambda query, values=None: [[rows_changed]] if "ROW_COUNT" in query else None
+        with patch.object(executor.frappe, "db", db, create=True):
+            claimed = executor._claim_job(MagicMock(name="job"))
+        return claimed, db
+
+    def test_claim_is_a_conditional_update_on_queued(self):
+        claimed, db = self._claim(1)
+
+        self.assertTrue(claimed)
+        query = " ".join(db.sql.call_args_list[0].args[0].split())
+        self.assertIn("WHERE name = %(name)s AND status = 'Queued'", query)
+        self.assertNotIn("SET status", query)
+        db.rollback.assert_not_called()
+
+    def test_claim_lost_to_another_worker(self):
+        claimed, db = self._claim(0)
+
+        self.assertFalse(claimed)
+        db.rollback.assert_called_once()
+
+    def test_lost_claim_neither_runs_nor_releases_slots(self):
+        from dartwing.dartwing_core.background_jobs import executor
+
+        job = MagicMock(status="Queued", timeout_seconds=60)
+        job.name = "JOB-2026-00001"
+        with patch.object(executor.frappe, "get_doc", return_value=job, create=True), \
+                patch.object(executor, "_hand_off_job", return_value=False), \
+                patch.object(executor, "_check_dependency", return_value=True), \
+                patch.object(executor, "check_circuit_breaker", return_value=True), \
+                patch.object(executor, "_acquire_concurrency_slots", return_value=["slot"]), \
+                patch.object(executor, "_claim_job", return_value=False), \
+                patch.object(executor, "_run_job") as run_job, \
+                patch.object(executor.concurrency, "release") as release, \
+                patch.object(executor, "release_probe") as release_probe:
+            executor.execute_job(background_job_id=job.name)
+
+        run_job.assert_not_called()
+        release.assert_not_called()
+        release_probe.assert_not_called()
+
+
+class TestHandOffJob(unittest.TestCase):
+    def _hand_off(self, config, is_async=False):
+        from dartwing.dartwing_core.background_jobs import executor
+
+        job = MagicMock(job_type="heavy")
+        job.name = "JOB-2026-00001"
+        with patch.object(executor, "find_job_type", return_value=config), \
+                patch.object(executor, "_get_handler"), \
+                patch("dartwing.dartwing_core.background_jobs.async_runner.is_async_handler", return_value=is_async), \
+                patch("dartwing.dartwing_core.background_jobs.async_runner.handoff", return_value=True) as handoff:
+            return executor._hand_off_job(job), handoff
+
+    def test_process_mode_job_goes_to_process_worker(self):
+        handed_off, handoff = self._hand_off(frappe._dict(execution_mode="Process"))
+
+        self.assertTrue(handed_off)
+        handoff.assert_called_once_with("JOB-2026-00001", channel="process")
+
+    def test_async_handler_goes_to_async_worker(self):
+        handed_off, handoff = self._hand_off(frappe._dict(execution_mode="Thread"), is_async=True)
+
+        self.assertTrue(handed_off)
+        handoff.assert_called_once_with("JOB-2026-00001")
+
+    def test_sync_thread_job_runs_here(self):
+        handed_off, handoff = self._hand_off(frappe._dict(execution_mode="Thread"))
+
+        self.assertFalse(handed_off)
+        handoff.assert_not_called()
+
+
+class TestDeferDelay(unittest.TestCase):
+    def test_delay_doubles_per_deferral_up_to_maximum(self):
+        from dartwing.dartwing_core.background_jobs import executor
+
+        with patch.object(executor.random, "random", return_value=1.0):
+            delays = [executor._get_defer_delay(n) for n in (1, 2, 3, 10, 1000)]
+
+        self.assertEqual(delays, [2, 4, 8, 60, 60])
+
+    def test_delay_is_jittered_down_by_up_to_half(self):
+        from dartwing.dartwing_core.background_jobs import executor
+
+        with patch.object(executor.random, "random", return_value=0.0):
+            self.assertEqual(executor._get_defer_delay(3), 4)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,108 @@
+"""
+Unit tests for buffered execution metrics recording and flushing.
+"""
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class TestMetricsBuffer(unittest.TestCase):
+    """Test sampling, Redis buffering and bulk flushing of execution metrics."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import metrics
+
+        self.metrics = metrics
+        self.db = MagicMock()
+        self.cache = MagicMock()
+        self.cache.make_key.side_effect = lambda key: key.encode()
+        self.script = self.cache.register_script.return_value
+        for patcher in (
+            patch.object(metrics.frappe, "db", self.db, create=True),
+            patch.object(metrics.frappe, "cache", return_value=self.cache),
+            patch.object(metrics.frappe, "session", frappe._dict(user="a@example.com"), create=True),
+            patch.object(metrics.frappe, "generate_hash", return_value="abc", create=True),
+            patch.object(metrics.frappe, "log_error", create=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _record(self, status="Completed", sample_rate=1.0):
+        with patch.object(self.metrics, "_get_sample_rate", return_value=sample_rate):
+            self.metrics.record_execution_metrics(
+                "JOB-1", 2.5, status, job_type="report", organization="ORG-1", priority="Normal"
+            )
+        return self.script.call_args.kwargs
+
+    def test_record_touches_only_redis(self):
+        call = self._record()
+
+        self.db.commit.assert_not_called()
+        self.db.get_value.assert_not_called()
+        self.db.insert.assert_not_called()
+        group, seconds = call["args"][:2]
+        self.assertEqual(group, "report\tORG-1\tCompleted")
+        self.assertEqual(seconds, 2.5)
+        self.assertEqual(json.loads(call["args"][5])["job_id"], "JOB-1")
+
+    def test_unsampled_success_counts_without_sample(self):
+        call = self._record(sample_rate=0.0)
+
+        self.assertEqual(call["args"][5], "")
+
+    def test_failures_always_sampled(self):
+        call = self._record(status="Failed", sample_rate=0.0)
+
+        self.assertEqual(json.loads(call["args"][5])["status"], "Failed")
+
+    def test_redis_error_does_not_raise(self):
+        self.script.side_effect = ConnectionError("down")
+
+        self._record()
+
+        self.metrics.frappe.log_error.assert_called_once()
+
+    def test_flush_writes_samples_and_closed_buckets_with_one_commit(self):
+        sample = json.dumps({
+            "job_id": "JOB-1", "job_type": "report", "organization": "ORG-1",
+            "priority": "Normal", "execution_time_seconds": 2.5, "status": "Completed",
+            "error_type": None, "recorded_at": "2026-10-17 10:00:05",
+        })
+        pipe = self.cache.pipeline.return_value
+        pipe.execute.side_effect = [
+            [[sample.encode()], True],
+            [{b"report\tORG-1\tCompleted|n": b"3", b"report\tORG-1\tCompleted|sum": b"6.5",
+              b"report\tORG-1\tCompleted|min": b"1", b"report\tORG-1\tCompleted|max": b"3",
+              b"report\tORG-1\tCompleted|maxjob": b"JOB-1",
+              b"report\tORG-1\tCompleted|b0": b"1", b"report\tORG-1\tCompleted|b55": b"2"}, 1, 1],
+        ]
+        self.cache.zrangebyscore.return_value = [b"2026-10-17 10:00:00"]
+
+        result = self.metrics.flush_metrics()
+
+        self.assertEqual(result, {"samples": 1, "rollups": 1})
+        self.db.commit.assert_called_once()
+        inserts = {call[0][0]: call[0] for call in self.db.bulk_insert.call_args_list}
+        _doctype, fields, rows = inserts["Background Job Metrics"]
+        self.assertEqual(dict(zip(fields, rows[0]))["execution_time_seconds"], 2.5)
+        _doctype, fields, rows = inserts["Background Job Metrics Rollup"]
+        row = dict(zip(fields, rows[0]))
+        self.assertEqual(row["bucket_start"], "2026-10-17 10:00:00")
+        self.assertEqual((row["job_count"], row["total_seconds"]), (3, 6.5))
+        self.assertEqual((row["min_seconds"], row["max_seconds"]), (1.0, 3.0))
+        self.assertEqual(row["max_job_id"], "JOB-1")
+        self.assertEqual(json.loads(row["duration_sketch"]), {"0": 1, "55": 2})
+
+    def test_flush_without_buffered_metrics_does_not_commit(self):
+        self.cache.pipeline.return_value.execute.return_value = [[], True]
+        self.cache.zrangebyscore.return_value = []
+
+        self.assertEqual(self.metrics.flush_metrics(), {"samples": 0, "rollups": 0})
+        self.db.commit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Unit tests for worker handler preloading.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+def _job_type(name, **fields):
+    row = {
+        "name": name,
+        "is_enabled": 1,
+        "handler_method": f"app.handlers.{name}",
+        "timeout_handler_method": None,
+    }
+    row.update(fields)
+    return frappe._dict(row)
+
+
+def _get_module(path):
+    if path == "app.missing":
+        raise ImportError(f"No module named '{path}'")
+    return MagicMock()
+
+
+class _PreloadTestCase(unittest.TestCase):
+    """Registry with three Job Types, one of them broken and one disabled."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import preload, registry
+
+        self.preload = preload
+        job_types = [
+            _job_type("echo", timeout_handler_method="app.handlers.on_timeout"),
+            _job_type("broken", handler_method="app.missing.run"),
+            _job_type("off", is_enabled=0),
+        ]
+        self.get_module = MagicMock(side_effect=_get_module)
+
+        self.cache = cache = MagicMock()
+        cache.get.return_value = b"1"
+        cache.get_value.return_value = None
+        for patcher in (
+            patch.dict(registry._registries, clear=True),
+            patch.object(registry.frappe, "local", frappe._dict(site="test.local")),
+            patch.object(registry.frappe, "cache", return_value=cache),
+            patch.object(registry.frappe, "get_all", return_value=job_types, create=True),
+            patch.object(registry.frappe, "get_module", self.get_module, create=True),
+            patch.object(registry.frappe, "db", MagicMock(transaction_writes=0), create=True),
+            patch.object(preload.frappe, "logger", create=True),
+            patch.dict(preload._preloaded_sites, clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestPreloadHandlers(_PreloadTestCase):
+    """Test which handlers are imported and how failures are reported."""
+
+    def test_imports_handlers_of_enabled_job_types(self):
+        report = self.preload.preload_handlers()
+
+        imported = {(row["job_type"], row["field"]) for row in report}
+        self.assertEqual(imported, {
+            ("echo", "handler_method"),
+            ("echo", "timeout_handler_method"),
+            ("broken", "handler_method"),
+        })
+        for row in report:
+            self.assertGreaterEqual(row["seconds"], 0)
+
+    def test_failed_import_is_reported_not_raised(self):
+        report = self.preload.preload_handlers()
+
+        errors = {row["job_type"]: row["error"] for row in report}
+        self.assertIn("ImportError", errors["broken"])
+        self.assertIsNone(errors["echo"])
+
+    def test_handlers_stay_resolved_for_jobs(self):
+        from dartwing.dartwing_core.background_jobs import registry
+
+        self.preload.preload_handlers()
+        calls = self.get_module.call_count
+        registry.get_handler("echo")
+
+        self.assertEqual(self.get_module.call_count, calls)
+
+
+
+class TestRefreshBeforeFork(_PreloadTestCase):
+    """Test that the worker parent picks up Job Type changes between jobs."""
+
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            patch.object(self.preload.frappe, "init", create=True),
+            patch.object(self.preload.frappe, "connect", create=True),
+            patch.object(self.preload.frappe, "destroy", create=True),
+            patch.object(self.preload.gc, "freeze"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.preload.preload_handlers()
+        self.preload._preloaded_sites["test.local"] -= 60
+
+    def test_reloads_when_job_types_changed(self):
+        from dartwing.dartwing_core.background_jobs import registry
+
+        self.cache.get.return_value = b"2"
+
+        self.assertTrue(self.preload.refresh_site("test.local"))
+        self.assertEqual(registry._registries["test.local"].version, b"2")
+        self.assertIn(("echo", "handler_method"), registry._registries["test.local"].handlers)
+
+    def test_unchanged_job_types_are_kept(self):
+        self.assertFalse(self.preload.refresh_site("test.local"))
+        self.preload.frappe.connect.assert_not_called()
+
+    def test_checks_at_most_once_per_interval(self):
+        self.cache.get.return_value = b"2"
+        self.preload.refresh_site("test.local")
+        self.cache.get.return_value = b"3"
+
+        self.assertFalse(self.preload.refresh_site("test.local"))
+
+    def test_sites_never_preloaded_are_skipped(self):
+        self.assertFalse(self.preload.refresh_site("other.local"))
+        self.preload.frappe.init.assert_not_called()
+
+    def test_fork_hook_refreshes_the_jobs_site(self):
+        fork_work_horse = MagicMock()
+        worker_class = type("Worker", (), {"fork_work_horse": fork_work_horse})
+        self.preload.install_fork_hook(worker_class, ["test.local"])
+
+        job = MagicMock(kwargs={"site": "test.local"})
+        with patch.object(self.preload, "refresh_site") as refresh_site:
+            worker_class().fork_work_horse(job, "queue")
+
+        refresh_site.assert_called_once_with("test.local")
+        fork_work_horse.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+"""
+Unit tests for process-isolated job execution.
+
+The child process is replaced by the other end of a real pipe, so the
+parent's relay, timeout and memory handling run unchanged.
+"""
+
+import multiprocessing
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class _FakeWorker:
+    def __init__(self, rss=0):
+        self.conn, self.child = multiprocessing.Pipe()
+        self.process = MagicMock(exitcode=-9)
+        self.process.is_alive.return_value = True
+        self.site = "test.local"
+        self.jobs = 0
+        self.ready = True
+        self.rss = MagicMock(return_value=rss)
+        self.kill = MagicMock()
+
+
+def _context(timeout_seconds=5):
+    context = MagicMock()
+    context.job_id = "JOB-1"
+    context.job_type = "heavy"
+    context.organization = "ORG-1"
+    context.parameters = {"n": 1}
+    context.timeout_seconds = timeout_seconds
+    return context
+
+
+class TestProcessExecute(unittest.TestCase):
+    """Test the parent side of a process-mode job."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import process_pool
+
+        self.process_pool = process_pool
+        for patcher in (
+            patch.object(process_pool.frappe, "session", frappe._dict(user="Administrator"), create=True),
+            patch.object(process_pool, "PROCESS_MEMORY_CHECK_SECONDS", 0.01),
+            patch.object(process_pool, "_checkin"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _execute(self, worker, context, **kwargs):
+        with patch.object(self.process_pool, "_checkout", return_value=worker):
+            return self.process_pool.execute(context, **kwargs)
+
+    def test_relays_progress_and_returns_result(self):
+        worker = _FakeWorker()
+        worker.child.send(("progress", 50, "Half way", False))
+        worker.child.send(("result", {"output_reference": "out"}))
+        context = _context()
+
+        result = self._execute(worker, context)
+
+        self.assertEqual(result, {"output_reference": "out"})
+        context.update_progress.assert_called_once_with(50, "Half way", False)
+        self.assertEqual(worker.child.recv()["job_id"], "JOB-1")
+        self.process_pool._checkin.assert_called_once_with(worker)
+        worker.kill.assert_not_called()
+
+    def test_timeout_starts_once_new_process_is_ready(self):
+        worker = _FakeWorker()
+        worker.ready = False
+
+        def start_slowly():
+            # Starting takes longer than the job's whole timeout
+            time.sleep(0.3)
+            worker.child.send(("ready",))
+            worker.child.send(("result", "done"))
+
+        threading.Thread(target=start_slowly).start()
+        self.assertEqual(self._execute(worker, _context(timeout_seconds=0.2)), "done")
+        self.assertTrue(worker.ready)
+
+    def test_process_that_does_not_start_is_transient_failure(self):
+        from dartwing.dartwing_core.background_jobs.errors import TransientError
+
+        worker = _FakeWorker()
+        worker.ready = False
+
+        with patch.object(self.process_pool, "PROCESS_START_TIMEOUT_SECONDS", 0.05), \
+                self.assertRaises(TransientError):
+            self._execute(worker, _context())
+
+        worker.kill.assert_called_once()
+
+    def test_handler_error_keeps_process(self):
+        from dartwing.dartwing_core.background_jobs.errors import PermanentError
+
+        worker = _FakeWorker()
+        worker.child.send(("error", PermanentError("bad input")))
+
+        with self.assertRaises(PermanentError):
+            self._execute(worker, _context())
+
+        self.process_pool._checkin.assert_called_once_with(worker)
+
+    def test_kills_process_at_timeout(self):
+        from dartwing.dartwing_core.background_jobs.executor import JobTimeoutError
+
+        worker = _FakeWorker()
+
+        with self.assertRaises(JobTimeoutError):
+            self._execute(worker, _context(timeout_seconds=0.05))
+
+        worker.kill.assert_called_once()
+        self.process_pool._checkin.assert_not_called()
+
+    def test_kills_process_over_memory_limit(self):
+        from dartwing.dartwing_core.background_jobs.errors import JobMemoryLimitError
+
+        worker = _FakeWorker(rss=300 * 1024 * 1024)
+
+        with self.assertRaises(JobMemoryLimitError):
+            self._execute(worker, _context(), max_memory_mb=256)
+
+        worker.kill.assert_called_once()
+
+    def test_kills_process_when_canceled(self):
+        from dartwing.dartwing_core.background_jobs.errors import JobCanceledError
+
+        worker = _FakeWorker()
+        worker.child.send(("progress", 10, None, False))
+        context = _context()
+        context.update_progress.side_effect = JobCanceledError("Job was canceled")
+
+        with self.assertRaises(JobCanceledError):
+            self._execute(worker, context)
+
+        worker.kill.assert_called_once()
+
+    def test_dead_process_is_transient_failure(self):
+        from dartwing.dartwing_core.background_jobs.errors import TransientError
+
+        worker = _FakeWorker()
+        worker.child.close()
+
+        with self.assertRaises(TransientError):
+            self._execute(worker, _context())
+
+        worker.kill.assert_called_once()
+
+
+class TestProcessJobWorker(unittest.TestCase):
+    """Test the long-lived worker that keeps handler processes between jobs."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import process_pool
+
+        self.process_pool = process_pool
+        for patcher in (
+            patch.object(process_pool, "_idle", {}),
+            patch.object(process_pool, "_max_idle", process_pool.PROCESS_POOL_MAX_IDLE),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_keeps_an_idle_child_per_concurrent_job(self):
+        worker = self.process_pool.ProcessJobWorker(["test.local"], concurrency=6)
+        children = [_FakeWorker() for _i in range(7)]
+
+        for child in children:
+            self.process_pool._checkin(child)
+
+        self.assertEqual(worker.channel, "process")
+        self.assertEqual(self.process_pool._idle["test.local"], children[:6])
+        children[6].kill.assert_called_once()
+
+    def test_child_replaced_after_max_jobs(self):
+        child = _FakeWorker()
+        child.jobs = self.process_pool.PROCESS_MAX_JOBS_PER_CHILD
+
+        self.process_pool._checkin(child)
+
+        child.kill.assert_called_once()
+        self.assertEqual(self.process_pool._idle, {})
+
+
+class TestPortableError(unittest.TestCase):
+    """Test errors sent back from the child process."""
+
+    def test_picklable_error_is_kept(self):
+        from dartwing.dartwing_core.background_jobs.process_pool import _portable_error
+
+        error = ValueError("bad")
+        self.assertIs(_portable_error(error), error)
+
+    def test_unpicklable_error_keeps_classification(self):
+        from dartwing.dartwing_core.background_jobs.errors import PermanentError
+        from dartwing.dartwing_core.background_jobs.process_pool import _portable_error
+
+        class ValidationError(Exception):
+            pass
+
+        error = _portable_error(ValidationError("missing field"))
+
+        self.assertIsInstance(error, PermanentError)
+        self.assertIn("missing field", str(error))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Unit tests for write-coalesced job progress.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+class TestProgressBuffer(unittest.TestCase):
+    """Test that progress goes to the Redis snapshot per call and to the database per interval."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import progress
+        from dartwing.dartwing_core.background_jobs.progress import JobContext
+
+        self.progress = progress
+        self.db = MagicMock()
+        self.cache = MagicMock()
+        self.cache.make_key.side_effect = lambda key: key
+
+        for patcher in (
+            patch.object(progress.frappe, "db", self.db, create=True),
+            patch.object(progress.frappe, "cache", return_value=self.cache),
+            patch.object(progress, "publish_job_progress"),
+            patch("dartwing.dartwing_core.background_jobs.cancellation.is_signaled", return_value=False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.context = JobContext(job_id="JOB-2026-00001", job_type="import_rows", organization="ORG-001")
+
+    def test_per_record_updates_coalesce_into_one_write(self):
+        for i in range(1000):
+            self.context.update_progress(i // 10, f"Row {i}")
+
+        self.db.set_value.assert_not_called()
+        self.assertEqual(self.cache.register_script.return_value.call_count, 1000)
+
+        self.context.flush_progress()
+        self.db.set_value.assert_called_once_with(
+            "Background Job",
+            "JOB-2026-00001",
+            {"progress": 99, "progress_message": "Row 999"},
+            update_modified=False,
+        )
+
+    def test_flushes_once_interval_has_passed(self):
+        self.context._last_flush -= self.context._flush_interval
+
+        self.context.update_progress(10, "Started")
+        self.context.update_progress(11, "Still going")
+
+        self.db.set_value.assert_called_once()
+
+    def test_flush_without_changes_skips_database(self):
+        self.context.flush_progress()
+
+        self.db.set_value.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Unit tests for the Redis sliding-window rate limiter.
+"""
+
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+class TestRateLimitStatus(unittest.TestCase):
+    """Test quota reporting returned to API clients."""
+
+    def test_remaining_never_negative(self):
+        from dartwing.dartwing_core.background_jobs.rate_limiter import RateLimitStatus
+
+        status = RateLimitStatus(allowed=False, limit=5, used=7, window_seconds=60, reset_at=time.time())
+        self.assertEqual(status.remaining, 0)
+
+    def test_retry_after_rounds_up(self):
+        from dartwing.dartwing_core.background_jobs.rate_limiter import RateLimitStatus
+
+        status = RateLimitStatus(allowed=False, limit=5, used=5, window_seconds=60, reset_at=time.time() + 10.2)
+        self.assertEqual(status.retry_after, 11)
+
+    def test_as_dict_fields(self):
+        from dartwing.dartwing_core.background_jobs.rate_limiter import RateLimitStatus
+
+        status = RateLimitStatus(allowed=True, limit=10, used=3, window_seconds=60, reset_at=time.time() + 60)
+        self.assertEqual(
+            set(status.as_dict()),
+            {"limit", "remaining", "window_seconds", "reset_at", "retry_after"},
+        )
+        self.assertEqual(status.as_dict()["remaining"], 7)
+
+
+class TestAcquire(unittest.TestCase):
+    """Test acquire() wiring to the Lua script."""
+
+    def _mock_cache(self, script_result):
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: f"site|{key}"
+        cache.register_script.return_value = MagicMock(return_value=script_result)
+        return cache
+
+    def test_acquire_passes_key_and_limit(self):
+        from dartwing.dartwing_core.background_jobs import rate_limiter
+
+        now_ms = int(time.time() * 1000)
+        cache = self._mock_cache([1, 3, now_ms])
+        with patch.object(rate_limiter.frappe, "cache", return_value=cache):
+            status = rate_limiter.acquire("pdf_generation", "ORG-001", "a@example.com", limit=10, window_seconds=60, count=2)
+
+        script = cache.register_script.return_value
+        kwargs = script.call_args.kwargs
+        self.assertEqual(
+            kwargs["keys"],
+            ["site|dartwing_core:background_job:rate_limit:pdf_generation:ORG-001:a@example.com"],
+        )
+        self.assertEqual(kwargs["args"][1:4], [60000, 10, 2])
+        self.assertTrue(status.allowed)
+        self.assertEqual(status.remaining, 7)
+        self.assertAlmostEqual(status.reset_at, now_ms / 1000 + 60, places=2)
+
+    def test_acquire_rejected(self):
+        from dartwing.dartwing_core.background_jobs import rate_limiter
+
+        cache = self._mock_cache([0, 10, int(time.time() * 1000)])
+        with patch.object(rate_limiter.frappe, "cache", return_value=cache):
+            status = rate_limiter.acquire("pdf_generation", "ORG-001", "a@example.com", limit=10, window_seconds=60)
+
+        self.assertFalse(status.allowed)
+        self.assertEqual(status.remaining, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Unit tests for the in-process Job Type registry.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+def _job_type(name, **fields):
+    row = {
+        "name": name,
+        "is_enabled": 1,
+        "handler_method": "dartwing.dartwing_core.background_jobs.samples.execute_echo_job",
+        "timeout_handler_method": None,
+    }
+    row.update(fields)
+    return frappe._dict(row)
+
+
+class TestJobTypeRegistry(unittest.TestCase):
+    """Test loading, handler resolution and invalidation."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import registry
+
+        self.registry = registry
+        self.cache = MagicMock()
+        self.cache.get.return_value = b"3"
+        self.cache.get_value.return_value = None
+        self.get_all = MagicMock(return_value=[_job_type("echo"), _job_type("off", is_enabled=0)])
+        self.db = MagicMock(transaction_writes=0)
+
+        for patcher in (
+            patch.dict(registry._registries, clear=True),
+            patch.object(registry.frappe, "local", frappe._dict(site="test.local")),
+            patch.object(registry.frappe, "cache", return_value=self.cache),
+            patch.object(registry.frappe, "get_all", self.get_all, create=True),
+            patch.object(registry.frappe, "get_module", create=True),
+            patch.object(registry.frappe, "db", self.db, create=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_job_types_loaded_once(self):
+        for _i in range(10):
+            self.assertEqual(self.registry.get_job_type("echo").name, "echo")
+        self.assertIsNone(self.registry.find_job_type("missing"))
+
+        self.get_all.assert_called_once()
+
+    def test_cold_process_reads_configs_from_cache(self):
+        self.cache.get_value.return_value = [_job_type("echo")]
+
+        self.assertEqual(self.registry.get_job_type("echo").name, "echo")
+
+        self.cache.get_value.assert_called_once_with("dartwing_core:background_job:job_type_registry:configs:3")
+        self.get_all.assert_not_called()
+
+    def test_loaded_configs_shared_under_version(self):
+        self.registry.get_job_type("echo")
+
+        key, rows = self.cache.set_value.call_args.args
+        self.assertEqual(key, "dartwing_core:background_job:job_type_registry:configs:3")
+        self.assertEqual([row.name for row in rows], ["echo", "off"])
+
+    def test_rows_read_in_a_snapshot_taken_after_the_version(self):
+        calls = MagicMock()
+        calls.attach_mock(self.cache.get, "version")
+        calls.attach_mock(self.db.commit, "commit")
+        calls.attach_mock(self.get_all, "get_all")
+        calls.attach_mock(self.cache.set_value, "set_value")
+
+        self.registry.get_job_type("echo")
+
+        # A snapshot older than the version could hold rows from before the
+        # change that bumped it
+        self.assertEqual(
+            [name for name, _args, _kwargs in calls.mock_calls],
+            ["version", "commit", "get_all", "set_value"],
+        )
+
+    def test_rows_read_with_pending_writes_are_not_shared(self):
+        self.db.transaction_writes = 1
+
+        self.registry.get_job_type("echo")
+
+        self.db.commit.assert_not_called()
+        self.cache.set_value.assert_not_called()
+        self.assertFalse(self.registry.is_current())
+
+        # Reloaded at the next check, in a fresh snapshot
+        self.db.transaction_writes = 0
+        self.registry._registries["test.local"].checked_at -= 60
+        self.registry.get_job_type("echo")
+
+        self.assertEqual(self.get_all.call_count, 2)
+        self.cache.set_value.assert_called_once()
+        self.assertTrue(self.registry.is_current())
+
+    def test_unknown_job_type_raises(self):
+        with self.assertRaises(frappe.DoesNotExistError):
+            self.registry.get_job_type("missing")
+
+    def test_handler_resolved_once(self):
+        first = self.registry.get_handler("echo")
+        second = self.registry.get_handler("echo")
+
+        self.assertIs(first, second)
+        self.registry.frappe.get_module.assert_called_once_with(
+            "dartwing.dartwing_core.background_jobs.samples"
+        )
+
+    def test_disabled_job_type_has_no_handler(self):
+        with self.assertRaises(frappe.ValidationError):
+            self.registry.get_handler("off")
+
+    def test_missing_timeout_handler(self):
+        self.assertIsNone(self.registry.get_timeout_handler("echo"))
+
+    def test_reloads_when_remote_version_changes(self):
+        self.registry.get_job_type("echo")
+        self.registry._registries["test.local"].checked_at -= 60
+
+        self.cache.get.return_value = b"4"
+        self.registry.get_job_type("echo")
+
+        self.assertEqual(self.get_all.call_count, 2)
+
+    def test_keeps_registry_while_version_unchanged(self):
+        self.registry.get_job_type("echo")
+        self.registry._registries["test.local"].checked_at -= 60
+
+        self.registry.get_job_type("echo")
+
+        self.get_all.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
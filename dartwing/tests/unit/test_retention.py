@@ -0,0 +1,214 @@
+"""
+Unit tests for the chunked retention engine.
+"""
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class FakeRetentionDB:
+    """Answers the retention engine's SELECTs from in-memory tables."""
+
+    def __init__(self, jobs, metrics=0, rollups=0):
+        self.jobs = jobs
+        self.tables = {
+            "Background Job Metrics": [f"M{i:04d}" for i in range(metrics)],
+            "Background Job Metrics Rollup": [f"R{i:04d}" for i in range(rollups)],
+        }
+        self.statements = []
+        self.row_count = 0
+        self.commit = MagicMock()
+        self.before_lock = None
+
+    def sql(self, query, values=None, as_dict=False, pluck=False):
+        query = " ".join(query.split())
+        self.statements.append((query, dict(values or {})))
+        if query == "SELECT ROW_COUNT()":
+            return [[self.row_count]]
+        if query.startswith("SELECT name, modified"):
+            matches = sorted(
+                (
+                    job for job in self.jobs
+                    if job.status == values["status"]
+                    and job.modified < values["cutoff"]
+                    and ("after" not in query or (job.modified, job.name) > (values["after"], values["after_name"]))
+                    and (values.get("job_type") is None or job.job_type == values["job_type"])
+                    and job.job_type not in values.get("exclude", ())
+                ),
+                key=lambda job: (job.modified, job.name),
+            )
+            return matches[:values["limit"]]
+        if query.startswith("SELECT name, organization"):
+            if self.before_lock:
+                self.before_lock()
+            return [
+                job for job in self.jobs
+                if job.name in values["names"]
+                and job.status in values["statuses"]
+                and job.modified < values["cutoff"]
+            ]
+        if query.startswith("SELECT name FROM"):
+            doctype = query.split("`")[1][3:]
+            return self.tables[doctype][:values["limit"]]
+        if query.startswith("DELETE FROM `tabBackground Job` "):
+            deleted = [job for job in self.jobs if job.name in values["names"]]
+            self.jobs = [job for job in self.jobs if job not in deleted]
+            self.row_count = len(deleted)
+        elif query.startswith("DELETE FROM"):
+            doctype = query.split("`")[1][3:]
+            if doctype in self.tables:
+                self.tables[doctype] = [n for n in self.tables[doctype] if n not in values["names"]]
+            self.row_count = len(values["names"])
+
+
+def _job(name, job_type="report", modified=None, status="Completed"):
+    return frappe._dict(
+        name=name, organization="ORG-1", job_type=job_type, priority="Normal", status=status,
+        modified=modified or datetime(2020, 1, 1),
+    )
+
+
+class TestRunRetention(unittest.TestCase):
+    """Test chunking, per-Job-Type policies and the time budget."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import cleanup
+
+        self.cleanup = cleanup
+        self.job_types = []
+        self.archive_enabled = False
+        self.record_transition = MagicMock()
+        self.delete_artifacts = MagicMock()
+        for patcher in (
+            patch("dartwing.dartwing_core.background_jobs.registry.get_job_types", lambda: self.job_types),
+            patch("dartwing.dartwing_core.background_jobs.status_rollup.record_transition", self.record_transition),
+            patch("dartwing.dartwing_core.background_jobs.artifacts.delete_artifacts", self.delete_artifacts),
+            patch("dartwing.dartwing_core.background_jobs.status_snapshot.delete", MagicMock()),
+            patch("dartwing.dartwing_core.background_jobs.archive.is_enabled", lambda: self.archive_enabled),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _run(self, db, **kwargs):
+        with patch.object(self.cleanup.frappe, "db", db, create=True):
+            return self.cleanup.run_retention(**kwargs)
+
+    def test_jobs_deleted_in_modified_order_chunks(self):
+        db = FakeRetentionDB(
+            [_job(f"JOB-{i:03d}", modified=datetime(2020, 1, 1 + i // 2)) for i in range(5)],
+            metrics=3,
+            rollups=1,
+        )
+
+        report = self._run(db, chunk_size=2)
+
+        self.assertTrue(report["caught_up"])
+        self.assertEqual(report["Background Job"], 5)
+        self.assertEqual(report["Background Job Metrics"], 3)
+        self.assertEqual(report["Background Job Metrics Rollup"], 1)
+        self.assertEqual(db.jobs, [])
+
+        # Each chunk of a status continues after the (modified, name) of the
+        # last job of the previous one, without taking locks
+        selects = [(query, values) for query, values in db.statements if query.startswith("SELECT name, modified")]
+        self.assertEqual(
+            [
+                (values["status"], *((values["after"], values["after_name"]) if "%(after)s" in query else (None, None)))
+                for query, values in selects
+            ],
+            [
+                ("Completed", None, None),
+                ("Completed", datetime(2020, 1, 1), "JOB-001"),
+                ("Completed", datetime(2020, 1, 2), "JOB-003"),
+                ("Dead Letter", None, None),
+                ("Canceled", None, None),
+            ],
+        )
+        self.assertNotIn("FOR UPDATE", selects[0][0])
+        self.assertIn("ORDER BY modified, name", selects[0][0])
+
+        # One transaction per chunk: 3 job chunks, 2 metrics chunks, 1 rollup chunk
+        self.assertEqual(db.commit.call_count, 6)
+        self.assertEqual(self.delete_artifacts.call_count, 5)
+
+    def test_logs_and_dependencies_deleted_with_their_jobs(self):
+        db = FakeRetentionDB([_job("JOB-001")])
+
+        report = self._run(db)
+
+        deletes = [query for query, _values in db.statements if query.startswith("DELETE")]
+        self.assertTrue(deletes[0].startswith("DELETE FROM `tabJob Execution Log`"))
+        self.assertTrue(deletes[1].startswith("DELETE FROM `tabBackground Job Dependency`"))
+        self.assertIn("depends_on IN", deletes[1])
+        self.assertEqual(report["Job Execution Log"], 1)
+        self.record_transition.assert_called_once_with(
+            "ORG-1", "report", "Normal", "Completed", None, count=1
+        )
+
+    def test_jobs_archived_before_they_are_deleted(self):
+        self.archive_enabled = True
+        db = FakeRetentionDB([_job(f"JOB-{i:03d}") for i in range(3)])
+
+        def archive_jobs(names):
+            self.assertEqual([job.name for job in db.jobs][:len(names)], names)
+            return len(names)
+
+        with patch("dartwing.dartwing_core.background_jobs.archive.archive_jobs", side_effect=archive_jobs) as archived:
+            report = self._run(db, chunk_size=2)
+
+        self.assertEqual(archived.call_count, 2)
+        self.assertEqual(report["archived"], 3)
+        self.assertEqual(report["Background Job"], 3)
+
+    def test_jobs_changed_after_the_chunk_was_read_are_kept(self):
+        self.archive_enabled = True
+        db = FakeRetentionDB([_job("JOB-001", status="Dead Letter"), _job("JOB-002", status="Dead Letter")])
+
+        def retry():
+            # An admin retries JOB-001 after the chunk was read
+            db.jobs[0].status = "Queued"
+
+        db.before_lock = retry
+        with patch(
+            "dartwing.dartwing_core.background_jobs.archive.archive_jobs", side_effect=len
+        ) as archived:
+            report = self._run(db)
+
+        self.assertEqual([job.name for job in db.jobs], ["JOB-001"])
+        archived.assert_called_once_with(["JOB-002"])
+        self.assertEqual(report["archived"], 1)
+        self.assertEqual(report["Background Job"], 1)
+        deletes = [values for query, values in db.statements if query.startswith("DELETE FROM `tabJob Execution Log`")]
+        self.assertEqual(deletes[0]["names"], ("JOB-002",))
+        self.delete_artifacts.assert_called_once_with("JOB-002")
+        self.record_transition.assert_called_once_with(
+            "ORG-1", "report", "Normal", "Dead Letter", None, count=1
+        )
+
+    def test_job_type_retention_overrides_default(self):
+        self.job_types = [frappe._dict(name="audit", retention_days=365), frappe._dict(name="report")]
+        db = FakeRetentionDB([_job("JOB-001", "audit"), _job("JOB-002")])
+
+        self._run(db)
+
+        selects = [values for query, values in db.statements if query.startswith("SELECT name, modified")]
+        self.assertEqual(selects[0]["job_type"], "audit")
+        self.assertEqual(selects[-1]["exclude"], ("audit",))
+        self.assertLess(selects[0]["cutoff"], selects[-1]["cutoff"])
+
+    def test_stops_when_time_budget_is_used_up(self):
+        db = FakeRetentionDB([_job(f"JOB-{i:03d}") for i in range(5)], metrics=3)
+
+        with patch.object(self.cleanup.time, "monotonic", side_effect=[0, 0, 0, 11]):
+            report = self._run(db, chunk_size=2, time_budget_seconds=10)
+
+        self.assertFalse(report["caught_up"])
+        self.assertEqual(report["Background Job"], 4)
+        self.assertEqual(report["Background Job Metrics"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Unit tests for the mergeable latency sketch.
+"""
+
+import random
+import unittest
+
+
+class TestLatencySketch(unittest.TestCase):
+    """Test accuracy, merging and size bounds of LatencySketch."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import sketch
+        from dartwing.dartwing_core.background_jobs.config import METRICS_SKETCH_RELATIVE_ACCURACY
+
+        self.sketch = sketch
+        self.accuracy = METRICS_SKETCH_RELATIVE_ACCURACY
+        self.rng = random.Random(42)
+
+    def _exact(self, values, q):
+        values = sorted(values)
+        return values[int((len(values) - 1) * q)]
+
+    def test_quantiles_within_relative_accuracy(self):
+        values = [self.rng.lognormvariate(0, 2) + 0.01 for _i in range(20000)]
+        durations = self.sketch.LatencySketch()
+        for value in values:
+            durations.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = self._exact(values, q)
+            self.assertLessEqual(abs(durations.quantile(q) - exact), exact * self.accuracy)
+
+    def test_merged_sketch_equals_sketch_of_all_values(self):
+        values = [self.rng.expovariate(0.1) for _i in range(3000)]
+        whole = self.sketch.LatencySketch()
+        for value in values:
+            whole.add(value)
+
+        parts = []
+        for start in range(0, len(values), 1000):
+            part = self.sketch.LatencySketch()
+            for value in values[start:start + 1000]:
+                part.add(value)
+            parts.append(part.to_json())
+        merged = self.sketch.merge_all(parts + [None])
+
+        self.assertEqual(merged.bins, whole.bins)
+        self.assertEqual(merged.count, 3000)
+
+    def test_size_bounded_by_value_range(self):
+        durations = self.sketch.LatencySketch()
+        for _i in range(50000):
+            durations.add(self.rng.uniform(0.5, 2.0))
+
+        # (0.5, 2.0] spans log(4) / log(gamma) bins
+        self.assertLessEqual(len(durations.bins), 71)
+
+    def test_tiny_and_empty(self):
+        durations = self.sketch.LatencySketch()
+        self.assertEqual(durations.quantile(0.5), 0)
+
+        durations.add(0)
+        self.assertAlmostEqual(durations.quantile(0.5), 0.001, delta=0.001 * self.accuracy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for long-poll job waiting.
+"""
+
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+ENGINE = "dartwing.dartwing_core.background_jobs.engine"
+SNAPSHOT = "dartwing.dartwing_core.background_jobs.status_snapshot"
+
+
+class TestStatusListener(unittest.TestCase):
+    """Test event fan-out to local waiters."""
+
+    def test_notify_wakes_waiters_of_channel_only(self):
+        from dartwing.dartwing_core.background_jobs.status_events import _StatusListener
+
+        listener = _StatusListener(MagicMock())
+        listener._thread = MagicMock()
+        listener._thread.is_alive.return_value = True
+
+        first = listener.add("status:changed:JOB-1")
+        second = listener.add("status:changed:JOB-1")
+        other = listener.add("status:changed:JOB-2")
+        listener._notify("status:changed:JOB-1")
+
+        self.assertTrue(first.is_set())
+        self.assertTrue(second.is_set())
+        self.assertFalse(other.is_set())
+
+    def test_subscriptions_follow_waiters(self):
+        from dartwing.dartwing_core.background_jobs.status_events import _StatusListener
+
+        pubsub = MagicMock()
+        listener = _StatusListener(pubsub)
+        listener._thread = MagicMock()
+        listener._thread.is_alive.return_value = True
+
+        event = listener.add("status:changed:JOB-1")
+        listener._sync_subscriptions()
+        pubsub.subscribe.assert_called_once_with("status:changed:JOB-1")
+
+        listener.remove("status:changed:JOB-1", event)
+        listener._sync_subscriptions()
+        pubsub.unsubscribe.assert_called_once_with("status:changed:JOB-1")
+
+
+class TestWaitForJob(unittest.TestCase):
+    """Test when wait_for_job returns."""
+
+    def setUp(self):
+        patcher = patch(
+            "dartwing.dartwing_core.background_jobs.status_events.is_long_poll_enabled", return_value=True
+        )
+        self.long_poll_enabled = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_immediately_when_long_poll_disabled(self):
+        from dartwing.dartwing_core.background_jobs import status_events
+
+        self.long_poll_enabled.return_value = False
+        status = {"job_id": "JOB-1", "status": "Running", "version": 7}
+        with patch(f"{ENGINE}.get_job_status", return_value=status), \
+                patch.object(status_events, "_get_listener") as get_listener:
+            result = status_events.wait_for_job("JOB-1", since_version=7, timeout=10)
+
+        self.assertFalse(result["changed"])
+        self.assertFalse(result["long_poll"])
+        self.assertEqual(result["version"], 7)
+        get_listener.assert_not_called()
+
+    def test_returns_immediately_when_version_moved(self):
+        from dartwing.dartwing_core.background_jobs import status_events
+
+        status = {"job_id": "JOB-1", "status": "Running", "version": 8}
+        with patch(f"{ENGINE}.get_job_status", return_value=status), \
+                patch.object(status_events, "_get_listener") as get_listener:
+            result = status_events.wait_for_job("JOB-1", since_version=7, timeout=10)
+
+        self.assertTrue(result["changed"])
+        get_listener.assert_not_called()
+
+    def test_returns_immediately_for_finished_job(self):
+        from dartwing.dartwing_core.background_jobs import status_events
+
+        status = {"job_id": "JOB-1", "status": "Completed", "version": 7}
+        with patch(f"{ENGINE}.get_job_status", return_value=status), \
+                patch.object(status_events, "_get_listener") as get_listener:
+            result = status_events.wait_for_job("JOB-1", since_version=7, timeout=10)
+
+        self.assertFalse(result["changed"])
+        get_listener.assert_not_called()
+
+    def test_wakes_on_change_event(self):
+        from dartwing.dartwing_core.background_jobs import status_events
+
+        event = threading.Event()
+        event.set()
+        listener = MagicMock()
+        listener.add.return_value = event
+        statuses = [
+            {"job_id": "JOB-1", "status": "Running", "version": 7},
+            {"job_id": "JOB-1", "status": "Completed", "version": 9},
+        ]
+        with patch(f"{ENGINE}.get_job_status", side_effect=statuses), \
+                patch(f"{SNAPSHOT}.get", return_value={"version": 9}), \
+                patch(f"{SNAPSHOT}.get_channel", return_value=b"site|status:changed:JOB-1"), \
+                patch.object(status_events, "_get_listener", return_value=listener), \
+                patch.object(status_events, "_release_db_connection") as release_db:
+            result = status_events.wait_for_job("JOB-1", since_version=7, timeout=10)
+
+        self.assertTrue(result["changed"])
+        self.assertTrue(result["long_poll"])
+        self.assertEqual(result["version"], 9)
+        release_db.assert_called_once()
+        listener.remove.assert_called_once_with("site|status:changed:JOB-1", event)
+
+
+if __name__ == "__main__":
+    unittest.main()
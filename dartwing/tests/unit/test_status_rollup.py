@@ -0,0 +1,70 @@
+"""
+Unit tests for the job status rollups behind get_metrics.
+"""
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+class TestStatusRollup(unittest.TestCase):
+    """Test buffering and upserting of status transitions."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import status_rollup
+
+        self.status_rollup = status_rollup
+        self.db = MagicMock()
+        for patcher in (
+            patch.object(status_rollup.frappe, "local", frappe._dict()),
+            patch.object(status_rollup.frappe, "db", self.db, create=True),
+            patch.object(status_rollup.frappe, "session", frappe._dict(user="a@example.com"), create=True),
+            patch.object(status_rollup.frappe, "generate_hash", return_value="abc", create=True),
+            patch.object(status_rollup, "now_datetime", return_value=datetime(2026, 10, 17, 10, 0, 30)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _upserted_rows(self):
+        self.db.before_commit.add.call_args[0][0]()
+        rows = []
+        for call in self.db.sql.call_args_list:
+            values = call[0][1]
+            rows.extend(tuple(values[i + 6:i + 13]) for i in range(0, len(values), 13))
+        return rows
+
+    def test_transitions_net_out_within_a_transaction(self):
+        record = self.status_rollup.record_transition
+        record("ORG-1", "report", "Normal", None, "Pending")
+        record("ORG-1", "report", "Normal", "Pending", "Queued")
+        record("ORG-1", "report", "Normal", "Queued", "Running")
+        self.db.sql.assert_not_called()
+
+        rows = {row[4]: row[5:] for row in self._upserted_rows()}
+
+        # Pending and Queued were entered and left again: counted, no net change
+        self.assertEqual(rows["Pending"], (1, 0))
+        self.assertEqual(rows["Queued"], (1, 0))
+        self.assertEqual(rows["Running"], (1, 1))
+        self.assertIn("ON DUPLICATE KEY UPDATE", self.db.sql.call_args[0][0])
+
+    def test_deleted_job_leaves_its_status(self):
+        self.status_rollup.record_transition("ORG-1", "report", "Normal", "Completed", None, count=3)
+
+        (row,) = self._upserted_rows()
+        self.assertEqual(row[0], datetime(2026, 10, 17, 10, 0))
+        self.assertEqual(row[4:], ("Completed", 0, -3))
+
+    def test_rollback_discards_transitions(self):
+        self.status_rollup.record_transition("ORG-1", "report", "Normal", None, "Pending")
+
+        self.db.after_rollback.add.call_args[0][0]()
+        self.status_rollup.flush()
+
+        self.db.sql.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
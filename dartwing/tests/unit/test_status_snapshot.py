@@ -0,0 +1,146 @@
+"""
+Unit tests for Redis job status snapshots.
+"""
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+
+def _snapshot(**overrides):
+    snapshot = {
+        "job_id": "JOB-2026-00001",
+        "job_type": "sync_contacts",
+        "status": "Running",
+        "progress": 40,
+        "progress_message": "Syncing",
+        "organization": "ORG-001",
+        "owner_user": "poller@example.com",
+        "modified": "2026-01-01 10:00:00.000000",
+    }
+    snapshot.update(overrides)
+    return snapshot
+
+
+class TestStatusSnapshot(unittest.TestCase):
+    """Test snapshot reads and the Lua write wrapper."""
+
+    def test_get_decodes_hash(self):
+        from dartwing.dartwing_core.background_jobs import status_snapshot
+
+        cache = MagicMock()
+        cache.hgetall.return_value = {b"data": json.dumps(_snapshot()).encode(), b"version": b"17"}
+        with patch.object(status_snapshot.frappe, "cache", return_value=cache):
+            snapshot = status_snapshot.get("JOB-2026-00001")
+
+        self.assertEqual(snapshot["version"], 17)
+        self.assertEqual(snapshot["progress"], 40)
+
+    def test_get_without_snapshot(self):
+        from dartwing.dartwing_core.background_jobs import status_snapshot
+
+        cache = MagicMock()
+        cache.hgetall.return_value = {}
+        with patch.object(status_snapshot.frappe, "cache", return_value=cache):
+            self.assertIsNone(status_snapshot.get("JOB-2026-00001"))
+
+    def test_merge_progress_uses_merge_mode(self):
+        from dartwing.dartwing_core.background_jobs import status_snapshot
+
+        cache = MagicMock()
+        cache.make_key.side_effect = lambda key: key
+        cache.register_script.return_value = MagicMock(return_value=5)
+        with patch.object(status_snapshot.frappe, "cache", return_value=cache):
+            self.assertEqual(status_snapshot.merge_progress("JOB-2026-00001", 50, "Half"), 5)
+
+        call = cache.register_script.return_value.call_args.kwargs
+        self.assertEqual(call["keys"][0], "dartwing_core:background_job:status:JOB-2026-00001")
+        self.assertEqual(call["args"][0], "merge")
+        self.assertEqual(json.loads(call["args"][1]), {"progress": 50, "progress_message": "Half"})
+
+
+class TestGetJobStatusFromSnapshot(unittest.TestCase):
+    """Test that polls are answered from the snapshot without loading the job."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.background_jobs import engine
+
+        self.engine = engine
+        for patcher in (
+            patch.object(engine.frappe, "session", frappe._dict(user="poller@example.com")),
+            patch.object(engine, "_is_system_manager", return_value=False),
+            patch.object(engine.frappe, "get_doc", create=True),
+        ):
+            self.addCleanup(patcher.stop)
+            setattr(self, patcher.attribute, patcher.start())
+
+    def test_unchanged_version_is_not_modified(self):
+        snapshot = dict(_snapshot(), version=17)
+        with patch("dartwing.dartwing_core.background_jobs.status_snapshot.get", return_value=snapshot):
+            result = self.engine.get_job_status("JOB-2026-00001", if_version="17")
+
+        self.assertEqual(result, {"job_id": "JOB-2026-00001", "version": 17, "not_modified": True})
+        self.get_doc.assert_not_called()
+
+    def test_changed_version_returns_status(self):
+        snapshot = dict(_snapshot(), version=18)
+        with patch("dartwing.dartwing_core.background_jobs.status_snapshot.get", return_value=snapshot):
+            result = self.engine.get_job_status("JOB-2026-00001", if_version=17)
+
+        self.assertEqual(result["version"], 18)
+        self.assertEqual(result["progress"], 40)
+        self.assertNotIn("owner_user", result)
+        self.get_doc.assert_not_called()
+
+    def test_other_users_need_organization_access(self):
+        snapshot = dict(_snapshot(owner_user="someone@example.com"), version=18)
+        cache = MagicMock()
+        cache.get_value.return_value = None
+        with patch("dartwing.dartwing_core.background_jobs.status_snapshot.get", return_value=snapshot), \
+                patch.object(self.engine.frappe, "cache", return_value=cache), \
+                patch.object(self.engine, "_validate_organization_access") as validate:
+            self.engine.get_job_status("JOB-2026-00001")
+
+        validate.assert_called_once_with("ORG-001")
+        cache.set_value.assert_called_once()
+
+
+class TestGetJobStatusEndpoint(unittest.TestCase):
+    """Test the ETag round trip of the job status endpoint."""
+
+    def setUp(self):
+        from dartwing.dartwing_core.api import jobs
+        from dartwing.dartwing_core.background_jobs import engine
+
+        self.jobs = jobs
+        snapshot = dict(_snapshot(), version=18)
+        for patcher in (
+            patch.object(engine.frappe, "session", frappe._dict(user="poller@example.com")),
+            patch.object(engine, "_is_system_manager", return_value=False),
+            patch("dartwing.dartwing_core.background_jobs.status_snapshot.get", return_value=snapshot),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _get(self, headers):
+        with patch.object(self.jobs.frappe, "request", frappe._dict(headers=headers), create=True):
+            return self.jobs.get_job_status("JOB-2026-00001")
+
+    def test_etag_of_200_makes_next_poll_304(self):
+        response = self._get({})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"18"')
+        self.assertEqual(json.loads(response.get_data())["message"]["version"], 18)
+
+        response = self._get({"If-None-Match": response.headers["ETag"]})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], '"18"')
+        self.assertEqual(response.get_data(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()